@@ -0,0 +1,68 @@
+"""booking references, idempotency keys and outbox
+
+Schema added after the create_all() baseline: the block-allocated
+booking_reference_seq (PostgreSQL only), bookings.idempotency_key with
+its per-user unique constraint, and the outbox_events table drained by
+the outbox dispatcher.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-19 09:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Block-allocated booking references (see booking_reference_seq)
+        op.execute(sa.schema.CreateSequence(
+            sa.Sequence("booking_reference_seq", start=1, increment=64)
+        ))
+
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=100), nullable=True))
+        batch_op.create_unique_constraint('uq_bookings_user_idempotency_key', ['user_id', 'idempotency_key'])
+
+    op.create_table('outbox_events',
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('aggregate_id', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'DELIVERED', 'FAILED', name='outboxstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbox_events_id'), 'outbox_events', ['id'], unique=False)
+    op.create_index('ix_outbox_events_status_next_attempt_at', 'outbox_events', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_status_next_attempt_at', table_name='outbox_events')
+    op.drop_index(op.f('ix_outbox_events_id'), table_name='outbox_events')
+    op.drop_table('outbox_events')
+
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_constraint('uq_bookings_user_idempotency_key', type_='unique')
+        batch_op.drop_column('idempotency_key')
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(sa.schema.DropSequence(sa.Sequence("booking_reference_seq")))
+        sa.Enum(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
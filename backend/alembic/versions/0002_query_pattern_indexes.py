@@ -0,0 +1,71 @@
+"""query pattern indexes
+
+Composite, partial and covering indexes matched to the filters the routers
+actually run. On PostgreSQL they are built CONCURRENTLY so live tables stay
+writable during the migration.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-19 02:27:55.145207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, dialect options)
+INDEXES = [
+    # Active bargain session for a user; accepted bargain at booking time
+    ('ix_bargain_sessions_user_id_status', 'bargain_sessions', ['user_id', 'status'], {}),
+    # Expiry sweep: only active sessions ever expire
+    ('ix_bargain_sessions_active_expires_at', 'bargain_sessions', ['expires_at'], {
+        'postgresql_where': sa.text("status = 'ACTIVE'"),
+        'sqlite_where': sa.text("status = 'ACTIVE'"),
+    }),
+    # Duplicate offer check within a session
+    ('ix_bargain_attempts_session_id_offered_price', 'bargain_attempts', ['session_id', 'offered_price'], {}),
+    # My bookings, newest first
+    ('ix_bookings_user_id_created_at', 'bookings', ['user_id', 'created_at'], {}),
+    # Admin booking analytics by status and period
+    ('ix_bookings_status_created_at', 'bookings', ['status', 'created_at'], {
+        'postgresql_include': ['total_amount', 'booking_type'],
+    }),
+    # Revenue over completed payments
+    ('ix_payments_status_completed_at', 'payments', ['status', 'completed_at'], {
+        'postgresql_include': ['amount'],
+    }),
+    # A user's active sessions by last activity
+    ('ix_user_sessions_user_id_active_last_activity', 'user_sessions', ['user_id', 'last_activity'], {
+        'postgresql_where': sa.text('is_active = true'),
+        'sqlite_where': sa.text('is_active = 1'),
+    }),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns, options in INDEXES:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, **options)
+    else:
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, unique=False, **options)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,108 @@
+"""fee engine dimensions
+
+Adds region to vat_rates and region/country/payment_method to
+convenience_fees so the fee engine can key rows on them, and seeds both
+tables with the rates that were previously hardcoded in PricingService and
+the VAT router (only when a table is still empty).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 03:05:12.481903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (booking_type, region, vat_percentage)
+VAT_ROWS = [
+    ('flight', 'domestic', 5.0),
+    ('flight', 'international', 0.0),
+    ('hotel', 'domestic', 12.0),
+    ('hotel', 'international', 0.0),
+]
+
+# (booking_type, region, flat fee in INR)
+BASE_FEES = [
+    ('flight', 'domestic', 25.0),
+    ('flight', 'international', 50.0),
+    ('hotel', 'domestic', 35.0),
+    ('hotel', 'international', 65.0),
+    ('package', None, 75.0),
+]
+
+# Payment method discounts on the base fee
+PAYMENT_METHOD_FACTORS = [
+    ('net_banking', 0.8),
+    ('upi', 0.7),
+    ('wallet', 0.9),
+]
+
+
+def is_empty(table) -> bool:
+    # Offline (--sql) runs can't query, so they always emit the seed
+    if op.get_context().as_sql:
+        return True
+    return not op.get_bind().execute(sa.select(sa.func.count()).select_from(table)).scalar()
+
+
+def upgrade() -> None:
+    op.add_column('vat_rates', sa.Column('region', sa.String(length=20), nullable=True))
+    op.add_column('convenience_fees', sa.Column('region', sa.String(length=20), nullable=True))
+    op.add_column('convenience_fees', sa.Column('country', sa.String(length=100), nullable=True))
+    op.add_column('convenience_fees', sa.Column('payment_method', sa.String(length=50), nullable=True))
+
+    common = {'is_active': True, 'is_deleted': False}
+
+    vat_rates = sa.table(
+        'vat_rates',
+        sa.column('booking_type', sa.String), sa.column('region', sa.String),
+        sa.column('vat_percentage', sa.Float),
+        sa.column('is_active', sa.Boolean), sa.column('is_deleted', sa.Boolean),
+    )
+    if is_empty(vat_rates):
+        op.bulk_insert(vat_rates, [
+            {'booking_type': booking_type, 'region': region, 'vat_percentage': percentage, **common}
+            for booking_type, region, percentage in VAT_ROWS
+        ])
+
+    convenience_fees = sa.table(
+        'convenience_fees',
+        sa.column('booking_type', sa.String), sa.column('region', sa.String),
+        sa.column('payment_method', sa.String), sa.column('fee_type', sa.String),
+        sa.column('fee_amount', sa.Float), sa.column('currency', sa.String),
+        sa.column('is_active', sa.Boolean), sa.column('is_deleted', sa.Boolean),
+    )
+    if is_empty(convenience_fees):
+        rows = []
+        for booking_type, region, amount in BASE_FEES:
+            for payment_method, factor in [(None, 1.0)] + PAYMENT_METHOD_FACTORS:
+                rows.append({
+                    'booking_type': booking_type,
+                    'region': region,
+                    'payment_method': payment_method,
+                    'fee_type': 'flat',
+                    'fee_amount': round(amount * factor, 2),
+                    'currency': 'INR',
+                    **common,
+                })
+        op.bulk_insert(convenience_fees, rows)
+
+
+def downgrade() -> None:
+    # Seeded rows are left in place; only the new dimensions are removed
+    with op.batch_alter_table('convenience_fees') as batch_op:
+        batch_op.drop_column('payment_method')
+        batch_op.drop_column('country')
+        batch_op.drop_column('region')
+    with op.batch_alter_table('vat_rates') as batch_op:
+        batch_op.drop_column('region')
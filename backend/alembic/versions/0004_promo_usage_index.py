@@ -0,0 +1,38 @@
+"""promo usage index
+
+Per-user promo limit checks count promo_usage rows by (promo_code_id,
+user_id) on every validation and redemption. Built CONCURRENTLY on
+PostgreSQL like 0002.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 03:31:47.206118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index('ix_promo_usage_promo_code_id_user_id', 'promo_usage', ['promo_code_id', 'user_id'],
+                            unique=False, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_promo_usage_promo_code_id_user_id', 'promo_usage', ['promo_code_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_promo_usage_promo_code_id_user_id', table_name='promo_usage', postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_promo_usage_promo_code_id_user_id', table_name='promo_usage')
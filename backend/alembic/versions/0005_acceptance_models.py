@@ -0,0 +1,49 @@
+"""acceptance models
+
+Stores trained counter-offer acceptance models by version. The serving
+path reads the active row's exported coefficients; nothing is seeded, so
+counter offers stay on the strategy rules until a model is activated.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 05:12:38.904116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('acceptance_models',
+    sa.Column('version', sa.String(length=50), nullable=False),
+    sa.Column('model_type', sa.String(length=50), nullable=False),
+    sa.Column('features', sa.JSON(), nullable=False),
+    sa.Column('parameters', sa.JSON(), nullable=False),
+    sa.Column('metrics', sa.JSON(), nullable=True),
+    sa.Column('trained_at', sa.DateTime(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('activated_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_acceptance_models_id'), 'acceptance_models', ['id'], unique=False)
+    op.create_index(op.f('ix_acceptance_models_version'), 'acceptance_models', ['version'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_acceptance_models_version'), table_name='acceptance_models')
+    op.drop_index(op.f('ix_acceptance_models_id'), table_name='acceptance_models')
+    op.drop_table('acceptance_models')
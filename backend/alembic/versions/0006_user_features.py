@@ -0,0 +1,55 @@
+"""user features
+
+Per-user behavior aggregates for the feature store, one row per user,
+kept current by increments committed with each bargain and booking
+event. Existing history is not backfilled here: run
+POST /api/admin/feature-store/rebuild once after upgrading.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 05:58:21.377902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_features',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bargain_sessions', sa.Integer(), nullable=False),
+    sa.Column('bargain_offers', sa.Integer(), nullable=False),
+    sa.Column('bargains_accepted', sa.Integer(), nullable=False),
+    sa.Column('discount_sought_total', sa.Float(), nullable=False),
+    sa.Column('last_bargain_at', sa.DateTime(), nullable=True),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.Column('last_booking_at', sa.DateTime(), nullable=True),
+    sa.Column('activity_night', sa.Integer(), nullable=False),
+    sa.Column('activity_morning', sa.Integer(), nullable=False),
+    sa.Column('activity_afternoon', sa.Integer(), nullable=False),
+    sa.Column('activity_evening', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_features_id'), 'user_features', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_features_id'), table_name='user_features')
+    op.drop_table('user_features')
@@ -0,0 +1,49 @@
+"""top k snapshots
+
+Space-Saving summaries of top destinations and routes, one row per
+worker, stream and time bucket, written by app.services.heavy_hitters.
+Existing bookings are not backfilled here: run
+POST /api/admin/top-k/rebuild once after upgrading.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 06:31:21.861758
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('top_k_snapshots',
+    sa.Column('stream', sa.String(length=50), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('worker', sa.String(length=100), nullable=False),
+    sa.Column('entries', sa.JSON(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('worker', 'stream', 'granularity', 'bucket_start')
+    )
+    op.create_index(op.f('ix_top_k_snapshots_id'), 'top_k_snapshots', ['id'], unique=False)
+    op.create_index('ix_top_k_snapshots_stream_granularity_bucket_start', 'top_k_snapshots', ['stream', 'granularity', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_top_k_snapshots_stream_granularity_bucket_start', table_name='top_k_snapshots')
+    op.drop_index(op.f('ix_top_k_snapshots_id'), table_name='top_k_snapshots')
+    op.drop_table('top_k_snapshots')
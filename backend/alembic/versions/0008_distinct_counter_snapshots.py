@@ -0,0 +1,49 @@
+"""distinct counter snapshots
+
+HyperLogLog registers for active-user counts, one row per worker, metric
+and time bucket, written by app.services.active_users. Nothing to
+backfill: counts start from the first logins after upgrading, and
+?exact=true on the admin endpoints still counts session rows.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 07:12:48.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('distinct_counter_snapshots',
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('worker', sa.String(length=100), nullable=False),
+    sa.Column('precision', sa.Integer(), nullable=False),
+    sa.Column('registers', sa.LargeBinary(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('worker', 'metric', 'granularity', 'bucket_start')
+    )
+    op.create_index(op.f('ix_distinct_counter_snapshots_id'), 'distinct_counter_snapshots', ['id'], unique=False)
+    op.create_index('ix_distinct_counter_snapshots_metric_granularity_bucket_start', 'distinct_counter_snapshots', ['metric', 'granularity', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_distinct_counter_snapshots_metric_granularity_bucket_start', table_name='distinct_counter_snapshots')
+    op.drop_index(op.f('ix_distinct_counter_snapshots_id'), table_name='distinct_counter_snapshots')
+    op.drop_table('distinct_counter_snapshots')
@@ -0,0 +1,59 @@
+"""backfill counter offer attempts
+
+Counter offers made through /api/bargain/offer were written without
+their attempt_id (the attempt had not been flushed yet), so acceptance
+training and the strategy replay, which join counters to attempts, saw
+none of them. Links each unlinked counter to the user offer it answered:
+the session's USER_OFFER attempt with the same price, which the offer
+endpoint keeps unique per session. Downgrade leaves the links in place.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 11:02:17.730415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    counter_offers = sa.table(
+        'counter_offers',
+        sa.column('attempt_id', sa.Integer),
+        sa.column('session_id', sa.Integer),
+        sa.column('original_offer', sa.Float)
+    )
+    bargain_attempts = sa.table(
+        'bargain_attempts',
+        sa.column('id', sa.Integer),
+        sa.column('session_id', sa.Integer),
+        sa.column('attempt_type', sa.String),
+        sa.column('offered_price', sa.Float)
+    )
+    answered = (
+        sa.select(sa.func.max(bargain_attempts.c.id))
+        .where(
+            bargain_attempts.c.session_id == counter_offers.c.session_id,
+            bargain_attempts.c.attempt_type == 'USER_OFFER',
+            bargain_attempts.c.offered_price == counter_offers.c.original_offer
+        )
+        .scalar_subquery()
+    )
+    op.execute(
+        counter_offers.update()
+        .where(counter_offers.c.attempt_id.is_(None))
+        .values(attempt_id=answered)
+    )
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,177 @@
+"""
+Response compression for Faredown
+Negotiated brotli/zstd/gzip ASGI middleware with a minimum-size threshold
+"""
+
+from typing import Dict, List, Optional
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: br is simply not offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd is simply not offered
+    zstandard = None
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush so every chunk of a streamed body reaches the client right away
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order"""
+    return [name for name, module in (("br", brotli), ("zstd", zstandard), ("gzip", zlib)) if module is not None]
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header
+
+    Highest q-value wins; ties go to the earlier entry in offered. Codings
+    with q=0 are refused, and * covers anything not listed explicitly.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in offered:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+class CompressionMiddleware:
+    """
+    Compress compressible responses with the best coding the client accepts
+
+    Bodies sent in one piece are compressed only from minimum_size bytes
+    up; streamed bodies are compressed chunk by chunk as they are sent.
+    Responses that already have a Content-Encoding are left alone, and
+    compressed responses get a weak ETag since their bytes differ from the
+    identity representation.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings()
+        self.factories = {
+            "gzip": lambda: GzipEncoder(gzip_level),
+            "br": lambda: BrotliEncoder(brotli_quality),
+            "zstd": lambda: ZstdEncoder(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        responder = CompressionResponder(send, coding, self.factories.get(coding), self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class CompressionResponder:
+    """Per-response state: holds back the start message until the first body chunk decides"""
+
+    def __init__(self, send: Send, coding: Optional[str], factory, minimum_size: int):
+        self._send = send
+        self.coding = coding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+        if self.encoder is not None:
+            await self._send_compressed(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start["headers"])
+        compressible = self.start["status"] not in (204, 206, 304) and "content-encoding" not in headers and \
+            headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+
+        if not compressible or self.coding is None or (not more_body and len(body) < self.minimum_size):
+            self.passthrough = True
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        self.encoder = self.factory()
+        headers["Content-Encoding"] = self.coding
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if more_body:
+            del headers["Content-Length"]
+            await self._send(self.start)
+            await self._send_compressed(message)
+        else:
+            compressed = self.encoder.finish(body)
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _send_compressed(self, message: Message):
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        data = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -5,6 +5,7 @@ Environment variables and application configuration
 
 from pydantic_settings import BaseSettings
 from typing import List
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -48,8 +49,16 @@ class Settings(BaseSettings):
     
     # AI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
     AI_MODEL: str = "gpt-3.5-turbo"
     
+    # LLM gateway (app/services/llm_gateway.py)
+    LLM_TIMEOUT: float = 10.0  # seconds a caller waits before its fallback
+    LLM_MAX_CONCURRENCY: int = 8  # API calls in flight per worker
+    LLM_CACHE_SIZE: int = 2048  # completions kept in each worker's memory
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "")  # SQLite file shared by workers, e.g. /var/tmp/faredown/llm_cache.db; empty disables
+    LLM_CACHE_TTL: float = 7 * 24 * 3600.0  # seconds a cached completion is reused
+    
     # Email Configuration
     SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
@@ -66,10 +75,87 @@ class Settings(BaseSettings):
     MIN_MARKUP_PERCENTAGE: float = 5.0
     MAX_MARKUP_PERCENTAGE: float = 20.0
     
+    # Response Compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller one-piece bodies are sent uncompressed
+    
     # Currency Settings
     EXCHANGE_RATE_API_KEY: str = os.getenv("EXCHANGE_RATE_API_KEY", "")
     DEFAULT_CURRENCY: str = "INR"
     
+    # Fees & Taxes
+    HOME_COUNTRY: str = "IN"  # bookings entirely within it are domestic
+    FEE_TABLE_CHECK_INTERVAL: float = 30.0  # seconds between fee table change checks
+    
+    # Promo Engine
+    PROMO_INDEX_CHECK_INTERVAL: float = 30.0  # seconds between promo table change checks
+    
+    # CMS Content Cache
+    CMS_CACHE_MAX_AGE: int = 60  # seconds browsers and CDNs may reuse a CMS response
+    CMS_CACHE_STALE_WHILE_REVALIDATE: int = 300
+    CMS_CACHE_CHECK_INTERVAL: float = 30.0  # seconds between CMS table change checks
+    BANNER_PREBUILD_LEAD: float = 5.0  # seconds before a banner schedule boundary to build its entries
+    
+    # Loyalty Service
+    LOYALTY_SERVER_URL: str = os.getenv("LOYALTY_SERVER_URL", "http://localhost:5000")
+    
+    # Outbox Dispatcher
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_CONCURRENCY: int = 10
+    OUTBOX_POLL_INTERVAL: float = 1.0  # seconds
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    
+    # AI Decision Log
+    AI_LOG_QUEUE_SIZE: int = 10000  # records buffered before new ones are dropped
+    AI_LOG_BATCH_SIZE: int = 200
+    AI_LOG_FLUSH_INTERVAL: float = 0.5  # seconds
+    AI_LOG_SAMPLE_THRESHOLD: float = 0.8  # queue fill fraction where sampling starts
+    AI_LOG_OVERLOAD_SAMPLE_RATE: float = 0.1  # fraction of records kept while sampling
+    
+    # Counter-offer acceptance model
+    ACCEPTANCE_MODEL_CHECK_INTERVAL: float = 30.0  # seconds between active model checks
+    ACCEPTANCE_PRICE_CANDIDATES: int = 9  # counter prices scored between min acceptable and the rule price
+    
+    # User behavior feature store
+    FEATURE_STORE_MAX_USERS: int = 100000  # users kept in each worker's hot tier
+    FEATURE_STORE_TTL: float = 60.0  # seconds before a hot entry is re-read (picks up other workers' events)
+    
+    # Demand signals for dynamic pricing
+    DEMAND_SKETCH_WIDTH: int = 4096  # counters per sketch row
+    DEMAND_SKETCH_DEPTH: int = 4
+    DEMAND_SHORT_HALF_LIFE: float = 3600.0  # seconds; "recent" demand
+    DEMAND_LONG_HALF_LIFE: float = 86400.0  # seconds; baseline demand
+    DEMAND_PRIOR_RATE: float = 2.0  # weighted events per hour assumed for every item and market
+    DEMAND_ELASTICITY: float = 0.2  # multiplier = (recent rate / baseline rate) ** elasticity
+    DEMAND_MULTIPLIER_MIN: float = 0.9
+    DEMAND_MULTIPLIER_MAX: float = 1.2
+    
+    # Top destinations and routes (streaming top-k)
+    TOP_K_CAPACITY: int = 200  # keys per bucket summary; counts past the top few dozen get less exact
+    TOP_K_SNAPSHOT_INTERVAL: float = 30.0  # seconds between snapshot writes; also how stale top-k answers can be
+    TOP_K_RETENTION_DAYS: int = 400  # daily summaries kept for report date ranges
+    
+    # Active-user counts (HyperLogLog)
+    ACTIVE_USERS_HLL_PRECISION: int = 14  # 2^14 one-byte registers per bucket; ~0.8% standard error
+    ACTIVE_USERS_ONLINE_MINUTES: int = 30  # "online" = logged in or made a request within this many minutes
+    ACTIVE_USERS_SNAPSHOT_INTERVAL: float = 15.0  # seconds between snapshot writes; other workers' activity lags by this much
+    ACTIVE_USERS_RETENTION_DAYS: int = 90  # daily sketches kept
+    
+    # Counter-offer messages
+    BARGAIN_MESSAGE_EXPERIMENT_SALT: str = ""  # change to reshuffle which sessions get which template variant
+    BARGAIN_MESSAGE_LLM: bool = False  # let the LLM write templates (needs OPENAI_API_KEY)
+    BARGAIN_MESSAGE_LLM_BUDGET: float = 0.15  # seconds a counter offer waits for an uncached LLM template
+    BARGAIN_MESSAGE_LLM_CACHE_TTL: float = 3600.0  # seconds an LLM template is reused
+    
+    # Routers to mount (comma-separated names from main.ROUTERS; empty mounts all)
+    ENABLED_ROUTERS: str = os.getenv("ENABLED_ROUTERS", "")
+    
+    # Schema Migrations
+    # Apply pending Alembic migrations at startup instead of refusing to start
+    AUTO_MIGRATE: bool = os.getenv(
+        "AUTO_MIGRATE",
+        str(os.getenv("ENVIRONMENT", "development") == "development")
+    ).lower() == "true"
+    
     # Redis Configuration (for caching and sessions)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
@@ -91,4 +177,4 @@ if not settings.SECRET_KEY or settings.SECRET_KEY == "your-secret-key-change-in-
 if settings.ENVIRONMENT == "production" and not settings.DATABASE_URL.startswith("postgresql://"):
     raise ValueError("DATABASE_URL must be a valid PostgreSQL URL in production")
 
-print(f"🔧 Configuration loaded for {settings.ENVIRONMENT} environment")
+logging.getLogger(__name__).info("Configuration loaded for %s environment", settings.ENVIRONMENT)
@@ -0,0 +1,42 @@
+"""
+Deferred imports for heavy optional modules
+Keeps numpy/pandas/openai out of worker boot until first use
+"""
+
+import importlib
+import threading
+from types import ModuleType
+
+class LazyModule(ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    Return a stand-in for `import name` that loads on first use
+
+    Usage: np = lazy_module("numpy") at module level, then np.array(...)
+    inside functions. A missing package only fails when it is first used.
+    """
+    return LazyModule(name)
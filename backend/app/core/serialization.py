@@ -0,0 +1,87 @@
+"""
+JSON serialization for Faredown responses
+orjson with the same output conventions as FastAPI's jsonable_encoder
+"""
+
+from typing import Any, Dict, List, Optional, Union
+from decimal import Decimal
+from enum import Enum
+from pathlib import PurePath
+
+import orjson
+from fastapi import HTTPException, Query, status
+from fastapi.responses import ORJSONResponse as BaseORJSONResponse
+from pydantic import BaseModel
+
+# Non-string dict keys are stringified and numpy values pass straight through
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def default(obj: Any) -> Any:
+    """
+    Types orjson doesn't handle itself, encoded the way jsonable_encoder does
+
+    datetime/date/time (isoformat), UUID, Enum and dataclasses are native
+    to orjson and already come out the same.
+    """
+    if isinstance(obj, Decimal):
+        # Same as FastAPI's decimal_encoder: whole numbers stay ints
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Enum):
+        # Enums with non-JSON values (orjson only accepts str/int/float ones)
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, PurePath):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=default, option=OPTIONS)
+
+class ORJSONResponse(BaseORJSONResponse):
+    """
+    Default response class for the app
+
+    Returning one directly from a route skips FastAPI's jsonable_encoder and
+    response_model pass entirely: plain dicts holding datetimes, enums and
+    Decimals are encoded in a single orjson call.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class ListShape:
+    """
+    Opt-in slimming for list endpoints (use as a FastAPI dependency)
+
+    ?fields=a,b keeps only those keys in each row; ?format=columnar returns
+    {"count": n, "columns": {"a": [...], "b": [...]}} instead of a list of
+    objects, so each key is sent once rather than once per row.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to include", max_length=500),
+        format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (default) or columnar")
+    ):
+        self.fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        self.columnar = format == "columnar"
+
+    def apply(self, rows: List[Dict[str, Any]], available: List[str]) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """Shape rows whose keys are available (needed to validate fields= and order columns on empty lists)"""
+        fields = self.fields or available
+        unknown = [field for field in fields if field not in available]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+            )
+        if self.columnar:
+            return {"count": len(rows), "columns": {field: [row[field] for row in rows] for field in fields}}
+        if self.fields is None:
+            return rows
+        return [{field: row[field] for field in fields} for row in rows]
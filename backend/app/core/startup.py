@@ -0,0 +1,99 @@
+"""
+Faredown Startup Pipeline
+Cold-start timing and deferred database/schema checks
+"""
+
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+class SchemaOutOfDate(RuntimeError):
+    """Database is not at the migration head"""
+
+class StartupTimer:
+    """
+    Records how long each startup phase takes
+
+    Phases are checkpoints: mark(name) charges the time since the previous
+    checkpoint to name. The clock starts when this module is first imported,
+    so main.py imports it before anything else.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.total_ms: Optional[float] = None
+        self.ready_at: Optional[datetime] = None
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def complete(self):
+        """Mark the application ready to serve"""
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        self.ready_at = datetime.utcnow()
+
+    def summary(self) -> str:
+        parts = [f"{phase} {elapsed:.0f}ms" for phase, elapsed in self.phases.items()]
+        total = f"{self.total_ms:.0f}ms" if self.total_ms is not None else "n/a"
+        return f"{total} ({', '.join(parts)})"
+
+    def breakdown(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self.total_ms, 1) if self.total_ms is not None else None,
+            "phases_ms": {phase: round(elapsed, 1) for phase, elapsed in self.phases.items()},
+            "ready_at": self.ready_at.isoformat() if self.ready_at else None,
+            "pid": os.getpid()
+        }
+
+def schema_revisions(connection) -> Dict[str, List[str]]:
+    """Current database revision(s) and the migration head(s)"""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    heads = ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads()
+    current = MigrationContext.configure(connection).get_current_heads()
+    return {"current": sorted(current), "head": sorted(heads)}
+
+def verify_schema(engine, auto_migrate: bool = False) -> Dict[str, List[str]]:
+    """
+    Check the database is at the Alembic head
+
+    Replaces create_all(): with auto_migrate pending migrations are applied,
+    otherwise an out-of-date schema raises SchemaOutOfDate.
+    """
+    with engine.connect() as connection:
+        revisions = schema_revisions(connection)
+    if revisions["current"] == revisions["head"]:
+        return revisions
+
+    if not auto_migrate:
+        raise SchemaOutOfDate(
+            f"Database at {revisions['current'] or 'no revision'}, expected {revisions['head']}; "
+            "run 'alembic upgrade head'"
+        )
+
+    from alembic import command
+    from alembic.config import Config
+
+    logger.warning("Applying migrations %s -> %s", revisions["current"], revisions["head"])
+    config = Config(ALEMBIC_INI)
+    with engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        connection.commit()
+    with engine.connect() as connection:
+        return schema_revisions(connection)
+
+# Started on first import (main.py imports this first)
+startup_timer = StartupTimer()
@@ -3,7 +3,7 @@ Faredown Database Configuration and Session Management
 PostgreSQL database setup with SQLAlchemy
 """
 
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from app.core.config import settings
@@ -61,16 +61,12 @@ def drop_tables():
 
 # Database connection test
 def test_connection():
-    """Test database connection"""
+    """Test database connection (run from the application lifespan, not on import)"""
     try:
         with engine.connect() as connection:
-            result = connection.execute("SELECT 1")
+            connection.execute(text("SELECT 1"))
             print("✅ Database connection successful")
             return True
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
         return False
-
-# Initialize database connection test
-if __name__ != "__main__":
-    test_connection()
@@ -4,7 +4,7 @@ All SQLAlchemy models for the booking platform
 """
 
 from .base import Base
-from .user_models import User, UserProfile, UserSession
+from .user_models import User, UserProfile, UserSession, UserFeatures
 from .booking_models import Booking, BookingItem, Payment
 from .flight_models import Flight, Airline, Airport, FlightBooking
 from .hotel_models import Hotel, Room, HotelBooking, HotelAmenity
@@ -14,15 +14,16 @@ from .pricing_models import Markup, Currency, VAT, ConvenienceFee
 from .promo_models import PromoCode, PromoUsage
 from .cms_models import CMSContent, Banner, Destination
 from .extranet_models import ExtranetHotel, ExtranetFlight, ExtranetDeal
-from .ai_models import AIRecommendation, AIAnalytics, AILog
-from .report_models import BookingReport, RevenueReport, UserReport
+from .ai_models import AIRecommendation, AIAnalytics, AILog, AcceptanceModel
+from .report_models import BookingReport, RevenueReport, UserReport, TopKSnapshot, DistinctCounterSnapshot
+from .outbox_models import OutboxEvent
 
 __all__ = [
     # Base
     "Base",
     
     # User Models
-    "User", "UserProfile", "UserSession",
+    "User", "UserProfile", "UserSession", "UserFeatures",
     
     # Booking Models
     "Booking", "BookingItem", "Payment",
@@ -52,8 +53,11 @@ __all__ = [
     "ExtranetHotel", "ExtranetFlight", "ExtranetDeal",
     
     # AI Models
-    "AIRecommendation", "AIAnalytics", "AILog",
+    "AIRecommendation", "AIAnalytics", "AILog", "AcceptanceModel",
     
     # Report Models
-    "BookingReport", "RevenueReport", "UserReport",
+    "BookingReport", "RevenueReport", "UserReport", "TopKSnapshot", "DistinctCounterSnapshot",
+    
+    # Outbox Models
+    "OutboxEvent",
 ]
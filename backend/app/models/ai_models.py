@@ -95,3 +95,23 @@ class AILog(BaseModel):
     error_occurred = Column(Boolean, default=False, nullable=False)
     error_message = Column(Text, nullable=True)
     error_code = Column(String(50), nullable=True)
+
+class AcceptanceModel(BaseModel):
+    """Trained counter-offer acceptance models, one row per version"""
+    
+    __tablename__ = "acceptance_models"
+    
+    version = Column(String(50), unique=True, index=True, nullable=False)
+    model_type = Column(String(50), nullable=False)  # logistic
+    
+    # Exported parameters: feature names, scaler mean/scale, coefficients, intercept
+    features = Column(JSON, nullable=False)
+    parameters = Column(JSON, nullable=False)
+    
+    # Training data and holdout metrics (samples, base_rate, auc, log_loss)
+    metrics = Column(JSON, nullable=True)
+    trained_at = Column(DateTime, nullable=False)
+    
+    # Exactly one active version is served; switching needs no restart
+    is_active = Column(Boolean, default=False, nullable=False)
+    activated_at = Column(DateTime, nullable=True)
@@ -3,7 +3,7 @@ Bargain Engine Models for Faredown
 AI-powered bargaining system with session control
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import BaseModel
@@ -28,6 +28,16 @@ class BargainSession(BaseModel):
     """Main bargain session tracking for 10-minute sessions"""
     
     __tablename__ = "bargain_sessions"
+    __table_args__ = (
+        # A user's sessions by status (active session lookup, accepted bargain at booking)
+        Index("ix_bargain_sessions_user_id_status", "user_id", "status"),
+        # Expiry sweep only ever looks at active sessions
+        Index(
+            "ix_bargain_sessions_active_expires_at", "expires_at",
+            postgresql_where=text("status = 'ACTIVE'"),
+            sqlite_where=text("status = 'ACTIVE'")
+        ),
+    )
     
     # Session Identification
     session_id = Column(String(100), unique=True, index=True, nullable=False)
@@ -111,6 +121,10 @@ class BargainAttempt(BaseModel):
     """Individual bargain attempts within a session"""
     
     __tablename__ = "bargain_attempts"
+    __table_args__ = (
+        # Duplicate offer check within a session
+        Index("ix_bargain_attempts_session_id_offered_price", "session_id", "offered_price"),
+    )
     
     session_id = Column(Integer, ForeignKey("bargain_sessions.id"), nullable=False)
     attempt_number = Column(Integer, nullable=False)
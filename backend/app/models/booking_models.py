@@ -3,10 +3,10 @@ Booking Management Models for Faredown
 Complete booking workflow with payments and status tracking
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Enum, Sequence, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from .base import BaseModel
+from .base import Base, BaseModel
 import enum
 from datetime import datetime
 
@@ -28,6 +28,17 @@ class PaymentStatus(enum.Enum):
     REFUNDED = "refunded"
     PARTIAL_REFUND = "partial_refund"
 
+# Booking references are handed out in blocks; each nextval() reserves
+# BOOKING_REFERENCE_BLOCK_SIZE consecutive numbers for one worker process
+BOOKING_REFERENCE_BLOCK_SIZE = 64
+
+booking_reference_seq = Sequence(
+    "booking_reference_seq",
+    start=1,
+    increment=BOOKING_REFERENCE_BLOCK_SIZE,
+    metadata=Base.metadata
+)
+
 class PaymentMethod(enum.Enum):
     """Payment method options"""
     CREDIT_CARD = "credit_card"
@@ -41,10 +52,21 @@ class Booking(BaseModel):
     """Main booking record for all types (flights, hotels, packages)"""
     
     __tablename__ = "bookings"
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_bookings_user_idempotency_key"),
+        # Booking history (ORDER BY created_at DESC is a backward scan)
+        Index("ix_bookings_user_id_created_at", "user_id", "created_at"),
+        # Admin analytics by status and period; covers the revenue/type aggregates
+        Index(
+            "ix_bookings_status_created_at", "status", "created_at",
+            postgresql_include=["total_amount", "booking_type"]
+        ),
+    )
     
     # Booking Identification
     booking_reference = Column(String(20), unique=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    idempotency_key = Column(String(100), nullable=True)  # Client supplied Idempotency-Key header
     
     # Booking Details
     booking_type = Column(String(20), nullable=False)  # 'flight', 'hotel', 'package'
@@ -163,6 +185,13 @@ class Payment(BaseModel):
     """Payment records for bookings"""
     
     __tablename__ = "payments"
+    __table_args__ = (
+        # Revenue reporting over completed payments; covers the amount sum
+        Index(
+            "ix_payments_status_completed_at", "status", "completed_at",
+            postgresql_include=["amount"]
+        ),
+    )
     
     booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=False)
     
@@ -0,0 +1,35 @@
+"""
+Outbox Models for Faredown
+Transactional outbox for side effects delivered after commit
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum, Index
+from .base import BaseModel
+import enum
+from datetime import datetime
+
+class OutboxStatus(enum.Enum):
+    """Outbox event delivery status"""
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+class OutboxEvent(BaseModel):
+    """Side effect recorded in the same transaction as the change that caused it"""
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    # Event Details
+    event_type = Column(String(50), nullable=False)  # loyalty_earning
+    aggregate_id = Column(String(100), nullable=False)  # e.g. booking reference
+    payload = Column(JSON, nullable=False)
+
+    # Delivery Tracking
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
@@ -36,7 +36,9 @@ class VAT(BaseModel):
     
     __tablename__ = "vat_rates"
     
+    # Blank region/country match any value; the most specific row wins
     booking_type = Column(String(50), nullable=False)
+    region = Column(String(20), nullable=True)  # domestic, international
     country = Column(String(100), nullable=True)
     vat_percentage = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -46,7 +48,11 @@ class ConvenienceFee(BaseModel):
     
     __tablename__ = "convenience_fees"
     
+    # Blank region/country/payment_method match any value; the most specific row wins
     booking_type = Column(String(50), nullable=False)
+    region = Column(String(20), nullable=True)  # domestic, international
+    country = Column(String(100), nullable=True)
+    payment_method = Column(String(50), nullable=True)  # credit_card, upi, net_banking, wallet, ...
     fee_type = Column(String(20), nullable=False)  # flat, percentage
     fee_amount = Column(Float, nullable=False)
     currency = Column(String(3), default="INR", nullable=False)
@@ -3,7 +3,7 @@ Promo Code Models for Faredown
 Promo codes and usage tracking
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -45,6 +45,10 @@ class PromoUsage(BaseModel):
     """Promo code usage tracking"""
     
     __tablename__ = "promo_usage"
+    __table_args__ = (
+        # Per-user limit check at validation/redemption
+        Index("ix_promo_usage_promo_code_id_user_id", "promo_code_id", "user_id"),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     promo_code_id = Column(Integer, ForeignKey("promo_codes.id"), nullable=False)
@@ -3,7 +3,7 @@ Report Models for Faredown
 Analytics and reporting data models
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, LargeBinary, Index, UniqueConstraint
 from .base import BaseModel
 
 class BookingReport(BaseModel):
@@ -103,3 +103,40 @@ class UserReport(BaseModel):
     # User Value
     lifetime_value = Column(Float, default=0.0, nullable=False)
     average_revenue_per_user = Column(Float, default=0.0, nullable=False)
+
+class TopKSnapshot(BaseModel):
+    """One worker's Space-Saving summary of a stream for one time bucket (see app.services.heavy_hitters)"""
+    
+    __tablename__ = "top_k_snapshots"
+    __table_args__ = (
+        UniqueConstraint("worker", "stream", "granularity", "bucket_start"),
+        # Window queries: every worker's buckets of one stream in a time range
+        Index("ix_top_k_snapshots_stream_granularity_bucket_start", "stream", "granularity", "bucket_start"),
+    )
+    
+    stream = Column(String(50), nullable=False)  # bookings:destination, bookings:route, searches:destination, searches:route
+    granularity = Column(String(10), nullable=False)  # 5m, hour, day
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    worker = Column(String(100), nullable=False)  # host:pid:token, or "rebuild"
+    
+    # [[key, count, error, revenue], ...], largest first
+    entries = Column(JSON, nullable=False)
+    total = Column(Integer, default=0, nullable=False)  # Events counted in the bucket
+
+class DistinctCounterSnapshot(BaseModel):
+    """One worker's HyperLogLog registers of a metric for one time bucket (see app.services.active_users)"""
+    
+    __tablename__ = "distinct_counter_snapshots"
+    __table_args__ = (
+        UniqueConstraint("worker", "metric", "granularity", "bucket_start"),
+        # Window queries: every worker's buckets of one metric in a time range
+        Index("ix_distinct_counter_snapshots_metric_granularity_bucket_start", "metric", "granularity", "bucket_start"),
+    )
+    
+    metric = Column(String(50), nullable=False)  # active_users
+    granularity = Column(String(10), nullable=False)  # minute, hour, day
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    worker = Column(String(100), nullable=False)  # host:pid:token
+    
+    precision = Column(Integer, nullable=False)  # 2^precision registers
+    registers = Column(LargeBinary, nullable=False)
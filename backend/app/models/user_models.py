@@ -3,7 +3,7 @@ User Management Models for Faredown
 B2C user tracking, profiles, and authentication
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import BaseModel, StatusMixin
@@ -117,10 +117,43 @@ class UserProfile(BaseModel):
     # Relationship
     user = relationship("User", back_populates="profile")
 
+class UserFeatures(BaseModel):
+    """Per-user behavior aggregates, updated incrementally on bargain and booking events"""
+    
+    __tablename__ = "user_features"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    
+    # Bargaining
+    bargain_sessions = Column(Integer, default=0, nullable=False)
+    bargain_offers = Column(Integer, default=0, nullable=False)
+    bargains_accepted = Column(Integer, default=0, nullable=False)
+    discount_sought_total = Column(Float, default=0.0, nullable=False)  # Sum of (base - offer) / base per offer
+    last_bargain_at = Column(DateTime, nullable=True)
+    
+    # Bookings (confirmed)
+    bookings = Column(Integer, default=0, nullable=False)
+    total_spent = Column(Float, default=0.0, nullable=False)
+    last_booking_at = Column(DateTime, nullable=True)
+    
+    # Offers and bookings by UTC time of day: 0-6, 6-12, 12-18, 18-24
+    activity_night = Column(Integer, default=0, nullable=False)
+    activity_morning = Column(Integer, default=0, nullable=False)
+    activity_afternoon = Column(Integer, default=0, nullable=False)
+    activity_evening = Column(Integer, default=0, nullable=False)
+
 class UserSession(BaseModel):
     """User session tracking for online status"""
     
     __tablename__ = "user_sessions"
+    __table_args__ = (
+        # A user's active sessions, most recent activity first
+        Index(
+            "ix_user_sessions_user_id_active_last_activity", "user_id", "last_activity",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1")
+        ),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     session_token = Column(String(255), unique=True, index=True, nullable=False)
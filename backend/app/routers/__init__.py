@@ -1,15 +1,10 @@
 """
 API Routers for Faredown Backend
 All API endpoints organized by functionality
-"""
 
-# Import all routers for easy access
-from . import (
-    admin, auth, users, bookings, 
-    airlines, hotels, bargain, promo,
-    currency, vat, cms, extranet,
-    ai, reports
-)
+Routers are not imported here; main.py imports and mounts them from its
+router table, so importing one router doesn't pull in all the others.
+"""
 
 __all__ = [
     "admin", "auth", "users", "bookings",
@@ -14,7 +14,22 @@ from app.database import get_db
 from app.models.user_models import User, UserSession
 from app.models.booking_models import Booking, Payment, BookingStatus, PaymentStatus
 from app.models.bargain_models import BargainSession, BargainStatus
+from app.models.ai_models import AcceptanceModel
+from app.core.serialization import ORJSONResponse, ListShape
 from app.routers.auth import get_current_user
+from app.core.startup import startup_timer
+from app.services.http_clients import http_clients
+from app.services.outbox_dispatcher import outbox_dispatcher
+from app.services.ai_log_writer import ai_log_writer
+from app.services.fee_engine import fee_engine
+from app.services.reference_data import reference_data
+from app.services.content_cache import content_cache
+from app.services.acceptance_model import acceptance_models
+from app.services.feature_store import feature_store
+from app.services.llm_gateway import llm_gateway
+from app.services.demand_signals import demand_signals
+from app.services.heavy_hitters import heavy_hitters, STREAMS, WINDOWS
+from app.services.active_users import active_users, WINDOWS as ACTIVE_USER_WINDOWS
 
 router = APIRouter()
 
@@ -59,6 +74,7 @@ async def get_admin_user(current_user: User = Depends(get_current_user)):
 
 @router.get("/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
+    exact: bool = Query(False, description="Count active users from session rows instead of the sketches (audits)"),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -70,11 +86,8 @@ async def get_dashboard_stats(
     # Total users
     total_users = db.query(User).filter(User.is_active == True).count()
     
-    # Active users today (had a session today)
-    active_users_today = db.query(UserSession).filter(
-        UserSession.created_at >= start_of_day,
-        UserSession.is_active == True
-    ).distinct(UserSession.user_id).count()
+    # Active users today (logged in or made a request since UTC midnight)
+    active_users_today = active_users.exact(db, "today") if exact else active_users.count(db, "today")
     
     # Total bookings
     total_bookings = db.query(Booking).filter(
@@ -172,14 +185,8 @@ async def get_booking_analytics(
         for result in booking_types_query.all()
     }
     
-    # Top destinations (mock data for demo)
-    top_destinations = [
-        {"destination": "Dubai", "bookings": 145, "revenue": 2500000},
-        {"destination": "London", "bookings": 98, "revenue": 1800000},
-        {"destination": "New York", "bookings": 87, "revenue": 1650000},
-        {"destination": "Singapore", "bookings": 76, "revenue": 1400000},
-        {"destination": "Bangkok", "bookings": 65, "revenue": 980000}
-    ]
+    # Top destinations from the streaming summaries, not a scan of booking items
+    top_destinations = heavy_hitters.top_destinations(db, start=start_date, limit=5)
     
     return BookingAnalytics(
         daily_bookings=daily_bookings,
@@ -190,6 +197,7 @@ async def get_booking_analytics(
 
 @router.get("/users/analytics", response_model=UserAnalytics)
 async def get_user_analytics(
+    exact: bool = Query(False, description="Count online users from session rows instead of the sketches (audits)"),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -203,11 +211,8 @@ async def get_user_analytics(
         User.created_at >= start_of_day
     ).count()
     
-    # Active users online (with active sessions)
-    active_users_online = db.query(UserSession).filter(
-        UserSession.is_active == True,
-        UserSession.last_activity >= datetime.utcnow() - timedelta(minutes=30)
-    ).distinct(UserSession.user_id).count()
+    # Active users online (logged in or made a request in the last ACTIVE_USERS_ONLINE_MINUTES)
+    active_users_online = active_users.exact(db, "online") if exact else active_users.count(db, "online")
     
     # User growth (last 30 days)
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
@@ -243,15 +248,21 @@ async def get_user_analytics(
         user_locations=user_locations
     )
 
+ADMIN_USER_FIELDS = [
+    "id", "email", "first_name", "last_name", "phone", "is_active", "is_verified", "is_premium",
+    "preferred_currency", "created_at", "last_login"
+]
+
 @router.get("/users")
 async def get_all_users(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
+    shape: ListShape = Depends(),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all users with pagination and search"""
+    """Get all users with pagination and search (users support ?fields= and ?format=columnar)"""
 
     # Base query
     query = db.query(User)
@@ -284,19 +295,19 @@ async def get_all_users(
             "is_verified": user.is_verified,
             "is_premium": user.is_premium,
             "preferred_currency": user.preferred_currency,
-            "created_at": user.created_at.isoformat() if user.created_at else None,
-            "last_login": user.last_login.isoformat() if user.last_login else None,
+            "created_at": user.created_at,
+            "last_login": user.last_login,
         }
         for user in users
     ]
 
-    return {
-        "users": users_data,
+    return ORJSONResponse({
+        "users": shape.apply(users_data, ADMIN_USER_FIELDS),
         "total": total,
         "page": page,
         "limit": limit,
         "total_pages": (total + limit - 1) // limit
-    }
+    })
 
 @router.get("/bargain/analytics", response_model=BargainAnalytics)
 async def get_bargain_analytics(
@@ -443,3 +454,232 @@ async def get_system_health(
         "uptime": "99.9%",         # Would integrate with actual uptime monitoring
         "last_updated": datetime.utcnow().isoformat()
     }
+
+@router.get("/outbox/metrics")
+async def get_outbox_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get outbox dispatcher delivery counters and lag"""
+    return outbox_dispatcher.metrics()
+
+@router.get("/ai-logs/metrics")
+async def get_ai_log_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get AI decision log queue depth, batch writes and shed counts"""
+    return ai_log_writer.metrics()
+
+@router.get("/http-clients/metrics")
+async def get_http_client_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get outbound HTTP client latency, error and circuit breaker state per host"""
+    return http_clients.metrics()
+
+@router.get("/demand-signals")
+async def get_demand_signals(
+    booking_type: Optional[str] = None,
+    market: Optional[str] = None,
+    travel_date: Optional[date] = None,
+    item_id: Optional[str] = None,
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get this worker's demand sketch usage, or one item's or market's decayed counts and multiplier"""
+    if booking_type is None:
+        return demand_signals.metrics()
+    return demand_signals.quote(booking_type, market.strip().upper() if market else "*", travel_date, item_id)
+
+@router.get("/top-k")
+async def get_top_k(
+    stream: str = Query("bookings:destination"),
+    window: str = Query("30d"),
+    limit: int = Query(10, ge=1, le=100),
+    booking_type: Optional[str] = Query(None),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get the top destinations or routes booked or searched in the last hour, day or 30 days"""
+    if stream not in STREAMS or window not in WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"stream must be one of {', '.join(STREAMS)}; window one of {', '.join(WINDOWS)}"
+        )
+    return {
+        "stream": stream,
+        "window": window,
+        "booking_type": booking_type,
+        "items": heavy_hitters.top(db, stream, window, limit=limit, booking_type=booking_type)
+    }
+
+@router.get("/top-k/metrics")
+async def get_top_k_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get this worker's top-k event counts, buckets in memory and snapshot writes"""
+    return heavy_hitters.metrics()
+
+@router.post("/top-k/rebuild")
+def rebuild_top_k(
+    days: Optional[int] = Query(None, ge=1),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Recount the booking top-k snapshots from booking history (runs in the threadpool)"""
+    return heavy_hitters.rebuild(db, days)
+
+@router.get("/active-users")
+async def get_active_users(
+    window: str = Query("online"),
+    exact: bool = False,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get distinct active users online, in the last hour, day, today or 30 days"""
+    if window not in ACTIVE_USER_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"window must be one of {', '.join(ACTIVE_USER_WINDOWS)}"
+        )
+    if exact:
+        try:
+            return {"window": window, "active_users": active_users.exact(db, window), "exact": True}
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {
+        "window": window,
+        "active_users": active_users.count(db, window),
+        "exact": False,
+        "standard_error": round(active_users.standard_error, 4)
+    }
+
+@router.get("/active-users/metrics")
+async def get_active_user_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get this worker's active-user sketch events, buckets in memory and snapshot writes"""
+    return active_users.metrics()
+
+@router.get("/llm-gateway/metrics")
+async def get_llm_gateway_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get LLM cache hit rates, deduplicated calls, fallbacks, token usage and latency"""
+    return llm_gateway.metrics()
+
+@router.get("/startup/metrics")
+async def get_startup_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get this worker's cold-start timing breakdown"""
+    return startup_timer.breakdown()
+
+@router.get("/reference-data")
+async def get_reference_data_info(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get the version and size of this worker's reference data snapshot"""
+    return reference_data.get().info()
+
+@router.post("/reference-data/reload")
+async def reload_reference_data(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Rebuild the reference data snapshot (markups, currencies, catalogs), fee lookup and CMS cache"""
+    fee_engine.invalidate()
+    content_cache.clear()
+    return reference_data.reload()
+
+@router.get("/fee-engine")
+async def get_fee_engine_info(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get the axes and size of the compiled VAT/convenience fee lookup"""
+    return fee_engine.compiled().info()
+
+@router.get("/cms-cache")
+async def get_cms_cache_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get this worker's CMS content cache version, entries and hit rates"""
+    return content_cache.metrics()
+
+@router.get("/acceptance-models")
+async def list_acceptance_models(
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """List trained acceptance model versions and the one this worker is serving"""
+    models = db.query(AcceptanceModel).filter(
+        AcceptanceModel.is_deleted.is_(False)
+    ).order_by(AcceptanceModel.trained_at.desc()).all()
+    acceptance_models.scorer()
+    return {
+        "serving": acceptance_models.metrics(),
+        "models": [
+            {
+                "version": model.version,
+                "model_type": model.model_type,
+                "metrics": model.metrics,
+                "trained_at": model.trained_at,
+                "is_active": model.is_active,
+                "activated_at": model.activated_at
+            }
+            for model in models
+        ]
+    }
+
+@router.post("/acceptance-models/train")
+def train_acceptance_model(
+    version: Optional[str] = Query(None, max_length=50),
+    activate: bool = False,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Train a new acceptance model version on bargain history (runs in the threadpool)"""
+    # scikit-learn is only imported here, never on the request path
+    from app.services.acceptance_training import train_and_store
+    
+    if version and db.query(AcceptanceModel.id).filter(AcceptanceModel.version == version).first():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Model version {version} already exists")
+    try:
+        result = train_and_store(db, version)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if activate:
+        acceptance_models.activate(db, result["version"])
+    return {**result, "is_active": activate}
+
+@router.post("/acceptance-models/{version}/activate")
+async def activate_acceptance_model(
+    version: str,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Serve this acceptance model version (other workers pick it up within the check interval)"""
+    if not acceptance_models.activate(db, version):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model version not found")
+    scorer = acceptance_models.scorer()
+    return {"active_version": scorer.version if scorer else None}
+
+@router.get("/feature-store")
+async def get_feature_store_metrics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get this worker's user feature hot tier size and hit rate"""
+    return feature_store.metrics()
+
+@router.get("/feature-store/users/{user_id}")
+async def get_user_features(
+    user_id: int,
+    admin_user: User = Depends(get_admin_user)
+):
+    """Get one user's behavior features as the bargain AI sees them"""
+    return feature_store.get(user_id).to_dict()
+
+@router.post("/feature-store/rebuild")
+def rebuild_feature_store(
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Recompute every user's behavior features from bargain and booking history (runs in the threadpool)"""
+    return feature_store.rebuild(db)
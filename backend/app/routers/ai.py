@@ -6,6 +6,7 @@ from pydantic import BaseModel
 from typing import Dict, List, Any
 from app.database import get_db
 from app.services.ai_service import AIBargainService
+from app.services.demand_signals import demand_signals, market_of, travel_date_of
 
 router = APIRouter()
 ai_service = AIBargainService()
@@ -18,7 +19,7 @@ class PricingAnalysisRequest(BaseModel):
 @router.post("/analyze-pricing")
 async def analyze_pricing(request: PricingAnalysisRequest):
     """AI-powered pricing analysis"""
-    analysis = await ai_service.generate_dynamic_pricing(request.item_data)
+    analysis = await ai_service.generate_dynamic_pricing(request.item_data, request.item_type)
     
     return {
         "analysis": analysis,
@@ -29,6 +30,28 @@ async def analyze_pricing(request: PricingAnalysisRequest):
         }
     }
 
+class RepriceRequest(BaseModel):
+    booking_type: str
+    items: List[Dict[str, Any]]
+
+@router.post("/reprice")
+async def reprice_items(request: RepriceRequest):
+    """Apply demand multipliers to a whole result set (items carry base_price, id and route/city data)"""
+    multipliers = demand_signals.multipliers([
+        (request.booking_type, market_of(request.booking_type, item), travel_date_of(item), item.get("item_id") or item.get("id"))
+        for item in request.items
+    ])
+    return {
+        "items": [
+            {
+                **item,
+                "demand_factor": round(float(multiplier), 4),
+                "suggested_price": round(item.get("base_price", 0) * float(multiplier), 2)
+            }
+            for item, multiplier in zip(request.items, multipliers)
+        ]
+    }
+
 @router.post("/recommendations")
 async def get_ai_recommendations(user_preferences: Dict[str, Any]):
     """Get AI-powered travel recommendations"""
@@ -4,9 +4,16 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import logging
+
+from app.services.demand_signals import demand_signals, market_of
+from app.services.heavy_hitters import heavy_hitters
+from app.services.reference_data import reference_data
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 class FlightSearchRequest(BaseModel):
     origin: str
     destination: str
@@ -18,6 +25,16 @@ class FlightSearchRequest(BaseModel):
 @router.post("/search")
 async def search_flights(search_data: FlightSearchRequest):
     """Search flights (mock implementation)"""
+    # Search telemetry must not fail the request
+    try:
+        demand_signals.record(
+            "search", "flight",
+            market=market_of("flight", {"origin": search_data.origin, "destination": search_data.destination}),
+            travel_date=search_data.departure_date
+        )
+        heavy_hitters.record_search("flight", search_data.destination, origin=search_data.origin)
+    except Exception as e:
+        logger.exception("Failed to record flight search %s-%s: %s", search_data.origin, search_data.destination, e)
     return {
         "flights": [
             {
@@ -37,10 +54,4 @@ async def search_flights(search_data: FlightSearchRequest):
 @router.get("/airlines")
 async def get_airlines():
     """Get list of airlines"""
-    return {
-        "airlines": [
-            {"code": "AI", "name": "Air India"},
-            {"code": "6E", "name": "IndiGo"},
-            {"code": "SG", "name": "SpiceJet"}
-        ]
-    }
+    return {"airlines": [dict(airline) for airline in reference_data.get().airlines]}
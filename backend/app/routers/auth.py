@@ -15,6 +15,7 @@ import secrets
 from app.database import get_db
 from app.models.user_models import User, UserProfile, UserSession
 from app.core.config import settings
+from app.services.active_users import active_users
 
 router = APIRouter()
 security = HTTPBearer()
@@ -88,6 +89,7 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     
+    active_users.record(user.id)
     return user
 
 @router.post("/register", response_model=TokenResponse)
@@ -138,6 +140,7 @@ async def register_user(user_data: UserRegistration, request: Request, db: Sessi
     )
     db.add(user_session)
     db.commit()
+    active_users.record(new_user.id)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -195,6 +198,7 @@ async def login_user(user_data: UserLogin, request: Request, db: Session = Depen
     )
     db.add(user_session)
     db.commit()
+    active_users.record(user.id)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
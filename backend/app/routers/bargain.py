@@ -10,16 +10,23 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import uuid
 import asyncio
+import logging
 
+from app.core.serialization import ORJSONResponse, ListShape
 from app.database import get_db
 from app.models.user_models import User
 from app.models.bargain_models import BargainSession, BargainAttempt, CounterOffer, BargainStatus, BargainAttemptType
 from app.routers.auth import get_current_user
 from app.services.ai_service import AIBargainService
+from app.services.bargain_cache import AcceptedBargain, bargain_price_cache
+from app.services.demand_signals import demand_signals, market_of, travel_date_of
+from app.services.feature_store import feature_store
 from app.services.pricing_service import PricingService
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 # Pydantic models
 class StartBargainRequest(BaseModel):
     booking_type: str  # 'flight' or 'hotel'
@@ -48,26 +55,46 @@ class BargainSessionResponse(BaseModel):
     final_price_range_max: float
     can_bargain: bool
 
-class BargainAttemptResponse(BaseModel):
-    attempt_number: int
-    attempt_type: str
-    offered_price: float
-    is_accepted: bool
-    ai_reasoning: Optional[str]
-    timestamp: datetime
+def session_payload(session: BargainSession) -> Dict[str, Any]:
+    """Fields of BargainSessionResponse, built without model validation"""
+    return {
+        "session_id": session.session_id,
+        "status": session.status.value,
+        "time_remaining": session.time_remaining,
+        "total_attempts": session.total_attempts,
+        "max_attempts": session.max_attempts,
+        "user_best_offer": session.user_best_offer,
+        "ai_best_counter": session.ai_best_counter,
+        "agreed_price": session.agreed_price,
+        "final_price_range_min": session.final_price_range_min,
+        "final_price_range_max": session.final_price_range_max,
+        "can_bargain": session.can_bargain
+    }
 
-class CounterOfferResponse(BaseModel):
-    counter_price: float
-    original_offer: float
-    discount_amount: float
-    discount_percentage: float
-    strategy_type: str
-    ai_message: Optional[str]
-    incentives: Optional[Dict[str, Any]]
-    valid_until: datetime
-    is_final_offer: bool
-    confidence_level: float
-    savings: Dict[str, float]
+def attempt_payload(attempt: BargainAttempt) -> Dict[str, Any]:
+    return {
+        "attempt_number": attempt.attempt_number,
+        "attempt_type": attempt.attempt_type.value,
+        "offered_price": attempt.offered_price,
+        "is_accepted": attempt.is_accepted,
+        "ai_reasoning": attempt.ai_reasoning,
+        "timestamp": attempt.created_at
+    }
+
+def counter_offer_payload(counter_offer: CounterOffer) -> Dict[str, Any]:
+    return {
+        "counter_price": counter_offer.counter_price,
+        "original_offer": counter_offer.original_offer,
+        "discount_amount": counter_offer.discount_amount,
+        "discount_percentage": counter_offer.discount_percentage,
+        "strategy_type": counter_offer.strategy_type,
+        "ai_message": counter_offer.ai_message,
+        "incentives": counter_offer.incentives,
+        "valid_until": counter_offer.valid_until,
+        "is_final_offer": counter_offer.is_final_offer,
+        "confidence_level": counter_offer.confidence_level,
+        "savings": counter_offer.calculate_savings()
+    }
 
 # Initialize AI and Pricing services
 ai_service = AIBargainService()
@@ -118,22 +145,21 @@ async def start_bargain_session(
     bargain_session.conversion_probability = ai_analysis.get("conversion_probability", 0.6)
     
     db.add(bargain_session)
+    feature_store.record_bargain_started(db, current_user.id)
     db.commit()
     db.refresh(bargain_session)
+    # The session is committed: demand telemetry must not fail the request
+    try:
+        demand_signals.record(
+            "bargain", request.booking_type,
+            market=market_of(request.booking_type, request.item_data),
+            travel_date=travel_date_of(request.item_data),
+            item_id=request.item_id
+        )
+    except Exception as e:
+        logger.exception("Failed to record demand signal for bargain session %s: %s", session_id, e)
     
-    return BargainSessionResponse(
-        session_id=bargain_session.session_id,
-        status=bargain_session.status.value,
-        time_remaining=bargain_session.time_remaining,
-        total_attempts=bargain_session.total_attempts,
-        max_attempts=bargain_session.max_attempts,
-        user_best_offer=bargain_session.user_best_offer,
-        ai_best_counter=bargain_session.ai_best_counter,
-        agreed_price=bargain_session.agreed_price,
-        final_price_range_min=bargain_session.final_price_range_min,
-        final_price_range_max=bargain_session.final_price_range_max,
-        can_bargain=bargain_session.can_bargain
-    )
+    return BargainSessionResponse(**session_payload(bargain_session))
 
 @router.post("/offer", response_model=Dict[str, Any])
 async def make_bargain_offer(
@@ -208,41 +234,34 @@ async def make_bargain_offer(
     # Update session
     session.total_attempts = attempt_number
     session.user_best_offer = request.offered_price
+    feature_store.record_offer(db, current_user.id, request.offered_price, session.base_price)
     
     if is_acceptable:
         # Accept the offer
         session.status = BargainStatus.ACCEPTED
         session.agreed_price = request.offered_price
         session.completed_at = datetime.utcnow()
+        feature_store.record_bargain_accepted(db, current_user.id)
         
         db.add(attempt)
         db.commit()
+        remember_accepted_price(session)
         
-        return {
+        return ORJSONResponse({
             "status": "accepted",
             "message": "🎉 Congratulations! Your offer has been accepted!",
             "agreed_price": request.offered_price,
             "savings": session.base_price - request.offered_price,
-            "session": BargainSessionResponse(
-                session_id=session.session_id,
-                status=session.status.value,
-                time_remaining=session.time_remaining,
-                total_attempts=session.total_attempts,
-                max_attempts=session.max_attempts,
-                user_best_offer=session.user_best_offer,
-                ai_best_counter=session.ai_best_counter,
-                agreed_price=session.agreed_price,
-                final_price_range_min=session.final_price_range_min,
-                final_price_range_max=session.final_price_range_max,
-                can_bargain=session.can_bargain
-            )
-        }
+            "session": session_payload(session)
+        })
     
     # Generate AI counter offer
     ai_response = await ai_service.generate_counter_offer(
         session=session,
         user_offer=request.offered_price,
-        attempt_number=attempt_number
+        attempt_number=attempt_number,
+        currency=current_user.preferred_currency,
+        locale=current_user.preferred_language
     )
     
     # Update attempt with AI reasoning
@@ -250,6 +269,10 @@ async def make_bargain_offer(
     attempt.margin_analysis = ai_response.get("margin_analysis")
     attempt.user_behavior_score = ai_response.get("behavior_score")
     
+    # Flush the attempt first so the counter offer links to its id
+    db.add(attempt)
+    db.flush()
+    
     # Create counter offer
     counter_offer = CounterOffer(
         session_id=session.id,
@@ -264,56 +287,25 @@ async def make_bargain_offer(
         valid_until=datetime.utcnow() + timedelta(minutes=5),
         is_final_offer=(attempt_number >= session.max_attempts - 1),
         confidence_level=ai_response["confidence"],
+        expected_acceptance_rate=ai_response.get("acceptance_probability"),
         profit_margin=ai_response["profit_margin"]
     )
     
     session.ai_best_counter = ai_response["counter_price"]
     
-    db.add(attempt)
     db.add(counter_offer)
     db.commit()
     
     # Schedule session cleanup
     background_tasks.add_task(cleanup_expired_sessions, db)
     
-    return {
+    return ORJSONResponse({
         "status": "counter_offer",
         "message": "We have a counter offer for you!",
-        "attempt": BargainAttemptResponse(
-            attempt_number=attempt.attempt_number,
-            attempt_type=attempt.attempt_type.value,
-            offered_price=attempt.offered_price,
-            is_accepted=attempt.is_accepted,
-            ai_reasoning=attempt.ai_reasoning,
-            timestamp=attempt.created_at
-        ),
-        "counter_offer": CounterOfferResponse(
-            counter_price=counter_offer.counter_price,
-            original_offer=counter_offer.original_offer,
-            discount_amount=counter_offer.discount_amount,
-            discount_percentage=counter_offer.discount_percentage,
-            strategy_type=counter_offer.strategy_type,
-            ai_message=counter_offer.ai_message,
-            incentives=counter_offer.incentives,
-            valid_until=counter_offer.valid_until,
-            is_final_offer=counter_offer.is_final_offer,
-            confidence_level=counter_offer.confidence_level,
-            savings=counter_offer.calculate_savings()
-        ),
-        "session": BargainSessionResponse(
-            session_id=session.session_id,
-            status=session.status.value,
-            time_remaining=session.time_remaining,
-            total_attempts=session.total_attempts,
-            max_attempts=session.max_attempts,
-            user_best_offer=session.user_best_offer,
-            ai_best_counter=session.ai_best_counter,
-            agreed_price=session.agreed_price,
-            final_price_range_min=session.final_price_range_min,
-            final_price_range_max=session.final_price_range_max,
-            can_bargain=session.can_bargain
-        )
-    }
+        "attempt": attempt_payload(attempt),
+        "counter_offer": counter_offer_payload(counter_offer),
+        "session": session_payload(session)
+    })
 
 @router.post("/accept-counter/{session_id}")
 async def accept_counter_offer(
@@ -334,6 +326,24 @@ async def accept_counter_offer(
             detail="Bargain session not found"
         )
     
+    # An agreement is final: accepting again returns it unchanged, so the
+    # price cached by every worker for the booking path stays valid
+    if session.status == BargainStatus.ACCEPTED:
+        accepted_counter = db.query(CounterOffer).filter(
+            CounterOffer.session_id == session.id,
+            CounterOffer.was_accepted.is_(True),
+            CounterOffer.counter_price == session.agreed_price
+        ).order_by(CounterOffer.created_at.desc()).first()
+        return {
+            "status": "accepted",
+            "message": "🎉 Great choice! Counter offer accepted!",
+            "agreed_price": session.agreed_price,
+            "savings": (
+                accepted_counter.calculate_savings() if accepted_counter
+                else session.base_price - session.agreed_price
+            )
+        }
+    
     # Get latest counter offer
     counter_offer = db.query(CounterOffer).filter(
         CounterOffer.session_id == session.id
@@ -346,12 +356,14 @@ async def accept_counter_offer(
         )
     
     # Accept the counter offer
+    feature_store.record_bargain_accepted(db, current_user.id)
     session.status = BargainStatus.ACCEPTED
     session.agreed_price = counter_offer.counter_price
     session.completed_at = datetime.utcnow()
     counter_offer.was_accepted = True
     
     db.commit()
+    remember_accepted_price(session)
     
     return {
         "status": "accepted",
@@ -379,32 +391,23 @@ async def get_bargain_session(
             detail="Bargain session not found"
         )
     
-    return BargainSessionResponse(
-        session_id=session.session_id,
-        status=session.status.value,
-        time_remaining=session.time_remaining,
-        total_attempts=session.total_attempts,
-        max_attempts=session.max_attempts,
-        user_best_offer=session.user_best_offer,
-        ai_best_counter=session.ai_best_counter,
-        agreed_price=session.agreed_price,
-        final_price_range_min=session.final_price_range_min,
-        final_price_range_max=session.final_price_range_max,
-        can_bargain=session.can_bargain
-    )
+    return BargainSessionResponse(**session_payload(session))
+
+HISTORY_FIELDS = ["session_id", "booking_type", "status", "base_price", "agreed_price", "savings", "created_at", "completed_at"]
 
 @router.get("/history")
 async def get_bargain_history(
+    shape: ListShape = Depends(),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's bargain history"""
+    """Get user's bargain history (supports ?fields= and ?format=columnar)"""
     
     sessions = db.query(BargainSession).filter(
         BargainSession.user_id == current_user.id
     ).order_by(BargainSession.created_at.desc()).limit(20).all()
     
-    return [
+    rows = [
         {
             "session_id": session.session_id,
             "booking_type": session.booking_type,
@@ -417,6 +420,19 @@ async def get_bargain_history(
         }
         for session in sessions
     ]
+    return ORJSONResponse(shape.apply(rows, HISTORY_FIELDS))
+
+def remember_accepted_price(session: BargainSession):
+    """Cache the agreed pricing so booking creation can skip the session lookup"""
+    bargain_price_cache.put(
+        session.session_id,
+        AcceptedBargain(
+            user_id=session.user_id,
+            booking_type=session.booking_type,
+            base_price=session.base_price,
+            agreed_price=session.agreed_price
+        )
+    )
 
 async def cleanup_expired_sessions(db: Session):
     """Background task to cleanup expired sessions"""
@@ -3,20 +3,31 @@ Booking Management API Router for Faredown
 Complete booking workflow with payments
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-import secrets
+import logging
 
+from app.core.serialization import ORJSONResponse, ListShape
 from app.database import get_db
 from app.models.user_models import User
-from app.models.booking_models import Booking, BookingItem, Payment, BookingStatus, PaymentStatus, PaymentMethod
+from app.models.booking_models import Booking, BookingItem, Payment, BookingStatus
 from app.routers.auth import get_current_user
+from app.services.booking_service import BookingService
+from app.services.demand_signals import demand_signals, market_of, travel_date_of
+from app.services.heavy_hitters import heavy_hitters
+from app.services.payment_service import PaymentService, InvalidTransition
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+# Initialize booking service (holds the booking reference block allocator)
+booking_service = BookingService()
+payment_service = PaymentService()
+
 # Pydantic models
 class CreateBookingRequest(BaseModel):
     booking_type: str  # 'flight', 'hotel', 'package'
@@ -47,62 +58,66 @@ class PaymentRequest(BaseModel):
 @router.post("/create", response_model=BookingResponse)
 async def create_booking(
     booking_data: CreateBookingRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new booking"""
+    """Create a new booking
     
-    # Generate unique booking reference
-    booking_reference = f"FD{secrets.token_hex(4).upper()}{current_user.id}"
+    Retries carrying the same Idempotency-Key header return the booking
+    created by the first request instead of creating a duplicate.
+    """
     
     # Extract passenger details
     lead_passenger = booking_data.passenger_details.get("lead_passenger", {})
     
-    # Create booking
-    booking = Booking(
-        booking_reference=booking_reference,
-        user_id=current_user.id,
-        booking_type=booking_data.booking_type,
-        base_amount=booking_data.base_amount,
-        tax_amount=booking_data.tax_amount,
-        convenience_fee=booking_data.convenience_fee,
-        promo_discount=booking_data.promo_discount,
-        total_amount=booking_data.total_amount,
-        currency=booking_data.currency,
-        passenger_count=len(booking_data.passenger_details.get("passengers", [1])),
-        lead_passenger_name=lead_passenger.get("name", current_user.full_name),
-        lead_passenger_email=lead_passenger.get("email", current_user.email),
-        lead_passenger_phone=lead_passenger.get("phone", current_user.phone or ""),
-        special_requests=booking_data.special_requests,
-        bargain_session_id=booking_data.bargain_session_id,
-        was_bargained=bool(booking_data.bargain_session_id)
-    )
-    
-    # If from bargain session, calculate savings
-    if booking_data.bargain_session_id:
-        # In production, fetch actual bargain session and calculate savings
-        booking.bargain_savings = 500.0  # Mock value
-        booking.original_price = booking_data.total_amount + booking.bargain_savings
+    booking_values = {
+        "user_id": current_user.id,
+        "booking_type": booking_data.booking_type,
+        "base_amount": booking_data.base_amount,
+        "tax_amount": booking_data.tax_amount,
+        "convenience_fee": booking_data.convenience_fee,
+        "promo_discount": booking_data.promo_discount,
+        "total_amount": booking_data.total_amount,
+        "currency": booking_data.currency,
+        "passenger_count": len(booking_data.passenger_details.get("passengers", [1])),
+        "lead_passenger_name": lead_passenger.get("name", current_user.full_name),
+        "lead_passenger_email": lead_passenger.get("email", current_user.email),
+        "lead_passenger_phone": lead_passenger.get("phone", current_user.phone or ""),
+        "special_requests": booking_data.special_requests,
+        "bargain_session_id": booking_data.bargain_session_id,
+        "was_bargained": bool(booking_data.bargain_session_id)
+    }
     
-    db.add(booking)
-    db.flush()  # Get booking ID
+    # Booking and all items are written in one transaction; bargain savings
+    # are resolved from the accepted bargain session inside the same insert
+    booking, created = booking_service.create_booking(
+        db,
+        booking_values=booking_values,
+        items=booking_data.items,
+        idempotency_key=idempotency_key
+    )
     
-    # Create booking items
-    for item_data in booking_data.items:
-        booking_item = BookingItem(
-            booking_id=booking.id,
-            item_type=item_data.get("type", "unknown"),
-            item_name=item_data.get("name", ""),
-            item_description=item_data.get("description"),
-            unit_price=item_data.get("unit_price", 0),
-            quantity=item_data.get("quantity", 1),
-            total_price=item_data.get("total_price", 0),
-            item_data=item_data
+    if booking is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bargain session not found, not accepted, or agreed price does not match booking total"
         )
-        db.add(booking_item)
     
-    db.commit()
-    db.refresh(booking)
+    # The booking is committed: demand telemetry must not fail the request.
+    # Idempotent replays return the original booking and are not counted again.
+    try:
+        if created:
+            for item in booking_data.items or [{}]:
+                demand_signals.record(
+                    "booking", booking_data.booking_type,
+                    market=market_of(booking_data.booking_type, item),
+                    travel_date=travel_date_of(item),
+                    item_id=item.get("item_id") or item.get("id")
+                )
+            heavy_hitters.record_booking(booking_data.booking_type, booking_data.items, booking.total_amount, booking.currency)
+    except Exception as e:
+        logger.exception("Failed to record demand signals for booking %s: %s", booking.booking_reference, e)
     
     return BookingResponse(
         booking_reference=booking.booking_reference,
@@ -112,19 +127,26 @@ async def create_booking(
         created_at=booking.created_at
     )
 
+MY_BOOKINGS_FIELDS = [
+    "booking_reference", "booking_type", "status", "total_amount", "currency", "was_bargained",
+    "bargain_savings", "departure_date", "return_date", "passenger_count", "lead_passenger_name",
+    "created_at", "confirmed_at"
+]
+
 @router.get("/my-bookings")
 async def get_user_bookings(
     limit: int = 20,
+    shape: ListShape = Depends(),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's booking history"""
+    """Get user's booking history (supports ?fields= and ?format=columnar)"""
     
     bookings = db.query(Booking).filter(
         Booking.user_id == current_user.id
     ).order_by(Booking.created_at.desc()).limit(limit).all()
     
-    return [
+    rows = [
         {
             "booking_reference": booking.booking_reference,
             "booking_type": booking.booking_type,
@@ -142,36 +164,10 @@ async def get_user_bookings(
         }
         for booking in bookings
     ]
+    return ORJSONResponse(shape.apply(rows, MY_BOOKINGS_FIELDS))
 
-@router.get("/{booking_reference}")
-async def get_booking_details(
-    booking_reference: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get detailed booking information"""
-    
-    booking = db.query(Booking).filter(
-        Booking.booking_reference == booking_reference,
-        Booking.user_id == current_user.id
-    ).first()
-    
-    if not booking:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Booking not found"
-        )
-    
-    # Get booking items
-    items = db.query(BookingItem).filter(
-        BookingItem.booking_id == booking.id
-    ).all()
-    
-    # Get payments
-    payments = db.query(Payment).filter(
-        Payment.booking_id == booking.id
-    ).all()
-    
+def booking_details_payload(booking: Booking, items: List[BookingItem], payments: List[Payment]) -> Dict[str, Any]:
+    """Booking with its items and payments, as returned by GET /{booking_reference}"""
     return {
         "booking_reference": booking.booking_reference,
         "booking_type": booking.booking_type,
@@ -224,6 +220,37 @@ async def get_booking_details(
         ]
     }
 
+@router.get("/{booking_reference}")
+async def get_booking_details(
+    booking_reference: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get detailed booking information"""
+    
+    booking = db.query(Booking).filter(
+        Booking.booking_reference == booking_reference,
+        Booking.user_id == current_user.id
+    ).first()
+    
+    if not booking:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking not found"
+        )
+    
+    # Get booking items
+    items = db.query(BookingItem).filter(
+        BookingItem.booking_id == booking.id
+    ).all()
+    
+    # Get payments
+    payments = db.query(Payment).filter(
+        Payment.booking_id == booking.id
+    ).all()
+    
+    return ORJSONResponse(booking_details_payload(booking, items, payments))
+
 @router.post("/payment/initiate")
 async def initiate_payment(
     payment_data: PaymentRequest,
@@ -252,29 +279,14 @@ async def initiate_payment(
             detail="Payment amount does not match booking total"
         )
     
-    # Create payment record
-    payment_id = f"PAY_{secrets.token_hex(6).upper()}"
-    payment = Payment(
-        booking_id=booking.id,
-        payment_id=payment_id,
-        amount=payment_data.amount,
-        currency=booking.currency,
-        payment_method=PaymentMethod(payment_data.payment_method),
-        payment_gateway="razorpay",  # Default gateway
-        gateway_response=payment_data.gateway_data
+    payment = payment_service.initiate_payment(
+        db,
+        booking,
+        payment_data.amount,
+        payment_data.payment_method,
+        payment_data.gateway_data
     )
     
-    db.add(payment)
-    db.commit()
-    db.refresh(payment)
-    
-    # In production, integrate with actual payment gateway
-    # For demo, simulate payment processing
-    payment.status = PaymentStatus.PROCESSING
-    payment.gateway_transaction_id = f"razorpay_{secrets.token_hex(8)}"
-    
-    db.commit()
-    
     return {
         "payment_id": payment.payment_id,
         "status": payment.status.value,
@@ -290,89 +302,29 @@ async def confirm_payment(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Confirm payment completion"""
+    """Confirm payment completion
     
-    # Find payment
-    payment = db.query(Payment).join(Booking).filter(
-        Payment.payment_id == payment_id,
-        Booking.user_id == current_user.id
-    ).first()
+    Safe to call more than once (client and gateway webhook); repeated
+    confirmations of a completed payment return its current state.
+    """
+    
+    try:
+        result = payment_service.confirm_payment(db, payment_id, current_user.id, gateway_response)
+    except InvalidTransition as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     
-    if not payment:
+    if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Payment not found"
         )
     
-    # Update payment status
-    payment.status = PaymentStatus.COMPLETED
-    payment.completed_at = datetime.utcnow()
-    payment.gateway_response = gateway_response
-    
-    # Update booking status
-    booking = payment.booking
-    booking.status = BookingStatus.CONFIRMED
-    booking.confirmed_at = datetime.utcnow()
-    booking.supplier_booking_ref = f"SUP_{secrets.token_hex(4).upper()}"
-    
-    db.commit()
-
-    # Process loyalty points earning (non-blocking)
-    try:
-        import asyncio
-        import httpx
-        import os
-
-        async def process_loyalty_earning():
-            try:
-                loyalty_server_url = os.getenv('LOYALTY_SERVER_URL', 'http://localhost:5000')
-
-                # Calculate eligible amount (adjust based on your price structure)
-                eligible_amount = float(booking.total_amount) * 0.8  # 80% of total (excluding taxes/fees)
-
-                loyalty_data = {
-                    "userId": str(current_user.id),
-                    "bookingId": booking.booking_reference,
-                    "bookingType": "HOTEL" if booking.booking_type.value == "hotel" else "FLIGHT",
-                    "eligibility": {
-                        "eligibleAmount": eligible_amount,
-                        "currency": booking.currency or "INR",
-                        "fxRate": 1.0
-                    },
-                    "description": f"{booking.booking_type.value.title()} booking confirmed"
-                }
-
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{loyalty_server_url}/api/loyalty/process-earning",
-                        json=loyalty_data,
-                        timeout=5.0
-                    )
-
-                    if response.status_code == 200:
-                        result = response.json()
-                        if result.get("success"):
-                            print(f"✅ Loyalty points earned for booking {booking.booking_reference}")
-                        else:
-                            print(f"❌ Loyalty earning failed: {result.get('error')}")
-                    else:
-                        print(f"❌ Loyalty service error: {response.status_code}")
-
-            except Exception as e:
-                print(f"❌ Error processing loyalty earning: {e}")
-
-        # Run loyalty earning in background (don't await)
-        asyncio.create_task(process_loyalty_earning())
-
-    except Exception as e:
-        print(f"❌ Failed to trigger loyalty earning: {e}")
-        # Continue with normal response even if loyalty fails
-
     return {
         "message": "Payment confirmed successfully",
-        "booking_reference": booking.booking_reference,
-        "payment_status": payment.status.value,
-        "booking_status": booking.status.value
+        **result
     }
 
 @router.post("/{booking_reference}/cancel")
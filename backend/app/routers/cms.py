@@ -1,57 +1,48 @@
 """CMS Content API Router for Faredown"""
 
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Request, Response, Query
+
+from app.core.config import settings
+from app.services.content_cache import content_cache, page_key, ContentEntry
 
 router = APIRouter()
 
-@router.get("/banners")
-async def get_banners():
-    """Get active banners"""
-    return {
-        "banners": [
-            {
-                "id": 1,
-                "title": "Summer Sale",
-                "description": "Up to 50% off on flights",
-                "image_url": "https://example.com/banner1.jpg",
-                "link_url": "/flights",
-                "is_active": True
-            }
-        ]
+PAGE_NOT_FOUND = {"title": "Page Not Found", "content": ""}
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def cached_response(request: Request, entry: ContentEntry) -> Response:
+    """Pre-serialized body with validators, or 304 if the client already has it"""
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={settings.CMS_CACHE_MAX_AGE}, "
+                         f"stale-while-revalidate={settings.CMS_CACHE_STALE_WHILE_REVALIDATE}",
+        "Surrogate-Key": entry.surrogate_keys,
     }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, entry.etag):
+        content_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+@router.get("/banners")
+async def get_banners(request: Request, position: Optional[str] = Query(None, max_length=50)):
+    """Get banners live right now, optionally for one position"""
+    entry = content_cache.get(f"banners:{position}" if position else "banners")
+    return cached_response(request, entry) if entry else {"banners": []}
 
 @router.get("/destinations")
-async def get_destinations():
+async def get_destinations(request: Request):
     """Get popular destinations"""
-    return {
-        "destinations": [
-            {
-                "id": 1,
-                "name": "Dubai",
-                "country": "UAE",
-                "description": "Experience luxury and adventure",
-                "image_url": "https://example.com/dubai.jpg",
-                "featured": True
-            }
-        ]
-    }
+    return cached_response(request, content_cache.get("destinations"))
 
 @router.get("/content/{page}")
-async def get_page_content(page: str):
+async def get_page_content(request: Request, page: str):
     """Get content for specific page"""
-    content_map = {
-        "about": {
-            "title": "About Faredown",
-            "content": "Faredown is the world's first AI-powered travel platform..."
-        },
-        "terms": {
-            "title": "Terms and Conditions",
-            "content": "These terms and conditions govern your use of Faredown..."
-        },
-        "privacy": {
-            "title": "Privacy Policy",
-            "content": "We respect your privacy and are committed to protecting..."
-        }
-    }
-    
-    return content_map.get(page, {"title": "Page Not Found", "content": ""})
+    entry = content_cache.get(page_key(page))
+    return cached_response(request, entry) if entry else PAGE_NOT_FOUND
@@ -2,21 +2,23 @@
 
 from fastapi import APIRouter
 
+from app.services.reference_data import reference_data
+
 router = APIRouter()
 
 @router.get("/rates")
 async def get_exchange_rates():
     """Get current exchange rates"""
+    snapshot = reference_data.get()
+    # Currencies store INR per unit; publish units per INR
     return {
         "base_currency": "INR",
         "rates": {
-            "USD": 0.012,
-            "EUR": 0.011,
-            "GBP": 0.0095,
-            "AED": 0.044,
-            "SGD": 0.016
+            code: round(1 / currency["exchange_rate"], 4)
+            for code, currency in snapshot.currencies.items()
+            if code != "INR" and currency["exchange_rate"]
         },
-        "last_updated": "2024-07-20T10:00:00Z"
+        "last_updated": snapshot.built_at.isoformat() + "Z"
     }
 
 @router.get("/supported")
@@ -24,11 +26,7 @@ async def get_supported_currencies():
     """Get list of supported currencies"""
     return {
         "currencies": [
-            {"code": "INR", "name": "Indian Rupee", "symbol": "₹"},
-            {"code": "USD", "name": "US Dollar", "symbol": "$"},
-            {"code": "EUR", "name": "Euro", "symbol": "€"},
-            {"code": "GBP", "name": "British Pound", "symbol": "£"},
-            {"code": "AED", "name": "UAE Dirham", "symbol": "د.إ"},
-            {"code": "SGD", "name": "Singapore Dollar", "symbol": "S$"}
+            {"code": currency["code"], "name": currency["name"], "symbol": currency["symbol"]}
+            for currency in reference_data.get().currencies.values()
         ]
     }
@@ -4,9 +4,15 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import logging
+
+from app.services.demand_signals import demand_signals, market_of
+from app.services.heavy_hitters import heavy_hitters
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 class HotelSearchRequest(BaseModel):
     destination: str
     check_in: datetime
@@ -17,6 +23,16 @@ class HotelSearchRequest(BaseModel):
 @router.post("/search")
 async def search_hotels(search_data: HotelSearchRequest):
     """Search hotels (mock implementation)"""
+    # Search telemetry must not fail the request
+    try:
+        demand_signals.record(
+            "search", "hotel",
+            market=market_of("hotel", {"destination": search_data.destination}),
+            travel_date=search_data.check_in
+        )
+        heavy_hitters.record_search("hotel", search_data.destination)
+    except Exception as e:
+        logger.exception("Failed to record hotel search %s: %s", search_data.destination, e)
     return {
         "hotels": [
             {
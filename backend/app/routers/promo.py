@@ -1,9 +1,15 @@
 """Promo Codes API Router for Faredown"""
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional
 from app.database import get_db
+from app.models.user_models import User
+from app.models.booking_models import Booking
+from app.routers.auth import get_current_user
+from app.services.promo_engine import promo_engine, normalize_route, PromoError, PromoLimitReached
 
 router = APIRouter()
 
@@ -11,33 +17,111 @@ class PromoCodeRequest(BaseModel):
     code: str
     booking_type: str
     amount: float
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+
+class PromoApplyRequest(PromoCodeRequest):
+    booking_reference: Optional[str] = None
+
+class BestPromoRequest(BaseModel):
+    booking_type: str
+    amount: float
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    limit: int = Field(5, ge=1, le=50)
 
 @router.post("/validate")
 async def validate_promo_code(promo_data: PromoCodeRequest, db: Session = Depends(get_db)):
     """Validate promo code"""
-    # Mock implementation
-    if promo_data.code.upper() == "SAVE10":
+    try:
+        result = promo_engine.validate(
+            db,
+            promo_data.code,
+            promo_data.booking_type,
+            promo_data.amount,
+            route=normalize_route(promo_data.origin, promo_data.destination)
+        )
+    except PromoError as e:
         return {
-            "valid": True,
-            "discount_percentage": 10,
-            "discount_amount": promo_data.amount * 0.1,
-            "message": "10% discount applied"
+            "valid": False,
+            "message": str(e)
         }
+    
+    promo = result["promo"]
     return {
-        "valid": False,
-        "message": "Invalid promo code"
+        "valid": True,
+        "code": promo["code"],
+        "discount_type": promo["discount_type"],
+        "discount_percentage": promo["discount_value"] if promo["discount_type"] == "percentage" else None,
+        "discount_amount": result["discount_amount"],
+        "message": f"{promo['name']} applied"
     }
 
-@router.get("/available")
-async def get_available_promos():
-    """Get available promo codes"""
+@router.post("/apply")
+async def apply_promo_code(
+    promo_data: PromoApplyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Redeem a promo code for the current user"""
+    booking_id = None
+    if promo_data.booking_reference:
+        booking_id = db.execute(
+            select(Booking.id).where(
+                Booking.booking_reference == promo_data.booking_reference,
+                Booking.user_id == current_user.id
+            )
+        ).scalar()
+        if booking_id is None:
+            raise HTTPException(status_code=404, detail="Booking not found")
+    
+    try:
+        result = promo_engine.redeem(
+            db,
+            promo_data.code,
+            current_user.id,
+            promo_data.booking_type,
+            promo_data.amount,
+            route=normalize_route(promo_data.origin, promo_data.destination),
+            booking_id=booking_id
+        )
+    except PromoLimitReached as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PromoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
-        "promos": [
-            {
-                "code": "SAVE10",
-                "description": "10% off on all bookings",
-                "discount_percentage": 10,
-                "valid_until": "2024-12-31"
-            }
-        ]
+        "message": "Promo code applied",
+        "code": result["promo"]["code"],
+        "discount_amount": result["discount_amount"],
+        "remaining_uses": result["remaining_uses"]
     }
+
+@router.post("/best")
+async def get_best_promos(
+    cart: BestPromoRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Promo codes the current user can redeem on this cart, biggest discount first"""
+    promos = promo_engine.best(
+        db,
+        cart.booking_type,
+        cart.amount,
+        user_id=current_user.id,
+        route=normalize_route(cart.origin, cart.destination),
+        limit=cart.limit
+    )
+    return {
+        "promos": promos,
+        "best": promos[0] if promos else None
+    }
+
+@router.get("/available")
+async def get_available_promos(
+    booking_type: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None
+):
+    """Get available promo codes"""
+    return {"promos": promo_engine.available(booking_type, normalize_route(origin, destination))}
@@ -1,8 +1,8 @@
 """Analytics and Reports API Router for Faredown"""
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, func
-from sqlalchemy import and_, desc
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc, func
 from typing import Optional
 from datetime import datetime, timedelta
 
@@ -11,6 +11,7 @@ from app.models.booking_models import Booking, Payment, BookingStatus, PaymentSt
 from app.models.bargain_models import BargainSession, BargainStatus
 from app.routers.auth import get_current_user
 from app.models.user_models import User
+from app.services.heavy_hitters import heavy_hitters
 
 router = APIRouter()
 
@@ -142,12 +143,10 @@ async def get_booking_report(
         Booking.created_at < end_datetime
     ).group_by(Booking.was_bargained).all()
     
-    # Top destinations (mock data)
-    top_destinations = [
-        {"destination": "Dubai", "bookings": 45, "revenue": 750000},
-        {"destination": "Singapore", "bookings": 32, "revenue": 580000},
-        {"destination": "London", "bookings": 28, "revenue": 920000}
-    ]
+    # Top destinations from the streaming summaries, not a scan of booking items
+    top_destinations = heavy_hitters.top_destinations(
+        db, start=start_datetime, end=datetime.fromisoformat(end_date), limit=10, booking_type=booking_type
+    )
     
     return {
         "period": {
@@ -1,44 +1,90 @@
 """VAT and Fees API Router for Faredown"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.services.fee_engine import fee_engine, REGIONS
 
 router = APIRouter()
 
+class FeeQuoteItem(BaseModel):
+    booking_type: str
+    base_amount: float
+    region: str = "domestic"
+    country: Optional[str] = None
+    payment_method: Optional[str] = None
+
+class FeeQuoteBatchRequest(BaseModel):
+    items: List[FeeQuoteItem]
+
+def split_booking_type(booking_type: str):
+    """Accept "flight" or the older "flight_domestic" style keys"""
+    for region in REGIONS:
+        if booking_type.endswith(f"_{region}"):
+            return booking_type[: -len(region) - 1], region
+    return booking_type, None
+
 @router.get("/rates")
 async def get_vat_rates():
     """Get VAT rates for different booking types"""
+    compiled = fee_engine.compiled()
+    vat_rates, convenience_fees = {}, {}
+    for booking_type in compiled.axes["booking_type"][:-1]:
+        for region in REGIONS:
+            rates = compiled.rates(booking_type, region)
+            vat_rates[f"{booking_type}_{region}"] = rates["vat_percentage"]
+            convenience_fees[f"{booking_type}_{region}"] = rates["fee_flat"]
     return {
-        "vat_rates": {
-            "flight_domestic": 5.0,
-            "flight_international": 0.0,
-            "hotel_domestic": 12.0,
-            "hotel_international": 0.0
-        },
-        "convenience_fees": {
-            "flight_domestic": 25.0,
-            "flight_international": 50.0,
-            "hotel_domestic": 35.0,
-            "hotel_international": 65.0
-        }
+        "vat_rates": vat_rates,
+        "convenience_fees": convenience_fees
     }
 
 @router.get("/calculate")
-async def calculate_fees(booking_type: str, base_amount: float):
+async def calculate_fees(
+    booking_type: str,
+    base_amount: float,
+    region: Optional[str] = None,
+    country: Optional[str] = None,
+    payment_method: Optional[str] = None
+):
     """Calculate VAT and fees for booking"""
-    rates = {
-        "flight_domestic": {"vat": 5.0, "convenience": 25.0},
-        "flight_international": {"vat": 0.0, "convenience": 50.0},
-        "hotel_domestic": {"vat": 12.0, "convenience": 35.0},
-        "hotel_international": {"vat": 0.0, "convenience": 65.0}
-    }
-    
-    rate = rates.get(booking_type, {"vat": 0.0, "convenience": 0.0})
-    vat_amount = base_amount * (rate["vat"] / 100)
+    booking_type, key_region = split_booking_type(booking_type)
+    region = region or key_region or "domestic"
+    if region not in REGIONS:
+        raise HTTPException(status_code=400, detail=f"region must be one of {', '.join(REGIONS)}")
     
+    quote = fee_engine.compiled().quote(booking_type, base_amount, region, country, payment_method)
     return {
         "base_amount": base_amount,
-        "vat_percentage": rate["vat"],
-        "vat_amount": vat_amount,
-        "convenience_fee": rate["convenience"],
-        "total_amount": base_amount + vat_amount + rate["convenience"]
+        "vat_percentage": quote["vat_percentage"],
+        "vat_amount": quote["vat_amount"],
+        "convenience_fee": quote["convenience_fee"],
+        "total_amount": quote["total_amount"]
+    }
+
+@router.post("/calculate/batch")
+async def calculate_fees_batch(request: FeeQuoteBatchRequest):
+    """Calculate VAT and fees for many items in one vectorized pass"""
+    if not request.items:
+        return {"quotes": []}
+    items = request.items
+    quotes = fee_engine.quote_batch(
+        [item.booking_type for item in items],
+        [item.base_amount for item in items],
+        [item.region for item in items],
+        [item.country for item in items],
+        [item.payment_method for item in items]
+    )
+    return {
+        "quotes": [
+            {
+                "base_amount": item.base_amount,
+                "vat_percentage": float(quotes["vat_percentage"][i]),
+                "vat_amount": float(quotes["vat_amount"][i]),
+                "convenience_fee": float(quotes["convenience_fee"][i]),
+                "total_amount": float(quotes["total_amount"][i])
+            }
+            for i, item in enumerate(items)
+        ]
     }
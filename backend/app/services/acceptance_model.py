@@ -0,0 +1,223 @@
+"""
+Counter-offer acceptance scoring for Faredown
+Serves the active trained acceptance model from exported coefficients (no scikit-learn)
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from datetime import datetime
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.lazy_imports import lazy_module
+from app.database import SessionLocal
+from app.models.ai_models import AcceptanceModel
+
+logger = logging.getLogger(__name__)
+
+np = lazy_module("numpy")
+
+# Model inputs, in column order; training and serving both build them with counter_features
+FEATURES = (
+    "gap",               # counter over the user's offer, relative to the offer
+    "offer_margin",      # user's offer over net rate, relative to net rate
+    "counter_position",  # counter within [min acceptable, max price]
+    "offer_position",    # user's offer against the same range (negative below min)
+    "attempt_number",
+    "is_final",
+    "log_price",
+    "is_hotel",
+)
+
+def counter_features(
+    booking_type: str,
+    net_rate: float,
+    min_acceptable: float,
+    max_price: float,
+    max_attempts: int,
+    user_offer: float,
+    counter_price: float,
+    attempt_number: int
+) -> List[float]:
+    """Feature vector for one counter offer, in FEATURES order"""
+    spread = (max_price - min_acceptable) or 1.0
+    return [
+        (counter_price - user_offer) / user_offer,
+        (user_offer - net_rate) / net_rate,
+        (counter_price - min_acceptable) / spread,
+        (user_offer - min_acceptable) / spread,
+        float(attempt_number),
+        1.0 if attempt_number >= max_attempts - 1 else 0.0,
+        math.log(counter_price),
+        1.0 if booking_type == "hotel" else 0.0,
+    ]
+
+class AcceptanceScorer:
+    """
+    One exported logistic model
+
+    The scaler is folded into the coefficients at load time, so scoring a
+    counter is one dot product over a handful of floats and an exp.
+    """
+
+    def __init__(self, version: str, features: Sequence[str], parameters: Dict[str, Any]):
+        if tuple(features) != FEATURES:
+            raise ValueError(f"Model {version} was trained on features {list(features)}, serving builds {list(FEATURES)}")
+        self.version = version
+        mean, scale, coef = parameters["mean"], parameters["scale"], parameters["coef"]
+        self.weights = [c / s for c, s in zip(coef, scale)]
+        self.bias = parameters["intercept"] - sum(c * m / s for c, m, s in zip(coef, mean, scale))
+        self.loaded_at = time.time()
+        self._weight_array = None
+
+    def score(self, values: Sequence[float]) -> float:
+        z = self.bias + sum(w * v for w, v in zip(self.weights, values))
+        # Split on sign so exp never overflows
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def score_many(self, matrix):
+        """Probabilities for an (n, len(FEATURES)) array"""
+        if self._weight_array is None:
+            self._weight_array = np.array(self.weights)
+        return 1.0 / (1.0 + np.exp(-(np.asarray(matrix) @ self._weight_array + self.bias)))
+
+def choose_counter_price(
+    scorer: AcceptanceScorer,
+    booking_type: str,
+    net_rate: float,
+    min_acceptable: float,
+    max_price: float,
+    max_attempts: int,
+    user_offer: float,
+    rule_price: float,
+    attempt_number: int,
+    candidates: int = settings.ACCEPTANCE_PRICE_CANDIDATES
+) -> Tuple[float, float]:
+    """
+    (price, acceptance probability) maximizing expected margin over net rate
+
+    Candidates run from the strategy rules' price down to min acceptable,
+    so the model can concede more when that pays but never asks for more
+    than the rules would.
+    """
+    best_price, best_probability, best_value = rule_price, 0.0, -math.inf
+    steps = max(1, candidates - 1)
+    for step in range(steps + 1):
+        price = round(rule_price - (rule_price - min_acceptable) * step / steps, 2)
+        probability = scorer.score(counter_features(
+            booking_type, net_rate, min_acceptable, max_price, max_attempts, user_offer, price, attempt_number
+        ))
+        value = probability * (price - net_rate)
+        if value > best_value:
+            best_price, best_probability, best_value = price, probability, value
+        if min_acceptable >= rule_price:
+            break
+    return best_price, best_probability
+
+def table_fingerprint(db) -> Tuple:
+    """Cheap change detector (row count, last model change)"""
+    return tuple(db.execute(select(func.count(AcceptanceModel.id), func.max(AcceptanceModel.updated_at))).one())
+
+class AcceptanceModelRegistry:
+    """
+    The active acceptance model for this process
+
+    Loaded on first use and reloaded when this process activates a
+    version, and otherwise at most every ACCEPTANCE_MODEL_CHECK_INTERVAL
+    seconds if acceptance_models changed elsewhere, so a new version goes
+    live in every worker without a restart. scorer() is None while no
+    version is active.
+    """
+
+    def __init__(self):
+        self._scorer: Optional[AcceptanceScorer] = None
+        self._loaded = False
+        self._fingerprint: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    def invalidate(self):
+        self._loaded = False
+
+    def load(self) -> Optional[AcceptanceScorer]:
+        with self._lock:
+            db = SessionLocal()
+            try:
+                fingerprint = table_fingerprint(db)
+                row = db.execute(
+                    select(AcceptanceModel).where(
+                        AcceptanceModel.is_active.is_(True),
+                        AcceptanceModel.is_deleted.is_(False)
+                    ).order_by(AcceptanceModel.activated_at.desc()).limit(1)
+                ).scalar_one_or_none()
+                scorer = AcceptanceScorer(row.version, row.features, row.parameters) if row else None
+            except ValueError as e:
+                # A model this code can't serve is skipped, not half-served
+                logger.error("Acceptance model not loaded: %s", e)
+                scorer = None
+            finally:
+                db.close()
+
+            if (scorer and scorer.version) != (self._scorer and self._scorer.version):
+                self.swaps += 1
+                logger.info("Acceptance model now %s", scorer.version if scorer else "off")
+            self._scorer = scorer
+            self._fingerprint = fingerprint
+            self._loaded = True
+            self._checked_at = time.monotonic()
+            return scorer
+
+    def _changed_elsewhere(self) -> bool:
+        self._checked_at = time.monotonic()
+        db = SessionLocal()
+        try:
+            return table_fingerprint(db) != self._fingerprint
+        finally:
+            db.close()
+
+    def scorer(self) -> Optional[AcceptanceScorer]:
+        if not self._loaded:
+            return self.load()
+        if time.monotonic() - self._checked_at >= settings.ACCEPTANCE_MODEL_CHECK_INTERVAL and self._changed_elsewhere():
+            return self.load()
+        return self._scorer
+
+    def activate(self, db, version: str) -> bool:
+        """Make version the only active model; False if it doesn't exist"""
+        exists = db.execute(
+            select(AcceptanceModel.id).where(AcceptanceModel.version == version, AcceptanceModel.is_deleted.is_(False))
+        ).scalar()
+        if exists is None:
+            return False
+        now = datetime.utcnow()
+        db.execute(
+            update(AcceptanceModel).where(AcceptanceModel.is_active.is_(True), AcceptanceModel.version != version)
+            .values(is_active=False, updated_at=now)
+        )
+        db.execute(
+            update(AcceptanceModel).where(AcceptanceModel.id == exists)
+            .values(is_active=True, activated_at=now, updated_at=now)
+        )
+        db.commit()
+        self.invalidate()
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        scorer = self._scorer
+        return {
+            "active_version": scorer.version if scorer else None,
+            "loaded_at": scorer.loaded_at if scorer else None,
+            "swaps": self.swaps,
+            "check_interval_s": settings.ACCEPTANCE_MODEL_CHECK_INTERVAL
+        }
+
+# Global acceptance model registry
+acceptance_models = AcceptanceModelRegistry()
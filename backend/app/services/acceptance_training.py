@@ -0,0 +1,121 @@
+"""
+Acceptance model training for Faredown
+Fits counter-offer acceptance on bargain history with scikit-learn and stores the exported model
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+import logging
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import log_loss, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy import insert, select
+
+from app.models.ai_models import AcceptanceModel
+from app.models.bargain_models import BargainSession, BargainAttempt, CounterOffer
+from app.services.acceptance_model import FEATURES, AcceptanceScorer, counter_features
+from app.services.bargain_replay import stream
+
+logger = logging.getLogger(__name__)
+
+MODEL_TYPE = "logistic"
+
+def load_training_data(db, batch_size: int = 10000) -> Tuple[np.ndarray, np.ndarray]:
+    """(features, was_accepted) for every recorded counter offer, oldest first"""
+    statement = (
+        select(
+            BargainSession.booking_type,
+            BargainSession.net_rate,
+            BargainSession.final_price_range_min,
+            BargainSession.final_price_range_max,
+            BargainSession.max_attempts,
+            CounterOffer.original_offer,
+            CounterOffer.counter_price,
+            BargainAttempt.attempt_number,
+            CounterOffer.was_accepted
+        )
+        .join(BargainSession, BargainSession.id == CounterOffer.session_id)
+        .join(BargainAttempt, BargainAttempt.id == CounterOffer.attempt_id)
+        .where(CounterOffer.original_offer > 0, CounterOffer.counter_price > 0, BargainSession.net_rate > 0)
+        .order_by(CounterOffer.id)
+    )
+    features, labels = [], []
+    for part in stream(db, statement, batch_size):
+        for row in part:
+            features.append(counter_features(*row[:8]))
+            labels.append(1.0 if row[8] else 0.0)
+    return np.array(features, dtype=np.float64).reshape(-1, len(FEATURES)), np.array(labels)
+
+class ScaledLogistic:
+    """StandardScaler and LogisticRegression applied together"""
+
+    def __init__(self, scaler: StandardScaler, regression: LogisticRegression):
+        self.scaler = scaler
+        self.regression = regression
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        return self.regression.predict_proba(self.scaler.transform(features))
+
+def fit(features: np.ndarray, labels: np.ndarray) -> ScaledLogistic:
+    scaler = StandardScaler().fit(features)
+    regression = LogisticRegression(C=1.0, max_iter=1000).fit(scaler.transform(features), labels)
+    return ScaledLogistic(scaler, regression)
+
+def train(features: np.ndarray, labels: np.ndarray, holdout: float = 0.2) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Fit a scaled logistic regression and export it as plain parameters
+
+    The newest `holdout` share of counters (the data is in time order) is
+    kept out of the fit and used for the reported metrics, then the model
+    is refitted on everything.
+    """
+    if len(labels) < 100 or labels.min() == labels.max():
+        raise ValueError("Need at least 100 counter offers with both accepted and declined outcomes")
+
+    split = int(len(labels) * (1 - holdout))
+    holdout_model = fit(features[:split], labels[:split])
+    predicted = holdout_model.predict_proba(features[split:])[:, 1]
+    metrics = {
+        "samples": int(len(labels)),
+        "base_rate": round(float(labels.mean()), 4),
+        "holdout_samples": int(len(labels) - split),
+        "auc": round(float(roc_auc_score(labels[split:], predicted)), 4) if labels[split:].min() != labels[split:].max() else None,
+        "log_loss": round(float(log_loss(labels[split:], predicted, labels=[0, 1])), 4)
+    }
+
+    model = fit(features, labels)
+    scaler, regression = model.scaler, model.regression
+    parameters = {
+        "mean": scaler.mean_.tolist(),
+        "scale": scaler.scale_.tolist(),
+        "coef": regression.coef_[0].tolist(),
+        "intercept": float(regression.intercept_[0])
+    }
+    return parameters, metrics
+
+def train_and_store(db, version: Optional[str] = None) -> Dict[str, Any]:
+    """Train on all bargain history and store the result as a new, inactive version"""
+    features, labels = load_training_data(db)
+    parameters, metrics = train(features, labels)
+    version = version or f"acceptance-{datetime.utcnow():%Y%m%d%H%M%S}"
+    # Fails here, not at serving time, if the export can't be scored
+    AcceptanceScorer(version, FEATURES, parameters)
+
+    now = datetime.utcnow()
+    db.execute(insert(AcceptanceModel).values(
+        version=version,
+        model_type=MODEL_TYPE,
+        features=list(FEATURES),
+        parameters=parameters,
+        metrics=metrics,
+        trained_at=now,
+        is_active=False,
+        is_deleted=False,
+        created_at=now,
+        updated_at=now
+    ))
+    db.commit()
+    logger.info("Trained acceptance model %s on %d counters (auc %s)", version, metrics["samples"], metrics["auc"])
+    return {"version": version, "model_type": MODEL_TYPE, "metrics": metrics}
@@ -0,0 +1,201 @@
+"""
+Active Users for Faredown
+HyperLogLog distinct-user counts per minute, hour and day, mergeable across workers
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+import hashlib
+import math
+import time
+
+from sqlalchemy import select, distinct, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy_imports import lazy_module
+from app.database import SessionLocal
+from app.models.report_models import DistinctCounterSnapshot
+from app.models.user_models import UserSession
+from app.services.bucketed_snapshots import BucketedSnapshots
+
+np = lazy_module("numpy")
+
+METRIC = "active_users"
+
+# Granularity -> (bucket seconds, buckets kept; None = ACTIVE_USERS_RETENTION_DAYS)
+GRANULARITIES = {"minute": (60, 120), "hour": (3600, 48), "day": (86400, None)}
+
+# Window -> (granularity, buckets merged); "today" is the current UTC day
+WINDOWS = {
+    "online": ("minute", settings.ACTIVE_USERS_ONLINE_MINUTES),
+    "hour": ("minute", 60),
+    "day": ("hour", 24),
+    "today": ("day", 1),
+    "30d": ("day", 30),
+}
+
+class HyperLogLog:
+    """
+    Distinct count sketch of 2^precision one-byte registers
+
+    Adding the same user twice changes nothing, and the union of two
+    sketches is the register-wise maximum, so sketches from different
+    workers and time buckets merge without double counting. Standard
+    error is about 1.04 / sqrt(2^precision); small counts fall back to
+    linear counting and are close to exact.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = settings.ACTIVE_USERS_HLL_PRECISION, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+
+    def add(self, value: Any):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "little")
+        bits = 64 - self.precision
+        index, rest = hashed >> bits, hashed & ((1 << bits) - 1)
+        rank = bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.array(), other.array(), out=self.array())
+
+    def array(self):
+        return np.frombuffer(self.registers, dtype=np.uint8)
+
+    def estimate(self) -> float:
+        return estimate(self.array())
+
+def estimate(registers) -> float:
+    """Cardinality from a uint8 register array"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / float(np.ldexp(1.0, -registers.astype(np.int32)).sum())
+    zeros = int(m - np.count_nonzero(registers))
+    if raw <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)
+    return raw
+
+class ActiveUsers(BucketedSnapshots):
+    """
+    Distinct active users over rolling windows, without scanning sessions
+
+    Logins and authenticated requests add the user to a HyperLogLog per
+    minute, hour and day bucket, snapshotted to distinct_counter_snapshots
+    every ACTIVE_USERS_SNAPSHOT_INTERVAL. A query takes the register-wise
+    maximum of every worker's rows in its window (cached for the same
+    interval) and of this worker's live buckets, then estimates once.
+    exact() counts session rows instead, for audits.
+    """
+
+    model = DistinctCounterSnapshot
+    scope_column = "metric"
+    scopes = (METRIC,)
+    granularities = GRANULARITIES
+    name = "Active user"
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        precision: int = settings.ACTIVE_USERS_HLL_PRECISION,
+        snapshot_interval: float = settings.ACTIVE_USERS_SNAPSHOT_INTERVAL,
+        retention_days: int = settings.ACTIVE_USERS_RETENTION_DAYS
+    ):
+        super().__init__(session_factory, snapshot_interval, retention_days)
+        self.precision = precision
+        self._cache: Dict[Tuple[str, int, int], Tuple[float, Any]] = {}
+
+        self.events = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def new_sketch(self) -> HyperLogLog:
+        return HyperLogLog(self.precision)
+
+    def dump(self, sketch: HyperLogLog) -> Dict[str, Any]:
+        return {"precision": sketch.precision, "registers": bytes(sketch.registers)}
+
+    def load(self, values: Dict[str, Any]) -> HyperLogLog:
+        return HyperLogLog(values["precision"], values["registers"])
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(1 << self.precision)
+
+    def record(self, user_id: Any, at: Optional[float] = None):
+        """A login or authenticated request by user_id"""
+        if user_id is None:
+            return
+        at = time.time() if at is None else at
+        with self._lock:
+            for sketch in self._live(METRIC, at):
+                sketch.add(user_id)
+            self.events += 1
+
+    def count(self, db: Session, window: str = "online", at: Optional[float] = None) -> int:
+        """Estimated distinct users in a window, across every worker"""
+        granularity, buckets = WINDOWS[window]
+        at = time.time() if at is None else at
+        last = int(at // GRANULARITIES[granularity][0])
+        first = last - buckets + 1
+
+        registers = self._stored(db, granularity, first, last).copy()
+        with self._lock:
+            # Max is idempotent: live buckets already in a snapshot don't count twice
+            for (_, bucket_granularity, index), sketch in self._buckets.items():
+                if bucket_granularity == granularity and first <= index <= last:
+                    np.maximum(registers, sketch.array(), out=registers)
+        return round(estimate(registers))
+
+    def _stored(self, db: Session, granularity: str, first: int, last: int):
+        """Register-wise max of every snapshot row in [first, last]"""
+        key = (granularity, first, last)
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            self.cache_hits += 1
+            return cached[1]
+        self.cache_misses += 1
+
+        registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        for (stored,) in db.execute(
+            select(DistinctCounterSnapshot.registers).where(self._in_window((METRIC,), granularity, first, last))
+        ):
+            if len(stored) == len(registers):
+                np.maximum(registers, np.frombuffer(stored, dtype=np.uint8), out=registers)
+        if len(self._cache) > 64:
+            self._cache.clear()
+        self._cache[key] = (time.monotonic() + self.snapshot_interval, registers)
+        return registers
+
+    def exact(self, db: Session, window: str = "online") -> int:
+        """
+        Distinct users from session rows, for audits
+
+        Counts sessions opened today ("today") or active within
+        ACTIVE_USERS_ONLINE_MINUTES ("online"), as the dashboards did
+        before. Session rows only change on login, so requests made with
+        an existing token show up in count() but not here.
+        """
+        query = select(func.count(distinct(UserSession.user_id))).where(UserSession.is_active.is_(True))
+        if window == "today":
+            query = query.where(UserSession.created_at >= datetime.combine(datetime.utcnow().date(), datetime.min.time()))
+        elif window == "online":
+            query = query.where(UserSession.last_activity >= datetime.utcnow() - timedelta(minutes=settings.ACTIVE_USERS_ONLINE_MINUTES))
+        else:
+            raise ValueError(f"Exact counts are only kept for today and online, not {window}")
+        return db.execute(query).scalar() or 0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **super().metrics(),
+            "events": self.events,
+            "precision": self.precision,
+            "standard_error": round(self.standard_error, 4),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
+
+active_users = ActiveUsers()
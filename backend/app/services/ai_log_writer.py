@@ -0,0 +1,198 @@
+"""
+AI Log Writer for Faredown
+Buffers AI decision records in memory and writes them to ai_logs in batches
+"""
+
+from typing import Dict, Any, List, Optional
+from collections import deque
+from datetime import datetime
+import asyncio
+import logging
+import random
+import time
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.ai_models import AILog
+
+logger = logging.getLogger(__name__)
+
+class AILogWriter:
+    """
+    Background writer for AILog rows
+
+    record() only appends to a bounded in-memory queue, so logging a
+    decision costs the request path microseconds instead of an INSERT and
+    a commit. The writer loop flushes every batch_size records or every
+    flush_interval seconds, whichever comes first, with one executemany
+    INSERT per batch. Once the queue is past sample_threshold full, only
+    sample_rate of new records are kept; when it is full they are dropped.
+    Both are counted. Logs are best effort: a failed batch is counted and
+    discarded, never retried on the request path.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue: int = settings.AI_LOG_QUEUE_SIZE,
+        batch_size: int = settings.AI_LOG_BATCH_SIZE,
+        flush_interval: float = settings.AI_LOG_FLUSH_INTERVAL,
+        sample_threshold: float = settings.AI_LOG_SAMPLE_THRESHOLD,
+        sample_rate: float = settings.AI_LOG_OVERLOAD_SAMPLE_RATE
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_threshold = sample_threshold
+        self.sample_rate = sample_rate
+
+        self._queue: deque = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+        self.enqueued_total = 0
+        self.written_total = 0
+        self.sampled_out_total = 0
+        self.dropped_total = 0
+        self.failed_batches = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+
+    def record(
+        self,
+        event_type: str,
+        input_data: Dict[str, Any],
+        output_data: Dict[str, Any],
+        ai_model_used: str,
+        user_id: Optional[int] = None,
+        session_id: Optional[str] = None,
+        confidence_score: Optional[float] = None,
+        processing_time_ms: Optional[int] = None,
+        model_version: Optional[str] = None,
+        decision_factors: Optional[Dict[str, Any]] = None,
+        fallback_used: bool = False,
+        error_message: Optional[str] = None,
+        error_code: Optional[str] = None
+    ) -> bool:
+        """Queue one AILog row; False if it was shed under overload"""
+        depth = len(self._queue)
+        if depth >= self.max_queue:
+            self.dropped_total += 1
+            return False
+        if depth >= self.max_queue * self.sample_threshold and random.random() >= self.sample_rate:
+            self.sampled_out_total += 1
+            return False
+
+        now = datetime.utcnow()
+        # Every row carries every column so a batch is one executemany
+        self._queue.append({
+            "event_type": event_type,
+            "user_id": user_id,
+            "session_id": session_id,
+            "input_data": input_data,
+            "output_data": output_data,
+            "confidence_score": confidence_score,
+            "processing_time_ms": processing_time_ms,
+            "ai_model_used": ai_model_used,
+            "model_version": model_version,
+            "decision_factors": decision_factors,
+            "fallback_used": fallback_used,
+            "error_occurred": error_message is not None,
+            "error_message": error_message,
+            "error_code": error_code,
+            "is_deleted": False,
+            "created_at": now,
+            "updated_at": now
+        })
+        self.enqueued_total += 1
+        if depth + 1 >= self.batch_size and not self._wakeup.is_set():
+            self._wake()
+        return True
+
+    def _wake(self):
+        if self._loop is not None:
+            try:
+                # record() may be called from a threadpool route
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Loop already closed
+                pass
+
+    def start(self):
+        """Start the writer loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer loop after writing whatever is still queued"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        while self._queue:
+            await self.flush_once()
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # Drain back-to-back while full batches are waiting
+            while self._queue:
+                await self.flush_once()
+                if len(self._queue) < self.batch_size:
+                    break
+
+    async def flush_once(self) -> int:
+        """Write up to one batch; returns the number of rows taken off the queue"""
+        rows = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not rows:
+            return 0
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._insert, rows)
+            self.written_total += len(rows)
+        except Exception as e:
+            self.failed_batches += 1
+            logger.warning("Dropped a batch of %d AI log rows: %s", len(rows), e)
+        self.batches += 1
+        self.last_batch_size = len(rows)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return len(rows)
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            # A list of parameter sets runs as a single executemany
+            db.execute(insert(AILog), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "enqueued_total": self.enqueued_total,
+            "written_total": self.written_total,
+            "sampled_out_total": self.sampled_out_total,
+            "dropped_total": self.dropped_total,
+            "failed_batches": self.failed_batches,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+# Global AI log writer
+ai_log_writer = AILogWriter()
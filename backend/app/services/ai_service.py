@@ -3,22 +3,38 @@ AI Service for Faredown Bargain Engine
 OpenAI-powered intelligent bargaining and pricing decisions
 """
 
-import openai
 import json
-import random
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
 from app.core.config import settings
 from app.models.bargain_models import BargainSession
 from app.models.user_models import User
-
-# Configure OpenAI
-openai.api_key = settings.OPENAI_API_KEY
+from app.services.ai_log_writer import ai_log_writer
+from app.services.acceptance_model import acceptance_models, choose_counter_price
+from app.services.bargain_messages import counter_offer_messages
+from app.services.demand_signals import demand_signals, market_of, travel_date_of
+from app.services.feature_store import feature_store
 
 logger = logging.getLogger(__name__)
 
+# Counter offers come from the strategy rules (and the active acceptance model) and message templates below, not the LLM
+COUNTER_OFFER_MODEL = "rules"
+
+# Share of the gap between max price and the user's offer each strategy gives up
+STRATEGY_FACTORS = {"aggressive": 0.6, "moderate": 0.4, "conservative": 0.2}
+
+# Profit margins (of the user's offer over net rate) that switch strategy
+STRATEGY_THRESHOLDS = {"first_conservative": 0.05, "first_aggressive": 0.15, "middle_conservative": 0.08}
+
+# Pseudo-count of default behavior blended into a user's observed rates
+BEHAVIOR_PRIOR_WEIGHT = 5
+
+# On the final attempt only this share of the room above min acceptable is kept
+FINAL_ATTEMPT_SQUEEZE = 0.3
+
 class AIBargainService:
     """AI-powered bargain decision service"""
     
@@ -27,45 +43,113 @@ class AIBargainService:
         self.strategies = ["aggressive", "moderate", "conservative"]
     
     async def analyze_user_behavior(self, user_id: int, item_data: Dict[str, Any]) -> Dict[str, float]:
-        """Analyze user behavior and return scoring metrics"""
+        """Score a user from their behavior features (bargain and booking history)"""
         
-        # In production, this would analyze:
-        # - User's booking history
-        # - Previous bargain attempts
-        # - Time of day/week patterns
-        # - Price sensitivity indicators
-        # - Market comparison data
+        features = feature_store.get(user_id)
         
-        # For now, return intelligent defaults with some variation
+        # Defaults for a new user; history pulls each score towards what it shows
         base_confidence = 0.7
         base_sensitivity = 0.5
         base_conversion = 0.6
         
-        # Add some intelligent variation based on item data
+        # Acceptance rate and discount sought, shrunk towards the defaults until there is enough history
+        conversion = (features.bargains_accepted + base_conversion * BEHAVIOR_PRIOR_WEIGHT) / \
+            (features.bargain_sessions + BEHAVIOR_PRIOR_WEIGHT)
+        if features.avg_discount_sought is not None:
+            observed_sensitivity = min(1.0, max(0.0, features.avg_discount_sought * 4))
+            sensitivity = (observed_sensitivity * features.bargain_offers + base_sensitivity * BEHAVIOR_PRIOR_WEIGHT) / \
+                (features.bargain_offers + BEHAVIOR_PRIOR_WEIGHT)
+        else:
+            sensitivity = base_sensitivity
+        
+        # Repeat customers convert more, recent ones most
+        days_since_booking = features.days_since_last_booking()
+        if days_since_booking is not None:
+            conversion += 0.1 if days_since_booking < 90 else 0.05
+        
+        # More history, more confidence in these scores
+        confidence = base_confidence + 0.2 * min(1.0, (features.bargain_sessions + features.bookings) / 20)
+        
+        # Adjust for the item
         if item_data.get("booking_type") == "flight":
             # Flights typically have less bargain flexibility
-            base_confidence -= 0.1
-            base_conversion -= 0.1
+            confidence -= 0.1
+            conversion -= 0.1
         
         if item_data.get("is_premium", False):
             # Premium items have different sensitivity
-            base_sensitivity -= 0.2
-            base_conversion += 0.1
+            sensitivity -= 0.2
+            conversion += 0.1
         
         return {
-            "confidence": max(0.1, min(1.0, base_confidence + random.uniform(-0.2, 0.2))),
-            "price_sensitivity": max(0.1, min(1.0, base_sensitivity + random.uniform(-0.3, 0.3))),
-            "conversion_probability": max(0.1, min(1.0, base_conversion + random.uniform(-0.2, 0.2)))
+            "confidence": round(max(0.1, min(1.0, confidence)), 4),
+            "price_sensitivity": round(max(0.1, min(1.0, sensitivity)), 4),
+            "conversion_probability": round(max(0.1, min(1.0, conversion)), 4)
         }
     
     async def generate_counter_offer(
         self, 
         session: BargainSession, 
         user_offer: float, 
-        attempt_number: int
+        attempt_number: int,
+        currency: str = "INR",
+        locale: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate AI counter offer based on bargain context"""
         
+        started = time.perf_counter()
+        decision_input = {
+            "user_offer": user_offer,
+            "attempt_number": attempt_number,
+            "max_attempts": session.max_attempts,
+            "net_rate": session.net_rate,
+            "final_price_range_min": session.final_price_range_min,
+            "final_price_range_max": session.final_price_range_max
+        }
+        try:
+            decision = await self._decide_counter_offer(session, user_offer, attempt_number, currency, locale)
+        except Exception as e:
+            self._log_decision(session, decision_input, {}, started, error=e)
+            raise
+        self._log_decision(session, decision_input, decision, started)
+        return decision
+    
+    def _log_decision(
+        self,
+        session: BargainSession,
+        decision_input: Dict[str, Any],
+        decision: Dict[str, Any],
+        started: float,
+        error: Optional[Exception] = None
+    ):
+        """Queue the decision for the ai_logs table (written in batches off the request path)"""
+        ai_log_writer.record(
+            event_type="bargain_decision",
+            user_id=session.user_id,
+            session_id=session.session_id,
+            input_data=decision_input,
+            output_data={
+                key: decision[key] for key in ("counter_price", "strategy", "message", "message_variant", "incentives") if key in decision
+            },
+            confidence_score=decision.get("confidence"),
+            processing_time_ms=round((time.perf_counter() - started) * 1000),
+            ai_model_used=COUNTER_OFFER_MODEL,
+            model_version=decision.get("model_version"),
+            decision_factors={
+                key: decision[key]
+                for key in ("profit_margin", "margin_analysis", "behavior_score", "acceptance_probability") if key in decision
+            } or None,
+            error_message=f"{type(error).__name__}: {error}"[:1000] if error else None
+        )
+    
+    async def _decide_counter_offer(
+        self,
+        session: BargainSession,
+        user_offer: float,
+        attempt_number: int,
+        currency: str = "INR",
+        locale: Optional[str] = None
+    ) -> Dict[str, Any]:
         # Calculate profit margins and constraints
         min_acceptable = session.final_price_range_min
         max_price = session.final_price_range_max
@@ -84,13 +168,32 @@ class AIBargainService:
             max_attempts=session.max_attempts
         )
         
+        # With an active acceptance model, pick the price (at most the rules' one) with the best expected margin
+        acceptance_probability, model_version = None, None
+        scorer = acceptance_models.scorer()
+        if scorer is not None:
+            counter_price, acceptance_probability = choose_counter_price(
+                scorer,
+                booking_type=session.booking_type,
+                net_rate=session.net_rate,
+                min_acceptable=min_acceptable,
+                max_price=max_price,
+                max_attempts=session.max_attempts,
+                user_offer=user_offer,
+                rule_price=counter_price,
+                attempt_number=attempt_number
+            )
+            model_version = scorer.version
+        
         # Generate AI message
-        ai_message = await self._generate_ai_message(
+        ai_message, message_variant = await self._generate_ai_message(
             user_offer=user_offer,
             counter_price=counter_price,
             strategy=strategy,
             attempt_number=attempt_number,
-            session=session
+            session=session,
+            currency=currency,
+            locale=locale
         )
         
         # Calculate incentives
@@ -105,6 +208,7 @@ class AIBargainService:
             "counter_price": round(counter_price, 2),
             "strategy": strategy,
             "message": ai_message,
+            "message_variant": message_variant,
             "incentives": incentives,
             "confidence": session.ai_confidence_score or 0.7,
             "profit_margin": round(profit_margin * 100, 2),
@@ -114,7 +218,9 @@ class AIBargainService:
                 "counter_offer_margin": round(((counter_price - session.net_rate) / session.net_rate) * 100, 2),
                 "min_acceptable_margin": round(((min_acceptable - session.net_rate) / session.net_rate) * 100, 2)
             },
-            "behavior_score": 0.8  # Based on user behavior analysis
+            "behavior_score": 0.8,  # Based on user behavior analysis
+            "acceptance_probability": round(acceptance_probability, 4) if acceptance_probability is not None else None,
+            "model_version": model_version
         }
     
     def _determine_strategy(self, attempt_number: int, profit_margin: float, max_attempts: int) -> str:
@@ -122,9 +228,9 @@ class AIBargainService:
         
         # First attempt - be moderate
         if attempt_number == 1:
-            if profit_margin < 0.05:  # Less than 5% margin
+            if profit_margin < STRATEGY_THRESHOLDS["first_conservative"]:
                 return "conservative"
-            elif profit_margin > 0.15:  # More than 15% margin
+            elif profit_margin > STRATEGY_THRESHOLDS["first_aggressive"]:
                 return "aggressive"
             else:
                 return "moderate"
@@ -135,7 +241,7 @@ class AIBargainService:
         
         # Middle attempts - adapt based on margin
         else:
-            if profit_margin < 0.08:
+            if profit_margin < STRATEGY_THRESHOLDS["middle_conservative"]:
                 return "conservative"
             else:
                 return "moderate"
@@ -151,16 +257,8 @@ class AIBargainService:
     ) -> float:
         """Calculate AI counter offer price"""
         
-        # Strategy-based counter offer calculation
-        if strategy == "aggressive":
-            # Move closer to user's offer
-            adjustment_factor = 0.6  # Move 60% towards user offer
-        elif strategy == "moderate":
-            # Moderate movement
-            adjustment_factor = 0.4  # Move 40% towards user offer
-        else:  # conservative
-            # Small movement
-            adjustment_factor = 0.2  # Move 20% towards user offer
+        # Strategy-based counter offer calculation: aggressive moves furthest towards the user's offer
+        adjustment_factor = STRATEGY_FACTORS.get(strategy, STRATEGY_FACTORS["conservative"])
         
         # Calculate base counter price
         price_difference = max_price - user_offer
@@ -171,7 +269,7 @@ class AIBargainService:
         
         # Final attempt should be more aggressive
         if attempt_number >= max_attempts - 1:
-            counter_price = min_acceptable + ((counter_price - min_acceptable) * 0.3)
+            counter_price = min_acceptable + ((counter_price - min_acceptable) * FINAL_ATTEMPT_SQUEEZE)
         
         return counter_price
     
@@ -181,45 +279,22 @@ class AIBargainService:
         counter_price: float,
         strategy: str,
         attempt_number: int,
-        session: BargainSession
-    ) -> str:
-        """Generate personalized AI message for counter offer"""
-        
-        savings = user_offer - counter_price
-        savings_percentage = (savings / user_offer) * 100
-        
-        # Strategy-based message templates
-        if strategy == "aggressive":
-            messages = [
-                f"Great offer! I can get you an even better deal at ₹{counter_price:,.0f} - that's ₹{savings:,.0f} in savings!",
-                f"You drive a hard bargain! How about ₹{counter_price:,.0f}? You'll save ₹{savings:,.0f} from your offer!",
-                f"I like your style! Let's meet at ₹{counter_price:,.0f} - you're saving {savings_percentage:.1f}% from your original offer!"
-            ]
-        elif strategy == "moderate":
-            messages = [
-                f"I can work with that! How about ₹{counter_price:,.0f}? This gives you great value while ensuring quality service.",
-                f"Let's find a middle ground at ₹{counter_price:,.0f} - you'll still save ₹{savings:,.0f}!",
-                f"I can offer you ₹{counter_price:,.0f} - this is a fantastic deal that works for both of us!"
-            ]
-        else:  # conservative
-            messages = [
-                f"I appreciate your offer! The best I can do is ₹{counter_price:,.0f} while maintaining our premium service quality.",
-                f"This is a popular choice! I can offer ₹{counter_price:,.0f} - this ensures you get the best experience.",
-                f"For this premium option, ₹{counter_price:,.0f} is the best available price I can secure for you."
-            ]
-        
-        # Add attempt-specific context
-        if attempt_number == 1:
-            return random.choice(messages)
-        elif attempt_number >= session.max_attempts - 1:
-            final_messages = [
-                f"This is my final offer: ₹{counter_price:,.0f}. You're getting an incredible deal - save ₹{savings:,.0f}!",
-                f"Last chance for this amazing price: ₹{counter_price:,.0f}! Don't miss out on saving ₹{savings:,.0f}!",
-                f"Final offer: ₹{counter_price:,.0f}. This is the absolute best price I can secure for you!"
-            ]
-            return random.choice(final_messages)
-        else:
-            return random.choice(messages) + f" (Attempt {attempt_number} of {session.max_attempts})"
+        session: BargainSession,
+        currency: str = "INR",
+        locale: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """(message, template variant) for the counter offer, priced in the user's currency"""
+        return await counter_offer_messages.render(
+            strategy=strategy,
+            counter_price=counter_price,
+            list_price=session.base_price or session.final_price_range_max,
+            attempt_number=attempt_number,
+            max_attempts=session.max_attempts,
+            session_id=session.session_id,
+            booking_type=session.booking_type,
+            currency=currency,
+            locale=locale
+        )
     
     def _generate_incentives(self, strategy: str, attempt_number: int, session: BargainSession) -> Optional[Dict[str, Any]]:
         """Generate additional incentives based on strategy"""
@@ -255,25 +330,32 @@ class AIBargainService:
         
         return " | ".join(reasoning_parts)
 
-    async def generate_dynamic_pricing(self, item_data: Dict[str, Any]) -> Dict[str, float]:
-        """Generate dynamic pricing suggestions"""
-        
-        # This would integrate with real market data APIs
-        # For now, return intelligent suggestions
+    async def generate_dynamic_pricing(self, item_data: Dict[str, Any], booking_type: Optional[str] = None) -> Dict[str, Any]:
+        """Suggest a price from the item's demand signals (recent vs baseline searches, bargains, bookings)"""
         
         base_price = item_data.get("base_price", 1000)
+        booking_type = booking_type or item_data.get("booking_type", "flight")
+        
+        quote = demand_signals.quote(
+            booking_type,
+            market=market_of(booking_type, item_data),
+            travel_date=travel_date_of(item_data),
+            item_id=item_data.get("item_id") or item_data.get("id")
+        )
+        demand_factor = quote["multiplier"]
         
-        # Market factors simulation
-        demand_factor = random.uniform(0.8, 1.2)  # Market demand
-        seasonal_factor = random.uniform(0.9, 1.1)  # Seasonal pricing
-        competitor_factor = random.uniform(0.95, 1.05)  # Competitor analysis
+        # No seasonal or competitor data source yet; kept neutral in the response
+        seasonal_factor = 1.0
+        competitor_factor = 1.0
         
         suggested_price = base_price * demand_factor * seasonal_factor * competitor_factor
         
         return {
             "suggested_price": round(suggested_price, 2),
-            "demand_factor": round(demand_factor, 2),
-            "seasonal_factor": round(seasonal_factor, 2),
-            "competitor_factor": round(competitor_factor, 2),
-            "confidence_score": 0.85
+            "demand_factor": round(demand_factor, 4),
+            "seasonal_factor": seasonal_factor,
+            "competitor_factor": competitor_factor,
+            "confidence_score": round(quote["confidence"], 4),
+            "date_bucket": quote["date_bucket"],
+            "demand_signals": quote["signals"]
         }
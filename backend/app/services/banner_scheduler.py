@@ -0,0 +1,176 @@
+"""
+Banner Scheduler for Faredown
+Precomputed timeline of banner activation windows, looked up by binary search
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from bisect import bisect_right
+from datetime import datetime
+import logging
+import threading
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.cms_models import Banner
+
+logger = logging.getLogger(__name__)
+
+# Built-in banners served until the banners table is populated
+DEFAULT_BANNERS = [
+    {
+        "id": 1,
+        "title": "Summer Sale",
+        "description": "Up to 50% off on flights",
+        "image_url": "https://example.com/banner1.jpg",
+        "link_url": "/flights",
+        "is_active": True
+    }
+]
+
+DEFAULT_POSITION = "hero"
+
+class ScheduledBanner:
+    """A banner's response fields plus the window it is shown in"""
+
+    __slots__ = ("payload", "position", "valid_from", "valid_until")
+
+    def __init__(self, payload: Dict[str, Any], position: str, valid_from: Optional[datetime], valid_until: Optional[datetime]):
+        self.payload = payload
+        self.position = position
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+
+    def shown_at(self, moment: Optional[datetime]) -> bool:
+        """Whether the banner is live from moment on (None means before every boundary)"""
+        if moment is None:
+            return self.valid_from is None
+        return (self.valid_from is None or self.valid_from <= moment) and (self.valid_until is None or self.valid_until > moment)
+
+class BannerTimeline:
+    """
+    Every valid_from/valid_until of the live banners, sorted, with the
+    banner set of each interval between them precomputed
+
+    Segment i covers [boundaries[i-1], boundaries[i]); segment 0 is
+    everything before the first boundary. Finding the banners for a time is
+    one bisect plus a dict lookup.
+    """
+
+    __slots__ = ("version", "built_at", "source", "boundaries", "segments", "positions")
+
+    def __init__(self, version: int, banners: List[ScheduledBanner], source: str):
+        self.version = version
+        self.built_at = datetime.utcnow()
+        self.source = source
+        self.boundaries = sorted({
+            moment for banner in banners
+            for moment in (banner.valid_from, banner.valid_until) if moment is not None
+        })
+        self.positions = tuple(sorted({banner.position for banner in banners}))
+
+        # Banners arrive sorted by position and order_index, so each segment is too
+        self.segments: List[Dict[Optional[str], Tuple[Dict[str, Any], ...]]] = []
+        for start in [None, *self.boundaries]:
+            live = [banner for banner in banners if banner.shown_at(start)]
+            segment = {None: tuple(banner.payload for banner in live)}
+            for position in self.positions:
+                segment[position] = tuple(banner.payload for banner in live if banner.position == position)
+            self.segments.append(segment)
+
+    def active(self, position: Optional[str] = None, at: Optional[datetime] = None) -> Tuple[Dict[str, Any], ...]:
+        """Banners shown at time at (default now), for one position or all of them"""
+        segment = self.segments[bisect_right(self.boundaries, at or datetime.utcnow())]
+        return segment.get(position, ())
+
+    def next_boundary(self, at: Optional[datetime] = None) -> Optional[datetime]:
+        """First time after at when the banner set changes, if any"""
+        index = bisect_right(self.boundaries, at or datetime.utcnow())
+        return self.boundaries[index] if index < len(self.boundaries) else None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "built_at": self.built_at.isoformat(),
+            "source": self.source,
+            "positions": list(self.positions),
+            "boundaries": len(self.boundaries),
+            "next_boundary": (lambda moment: moment.isoformat() if moment else None)(self.next_boundary())
+        }
+
+def load_banners(db) -> List[ScheduledBanner]:
+    """Active, non-deleted banners in display order"""
+    rows = db.execute(
+        select(Banner)
+        .where(Banner.is_active.is_(True), Banner.is_deleted.is_(False))
+        .order_by(Banner.position, Banner.order_index, Banner.id)
+    ).scalars().all()
+    return [
+        ScheduledBanner(
+            {
+                "id": row.id,
+                "title": row.title,
+                "description": row.description,
+                "image_url": row.image_url,
+                "link_url": row.link_url,
+                "position": row.position,
+                "order_index": row.order_index,
+                "valid_from": row.valid_from.isoformat() if row.valid_from else None,
+                "valid_until": row.valid_until.isoformat() if row.valid_until else None,
+                "is_active": row.is_active
+            },
+            row.position, row.valid_from, row.valid_until
+        )
+        for row in rows
+    ]
+
+class BannerScheduler:
+    """
+    Holder for the current BannerTimeline
+
+    Built on first use and rebuilt after invalidate(), which the content
+    cache calls whenever it purges banners (commits touching the banners
+    table, or a change noticed in another process). Crossing a boundary
+    needs no rebuild: the next segment is already in the timeline.
+    """
+
+    def __init__(self):
+        self._timeline: Optional[BannerTimeline] = None
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def invalidate(self):
+        self._timeline = None
+
+    def timeline(self) -> BannerTimeline:
+        timeline = self._timeline
+        if timeline is not None:
+            return timeline
+        with self._lock:
+            if self._timeline is None:
+                self._timeline = self._build()
+            return self._timeline
+
+    def _build(self) -> BannerTimeline:
+        self._version += 1
+        db = SessionLocal()
+        try:
+            banners = load_banners(db)
+            source = "database"
+            if not banners and not db.execute(select(Banner.id).limit(1)).first():
+                banners = [ScheduledBanner(banner, DEFAULT_POSITION, None, None) for banner in DEFAULT_BANNERS]
+                source = "defaults"
+        finally:
+            db.close()
+        timeline = BannerTimeline(self._version, banners, source)
+        logger.info("Banner timeline %d: %d boundaries across %s", timeline.version, len(timeline.boundaries), ", ".join(timeline.positions))
+        return timeline
+
+    def active(self, position: Optional[str] = None, at: Optional[datetime] = None) -> Tuple[Dict[str, Any], ...]:
+        return self.timeline().active(position, at)
+
+    def next_boundary(self, at: Optional[datetime] = None) -> Optional[datetime]:
+        return self.timeline().next_boundary(at)
+
+# Global banner scheduler
+banner_scheduler = BannerScheduler()
@@ -0,0 +1,56 @@
+"""
+Bargain Session Cache for Faredown
+In-process cache of accepted bargain prices for the booking path
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import threading
+import time
+
+class AcceptedBargain(NamedTuple):
+    """Pricing agreed in an accepted bargain session"""
+    user_id: int
+    booking_type: str
+    base_price: float
+    agreed_price: float
+
+class BargainPriceCache:
+    """
+    Bounded LRU cache of accepted bargain sessions
+
+    Accepted sessions never change price again (accepting a counter on an
+    accepted session returns the existing agreement), so entries can be
+    served without re-reading bargain_sessions. Entries expire after
+    ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id: str, bargain: AcceptedBargain):
+        """Remember the agreed pricing for an accepted session"""
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + self.ttl_seconds, bargain)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[AcceptedBargain]:
+        """Return the cached pricing or None if unknown/expired"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            expires_at, bargain = entry
+            if expires_at < time.monotonic():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return bargain
+
+# Shared by the bargain (writer) and booking (reader) routers
+bargain_price_cache = BargainPriceCache()
@@ -0,0 +1,341 @@
+"""
+Counter-Offer Messages for Faredown
+Precompiled message templates, currency formatting and deterministic variant selection
+"""
+
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+import asyncio
+import bisect
+import logging
+import string
+import time
+import zlib
+
+from app.core.config import settings
+from app.services.llm_gateway import LLMGateway, llm_gateway
+from app.services.reference_data import reference_data
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("opening", "middle", "final")
+
+# Fields a template may use; all are filled on every render
+FIELDS = {"price", "savings", "savings_pct", "attempt", "max_attempts"}
+
+# Counter prices (INR) bounding the bands LLM messages are cached by
+PRICE_BANDS = (5000, 15000, 50000, 150000)
+
+DEFAULT_LOCALE = "en"
+
+# (strategy, phase, booking_type or "*", locale) -> variants; each variant is (id, template)
+TEMPLATES: Dict[Tuple[str, str, str, str], List[Tuple[str, str]]] = {
+    ("aggressive", "opening", "*", "en"): [
+        ("agg-open-1", "Great offer! I can get you an even better deal at {price} - that's {savings} off the listed price!"),
+        ("agg-open-2", "You drive a hard bargain! How about {price}? You'll save {savings} on the listed price!"),
+        ("agg-open-3", "I like your style! Let's meet at {price} - that's {savings_pct} off the listed price!"),
+        ("agg-open-4", "Great offer! I can meet you at {price} - that's the best deal on this booking right now."),
+    ],
+    ("moderate", "opening", "*", "en"): [
+        ("mod-open-1", "I can work with that! How about {price}? This gives you great value while ensuring quality service."),
+        ("mod-open-2", "Let's find a middle ground at {price} - you'll still save {savings}!"),
+        ("mod-open-3", "I can offer you {price} - this is a fantastic deal that works for both of us!"),
+    ],
+    ("conservative", "opening", "*", "en"): [
+        ("con-open-1", "I appreciate your offer! The best I can do is {price} while maintaining our premium service quality."),
+        ("con-open-2", "This is a popular choice! I can offer {price} - this ensures you get the best experience."),
+        ("con-open-3", "For this premium option, {price} is the best available price I can secure for you."),
+    ],
+    ("conservative", "opening", "flight", "en"): [
+        ("con-open-flight-1", "I appreciate your offer! The best I can do on this flight is {price}."),
+        ("con-open-flight-2", "Seats on this flight are filling up - {price} is the best fare I can secure for you."),
+    ],
+    ("conservative", "opening", "hotel", "en"): [
+        ("con-open-hotel-1", "I appreciate your offer! The best I can do for this room is {price}."),
+        ("con-open-hotel-2", "This is a popular property - {price} is the best rate I can secure for your stay."),
+    ],
+    ("aggressive", "middle", "*", "en"): [
+        ("agg-mid-1", "Let's close the gap - {price} saves you {savings}! (Attempt {attempt} of {max_attempts})"),
+        ("agg-mid-2", "I like your style! How about {price}? That's {savings_pct} off. (Attempt {attempt} of {max_attempts})"),
+        ("agg-mid-3", "You drive a hard bargain! Let's meet at {price}. (Attempt {attempt} of {max_attempts})"),
+    ],
+    ("moderate", "middle", "*", "en"): [
+        ("mod-mid-1", "We're getting closer! How about {price}? (Attempt {attempt} of {max_attempts})"),
+        ("mod-mid-2", "Let's find a middle ground at {price} - you'll still save {savings}! (Attempt {attempt} of {max_attempts})"),
+    ],
+    ("conservative", "middle", "*", "en"): [
+        ("con-mid-1", "I hear you, but {price} is as low as I can go right now. (Attempt {attempt} of {max_attempts})"),
+        ("con-mid-2", "I can offer {price} - this ensures you get the best experience. (Attempt {attempt} of {max_attempts})"),
+    ],
+    ("*", "final", "*", "en"): [
+        ("final-1", "This is my final offer: {price}. You're getting an incredible deal - save {savings}!"),
+        ("final-2", "Last chance for this amazing price: {price}! Don't miss out on saving {savings}!"),
+        ("final-3", "Final offer: {price}. This is the absolute best price I can secure for you!"),
+    ],
+}
+
+class MessageTemplate:
+    """A validated template; render is its bound str.format"""
+
+    __slots__ = ("variant", "text", "fields", "render")
+
+    def __init__(self, variant: str, text: str):
+        fields = {name for _, name, _, _ in string.Formatter().parse(text) if name is not None}
+        unknown = fields - FIELDS
+        if unknown or "price" not in fields:
+            raise ValueError(f"Template {variant} must use {{price}} and only {sorted(FIELDS)}, got {sorted(fields)}")
+        self.variant = variant
+        self.text = text
+        self.fields = fields
+        self.render = text.format
+
+def compile_templates(
+    templates: Dict[Tuple[str, str, str, str], List[Tuple[str, str]]]
+) -> Dict[Tuple[str, str, str, str], Tuple[MessageTemplate, ...]]:
+    """
+    Validate every template and resolve the fallback chain up front
+
+    The result has an entry for every (strategy, phase, booking_type,
+    locale) the sets mention, with "*" standing in for any booking type;
+    a lookup is one dict access. Entries fall back from the booking type
+    to "*", then from the strategy to "*", then to DEFAULT_LOCALE.
+    """
+    compiled = {
+        key: tuple(MessageTemplate(variant, text) for variant, text in variants)
+        for key, variants in templates.items()
+    }
+    strategies = {key[0] for key in compiled} - {"*"}
+    booking_types = {key[2] for key in compiled}
+    locales = {key[3] for key in compiled}
+    resolved = {}
+    for locale in locales:
+        for phase in PHASES:
+            for strategy in strategies:
+                for booking_type in booking_types:
+                    for candidate in (
+                        (strategy, phase, booking_type, locale),
+                        (strategy, phase, "*", locale),
+                        ("*", phase, booking_type, locale),
+                        ("*", phase, "*", locale),
+                        (strategy, phase, booking_type, DEFAULT_LOCALE),
+                        (strategy, phase, "*", DEFAULT_LOCALE),
+                        ("*", phase, booking_type, DEFAULT_LOCALE),
+                        ("*", phase, "*", DEFAULT_LOCALE),
+                    ):
+                        if candidate in compiled:
+                            resolved[(strategy, phase, booking_type, locale)] = compiled[candidate]
+                            break
+    if DEFAULT_LOCALE not in locales or any(
+        (strategy, phase, "*", DEFAULT_LOCALE) not in resolved for strategy in strategies for phase in PHASES
+    ):
+        raise ValueError(f"Templates must cover every strategy and phase in locale {DEFAULT_LOCALE}")
+    return resolved
+
+COMPILED_TEMPLATES = compile_templates(TEMPLATES)
+
+def attempt_phase(attempt_number: int, max_attempts: int) -> str:
+    if attempt_number == 1:
+        return "opening"
+    return "final" if attempt_number >= max_attempts - 1 else "middle"
+
+def price_band(amount_inr: float) -> int:
+    return bisect.bisect_right(PRICE_BANDS, amount_inr)
+
+def group_digits(whole: int, indian: bool) -> str:
+    """1234567 -> 1,234,567 (or 12,34,567 in the Indian system)"""
+    if not indian or whole < 100000:
+        return f"{whole:,}"
+    head, tail = str(whole // 1000), f"{whole % 1000:03d}"
+    groups = []
+    while len(head) > 2:
+        groups.append(head[-2:])
+        head = head[:-2]
+    return ",".join([head] + groups[::-1] + [tail])
+
+_money_formats: Dict[Tuple[int, str], Tuple[str, float, bool]] = {}
+
+def money_format(currency: str) -> Tuple[str, float, bool]:
+    """(symbol, INR per unit, Indian grouping) for a currency in the current reference snapshot"""
+    snapshot = reference_data.get()
+    found = _money_formats.get((snapshot.version, currency))
+    if found is None:
+        details = snapshot.currencies.get(currency) or snapshot.currencies.get("INR")
+        if details is None:
+            found = ("₹", 1.0, True)
+        else:
+            found = (details["symbol"], details["exchange_rate"] or 1.0, details["code"] == "INR")
+        if len(_money_formats) > 1000:
+            _money_formats.clear()
+        _money_formats[(snapshot.version, currency)] = found
+    return found
+
+def format_money(amount_inr: float, currency: str = "INR") -> str:
+    """An INR amount in the user's currency, e.g. ₹1,24,500 or $1,500"""
+    symbol, rate, indian = money_format(currency)
+    whole = int(round(abs(amount_inr) / rate))
+    return f"{'-' if amount_inr < 0 else ''}{symbol}{group_digits(whole, indian)}"
+
+def resolve_locale(locale: Optional[str], locales: frozenset) -> str:
+    """Exact locale, else its language ("hi-IN" -> "hi"), else DEFAULT_LOCALE"""
+    if locale in locales:
+        return locale
+    language = (locale or "").split("-")[0].split("_")[0].lower()
+    return language if language in locales else DEFAULT_LOCALE
+
+# Async callable (strategy, phase, price band, locale) -> template text or None
+TemplateSource = Callable[[str, str, int, str], Awaitable[Optional[str]]]
+
+class CounterOfferMessages:
+    """
+    Renders counter-offer messages from the precompiled template sets
+
+    The variant is picked by a stable hash of the session, attempt and
+    BARGAIN_MESSAGE_EXPERIMENT_SALT, so the same attempt always gets the
+    same message and changing the salt reshuffles the A/B split. Prices
+    are formatted in the user's preferred currency.
+
+    With BARGAIN_MESSAGE_LLM on and a template source configured, an LLM
+    written template for (strategy, price band, locale) is used when one
+    is cached. Otherwise the fetch runs in the background for at most
+    BARGAIN_MESSAGE_LLM_BUDGET seconds of the request's time; a late
+    answer still fills the cache for the next counter offer, and the
+    request gets the precompiled template.
+    """
+
+    def __init__(self, templates=COMPILED_TEMPLATES, template_source: Optional[TemplateSource] = None):
+        self.templates = templates
+        self.locales = frozenset(key[3] for key in templates)
+        self.template_source = template_source
+        self._llm_cache: Dict[Tuple[str, str, int, str], Tuple[float, Optional[MessageTemplate]]] = {}
+        self._inflight: Dict[Tuple[str, str, int, str], asyncio.Task] = {}
+        self.rendered = 0
+        self.llm_hits = 0
+        self.llm_fetches = 0
+        self.llm_timeouts = 0
+        self.llm_failures = 0
+
+    def select(self, variants: Tuple[MessageTemplate, ...], session_id: str, attempt_number: int) -> MessageTemplate:
+        key = f"{settings.BARGAIN_MESSAGE_EXPERIMENT_SALT}:{session_id}:{attempt_number}"
+        return variants[zlib.crc32(key.encode()) % len(variants)]
+
+    def variants(self, strategy: str, phase: str, booking_type: str, locale: str) -> Tuple[MessageTemplate, ...]:
+        templates = self.templates
+        return (
+            templates.get((strategy, phase, booking_type, locale))
+            or templates.get((strategy, phase, "*", locale))
+            or templates[("moderate", phase, "*", DEFAULT_LOCALE)]
+        )
+
+    async def render(
+        self,
+        strategy: str,
+        counter_price: float,
+        list_price: float,
+        attempt_number: int,
+        max_attempts: int,
+        session_id: str,
+        booking_type: str = "*",
+        currency: str = "INR",
+        locale: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """(message, variant id) for one counter offer; prices are in INR"""
+        locale = resolve_locale(locale, self.locales)
+        phase = attempt_phase(attempt_number, max_attempts)
+        savings = max(0.0, list_price - counter_price)
+
+        # Don't boast about saving nothing when the counter is at the listed price
+        no_savings = savings < 1
+
+        def quotes_savings(template: MessageTemplate) -> bool:
+            return "savings" in template.fields or "savings_pct" in template.fields
+
+        template = None
+        if settings.BARGAIN_MESSAGE_LLM and self.template_source is not None:
+            template = await self._llm_template(strategy, phase, price_band(counter_price), locale)
+            if template is not None and no_savings and quotes_savings(template):
+                template = None
+        if template is None:
+            variants = self.variants(strategy, phase, booking_type, locale)
+            if no_savings:
+                variants = tuple(v for v in variants if not quotes_savings(v)) or variants
+            template = self.select(variants, session_id, attempt_number)
+
+        self.rendered += 1
+        message = template.render(
+            price=format_money(counter_price, currency),
+            savings=format_money(savings, currency),
+            savings_pct=f"{savings / list_price * 100:.1f}%" if list_price else "0.0%",
+            attempt=attempt_number,
+            max_attempts=max_attempts
+        )
+        return message, template.variant
+
+    async def _llm_template(self, strategy: str, phase: str, band: int, locale: str) -> Optional[MessageTemplate]:
+        key = (strategy, phase, band, locale)
+        cached = self._llm_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < settings.BARGAIN_MESSAGE_LLM_CACHE_TTL:
+            self.llm_hits += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._fetch(key))
+        try:
+            # shield: a timeout abandons the wait, not the fetch
+            return await asyncio.wait_for(asyncio.shield(task), settings.BARGAIN_MESSAGE_LLM_BUDGET)
+        except asyncio.TimeoutError:
+            self.llm_timeouts += 1
+            return None
+
+    async def _fetch(self, key: Tuple[str, str, int, str]) -> Optional[MessageTemplate]:
+        strategy, phase, band, locale = key
+        self.llm_fetches += 1
+        template = None
+        try:
+            text = await self.template_source(strategy, phase, band, locale)
+            if text:
+                template = MessageTemplate(f"llm:{strategy}:{phase}:{band}:{locale}", text.strip())
+        except Exception as e:
+            self.llm_failures += 1
+            logger.warning("LLM counter-offer template for %s unavailable: %s", key, e)
+        finally:
+            self._inflight.pop(key, None)
+        # Failures are cached too, so a broken source isn't retried on every counter offer
+        self._llm_cache[key] = (time.monotonic(), template)
+        return template
+
+    def clear(self):
+        self._llm_cache.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "template_sets": len(self.templates),
+            "locales": sorted(self.locales),
+            "experiment_salt": settings.BARGAIN_MESSAGE_EXPERIMENT_SALT,
+            "rendered": self.rendered,
+            "llm_enabled": settings.BARGAIN_MESSAGE_LLM and self.template_source is not None,
+            "llm_cached": sum(1 for _, template in self._llm_cache.values() if template is not None),
+            "llm_hits": self.llm_hits,
+            "llm_fetches": self.llm_fetches,
+            "llm_timeouts": self.llm_timeouts,
+            "llm_failures": self.llm_failures
+        }
+
+async def openai_template(strategy: str, phase: str, band: int, locale: str, gateway: Optional[LLMGateway] = None) -> Optional[str]:
+    """Ask the LLM for a one-sentence template with {price} and {savings}; None if it can't answer"""
+    bounds = (0,) + PRICE_BANDS
+    around = f"above ₹{bounds[band]:,}" if band == len(PRICE_BANDS) else f"₹{bounds[band]:,} to ₹{bounds[band + 1]:,}"
+    prompt = (
+        f"Write one short, friendly sentence a travel booking assistant sends with a {strategy} counter offer "
+        f"({phase} round of haggling) for a booking priced around {around}, in language '{locale}'. "
+        "Use the literal placeholders {price} for the counter price and {savings} for the saving; "
+        "no other braces, no quotes."
+    )
+    result = await (gateway or llm_gateway).complete(
+        [{"role": "user", "content": prompt}],
+        max_tokens=60,
+        cache_key=("counter_offer_template", strategy, phase, band, locale)
+    )
+    return result.text
+
+# Global counter-offer message renderer
+counter_offer_messages = CounterOfferMessages(template_source=openai_template if llm_gateway.available else None)
@@ -0,0 +1,342 @@
+"""
+Bargain Strategy Replay for Faredown
+Re-prices historical bargain sessions under alternative counter-offer parameters
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import math
+import time
+
+from sqlalchemy import func, select
+
+from app.core.lazy_imports import lazy_module
+from app.database import SessionLocal, engine
+from app.models.bargain_models import BargainSession, BargainAttempt, CounterOffer, BargainAttemptType
+from app.services.ai_service import STRATEGY_FACTORS, STRATEGY_THRESHOLDS, FINAL_ATTEMPT_SQUEEZE
+
+np = lazy_module("numpy")
+
+# Grid columns, in the order they are stored in the parameter matrix
+PARAMETERS = ("aggressive", "moderate", "conservative", "final_squeeze")
+
+# Strategy codes index the first three parameter columns
+AGGRESSIVE, MODERATE, CONSERVATIVE = 0, 1, 2
+
+# Share of the way towards the last counter a user's next offer moves, if history has no repeat offers
+DEFAULT_CONCESSION = 0.3
+
+# Acceptance curve used when history is too thin (or one-sided) to fit one
+PRIOR_INTERCEPT = 0.5
+PRIOR_SLOPE = -40.0
+
+# Columns of a replay chunk, one row per user offer that got a counter
+COLUMNS = (
+    "session", "attempt_number", "offered_price", "net_rate", "min_acceptable",
+    "max_price", "max_attempts", "counter_price", "was_accepted"
+)
+
+def current_parameters() -> Dict[str, float]:
+    """The parameters AIBargainService prices with today"""
+    return {**STRATEGY_FACTORS, "final_squeeze": FINAL_ATTEMPT_SQUEEZE}
+
+def parameter_grid(**values: Sequence[float]) -> List[Dict[str, float]]:
+    """Every combination of the given values; parameters left out keep their current value"""
+    unknown = set(values) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown replay parameters: {', '.join(sorted(unknown))}")
+    current = current_parameters()
+    axes = [values.get(name) or [current[name]] for name in PARAMETERS]
+    return [dict(zip(PARAMETERS, combination)) for combination in product(*axes)]
+
+class AcceptanceCurve:
+    """
+    P(counter offer accepted) as a logistic function of its gap over the user's offer
+
+    Replaying a different counter price needs a guess at how the user would
+    have answered it; this is fitted on the counters history actually got.
+    """
+
+    def __init__(self, intercept: float = PRIOR_INTERCEPT, slope: float = PRIOR_SLOPE, samples: int = 0):
+        self.intercept = intercept
+        self.slope = slope
+        self.samples = samples
+
+    def probability(self, gap):
+        return 1.0 / (1.0 + np.exp(-(self.intercept + self.slope * gap)))
+
+    @classmethod
+    def fit(cls, gap, accepted, iterations: int = 25, ridge: float = 1.0) -> "AcceptanceCurve":
+        """Newton's method on the two coefficients; falls back to the prior if history can't identify them"""
+        gap = np.asarray(gap, dtype=np.float64)
+        accepted = np.asarray(accepted, dtype=np.float64)
+        if len(gap) < 50 or accepted.min() == accepted.max():
+            return cls(samples=len(gap))
+
+        # Fit on the standardized gap from a flat start, where Newton's method is stable
+        centre, scale = gap.mean(), gap.std() or 1.0
+        X = np.column_stack([np.ones_like(gap), (gap - centre) / scale])
+        rate = accepted.mean()
+        weights = np.array([math.log(rate / (1 - rate)), 0.0])
+        # A little ridge on the slope keeps perfectly separated history finite
+        penalty = ridge * np.diag([0.0, 1.0])
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-X @ weights))
+            gradient = X.T @ (accepted - p) - penalty @ weights
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + penalty
+            step = np.linalg.solve(hessian, gradient)
+            weights = weights + step
+            if np.abs(step).max() < 1e-8:
+                break
+        slope = weights[1] / scale
+        return cls(float(weights[0] - slope * centre), float(slope), len(gap))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"intercept": self.intercept, "slope": self.slope, "samples": self.samples}
+
+def stream(db, statement, batch_size: int):
+    """Execute on a server-side cursor and yield the rows a partition at a time"""
+    result = db.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    yield from result.partitions()
+
+def load_acceptance_history(db, batch_size: int = 10000) -> Tuple[Any, Any]:
+    """(gap, was_accepted) for every recorded counter offer"""
+    statement = select(
+        (CounterOffer.counter_price - CounterOffer.original_offer) / CounterOffer.original_offer,
+        CounterOffer.was_accepted
+    ).where(CounterOffer.original_offer > 0)
+    parts = [np.array(part, dtype=np.float64) for part in stream(db, statement, batch_size)]
+    history = np.concatenate(parts) if parts else np.empty((0, 2))
+    return history[:, 0], history[:, 1]
+
+def session_chunks(db, chunks: int) -> List[Tuple[int, int]]:
+    """Split the bargain session id range into [low, high) ranges of equal width"""
+    low, high = db.execute(select(func.min(BargainSession.id), func.max(BargainSession.id))).one()
+    if low is None:
+        return []
+    width = max(1, math.ceil((high + 1 - low) / chunks))
+    return [(start, min(start + width, high + 1)) for start in range(low, high + 1, width)]
+
+def load_chunk(db, bounds: Tuple[int, int], batch_size: int = 10000):
+    """User offers that got a counter in one session id range, ordered by session and attempt"""
+    low, high = bounds
+    statement = (
+        select(
+            BargainAttempt.session_id,
+            BargainAttempt.attempt_number,
+            BargainAttempt.offered_price,
+            BargainSession.net_rate,
+            BargainSession.final_price_range_min,
+            BargainSession.final_price_range_max,
+            BargainSession.max_attempts,
+            func.coalesce(CounterOffer.counter_price, 0.0),
+            func.coalesce(CounterOffer.was_accepted, False)
+        )
+        .join(BargainSession, BargainSession.id == BargainAttempt.session_id)
+        .outerjoin(CounterOffer, CounterOffer.attempt_id == BargainAttempt.id)
+        .where(
+            BargainAttempt.session_id >= low,
+            BargainAttempt.session_id < high,
+            BargainAttempt.attempt_type == BargainAttemptType.USER_OFFER,
+            BargainAttempt.is_accepted.is_(False)
+        )
+        .order_by(BargainAttempt.session_id, BargainAttempt.attempt_number)
+    )
+    parts = [np.array(part, dtype=np.float64) for part in stream(db, statement, batch_size)]
+    rows = np.concatenate(parts) if parts else np.empty((0, len(COLUMNS)))
+    chunk = {name: rows[:, position] for position, name in enumerate(COLUMNS)}
+    chunk["imputed"] = np.zeros(len(rows), dtype=bool)
+    return chunk
+
+def concession_rate(chunk) -> float:
+    """Median share of the gap to the last counter that users closed with their next offer"""
+    same_session = chunk["session"][1:] == chunk["session"][:-1]
+    gap = chunk["counter_price"][:-1] - chunk["offered_price"][:-1]
+    usable = same_session & (gap > 0)
+    if not usable.any():
+        return DEFAULT_CONCESSION
+    moved = (chunk["offered_price"][1:][usable] - chunk["offered_price"][:-1][usable]) / gap[usable]
+    return float(np.clip(np.median(moved), 0.0, 1.0))
+
+def complete_sessions(chunk, concession: Optional[float] = None):
+    """
+    Add the offers sessions that accepted early never got to make
+
+    History stops at the accepted counter, but a replayed counter may be
+    declined there. Each missing attempt up to max_attempts gets an offer
+    that closes `concession` of the gap to the previous counter (capped at
+    min acceptable), countered at today's parameters to seed the next one.
+    """
+    if concession is None:
+        concession = concession_rate(chunk)
+    last = np.ones(len(chunk["session"]), dtype=bool)
+    last[:-1] = chunk["session"][1:] != chunk["session"][:-1]
+    current = np.array([[current_parameters()[name] for name in PARAMETERS]])
+
+    pending = last & (chunk["was_accepted"] == 1) & (chunk["attempt_number"] < chunk["max_attempts"])
+    previous = {name: values[pending] for name, values in chunk.items()}
+    added = []
+    while len(previous["session"]):
+        rows = dict(previous)
+        rows["attempt_number"] = previous["attempt_number"] + 1
+        rows["offered_price"] = np.minimum(
+            previous["offered_price"] + concession * (previous["counter_price"] - previous["offered_price"]),
+            previous["min_acceptable"]
+        )
+        rows["was_accepted"] = np.zeros(len(rows["session"]))
+        rows["imputed"] = np.ones(len(rows["session"]), dtype=bool)
+        rows["counter_price"] = counter_prices(rows, current)[0]
+        added.append(rows)
+        more = rows["attempt_number"] < rows["max_attempts"]
+        previous = {name: values[more] for name, values in rows.items()}
+
+    if not added:
+        return chunk
+    merged = {name: np.concatenate([chunk[name]] + [rows[name] for rows in added]) for name in chunk}
+    order = np.lexsort((merged["attempt_number"], merged["session"]))
+    return {name: values[order] for name, values in merged.items()}
+
+def strategy_codes(chunk, thresholds: Dict[str, float] = STRATEGY_THRESHOLDS):
+    """AIBargainService._determine_strategy for every row at once"""
+    margin = (chunk["offered_price"] - chunk["net_rate"]) / chunk["net_rate"]
+    first = chunk["attempt_number"] == 1
+    final = chunk["attempt_number"] >= chunk["max_attempts"] - 1
+    first_code = np.where(
+        margin < thresholds["first_conservative"], CONSERVATIVE,
+        np.where(margin > thresholds["first_aggressive"], AGGRESSIVE, MODERATE)
+    )
+    middle_code = np.where(margin < thresholds["middle_conservative"], CONSERVATIVE, MODERATE)
+    return np.where(first, first_code, np.where(final, AGGRESSIVE, middle_code))
+
+def counter_prices(chunk, grid):
+    """AIBargainService._calculate_counter_price for every (parameter set, row) pair: shape (len(grid), rows)"""
+    offer, lowest, highest = chunk["offered_price"], chunk["min_acceptable"], chunk["max_price"]
+    factors = grid[:, strategy_codes(chunk)]
+    counter = np.maximum(highest - (highest - offer) * factors, lowest)
+    final = chunk["attempt_number"] >= chunk["max_attempts"] - 1
+    squeezed = lowest + (counter - lowest) * grid[:, 3:4]
+    return np.round(np.where(final, squeezed, counter), 2)
+
+def evaluate(chunk, grid, curve: AcceptanceCurve, block_elements: int = 4_000_000) -> Dict[str, Any]:
+    """
+    Expected outcomes of one chunk under every parameter set
+
+    A session ends at the first accepted counter, so counter i only counts
+    with the probability that every earlier counter in its session was
+    declined. Recorded user offers are replayed as they happened (they
+    answered the historical counters, not the replayed ones), and offers
+    imputed by complete_sessions fill in after an early acceptance.
+    """
+    rows = len(chunk["session"])
+    expected_accepted = np.zeros(len(grid))
+    expected_margin = np.zeros(len(grid))
+    if rows:
+        first = np.empty(rows, dtype=bool)
+        first[0] = True
+        first[1:] = chunk["session"][1:] != chunk["session"][:-1]
+        starts = np.flatnonzero(first)
+        group = np.cumsum(first) - 1
+        offer, net = chunk["offered_price"], chunk["net_rate"]
+
+        # Bounded (parameter sets x rows) blocks keep memory flat however big the grid is
+        step = max(1, block_elements // rows)
+        for start in range(0, len(grid), step):
+            block = slice(start, start + step)
+            counter = counter_prices(chunk, grid[block])
+            accept = np.minimum(curve.probability((counter - offer) / offer), 1 - 1e-12)
+            declined = np.log1p(-accept)
+            earlier = np.cumsum(declined, axis=1) - declined
+            reached = np.exp(earlier - earlier[:, starts][:, group])
+            converted = reached * accept
+            expected_accepted[block] = converted.sum(axis=1)
+            expected_margin[block] = (converted * (counter - net)).sum(axis=1)
+
+    accepted = chunk["was_accepted"] == 1
+    return {
+        "sessions": int(len(np.unique(chunk["session"]))),
+        "counters": int((~chunk["imputed"]).sum()),
+        "historical_accepted": int(accepted.sum()),
+        "historical_margin": float((chunk["counter_price"][accepted] - chunk["net_rate"][accepted]).sum()),
+        "expected_accepted": expected_accepted,
+        "expected_margin": expected_margin
+    }
+
+def _reset_engine():
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+def replay_chunk(bounds: Tuple[int, int], grid, curve: AcceptanceCurve, batch_size: int) -> Dict[str, Any]:
+    """Load and evaluate one session id range (runs in a pool worker)"""
+    db = SessionLocal()
+    try:
+        chunk = load_chunk(db, bounds, batch_size)
+    finally:
+        db.close()
+    return evaluate(complete_sessions(chunk), grid, curve)
+
+def replay(
+    grid: List[Dict[str, float]],
+    workers: int = 1,
+    chunks: Optional[int] = None,
+    curve: Optional[AcceptanceCurve] = None,
+    batch_size: int = 10000
+) -> Dict[str, Any]:
+    """
+    Replay every historical counter under each parameter set in grid
+
+    Sessions are partitioned into id ranges (by default four per worker)
+    and each range is streamed and evaluated in its own worker process;
+    only the per-parameter-set sums come back. Returns the totals plus one
+    result per parameter set, best expected margin first.
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if curve is None:
+            curve = AcceptanceCurve.fit(*load_acceptance_history(db, batch_size))
+        bounds = session_chunks(db, chunks or workers * 4)
+    finally:
+        db.close()
+
+    matrix = np.array([[params[name] for name in PARAMETERS] for params in grid], dtype=np.float64)
+    if workers > 1 and len(bounds) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_reset_engine) as pool:
+            results = list(pool.map(
+                replay_chunk, bounds, [matrix] * len(bounds), [curve] * len(bounds), [batch_size] * len(bounds)
+            ))
+    else:
+        results = [replay_chunk(chunk_bounds, matrix, curve, batch_size) for chunk_bounds in bounds]
+
+    sessions = sum(result["sessions"] for result in results)
+    expected_accepted = sum((result["expected_accepted"] for result in results), np.zeros(len(grid)))
+    expected_margin = sum((result["expected_margin"] for result in results), np.zeros(len(grid)))
+    historical_accepted = sum(result["historical_accepted"] for result in results)
+    ranked = sorted(
+        (
+            {
+                "parameters": params,
+                "expected_accepted": round(float(expected_accepted[position]), 2),
+                "expected_acceptance_rate": round(float(expected_accepted[position]) / sessions, 4) if sessions else 0.0,
+                "expected_margin": round(float(expected_margin[position]), 2),
+                "is_current": params == current_parameters()
+            }
+            for position, params in enumerate(grid)
+        ),
+        key=lambda result: result["expected_margin"],
+        reverse=True
+    )
+    return {
+        "sessions": sessions,
+        "counters": sum(result["counters"] for result in results),
+        "chunks": len(bounds),
+        "workers": workers,
+        "curve": curve.to_dict(),
+        "historical": {
+            "accepted": historical_accepted,
+            "acceptance_rate": round(historical_accepted / sessions, 4) if sessions else 0.0,
+            "margin": round(sum(result["historical_margin"] for result in results), 2)
+        },
+        "results": ranked,
+        "elapsed_s": round(time.perf_counter() - started, 3)
+    }
@@ -0,0 +1,233 @@
+"""
+Booking Service for Faredown
+Booking reference allocation and batched, idempotent booking writes
+"""
+
+from typing import Dict, Any, List, Optional
+import threading
+import time
+
+from sqlalchemy import case, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.bargain_models import BargainSession, BargainStatus
+from app.models.booking_models import (
+    Booking, BookingItem, BOOKING_REFERENCE_BLOCK_SIZE, booking_reference_seq
+)
+from app.services.bargain_cache import bargain_price_cache
+
+# Crockford base32 alphabet (no I, L, O, U) - unambiguous when read out over the phone
+BASE32_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+REFERENCE_PREFIX = "FD"
+REFERENCE_WIDTH = 10  # 32^10 ~ 1.1e15 references
+
+# Odd multiplier used to scatter consecutive sequence values over the whole
+# reference space, so references don't reveal booking volume. Multiplication
+# by an odd number is a bijection modulo 2^50, so references stay unique.
+_REFERENCE_SPACE = 32 ** REFERENCE_WIDTH
+_REFERENCE_MULTIPLIER = 0x2545F4914F6CD
+
+# Rounding slack when comparing the booking total with the agreed bargain price
+PRICE_TOLERANCE = 0.01
+
+def encode_reference(number: int) -> str:
+    """Encode a sequence number as a fixed-width booking reference"""
+    value = (number * _REFERENCE_MULTIPLIER) % _REFERENCE_SPACE
+    chars = []
+    for _ in range(REFERENCE_WIDTH):
+        value, remainder = divmod(value, 32)
+        chars.append(BASE32_ALPHABET[remainder])
+    return REFERENCE_PREFIX + "".join(reversed(chars))
+
+class BookingReferenceAllocator:
+    """
+    Collision-free booking reference generator
+
+    Reserves blocks of sequence numbers from the database sequence and hands
+    them out from memory, so most bookings need no extra round trip.
+    """
+
+    def __init__(self, block_size: int = BOOKING_REFERENCE_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+
+    def next_reference(self, db: Session) -> str:
+        """Return the next unused booking reference"""
+        with self._lock:
+            if self._next >= self._limit:
+                start = self._reserve_block(db)
+                self._next, self._limit = start, start + self.block_size
+            number = self._next
+            self._next += 1
+        return encode_reference(number)
+
+    def _reserve_block(self, db: Session) -> int:
+        """Reserve a new block and return its first number"""
+        if db.get_bind().dialect.name == "postgresql":
+            return db.execute(booking_reference_seq.next_value()).scalar_one()
+
+        # SQLite (development) has no sequences; seed blocks from the
+        # millisecond clock, which is unique for a single dev process
+        start = int(time.time() * 1000) * self.block_size
+        return max(start, self._limit)
+
+class BookingService:
+    """Service for writing bookings and their items"""
+
+    def __init__(self):
+        self.reference_allocator = BookingReferenceAllocator()
+
+    def find_by_idempotency_key(self, db: Session, user_id: int, idempotency_key: str):
+        """Return the booking previously created with this Idempotency-Key, if any"""
+        return db.execute(
+            select(
+                Booking.booking_reference,
+                Booking.status,
+                Booking.total_amount,
+                Booking.currency,
+                Booking.created_at
+            ).where(
+                Booking.user_id == user_id,
+                Booking.idempotency_key == idempotency_key
+            )
+        ).first()
+
+    def create_booking(
+        self,
+        db: Session,
+        booking_values: Dict[str, Any],
+        items: List[Dict[str, Any]],
+        idempotency_key: Optional[str] = None
+    ):
+        """
+        Insert a booking and all its items in one transaction
+
+        The booking row is inserted with RETURNING and the items with a single
+        executemany insert. Returns (booking, created): a row with
+        booking_reference, status, total_amount, currency and created_at, and
+        whether this call inserted it rather than finding it by
+        idempotency_key. The booking is None when the referenced bargain
+        session is not an accepted session of this user whose agreed price is
+        covered by the booking total.
+        """
+
+        if idempotency_key:
+            existing = self.find_by_idempotency_key(db, booking_values["user_id"], idempotency_key)
+            if existing:
+                return existing, False
+
+        booking_values = {
+            **booking_values,
+            "booking_reference": self.reference_allocator.next_reference(db),
+            "idempotency_key": idempotency_key
+        }
+
+        statement = self._booking_insert(booking_values)
+        if statement is None:
+            return None, False
+
+        try:
+            booking = db.execute(
+                statement.returning(
+                    Booking.id,
+                    Booking.booking_reference,
+                    Booking.status,
+                    Booking.total_amount,
+                    Booking.currency,
+                    Booking.created_at
+                )
+            ).first()
+
+            if booking is None:
+                db.rollback()
+                return None, False
+
+            if items:
+                db.execute(
+                    insert(BookingItem),
+                    [self._item_values(booking.id, item_data) for item_data in items]
+                )
+
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            # A concurrent retry with the same key won the race
+            if idempotency_key:
+                existing = self.find_by_idempotency_key(db, booking_values["user_id"], idempotency_key)
+                if existing:
+                    return existing, False
+            raise
+
+        return booking, True
+
+    def _booking_insert(self, booking_values: Dict[str, Any]):
+        """
+        Build the booking INSERT, resolving bargain pricing when linked
+
+        Accepted bargain prices come from the in-process cache when present.
+        Otherwise the bargain session is joined into the INSERT itself
+        (INSERT ... SELECT on the session_id index), so validating the agreed
+        price and writing the booking still take a single round trip.
+        Returns None when a cached bargain session rules the booking out.
+        """
+        bargain_session_id = booking_values.get("bargain_session_id")
+        if not bargain_session_id:
+            return insert(Booking).values(**booking_values)
+
+        total_amount = booking_values["total_amount"]
+        cached = bargain_price_cache.get(bargain_session_id)
+        if cached is not None:
+            if (
+                cached.user_id != booking_values["user_id"]
+                or cached.booking_type != booking_values["booking_type"]
+                or cached.agreed_price > total_amount + PRICE_TOLERANCE
+            ):
+                return None
+            savings = max(0.0, cached.base_price - cached.agreed_price)
+            return insert(Booking).values(
+                **booking_values,
+                bargain_savings=savings,
+                original_price=total_amount + savings
+            )
+
+        # Same floor as the cached path; case() rather than greatest() so SQLite works too
+        savings = case(
+            (BargainSession.base_price > BargainSession.agreed_price,
+             BargainSession.base_price - BargainSession.agreed_price),
+            else_=literal(0.0)
+        )
+        source = select(
+            *self._literals(booking_values),
+            savings,
+            literal(total_amount) + savings
+        ).where(
+            BargainSession.session_id == bargain_session_id,
+            BargainSession.user_id == booking_values["user_id"],
+            BargainSession.booking_type == booking_values["booking_type"],
+            BargainSession.status == BargainStatus.ACCEPTED,
+            BargainSession.agreed_price <= total_amount + PRICE_TOLERANCE
+        )
+        return insert(Booking).from_select(
+            list(booking_values) + ["bargain_savings", "original_price"], source
+        )
+
+    def _literals(self, booking_values: Dict[str, Any]):
+        """Typed SQL literals for booking values, in key order"""
+        columns = Booking.__table__.c
+        return [literal(value, columns[key].type) for key, value in booking_values.items()]
+
+    def _item_values(self, booking_id: int, item_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a request item onto booking_items columns"""
+        return {
+            "booking_id": booking_id,
+            "item_type": item_data.get("type", "unknown"),
+            "item_name": item_data.get("name", ""),
+            "item_description": item_data.get("description"),
+            "unit_price": item_data.get("unit_price", 0),
+            "quantity": item_data.get("quantity", 1),
+            "total_price": item_data.get("total_price", 0),
+            "item_data": item_data
+        }
@@ -0,0 +1,216 @@
+"""
+Bucketed Snapshots for Faredown
+Per-worker sketches in time buckets, periodically upserted to a snapshot table
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from sqlalchemy import select, insert, update, delete, and_, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# (scope, granularity, bucket index)
+Bucket = Tuple[str, str, int]
+
+class BucketedSnapshots:
+    """
+    Base for in-memory sketches that are shared across workers through the database
+
+    Events go into one sketch per scope (a stream or metric name),
+    granularity and time bucket. A worker only keeps the buckets it is
+    still filling; snapshot() upserts the changed ones as rows keyed by
+    (worker, scope, granularity, bucket_start) and drops rows past their
+    retention, and start()/stop() run it every snapshot_interval. Readers
+    combine every worker's rows in a window.
+
+    Subclasses set model, scope_column, scopes and granularities
+    ({granularity: (bucket seconds, buckets kept or None for
+    retention_days)}) and implement new_sketch(), dump() and load().
+    """
+
+    model = None
+    scope_column = "scope"
+    scopes: Tuple[str, ...] = ()
+    granularities: Dict[str, Tuple[int, Optional[int]]] = {}
+    name = "Snapshot"
+
+    def __init__(self, session_factory=SessionLocal, snapshot_interval: float = 60.0, retention_days: int = 30):
+        self.session_factory = session_factory
+        self.snapshot_interval = snapshot_interval
+        self.retention_days = retention_days
+
+        self._buckets: Dict[Bucket, Any] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[str] = None
+        self._worker_pid = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+        self.snapshots_written = 0
+        self.snapshot_failures = 0
+        self.last_snapshot_at: Optional[datetime] = None
+
+    def new_sketch(self):
+        raise NotImplementedError
+
+    def dump(self, sketch) -> Dict[str, Any]:
+        """Column values of a snapshot row holding sketch"""
+        raise NotImplementedError
+
+    def load(self, values: Dict[str, Any]):
+        """Sketch back from the values dump() returned"""
+        raise NotImplementedError
+
+    @property
+    def worker(self) -> str:
+        """Owner of this process's rows, regenerated after a fork so two processes never share one"""
+        if self._worker is None or self._worker_pid != os.getpid():
+            self._worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._worker_pid = os.getpid()
+        return self._worker
+
+    def _live(self, scope: str, at: float) -> List[Any]:
+        """The sketch of every granularity's bucket holding at, marked changed; call with _lock held"""
+        sketches = []
+        for granularity, (seconds, _) in self.granularities.items():
+            bucket = (scope, granularity, int(at // seconds))
+            sketch = self._buckets.get(bucket)
+            if sketch is None:
+                sketch = self._buckets[bucket] = self.new_sketch()
+            self._dirty.add(bucket)
+            sketches.append(sketch)
+        return sketches
+
+    def _bucket_start(self, index: int, seconds: int) -> datetime:
+        return datetime(1970, 1, 1) + timedelta(seconds=index * seconds)
+
+    def _in_window(self, scopes: Iterable[str], granularity: str, first: int, last: int):
+        """Filter for every worker's rows of the given scopes between buckets first and last"""
+        seconds = self.granularities[granularity][0]
+        return and_(
+            getattr(self.model, self.scope_column).in_(list(scopes)),
+            self.model.granularity == granularity,
+            self.model.bucket_start >= self._bucket_start(first, seconds),
+            self.model.bucket_start <= self._bucket_start(last, seconds)
+        )
+
+    def snapshot(self) -> int:
+        """Write every bucket changed since the last snapshot; returns rows written"""
+        now = time.time()
+        with self._lock:
+            changed = [(bucket, self.dump(self._buckets[bucket])) for bucket in self._dirty]
+            self._dirty.clear()
+            for bucket in list(self._buckets):
+                if bucket[2] < int(now // self.granularities[bucket[1]][0]):
+                    del self._buckets[bucket]
+        if not changed:
+            return 0
+
+        db = self.session_factory()
+        try:
+            self._write(db, self.worker, changed)
+            self._purge(db, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.snapshot_failures += 1
+            # A bucket still in memory holds everything dumped from it; closed ones are restored
+            with self._lock:
+                for bucket, values in changed:
+                    if bucket not in self._buckets:
+                        self._buckets[bucket] = self.load(values)
+                    self._dirty.add(bucket)
+            raise
+        finally:
+            db.close()
+        self.snapshots_written += len(changed)
+        self.last_snapshot_at = datetime.utcnow()
+        return len(changed)
+
+    def _write(self, db: Session, worker: str, changed: Iterable[Tuple[Bucket, Dict[str, Any]]]):
+        """Upsert one row per (worker, scope, granularity, bucket)"""
+        model, scope_column = self.model, getattr(self.model, self.scope_column)
+        values = {
+            (scope, granularity, self._bucket_start(index, self.granularities[granularity][0])): value
+            for (scope, granularity, index), value in changed
+        }
+        if not values:
+            return
+        existing = db.execute(
+            select(model.id, scope_column.label("scope"), model.granularity, model.bucket_start).where(
+                model.worker == worker,
+                scope_column.in_({scope for scope, _, _ in values}),
+                model.bucket_start.in_({bucket_start for _, _, bucket_start in values})
+            )
+        ).all()
+        updates = []
+        for row in existing:
+            value = values.pop((row.scope, row.granularity, row.bucket_start), None)
+            if value is not None:
+                updates.append({"id": row.id, **value})
+        if updates:
+            db.execute(update(model), updates)
+        if values:
+            db.execute(insert(model), [
+                {self.scope_column: scope, "granularity": granularity, "bucket_start": bucket_start, "worker": worker, **value}
+                for (scope, granularity, bucket_start), value in values.items()
+            ])
+
+    def _purge(self, db: Session, now: float):
+        """Delete this service's rows past their granularity's retention"""
+        cutoffs = []
+        for granularity, (seconds, kept) in self.granularities.items():
+            kept = kept if kept is not None else self.retention_days
+            cutoffs.append(and_(
+                self.model.granularity == granularity,
+                self.model.bucket_start < self._bucket_start(int(now // seconds) - kept, seconds)
+            ))
+        db.execute(delete(self.model).where(getattr(self.model, self.scope_column).in_(self.scopes), or_(*cutoffs)))
+
+    def start(self):
+        """Start the snapshot loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the snapshot loop after writing what is left"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.snapshot_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(self.snapshot)
+            except Exception as e:
+                logger.exception("%s snapshot failed: %s", self.name, e)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "worker": self.worker,
+            "buckets_in_memory": len(self._buckets),
+            "dirty_buckets": len(self._dirty),
+            "snapshots_written": self.snapshots_written,
+            "snapshot_failures": self.snapshot_failures,
+            "last_snapshot_at": self.last_snapshot_at.isoformat() if self.last_snapshot_at else None
+        }
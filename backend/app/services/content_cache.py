@@ -0,0 +1,426 @@
+"""
+Content Cache for Faredown
+Versioned, pre-serialized CMS responses (banners, destinations, pages) with ETags
+"""
+
+from typing import Dict, Any, Callable, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+from itertools import chain
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+from sqlalchemy import select, func, event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.database import SessionLocal
+from app.models.cms_models import CMSContent, Banner, Destination
+from app.services.banner_scheduler import banner_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Built-in content served until the CMS tables are populated
+DEFAULT_DESTINATIONS = [
+    {
+        "id": 1,
+        "name": "Dubai",
+        "country": "UAE",
+        "description": "Experience luxury and adventure",
+        "image_url": "https://example.com/dubai.jpg",
+        "featured": True
+    }
+]
+
+DEFAULT_PAGES = {
+    "about": {
+        "title": "About Faredown",
+        "content": "Faredown is the world's first AI-powered travel platform..."
+    },
+    "terms": {
+        "title": "Terms and Conditions",
+        "content": "These terms and conditions govern your use of Faredown..."
+    },
+    "privacy": {
+        "title": "Privacy Policy",
+        "content": "We respect your privacy and are committed to protecting..."
+    },
+}
+
+class ContentEntry:
+    """One cached response body with its validators"""
+
+    __slots__ = ("key", "body", "etag", "surrogate_keys", "version", "built_at", "starts_at", "expires_at")
+
+    def __init__(
+        self,
+        key: str,
+        payload: Any,
+        surrogate_keys: List[str],
+        version: int,
+        starts_at: Optional[datetime] = None,
+        expires_at: Optional[datetime] = None
+    ):
+        self.key = key
+        self.body = dumps(payload)
+        # Strong validator from the bytes, so every worker agrees on it
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.surrogate_keys = " ".join(surrogate_keys)
+        self.version = version
+        self.built_at = datetime.utcnow()
+        self.starts_at = starts_at
+        self.expires_at = expires_at
+
+    def fresh(self, now: datetime) -> bool:
+        return (self.starts_at is None or self.starts_at <= now) and (self.expires_at is None or now < self.expires_at)
+
+class PendingBuild:
+    """An in-flight build other readers of the same key wait for"""
+
+    __slots__ = ("done", "entry", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[ContentEntry] = None
+        self.error: Optional[BaseException] = None
+
+def page_key(page: str) -> str:
+    return f"page:{page}"
+
+def build_banners(db, key: str, version: int, at: Optional[datetime] = None) -> Optional[ContentEntry]:
+    """Banners shown at time at (default now), from the precomputed timeline"""
+    position = key.split(":", 1)[1] if ":" in key else None
+    timeline = banner_scheduler.timeline()
+    if position is not None and position not in timeline.positions:
+        return None
+    surrogate_keys = ["cms", "cms-banners"] + ([f"cms-banners-{position}"] if position else [])
+    return ContentEntry(
+        key, {"banners": list(timeline.active(position, at))}, surrogate_keys, version,
+        starts_at=at, expires_at=timeline.next_boundary(at)
+    )
+
+def build_destinations(db, key: str, version: int) -> ContentEntry:
+    rows = db.execute(
+        select(Destination)
+        .where(Destination.is_active.is_(True), Destination.is_deleted.is_(False))
+        .order_by(Destination.is_featured.desc(), Destination.name)
+    ).scalars().all()
+    destinations = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "country": row.country,
+            "description": row.description,
+            "image_url": row.image_url,
+            "featured": row.is_featured
+        }
+        for row in rows
+    ] or DEFAULT_DESTINATIONS
+    return ContentEntry(key, {"destinations": destinations}, ["cms", "cms-destinations"], version)
+
+def build_page(db, key: str, version: int) -> Optional[ContentEntry]:
+    page = key.split(":", 1)[1]
+    row = db.execute(
+        select(CMSContent).where(
+            CMSContent.page_key == page,
+            CMSContent.is_published.is_(True),
+            CMSContent.is_deleted.is_(False)
+        )
+    ).scalar_one_or_none()
+    if row is not None:
+        payload = {"title": row.title, "content": row.content}
+    elif page in DEFAULT_PAGES and not db.execute(select(func.count(CMSContent.id))).scalar():
+        payload = DEFAULT_PAGES[page]
+    else:
+        return None
+    return ContentEntry(key, payload, ["cms", "cms-page", f"cms-page-{page}"], version)
+
+BUILDERS: Dict[str, Callable[[Any, str, int], Optional[ContentEntry]]] = {
+    "banners": build_banners,
+    "destinations": build_destinations,
+    "page": build_page,
+}
+
+# Cache key family each table feeds
+MODEL_FAMILIES = {Banner: "banners", Destination: "destinations", CMSContent: "page"}
+
+class ContentCache:
+    """
+    Pre-serialized CMS responses keyed by "banners", "destinations", "page:<key>"
+
+    Entries are built on first read and kept until a commit touching their
+    table purges them (only the affected page for CMSContent row changes),
+    until their own expiry (banner schedule changes), or until a periodic
+    check notices the table changed in another process. Each purge bumps
+    the cache version.
+
+    Banner entries ("banners", "banners:<position>") expire at the next
+    schedule boundary; the background loop builds their successors a few
+    seconds ahead, so the swap at the boundary happens without a rebuild.
+
+    Builds run outside the cache lock, one per key at a time: concurrent
+    misses for a key wait for the build already in flight. Keys with no
+    content (unknown pages or banner positions) are remembered until the
+    next purge of their family, up to MISSING_KEYS_LIMIT of them.
+    """
+
+    MISSING_KEYS_LIMIT = 4096
+
+    def __init__(self):
+        self._entries: Dict[str, ContentEntry] = {}
+        self._upcoming: Dict[str, ContentEntry] = {}
+        self._missing: Set[str] = set()
+        self._building: Dict[str, PendingBuild] = {}
+        self._lock = threading.Lock()
+        self.version = 1
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.purged_surrogate_keys: List[str] = []
+        self.prebuilt = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = asyncio.Event()
+        self._rescheduled = asyncio.Event()
+
+    def get(self, key: str) -> Optional[ContentEntry]:
+        """Cached entry for key, building it if needed; None if there is no such content"""
+        self._check_tables()
+        now = datetime.utcnow()
+        entry = self._entries.get(key)
+        if entry is not None and not entry.fresh(now):
+            upcoming = self._upcoming.get(key)
+            entry = None
+            if upcoming is not None and upcoming.fresh(now):
+                with self._lock:
+                    # A purge may have dropped it since
+                    if self._upcoming.pop(key, None) is upcoming:
+                        self._entries[key] = entry = upcoming
+        if entry is not None or key in self._missing:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        with self._lock:
+            pending = self._building.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._building[key] = PendingBuild()
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.entry
+
+        try:
+            version = self.version
+            db = SessionLocal()
+            try:
+                entry = BUILDERS[key.split(":", 1)[0]](db, key, version)
+            finally:
+                db.close()
+            with self._lock:
+                # A purge during the build may have made it stale: serve it once, don't keep it
+                if self.version == version:
+                    if entry is not None:
+                        self._entries[key] = entry
+                    else:
+                        if len(self._missing) >= self.MISSING_KEYS_LIMIT:
+                            self._missing.clear()
+                        self._missing.add(key)
+            pending.entry = entry
+            return entry
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._building[key]
+            pending.done.set()
+
+    def purge(self, keys: Iterable[str] = (), families: Iterable[str] = ()):
+        """Drop the given keys and every key of the given families, then bump the version"""
+        keys, families = set(keys), set(families)
+        with self._lock:
+            dropped = [
+                entry for key, entry in self._entries.items()
+                if key in keys or key.split(":", 1)[0] in families
+            ]
+            for entry in dropped:
+                del self._entries[entry.key]
+            self._missing = {
+                key for key in self._missing
+                if key not in keys and key.split(":", 1)[0] not in families
+            }
+            self._upcoming = {
+                key: entry for key, entry in self._upcoming.items()
+                if key not in keys and key.split(":", 1)[0] not in families
+            }
+            if "banners" in families:
+                banner_scheduler.invalidate()
+            self.version += 1
+
+        if "banners" in families:
+            self._wake()
+
+        surrogate_keys = sorted({f"cms-{key.replace(':', '-')}" for key in keys} | {f"cms-{family}" for family in families})
+        self.purged_surrogate_keys = (self.purged_surrogate_keys + surrogate_keys)[-50:]
+        logger.info("Content cache v%d: purged %s", self.version, ", ".join(surrogate_keys))
+
+    def prebuild_banners(self, at: datetime) -> int:
+        """Build the banner entries as they will be at time at, to swap in then"""
+        with self._lock:
+            keys = [key for key in self._entries if key.split(":", 1)[0] == "banners"]
+            version = self.version
+        entries = [build_banners(None, key, version, at) for key in keys]
+        with self._lock:
+            if self.version == version:
+                self._upcoming.update((entry.key, entry) for entry in entries if entry is not None)
+        self.prebuilt += len(keys)
+        return len(keys)
+
+    def start(self):
+        """Start the banner prebuild loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the banner prebuild loop"""
+        self._stopping.set()
+        self._rescheduled.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def _wake(self):
+        """Make the prebuild loop look at the (possibly new) banner schedule now"""
+        if self._loop is not None:
+            try:
+                # Purges run on whichever thread committed
+                self._loop.call_soon_threadsafe(self._rescheduled.set)
+            except RuntimeError:
+                # Loop already closed
+                pass
+
+    async def _run(self):
+        lead = settings.BANNER_PREBUILD_LEAD
+        while not self._stopping.is_set():
+            self._rescheduled.clear()
+            delay = settings.CMS_CACHE_CHECK_INTERVAL
+            try:
+                self._check_tables()
+                boundary = await asyncio.to_thread(banner_scheduler.next_boundary)
+                if boundary is not None:
+                    remaining = (boundary - datetime.utcnow()).total_seconds()
+                    if remaining <= lead:
+                        await asyncio.to_thread(self.prebuild_banners, boundary)
+                        # Wake up again just after the boundary for the one after it
+                        delay = min(delay, remaining + 0.01)
+                    else:
+                        delay = min(delay, remaining - lead)
+            except Exception as e:
+                logger.exception("Banner prebuild failed: %s", e)
+            try:
+                await asyncio.wait_for(self._rescheduled.wait(), timeout=max(delay, 0.01))
+            except asyncio.TimeoutError:
+                pass
+
+    def clear(self):
+        self.purge(families=BUILDERS)
+
+    def warm(self):
+        """Build the landing-page entries ahead of the first request"""
+        try:
+            for key in ["banners", "destinations", *map(page_key, DEFAULT_PAGES)]:
+                self.get(key)
+        except Exception as e:
+            logger.warning("Content cache warm-up failed, entries will build on first request: %s", e)
+
+    def _check_tables(self):
+        """Purge families whose table changed in another process"""
+        if time.monotonic() - self._checked_at < settings.CMS_CACHE_CHECK_INTERVAL:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            db = SessionLocal()
+            try:
+                fingerprints = {
+                    family: tuple(db.execute(select(func.count(model.id), func.max(model.updated_at))).one())
+                    for model, family in MODEL_FAMILIES.items()
+                }
+            finally:
+                db.close()
+        except Exception as e:
+            logger.warning("Content cache table check failed: %s", e)
+            return
+        changed = [family for family, fingerprint in fingerprints.items()
+                   if family in self._fingerprints and self._fingerprints[family] != fingerprint]
+        self._fingerprints = fingerprints
+        if changed:
+            self.purge(families=changed)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "entries": sorted(self._entries),
+            "missing": len(self._missing),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "prebuilt": self.prebuilt,
+            "upcoming": {key: entry.starts_at.isoformat() for key, entry in self._upcoming.items()},
+            "recent_purges": self.purged_surrogate_keys,
+            "banner_timeline": banner_scheduler.timeline().info()
+        }
+
+# Global content cache
+content_cache = ContentCache()
+
+CONTENT_CHANGES = "content_cache_changes"
+
+def changed_keys(obj) -> Tuple[Set[str], Set[str]]:
+    """(keys, families) a changed CMS row affects"""
+    family = MODEL_FAMILIES[type(obj)]
+    if family != "page":
+        return set(), {family}
+    # Old and new page_key, in case the row was renamed
+    history = inspect(obj).attrs.page_key.history
+    pages = {page for page in chain(history.added, history.unchanged, history.deleted) if page}
+    return {page_key(page) for page in pages}, set()
+
+@event.listens_for(Session, "after_flush")
+def _track_content_changes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if type(obj) in MODEL_FAMILIES:
+            keys, families = changed_keys(obj)
+            pending = session.info.setdefault(CONTENT_CHANGES, (set(), set()))
+            pending[0].update(keys)
+            pending[1].update(families)
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_content_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in MODEL_FAMILIES:
+        # A bulk statement can touch any row: purge the whole family
+        pending = orm_execute_state.session.info.setdefault(CONTENT_CHANGES, (set(), set()))
+        pending[1].add(MODEL_FAMILIES[mapper.class_])
+
+@event.listens_for(Session, "after_commit")
+def _purge_content_cache(session):
+    pending = session.info.pop(CONTENT_CHANGES, None)
+    if pending:
+        content_cache.purge(*pending)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_content_changes(session):
+    session.info.pop(CONTENT_CHANGES, None)
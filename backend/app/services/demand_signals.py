@@ -0,0 +1,279 @@
+"""
+Demand Signals for Faredown
+Time-decayed search, bargain and booking counts per item and market, and the price multipliers they imply
+"""
+
+from array import array
+from datetime import date, datetime
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import math
+import time
+
+from app.core.config import settings
+from app.core.lazy_imports import lazy_module
+from app.services.promo_engine import normalize_route
+
+np = lazy_module("numpy")
+
+EVENTS = ("search", "bargain", "booking")
+
+# How much one event says about demand, relative to a search
+EVENT_WEIGHTS = {"search": 1.0, "bargain": 4.0, "booking": 12.0}
+
+# Forward-decay weights are rescaled once the landmark is this many half-lives old
+# (2^32), long before 2^((t - landmark) / half_life) could overflow a float
+MAX_DECAY_HALF_LIVES = 32.0
+
+ANY = "*"
+
+def market_of(booking_type: str, item_data: Optional[Dict[str, Any]]) -> str:
+    """Route ("DEL-BOM") for flights, city for hotels, from an item's data"""
+    item_data = item_data or {}
+    if booking_type == "flight":
+        return normalize_route(item_data.get("origin"), item_data.get("destination")) or ANY
+    city = item_data.get("city") or item_data.get("destination") or item_data.get("location")
+    return city.strip().upper() if isinstance(city, str) and city.strip() else ANY
+
+def travel_date_of(item_data: Optional[Dict[str, Any]]):
+    item_data = item_data or {}
+    for field in ("departure_date", "check_in", "travel_date", "date"):
+        value = item_data.get(field)
+        if value:
+            return value
+    return None
+
+def date_bucket(travel_date) -> str:
+    """ISO week of the travel date ("2026-W45"), or "*" when unknown"""
+    if isinstance(travel_date, str):
+        try:
+            travel_date = datetime.fromisoformat(travel_date.replace("Z", "+00:00"))
+        except ValueError:
+            return ANY
+    if not isinstance(travel_date, (date, datetime)):
+        return ANY
+    year, week, _ = travel_date.isocalendar()
+    return f"{year}-W{week:02d}"
+
+class DecayedCountMin:
+    """
+    Count-min sketch whose counts decay with a half-life
+
+    Uses forward decay: an event at time t adds 2^((t - landmark) / half_life)
+    and a query divides by the same weight at the query time, so both are
+    O(depth) with no per-cell timestamps. When the landmark falls more than
+    MAX_DECAY_HALF_LIVES behind, on an add or a query, every cell is
+    rescaled once and the landmark moves up, so a sketch that sees no
+    events for weeks still answers.
+    """
+
+    def __init__(self, width: int, depth: int, half_life: float, now: Optional[float] = None):
+        self.width = width
+        self.depth = depth
+        self.half_life = half_life
+        self.landmark = time.time() if now is None else now
+        self.cells = array("d", bytes(8 * width * depth))
+
+    def weight(self, at: float) -> float:
+        return 2.0 ** ((at - self.landmark) / self.half_life)
+
+    def add(self, positions: Sequence[int], amount: float, at: float):
+        self._advance(at)
+        increment = amount * self.weight(at)
+        cells = self.cells
+        for position in positions:
+            cells[position] += increment
+
+    def estimate(self, positions: Sequence[int], at: float) -> float:
+        self._advance(at)
+        cells = self.cells
+        return min(cells[position] for position in positions) / self.weight(at)
+
+    def estimate_many(self, positions, at: float):
+        """Estimates for an (n, depth) array of positions"""
+        self._advance(at)
+        return np.frombuffer(self.cells, dtype=np.float64)[positions].min(axis=1) / self.weight(at)
+
+    def _advance(self, at: float):
+        if (at - self.landmark) / self.half_life > MAX_DECAY_HALF_LIVES:
+            self._rescale(at)
+
+    def _rescale(self, at: float):
+        # The decay itself, not 1 / weight: the weight may be past float range
+        factor = 2.0 ** ((self.landmark - at) / self.half_life)
+        cells = self.cells
+        for index in range(len(cells)):
+            cells[index] *= factor
+        self.landmark = at
+
+class DemandSignals:
+    """
+    Rolling demand per (booking type, item or market, travel week)
+
+    Searches, bargain starts and bookings are counted into decayed
+    count-min sketches with a short and a long half-life, so memory is
+    fixed however many items and routes are seen. An item's multiplier
+    compares its recent weighted event rate with its longer-run rate:
+    demand picking up raises the price, demand falling away lowers it,
+    within DEMAND_MULTIPLIER_MIN/MAX. Every key gets DEMAND_PRIOR_RATE
+    of assumed background demand so a handful of events can't swing it.
+
+    Counts are per worker. The multiplier is a ratio of a key's own rates,
+    so once a key's traffic is well above the prior, a worker that sees an
+    even share of it computes about the same multiplier as one that sees
+    all of it.
+    """
+
+    def __init__(
+        self,
+        width: int = settings.DEMAND_SKETCH_WIDTH,
+        depth: int = settings.DEMAND_SKETCH_DEPTH,
+        short_half_life: float = settings.DEMAND_SHORT_HALF_LIFE,
+        long_half_life: float = settings.DEMAND_LONG_HALF_LIFE,
+        now: Optional[float] = None
+    ):
+        self.width = width
+        self.depth = depth
+        self.short_half_life = short_half_life
+        self.long_half_life = long_half_life
+        self.sketches = {
+            (event, horizon): DecayedCountMin(width, depth, half_life, now)
+            for event in EVENTS
+            for horizon, half_life in (("short", short_half_life), ("long", long_half_life))
+        }
+        self.events = {event: 0 for event in EVENTS}
+        self.started = time.time() if now is None else now
+
+    def positions(self, booking_type: str, subject: str, bucket: str) -> List[int]:
+        """One cell per sketch row, from a single 128-bit hash (double hashing)"""
+        digest = hashlib.blake2b(f"{booking_type}|{subject}|{bucket}".encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [row * width + (first + row * second) % width for row in range(self.depth)]
+
+    def keys(self, booking_type: str, market: str, bucket: str, item_id: Optional[str]) -> List[List[int]]:
+        """Positions for the market and, when known, the item itself"""
+        keys = [self.positions(booking_type, f"market:{market}", bucket)]
+        if item_id:
+            keys.append(self.positions(booking_type, f"item:{item_id}", bucket))
+        return keys
+
+    def record(
+        self,
+        event: str,
+        booking_type: str,
+        market: str = ANY,
+        travel_date=None,
+        item_id: Optional[str] = None,
+        count: int = 1,
+        at: Optional[float] = None
+    ):
+        at = time.time() if at is None else at
+        bucket = date_bucket(travel_date)
+        short, long = self.sketches[(event, "short")], self.sketches[(event, "long")]
+        for positions in self.keys(booking_type, market, bucket, item_id):
+            short.add(positions, count, at)
+            long.add(positions, count, at)
+        self.events[event] += count
+
+    def counts(self, positions: Sequence[int], at: float) -> Dict[str, Dict[str, float]]:
+        return {
+            horizon: {event: self.sketches[(event, horizon)].estimate(positions, at) for event in EVENTS}
+            for horizon in ("short", "long")
+        }
+
+    def windows(self, at: float) -> Tuple[float, float]:
+        """
+        Seconds of traffic each horizon's decayed count represents
+
+        A steady rate r decays to r * H / ln 2 * (1 - 2^(-uptime / H)), so
+        dividing by this gives the rate itself. Without the uptime term a
+        freshly started worker would read every item as surging, because
+        the long horizon hasn't filled yet.
+        """
+        uptime = max(at - self.started, 60.0)
+        return tuple(
+            half_life / math.log(2) * (1.0 - 2.0 ** (-uptime / half_life))
+            for half_life in (self.short_half_life, self.long_half_life)
+        )
+
+    def factor(self, short_weighted: float, long_weighted: float, at: float) -> float:
+        """Multiplier from the weighted decayed counts of one key"""
+        prior = settings.DEMAND_PRIOR_RATE / 3600.0
+        short_window, long_window = self.windows(at)
+        momentum = (short_weighted / short_window + prior) / (long_weighted / long_window + prior)
+        return min(settings.DEMAND_MULTIPLIER_MAX, max(settings.DEMAND_MULTIPLIER_MIN, momentum ** settings.DEMAND_ELASTICITY))
+
+    def quote(
+        self,
+        booking_type: str,
+        market: str = ANY,
+        travel_date=None,
+        item_id: Optional[str] = None,
+        at: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Demand multiplier and the counts behind it for one item"""
+        at = time.time() if at is None else at
+        bucket = date_bucket(travel_date)
+        factors, signals = [], {}
+        for name, positions in zip(("market", "item"), self.keys(booking_type, market, bucket, item_id)):
+            counts = self.counts(positions, at)
+            weighted = {
+                horizon: sum(EVENT_WEIGHTS[event] * value for event, value in by_event.items())
+                for horizon, by_event in counts.items()
+            }
+            factors.append(self.factor(weighted["short"], weighted["long"], at))
+            signals[name] = {
+                horizon: {event: round(value, 2) for event, value in by_event.items()}
+                for horizon, by_event in counts.items()
+            }
+        # Item and market evidence count equally when both are known
+        multiplier = math.prod(factors) ** (1.0 / len(factors))
+        evidence = sum(EVENT_WEIGHTS[event] * signals["market"]["long"][event] for event in EVENTS)
+        return {
+            "multiplier": multiplier,
+            "date_bucket": bucket,
+            "signals": signals,
+            "confidence": 1.0 - math.exp(-evidence / 50.0)
+        }
+
+    def multipliers(self, items: Iterable[Tuple[str, str, Any, Optional[str]]], at: Optional[float] = None):
+        """
+        Multipliers for a whole result set of (booking_type, market, travel_date, item_id)
+
+        Hashes each key once, then reads every sketch with one vectorized
+        gather instead of a Python loop per item and sketch.
+        """
+        at = time.time() if at is None else at
+        market_positions, item_positions = [], []
+        for booking_type, market, travel_date, item_id in items:
+            bucket = date_bucket(travel_date)
+            market_positions.append(self.positions(booking_type, f"market:{market}", bucket))
+            item_positions.append(self.positions(booking_type, f"item:{item_id}", bucket) if item_id else market_positions[-1])
+        if not market_positions:
+            return np.empty(0)
+
+        prior = settings.DEMAND_PRIOR_RATE / 3600.0
+        short_window, long_window = self.windows(at)
+        factors = []
+        for positions in (np.array(market_positions), np.array(item_positions)):
+            weighted = {
+                horizon: sum(EVENT_WEIGHTS[event] * self.sketches[(event, horizon)].estimate_many(positions, at) for event in EVENTS)
+                for horizon in ("short", "long")
+            }
+            momentum = (weighted["short"] / short_window + prior) / (weighted["long"] / long_window + prior)
+            factors.append(np.clip(momentum ** settings.DEMAND_ELASTICITY, settings.DEMAND_MULTIPLIER_MIN, settings.DEMAND_MULTIPLIER_MAX))
+        # Without an item id the "item" factor is the market's own, so the geometric mean is just the market factor
+        return np.sqrt(factors[0] * factors[1])
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "events": dict(self.events),
+            "sketch_width": self.width,
+            "sketch_depth": self.depth,
+            "half_lives_s": {"short": self.short_half_life, "long": self.long_half_life},
+            "memory_bytes": sum(len(sketch.cells) * sketch.cells.itemsize for sketch in self.sketches.values())
+        }
+
+# Global demand signals (per worker)
+demand_signals = DemandSignals()
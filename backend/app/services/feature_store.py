@@ -0,0 +1,281 @@
+"""
+User Feature Store for Faredown
+Per-user behavior aggregates: user_features rows with an in-process hot tier
+"""
+
+from typing import Dict, Any, Iterable, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+import logging
+import time
+
+from sqlalchemy import case, delete, event, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.bargain_models import BargainSession, BargainAttempt, BargainStatus, BargainAttemptType
+from app.models.booking_models import Booking, BookingStatus
+from app.models.user_models import UserFeatures
+
+logger = logging.getLogger(__name__)
+
+# Offers and bookings by UTC hour // 6
+DAYPARTS = ("activity_night", "activity_morning", "activity_afternoon", "activity_evening")
+
+COUNTERS = (
+    "bargain_sessions", "bargain_offers", "bargains_accepted", "discount_sought_total",
+    "bookings", "total_spent"
+) + DAYPARTS
+TIMESTAMPS = ("last_bargain_at", "last_booking_at")
+
+# Session.info key for increments waiting on the transaction
+PENDING_FEATURES = "user_features_pending"
+
+def daypart(at: datetime) -> str:
+    return DAYPARTS[at.hour // 6]
+
+class UserFeatureVector:
+    """One user's aggregates as held in the hot tier"""
+
+    __slots__ = COUNTERS + TIMESTAMPS + ("user_id", "loaded_at")
+
+    def __init__(self, user_id: int, row: Optional[UserFeatures] = None):
+        self.user_id = user_id
+        for name in COUNTERS:
+            setattr(self, name, getattr(row, name) if row is not None else 0)
+        for name in TIMESTAMPS:
+            setattr(self, name, getattr(row, name) if row is not None else None)
+        self.loaded_at = time.monotonic()
+
+    def apply(self, counters: Dict[str, float], timestamps: Dict[str, datetime]):
+        for name, delta in counters.items():
+            setattr(self, name, getattr(self, name) + delta)
+        for name, at in timestamps.items():
+            setattr(self, name, at)
+
+    @property
+    def acceptance_rate(self) -> Optional[float]:
+        return self.bargains_accepted / self.bargain_sessions if self.bargain_sessions else None
+
+    @property
+    def avg_discount_sought(self) -> Optional[float]:
+        return self.discount_sought_total / self.bargain_offers if self.bargain_offers else None
+
+    @property
+    def avg_booking_value(self) -> Optional[float]:
+        return self.total_spent / self.bookings if self.bookings else None
+
+    def days_since_last_booking(self, now: Optional[datetime] = None) -> Optional[float]:
+        if self.last_booking_at is None:
+            return None
+        return ((now or datetime.utcnow()) - self.last_booking_at).total_seconds() / 86400
+
+    def to_dict(self) -> Dict[str, Any]:
+        activity = [getattr(self, name) for name in DAYPARTS]
+        return {
+            "user_id": self.user_id,
+            **{name: getattr(self, name) for name in COUNTERS + TIMESTAMPS},
+            "acceptance_rate": self.acceptance_rate,
+            "avg_discount_sought": self.avg_discount_sought,
+            "avg_booking_value": self.avg_booking_value,
+            "days_since_last_booking": self.days_since_last_booking(),
+            "peak_daypart": DAYPARTS[activity.index(max(activity))][len("activity_"):] if any(activity) else None
+        }
+
+class UserFeatureStore:
+    """
+    Per-user behavior aggregates for the bargain AI
+
+    Each bargain or booking event adds its increments to the user's
+    user_features row with one upsert in the caller's transaction, so the
+    table is exact and survives restarts without rescanning history. Reads
+    come from a per-worker hot tier (one dict lookup); after this process
+    commits an event the hot entry is updated in place, and entries are
+    re-read after FEATURE_STORE_TTL seconds to pick up other workers'
+    events.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_users: int = settings.FEATURE_STORE_MAX_USERS,
+        ttl: float = settings.FEATURE_STORE_TTL
+    ):
+        self.session_factory = session_factory
+        self.max_users = max_users
+        self.ttl = ttl
+        self._hot: Dict[int, UserFeatureVector] = {}
+        self.hits = 0
+        self.loads = 0
+        self.events = 0
+        self.evictions = 0
+
+    def get(self, user_id: int) -> UserFeatureVector:
+        entry = self._hot.get(user_id)
+        if entry is not None and time.monotonic() - entry.loaded_at < self.ttl:
+            self.hits += 1
+            return entry
+        return self._load(user_id)
+
+    def _load(self, user_id: int) -> UserFeatureVector:
+        db = self.session_factory()
+        try:
+            row = db.execute(select(UserFeatures).where(UserFeatures.user_id == user_id)).scalar_one_or_none()
+            entry = UserFeatureVector(user_id, row)
+        finally:
+            db.close()
+        self.loads += 1
+        # Re-inserting keeps the dict in load order, so the oldest load is evicted first
+        self._hot.pop(user_id, None)
+        self._hot[user_id] = entry
+        while len(self._hot) > self.max_users:
+            self._hot.pop(next(iter(self._hot)), None)
+            self.evictions += 1
+        return entry
+
+    def record_bargain_started(self, db: Session, user_id: int, at: Optional[datetime] = None):
+        at = at or datetime.utcnow()
+        self._increment(db, user_id, {"bargain_sessions": 1}, {"last_bargain_at": at})
+
+    def record_offer(self, db: Session, user_id: int, offered_price: float, base_price: float, at: Optional[datetime] = None):
+        at = at or datetime.utcnow()
+        sought = (base_price - offered_price) / base_price if base_price else 0.0
+        self._increment(
+            db, user_id,
+            {"bargain_offers": 1, "discount_sought_total": sought, daypart(at): 1},
+            {"last_bargain_at": at}
+        )
+
+    def record_bargain_accepted(self, db: Session, user_id: int):
+        self._increment(db, user_id, {"bargains_accepted": 1}, {})
+
+    def record_booking(self, db: Session, user_id: int, amount: float, at: Optional[datetime] = None):
+        at = at or datetime.utcnow()
+        self._increment(
+            db, user_id,
+            {"bookings": 1, "total_spent": amount, daypart(at): 1},
+            {"last_booking_at": at}
+        )
+
+    def _increment(self, db: Session, user_id: int, counters: Dict[str, float], timestamps: Dict[str, datetime]):
+        """Upsert the increments in db's transaction; the hot tier follows on commit"""
+        dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        now = datetime.utcnow()
+        statement = dialect_insert(UserFeatures).values(
+            user_id=user_id,
+            **{name: counters.get(name, 0) for name in COUNTERS},
+            **timestamps,
+            is_deleted=False,
+            created_at=now,
+            updated_at=now
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[UserFeatures.user_id],
+            set_={
+                **{name: getattr(UserFeatures, name) + statement.excluded[name] for name in counters},
+                **{name: statement.excluded[name] for name in timestamps},
+                "updated_at": now
+            }
+        ))
+        db.info.setdefault(PENDING_FEATURES, []).append((user_id, counters, timestamps))
+
+    def committed(self, increments: Iterable[Tuple[int, Dict[str, float], Dict[str, datetime]]]):
+        for user_id, counters, timestamps in increments:
+            self.events += 1
+            entry = self._hot.get(user_id)
+            if entry is not None:
+                entry.apply(counters, timestamps)
+
+    def rebuild(self, db: Session) -> Dict[str, Any]:
+        """
+        Recompute every user's row from bargain and booking history
+
+        For backfilling after the table is created (or repairing it). Run
+        it off-peak: events committed while it runs may be counted twice
+        or not at all.
+        """
+        started = time.perf_counter()
+        rows: Dict[int, Dict[str, Any]] = defaultdict(lambda: {
+            **{name: 0 for name in COUNTERS}, **{name: None for name in TIMESTAMPS}
+        })
+
+        for user_id, sessions, accepted, last_at in db.execute(
+            select(
+                BargainSession.user_id,
+                func.count(BargainSession.id),
+                func.sum(case((BargainSession.status == BargainStatus.ACCEPTED, 1), else_=0)),
+                func.max(BargainSession.started_at)
+            ).group_by(BargainSession.user_id)
+        ):
+            rows[user_id].update(bargain_sessions=sessions, bargains_accepted=accepted or 0, last_bargain_at=last_at)
+
+        offers = (
+            select(BargainSession.user_id, BargainSession.base_price, BargainAttempt.offered_price, BargainAttempt.timestamp)
+            .join(BargainSession, BargainSession.id == BargainAttempt.session_id)
+            .where(BargainAttempt.attempt_type == BargainAttemptType.USER_OFFER)
+        )
+        for part in db.execute(offers.execution_options(stream_results=True, yield_per=10000)).partitions():
+            for user_id, base_price, offered_price, at in part:
+                row = rows[user_id]
+                row["bargain_offers"] += 1
+                row["discount_sought_total"] += (base_price - offered_price) / base_price if base_price else 0.0
+                row[daypart(at)] += 1
+                if row["last_bargain_at"] is None or at > row["last_bargain_at"]:
+                    row["last_bargain_at"] = at
+
+        bookings = select(Booking.user_id, Booking.total_amount, Booking.confirmed_at).where(
+            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]),
+            Booking.confirmed_at.is_not(None)
+        )
+        for part in db.execute(bookings.execution_options(stream_results=True, yield_per=10000)).partitions():
+            for user_id, amount, at in part:
+                row = rows[user_id]
+                row["bookings"] += 1
+                row["total_spent"] += amount
+                row[daypart(at)] += 1
+                if row["last_booking_at"] is None or at > row["last_booking_at"]:
+                    row["last_booking_at"] = at
+
+        now = datetime.utcnow()
+        db.execute(delete(UserFeatures))
+        if rows:
+            db.execute(insert(UserFeatures), [
+                {"user_id": user_id, **row, "is_deleted": False, "created_at": now, "updated_at": now}
+                for user_id, row in rows.items()
+            ])
+        db.commit()
+        self._hot.clear()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info("User features rebuilt for %d users in %.0fms", len(rows), elapsed_ms)
+        return {"users": len(rows), "elapsed_ms": round(elapsed_ms, 1)}
+
+    def clear(self):
+        self._hot.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        reads = self.hits + self.loads
+        return {
+            "hot_users": len(self._hot),
+            "max_users": self.max_users,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "loads": self.loads,
+            "hit_rate": round(self.hits / reads, 4) if reads else None,
+            "evictions": self.evictions,
+            "events": self.events
+        }
+
+# Global user feature store
+feature_store = UserFeatureStore()
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_features(session):
+    pending = session.info.pop(PENDING_FEATURES, None)
+    if pending:
+        feature_store.committed(pending)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_feature_increments(session):
+    session.info.pop(PENDING_FEATURES, None)
@@ -0,0 +1,373 @@
+"""
+Fee Engine for Faredown
+VAT and convenience fees compiled from the vat_rates and convenience_fees tables
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+from itertools import chain, product
+import logging
+import threading
+import time
+
+from sqlalchemy import select, func, event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy_imports import lazy_module
+from app.database import SessionLocal
+from app.models.pricing_models import VAT, ConvenienceFee
+
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Axis slot for values no row names explicitly (matched by blank columns only)
+WILDCARD = "*"
+
+REGIONS = ["domestic", "international"]
+
+# Used until the tables are migrated/seeded (mirrors migration 0003)
+DEFAULT_VAT_ROWS = [
+    {"booking_type": "flight", "region": "domestic", "country": None, "vat_percentage": 5.0},
+    {"booking_type": "flight", "region": "international", "country": None, "vat_percentage": 0.0},
+    {"booking_type": "hotel", "region": "domestic", "country": None, "vat_percentage": 12.0},
+    {"booking_type": "hotel", "region": "international", "country": None, "vat_percentage": 0.0},
+]
+
+# Payment method discounts on the base fee (mirrors migration 0003)
+PAYMENT_METHOD_FACTORS = {"net_banking": 0.8, "upi": 0.7, "wallet": 0.9}
+
+DEFAULT_FEE_ROWS = [
+    {"booking_type": booking_type, "region": region, "country": None, "payment_method": method,
+     "fee_type": "flat", "fee_amount": round(amount * factor, 2)}
+    for booking_type, region, amount in [
+        ("flight", "domestic", 25.0),
+        ("flight", "international", 50.0),
+        ("hotel", "domestic", 35.0),
+        ("hotel", "international", 65.0),
+        ("package", None, 75.0),
+    ]
+    for method, factor in [(None, 1.0)] + list(PAYMENT_METHOD_FACTORS.items())
+]
+
+# Flat fee for bookings no convenience_fees row covers (e.g. an unknown
+# booking_type), before the payment method discount - PricingService's old default
+FALLBACK_FLAT_FEE = 50.0
+
+# Match specificity: a country-specific row beats a region-wide one, etc.
+DIMENSION_WEIGHTS = {"country": 8, "booking_type": 4, "region": 2, "payment_method": 1}
+
+def region_for(booking_type: str, origin_country: Optional[str], destination_country: Optional[str]) -> str:
+    """
+    domestic when the booking stays within HOME_COUNTRY (hotels: where the stay is)
+
+    A missing country is not assumed to be home, so it prices as international.
+    """
+    home = settings.HOME_COUNTRY
+    if booking_type == "hotel":
+        return "domestic" if destination_country == home else "international"
+    return "domestic" if origin_country == home and destination_country == home else "international"
+
+def best_match(rows: List[Dict[str, Any]], key: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Most specific row whose non-blank columns all equal the key"""
+    best, best_score = None, -1
+    for row in rows:
+        score = 0
+        for dimension, value in key.items():
+            wanted = row.get(dimension)
+            if wanted is None:
+                continue
+            if wanted != value:
+                break
+            score += DIMENSION_WEIGHTS[dimension]
+        else:
+            # Later rows win ties, so a newer row overrides an older one
+            if score >= best_score:
+                best, best_score = row, score
+    return best
+
+class CompiledFees:
+    """
+    Dense lookup over (booking_type, region, country, payment_method)
+
+    Every combination of the values named by some row (plus a wildcard
+    slot per axis for anything else) is resolved once at compile time, so
+    a quote is four dict lookups and a list index. Batch quotes use numpy
+    arrays of the same cells.
+    """
+
+    def __init__(self, vat_rows: List[Dict[str, Any]], fee_rows: List[Dict[str, Any]], source: str):
+        self.source = source
+        self.compiled_at = time.time()
+
+        def axis(dimension: str, base: Sequence[str] = ()) -> List[str]:
+            values = {row.get(dimension) for row in chain(vat_rows, fee_rows)} | set(base)
+            return sorted(value for value in values if value is not None) + [WILDCARD]
+
+        self.axes: Dict[str, List[str]] = {
+            "booking_type": axis("booking_type"),
+            "region": axis("region", REGIONS),
+            "country": axis("country"),
+            "payment_method": axis("payment_method"),
+        }
+        self.index = {
+            dimension: {value: position for position, value in enumerate(values)}
+            for dimension, values in self.axes.items()
+        }
+
+        self.vat_percentage: List[float] = []
+        self.fee_flat: List[float] = []
+        self.fee_percentage: List[float] = []
+        for cell in product(*self.axes.values()):
+            key = dict(zip(self.axes, cell))
+            vat = best_match(vat_rows, {d: key[d] for d in ("booking_type", "region", "country")})
+            fee = best_match(fee_rows, key)
+            self.vat_percentage.append(vat["vat_percentage"] if vat else 0.0)
+            if fee is None:
+                fee = {"fee_type": "flat", "fee_amount": round(
+                    FALLBACK_FLAT_FEE * PAYMENT_METHOD_FACTORS.get(key["payment_method"], 1.0), 2
+                )}
+            is_percentage = fee["fee_type"] == "percentage"
+            self.fee_flat.append(fee["fee_amount"] if not is_percentage else 0.0)
+            self.fee_percentage.append(fee["fee_amount"] if is_percentage else 0.0)
+
+        self._arrays = None
+        self._arrays_lock = threading.Lock()
+
+    def cell(self, booking_type: str, region: str, country: Optional[str] = None, payment_method: Optional[str] = None) -> int:
+        position = 0
+        for dimension, value in (
+            ("booking_type", booking_type),
+            ("region", region),
+            ("country", country),
+            ("payment_method", payment_method),
+        ):
+            lookup = self.index[dimension]
+            position = position * len(lookup) + lookup.get(value, len(lookup) - 1)
+        return position
+
+    def rates(self, booking_type: str, region: str, country: Optional[str] = None, payment_method: Optional[str] = None) -> Dict[str, float]:
+        position = self.cell(booking_type, region, country, payment_method)
+        return {
+            "vat_percentage": self.vat_percentage[position],
+            "fee_flat": self.fee_flat[position],
+            "fee_percentage": self.fee_percentage[position],
+        }
+
+    def quote(
+        self,
+        booking_type: str,
+        amount: float,
+        region: str,
+        country: Optional[str] = None,
+        payment_method: Optional[str] = None
+    ) -> Dict[str, float]:
+        """VAT and convenience fee on amount"""
+        position = self.cell(booking_type, region, country, payment_method)
+        vat_percentage = self.vat_percentage[position]
+        vat_amount = amount * vat_percentage / 100
+        convenience_fee = self.fee_flat[position] + amount * self.fee_percentage[position] / 100
+        return {
+            "vat_percentage": vat_percentage,
+            "vat_amount": vat_amount,
+            "convenience_fee": convenience_fee,
+            "total_amount": amount + vat_amount + convenience_fee,
+        }
+
+    def _cell_arrays(self):
+        if self._arrays is None:
+            with self._arrays_lock:
+                if self._arrays is None:
+                    self._arrays = (
+                        np.asarray(self.vat_percentage, dtype=np.float64),
+                        np.asarray(self.fee_flat, dtype=np.float64),
+                        np.asarray(self.fee_percentage, dtype=np.float64),
+                    )
+        return self._arrays
+
+    def _axis_positions(self, dimension: str, values: Union[str, None, Sequence[Optional[str]]], size: int):
+        """Positions on one axis; a single value applies to every item"""
+        lookup = self.index[dimension]
+        wildcard = len(lookup) - 1
+        if values is None or isinstance(values, str):
+            return np.full(size, lookup.get(values, wildcard), dtype=np.intp)
+        return np.fromiter((lookup.get(value, wildcard) for value in values), dtype=np.intp, count=size)
+
+    def quote_batch(
+        self,
+        booking_types: Union[str, Sequence[str]],
+        amounts: Sequence[float],
+        regions: Union[str, Sequence[str]],
+        countries: Union[str, None, Sequence[Optional[str]]] = None,
+        payment_methods: Union[str, None, Sequence[Optional[str]]] = None
+    ) -> Dict[str, Any]:
+        """Vectorized quote(); each dimension is one value or one per amount"""
+        amounts = np.asarray(amounts, dtype=np.float64)
+        size = len(amounts)
+        positions = np.zeros(size, dtype=np.intp)
+        for dimension, values in (
+            ("booking_type", booking_types),
+            ("region", regions),
+            ("country", countries),
+            ("payment_method", payment_methods),
+        ):
+            positions = positions * len(self.index[dimension]) + self._axis_positions(dimension, values, size)
+
+        vat_table, flat_table, percentage_table = self._cell_arrays()
+        vat_percentage = vat_table[positions]
+        vat_amount = amounts * vat_percentage / 100
+        convenience_fee = flat_table[positions] + amounts * percentage_table[positions] / 100
+        return {
+            "vat_percentage": vat_percentage,
+            "vat_amount": vat_amount,
+            "convenience_fee": convenience_fee,
+            "total_amount": amounts + vat_amount + convenience_fee,
+        }
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "axes": self.axes,
+            "cells": len(self.vat_percentage),
+            "compiled_at": self.compiled_at,
+        }
+
+def load_fee_rows(db) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Active VAT and convenience fee rows, oldest first"""
+    vat_rows = [
+        {
+            "booking_type": row.booking_type,
+            "region": row.region,
+            "country": row.country,
+            "vat_percentage": row.vat_percentage,
+        }
+        for row in db.execute(
+            select(VAT).where(VAT.is_active.is_(True), VAT.is_deleted.is_(False)).order_by(VAT.id)
+        ).scalars()
+    ]
+    fee_rows = [
+        {
+            "booking_type": row.booking_type,
+            "region": row.region,
+            "country": row.country,
+            "payment_method": row.payment_method,
+            "fee_type": row.fee_type,
+            "fee_amount": row.fee_amount,
+        }
+        for row in db.execute(
+            select(ConvenienceFee)
+            .where(ConvenienceFee.is_active.is_(True), ConvenienceFee.is_deleted.is_(False))
+            .order_by(ConvenienceFee.id)
+        ).scalars()
+    ]
+    return vat_rows, fee_rows
+
+def table_fingerprint(db) -> Tuple:
+    """Cheap change detector for both tables (row count, last update)"""
+    return tuple(
+        tuple(db.execute(select(func.count(model.id), func.max(model.updated_at))).one())
+        for model in (VAT, ConvenienceFee)
+    )
+
+class FeeEngine:
+    """
+    Single source of VAT and convenience fees
+
+    The compiled lookup is rebuilt when this process commits a change to
+    either table, and otherwise at most every FEE_TABLE_CHECK_INTERVAL
+    seconds if the tables changed elsewhere (another worker, admin SQL).
+    """
+
+    def __init__(self):
+        self._compiled: Optional[CompiledFees] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._compiled = None
+
+    def compile(self) -> CompiledFees:
+        """Load the tables and swap in a new compiled lookup"""
+        with self._lock:
+            try:
+                db = SessionLocal()
+                try:
+                    fingerprint = table_fingerprint(db)
+                    vat_rows, fee_rows = load_fee_rows(db)
+                finally:
+                    db.close()
+                source = "database"
+            except Exception as e:
+                logger.warning("Fee tables unavailable, using defaults: %s", e)
+                fingerprint, vat_rows, fee_rows = None, [], []
+
+            if not vat_rows and not fee_rows:
+                vat_rows, fee_rows, source = DEFAULT_VAT_ROWS, DEFAULT_FEE_ROWS, "defaults"
+
+            self._compiled = CompiledFees(vat_rows, fee_rows, source)
+            self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            return self._compiled
+
+    def _changed_elsewhere(self) -> bool:
+        self._checked_at = time.monotonic()
+        try:
+            db = SessionLocal()
+            try:
+                return table_fingerprint(db) != self._fingerprint
+            finally:
+                db.close()
+        except Exception:
+            return False
+
+    def compiled(self) -> CompiledFees:
+        compiled = self._compiled
+        if compiled is None:
+            return self.compile()
+        if time.monotonic() - self._checked_at >= settings.FEE_TABLE_CHECK_INTERVAL and self._changed_elsewhere():
+            return self.compile()
+        return compiled
+
+    def quote(
+        self,
+        booking_type: str,
+        amount: float,
+        origin_country: Optional[str] = None,
+        destination_country: Optional[str] = None,
+        payment_method: Optional[str] = None
+    ) -> Dict[str, float]:
+        region = region_for(booking_type, origin_country, destination_country)
+        return self.compiled().quote(booking_type, amount, region, destination_country, payment_method)
+
+    def quote_batch(self, *args, **kwargs) -> Dict[str, Any]:
+        return self.compiled().quote_batch(*args, **kwargs)
+
+# Global fee engine
+fee_engine = FeeEngine()
+
+FEE_MODELS = (VAT, ConvenienceFee)
+FEE_TABLES_CHANGED = "fee_tables_changed"
+
+@event.listens_for(Session, "after_flush")
+def _track_fee_row_changes(session, flush_context):
+    if any(isinstance(obj, FEE_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[FEE_TABLES_CHANGED] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_fee_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in FEE_MODELS:
+        orm_execute_state.session.info[FEE_TABLES_CHANGED] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_fee_engine(session):
+    # Recompile only once the change is visible to other sessions
+    if session.info.pop(FEE_TABLES_CHANGED, False):
+        fee_engine.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_fee_changes(session):
+    session.info.pop(FEE_TABLES_CHANGED, None)
@@ -0,0 +1,364 @@
+"""
+Heavy Hitters for Faredown
+Streaming top destinations and routes from booking and search events, per time window
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import heapq
+import time
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.booking_models import Booking, BookingItem
+from app.models.report_models import TopKSnapshot
+from app.services.bucketed_snapshots import BucketedSnapshots
+from app.services.promo_engine import normalize_route
+from app.services.reference_data import reference_data
+
+STREAMS = ("bookings:destination", "bookings:route", "searches:destination", "searches:route")
+
+# Booking streams are recorded per booking type ("bookings:route:flight") and
+# merged across types unless a query asks for one; anything else is "other"
+BOOKING_TYPES = ("flight", "hotel", "package", "other")
+BOOKING_STREAMS = tuple(
+    f"{stream}:{booking_type}" for stream in ("bookings:destination", "bookings:route") for booking_type in BOOKING_TYPES
+)
+
+def booking_stream(stream: str, booking_type: str) -> str:
+    booking_type = (booking_type or "").lower()
+    return f"{stream}:{booking_type if booking_type in BOOKING_TYPES else 'other'}"
+
+# Granularity -> (bucket seconds, buckets kept; None = TOP_K_RETENTION_DAYS)
+GRANULARITIES = {"5m": (300, 24), "hour": (3600, 48), "day": (86400, None)}
+
+# Rolling window -> (granularity, buckets merged)
+WINDOWS = {"hour": ("5m", 12), "day": ("hour", 24), "30d": ("day", 30)}
+
+def epoch(moment: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are UTC, as the database stores them"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def destination_of(booking_type: str, item_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Display name of an item's destination city ("Dubai"); airport codes resolve through the airports catalog"""
+    item_data = item_data or {}
+    if booking_type == "flight":
+        code = item_data.get("destination")
+        if not isinstance(code, str) or not code.strip():
+            return None
+        airport = reference_data.get().airports.get(code.strip().upper())
+        return airport["city"] if airport and airport.get("city") else code.strip().upper()
+    value = item_data.get("city") or item_data.get("destination") or item_data.get("location")
+    if not isinstance(value, str):
+        return None
+    # "Dubai, UAE" -> "Dubai"; all-caps or all-lowercase input is title-cased so spellings share a key
+    name = value.split(",")[0].strip()
+    return (name.title() if name.isupper() or name.islower() else name) or None
+
+class SpaceSaving:
+    """
+    Space-Saving summary of at most capacity keys
+
+    Each key has a count that never undercounts, the most it may
+    overcount by (error) and the revenue seen since it entered the
+    summary. When the summary is full a new key replaces the smallest
+    one and inherits its count as error, so any key with more than
+    total / capacity occurrences is always present. The smallest count
+    is found through a heap with lazy deletion.
+    """
+
+    __slots__ = ("capacity", "counters", "total", "_heap")
+
+    def __init__(self, capacity: int = settings.TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counters: Dict[str, List[float]] = {}
+        self.total = 0
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1, revenue: float = 0.0):
+        self.total += count
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += count
+            entry[2] += revenue
+        elif len(self.counters) < self.capacity:
+            entry = self.counters[key] = [count, 0, revenue]
+        else:
+            smallest, evicted = self._pop_smallest()
+            del self.counters[evicted]
+            entry = self.counters[key] = [smallest + count, smallest, revenue]
+        heapq.heappush(self._heap, (entry[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(entry[0], key) for key, entry in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_smallest(self) -> Tuple[int, str]:
+        heap, counters = self._heap, self.counters
+        while True:
+            count, key = heapq.heappop(heap)
+            entry = counters.get(key)
+            if entry is not None and entry[0] == count:
+                return count, key
+
+    @property
+    def floor(self) -> int:
+        """Most a key missing from the summary can have occurred"""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(entry[0] for entry in self.counters.values())
+
+    def entries(self) -> List[List[Any]]:
+        """[key, count, error, revenue] rows, largest first"""
+        rows = [[key, entry[0], entry[1], round(entry[2], 2)] for key, entry in self.counters.items()]
+        rows.sort(key=lambda row: -row[1])
+        return rows
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[List[Any]], total: int, capacity: int = settings.TOP_K_CAPACITY) -> "SpaceSaving":
+        summary = cls(capacity)
+        for key, count, error, revenue in entries:
+            summary.counters[key] = [count, error, revenue]
+        summary.total = total
+        summary._heap = [(entry[0], key) for key, entry in summary.counters.items()]
+        heapq.heapify(summary._heap)
+        return summary
+
+def merge(summaries: Iterable[SpaceSaving]) -> List[Dict[str, Any]]:
+    """
+    Combine summaries of disjoint streams (workers, time buckets)
+
+    A key missing from a full summary may still have occurred up to that
+    summary's floor times, so the floor is added to its count and error;
+    counts stay upper bounds and count - error stays a lower bound.
+    """
+    summaries = list(summaries)
+    merged: Dict[str, List[float]] = {}
+    floors = 0
+    for summary in summaries:
+        floor = summary.floor
+        floors += floor
+        for key, (count, error, revenue) in summary.counters.items():
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [count - floor, error - floor, revenue]
+            else:
+                entry[0] += count - floor
+                entry[1] += error - floor
+                entry[2] += revenue
+    # Every key was credited each summary's floor, then had it taken back where present
+    rows = [
+        {"name": key, "count": count + floors, "error": error + floors, "revenue": round(revenue, 2)}
+        for key, (count, error, revenue) in merged.items()
+    ]
+    rows.sort(key=lambda row: (-row["count"], row["error"], row["name"]))
+    return rows
+
+class HeavyHitters(BucketedSnapshots):
+    """
+    Top destinations and routes for dashboards, in bounded memory
+
+    Bookings and searches are counted into a Space-Saving summary per
+    stream (bookings also per booking type) and time bucket (5 minutes,
+    hours, days), snapshotted to
+    top_k_snapshots every TOP_K_SNAPSHOT_INTERVAL. A query merges the
+    rows in its window from every worker, so answers cover the whole
+    deployment and survive restarts, and caches the merge for the same
+    interval. Answers lag events by at most about one interval.
+    """
+
+    model = TopKSnapshot
+    scope_column = "stream"
+    # Untyped booking streams are listed so rows written before the split still expire
+    scopes = STREAMS + BOOKING_STREAMS
+    granularities = GRANULARITIES
+    name = "Top-k"
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        capacity: int = settings.TOP_K_CAPACITY,
+        snapshot_interval: float = settings.TOP_K_SNAPSHOT_INTERVAL,
+        retention_days: int = settings.TOP_K_RETENTION_DAYS
+    ):
+        super().__init__(session_factory, snapshot_interval, retention_days)
+        self.capacity = capacity
+        self._cache: Dict[Tuple[Any, ...], Tuple[float, List[Dict[str, Any]]]] = {}
+
+        self.events = {stream: 0 for stream in STREAMS}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def new_sketch(self) -> SpaceSaving:
+        return SpaceSaving(self.capacity)
+
+    def dump(self, summary: SpaceSaving) -> Dict[str, Any]:
+        return {"entries": summary.entries(), "total": summary.total}
+
+    def load(self, values: Dict[str, Any]) -> SpaceSaving:
+        return SpaceSaving.from_entries(values["entries"], values["total"], self.capacity)
+
+    def record(self, stream: str, key: Optional[str], revenue: float = 0.0, at: Optional[float] = None):
+        if not key:
+            return
+        at = time.time() if at is None else at
+        with self._lock:
+            for summary in self._live(stream, at):
+                summary.add(key, 1, revenue)
+            self.events[":".join(stream.split(":")[:2])] += 1
+
+    def record_booking(
+        self,
+        booking_type: str,
+        items: List[Dict[str, Any]],
+        total_amount: float,
+        currency: str = "INR",
+        at: Optional[float] = None
+    ):
+        """
+        Count a booking once for its destination and once per flight route
+
+        The destination is the first item's that has one (the outbound leg
+        of a round trip). Revenue is converted to INR and credited to the
+        destination and split evenly across the routes.
+        """
+        revenue = total_amount * reference_data.get().exchange_rates().get(currency, 1.0)
+        destinations = (destination_of(booking_type, item) for item in items)
+        self.record(
+            booking_stream("bookings:destination", booking_type), next((name for name in destinations if name), None), revenue, at
+        )
+        routes = list(dict.fromkeys(filter(None, (
+            normalize_route(item.get("origin"), item.get("destination")) for item in items if booking_type == "flight"
+        ))))
+        for route in routes:
+            self.record(booking_stream("bookings:route", booking_type), route, revenue / len(routes), at)
+
+    def record_search(self, booking_type: str, destination: str, origin: Optional[str] = None, at: Optional[float] = None):
+        self.record("searches:destination", destination_of(booking_type, {"destination": destination}), at=at)
+        if origin:
+            self.record("searches:route", normalize_route(origin, destination), at=at)
+
+    def top(
+        self,
+        db: Session,
+        stream: str,
+        window: str = "30d",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 10,
+        booking_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Top keys of a stream over a rolling window, or over whole days from start to end
+
+        Each row has an upper-bound count, the error it may be over by and
+        the revenue credited to it. Booking streams cover every booking type
+        unless booking_type is given.
+        """
+        if stream.startswith("bookings:"):
+            scopes = (booking_stream(stream, booking_type),) if booking_type else tuple(
+                f"{stream}:{name}" for name in BOOKING_TYPES
+            )
+        else:
+            scopes = (stream,)
+
+        if start is not None:
+            granularity = "day"
+            end = end or datetime.utcnow()
+            first, last = int(epoch(start) // 86400), int(epoch(end) // 86400)
+        else:
+            granularity, buckets = WINDOWS[window]
+            last = int(time.time() // GRANULARITIES[granularity][0])
+            first = last - buckets + 1
+
+        key = (scopes, granularity, first, last)
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            self.cache_hits += 1
+            return cached[1][:limit]
+        self.cache_misses += 1
+
+        rows = db.execute(
+            select(TopKSnapshot.entries, TopKSnapshot.total).where(self._in_window(scopes, granularity, first, last))
+        ).all()
+        merged = merge(SpaceSaving.from_entries(entries, total, self.capacity) for entries, total in rows)
+        if len(self._cache) > 256:
+            self._cache.clear()
+        self._cache[key] = (time.monotonic() + self.snapshot_interval, merged)
+        return merged[:limit]
+
+    def top_destinations(
+        self,
+        db: Session,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 10,
+        booking_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Most booked destinations by day, in the dashboards' {destination, bookings, revenue} shape"""
+        return [
+            {"destination": row["name"], "bookings": row["count"], "revenue": round(row["revenue"])}
+            for row in self.top(db, "bookings:destination", start=start, end=end, limit=limit, booking_type=booking_type)
+        ]
+
+    def rebuild(self, db: Session, days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Replace the booking snapshots with ones recounted from booking history
+
+        For backfilling after the table is created. Run it off-peak:
+        bookings made while it runs may be counted twice.
+        """
+        started = time.perf_counter()
+        days = days or self.retention_days
+        builder = HeavyHitters(session_factory=self.session_factory, capacity=self.capacity, retention_days=self.retention_days)
+        query = select(
+            Booking.id, Booking.booking_type, Booking.total_amount, Booking.currency, Booking.created_at, BookingItem.item_data
+        ).outerjoin(BookingItem, BookingItem.booking_id == Booking.id).where(
+            Booking.created_at >= datetime.utcnow() - timedelta(days=days)
+        ).order_by(Booking.id, BookingItem.id)
+
+        bookings, current, items = 0, None, []
+
+        def flush():
+            booking_id, booking_type, total_amount, currency, created_at = current
+            builder.record_booking(booking_type, items, total_amount or 0.0, currency or "INR", at=epoch(created_at))
+
+        for part in db.execute(query.execution_options(stream_results=True, yield_per=10000)).partitions():
+            for booking_id, booking_type, total_amount, currency, created_at, item_data in part:
+                if current is None or current[0] != booking_id:
+                    if current is not None:
+                        flush()
+                        bookings += 1
+                    current, items = (booking_id, booking_type, total_amount, currency, created_at), []
+                if item_data:
+                    items.append(item_data)
+        if current is not None:
+            flush()
+            bookings += 1
+
+        changed = [(bucket, self.dump(summary)) for bucket, summary in builder._buckets.items()]
+        db.execute(delete(TopKSnapshot).where(TopKSnapshot.stream.startswith("bookings:")))
+        self._write(db, "rebuild", changed)
+        self._purge(db, time.time())
+        db.commit()
+        self._cache.clear()
+        return {
+            "bookings": bookings,
+            "snapshot_rows": len(changed),
+            "duration_s": round(time.perf_counter() - started, 3)
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **super().metrics(),
+            "events": dict(self.events),
+            "capacity": self.capacity,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
+
+heavy_hitters = HeavyHitters()
@@ -0,0 +1,228 @@
+"""
+Outbound HTTP Clients for Faredown
+Application-scoped, pooled HTTP clients for external integrations
+"""
+
+from typing import Dict, Any, List, Optional
+import asyncio
+import bisect
+import importlib.util
+import logging
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+class CircuitOpenError(Exception):
+    """Raised when a host's circuit breaker is rejecting calls"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            return True
+        # While half-open only the single probe call is in flight
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets_ms: List[float] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.counts[bisect.bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.buckets_ms, self.counts)},
+                "le_inf": self.counts[-1]
+            }
+        }
+
+class HostClient:
+    """Pooled client for one upstream host with concurrency cap and breaker"""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        max_connections: int = 20,
+        max_concurrency: int = 20,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.http2 = HTTP2_AVAILABLE and self.base_url.startswith("https://")
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=self.http2,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0
+            ),
+            transport=transport
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.rejected = 0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request; 5xx responses and transport errors count as failures"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {self.name}")
+
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.errors += 1
+                self.breaker.record_failure()
+                raise
+            finally:
+                self.latency.observe((time.perf_counter() - started) * 1000)
+
+        if response.status_code >= 500:
+            self.errors += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "circuit_state": self.breaker.state,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "latency": self.latency.snapshot()
+        }
+
+class HTTPClientRegistry:
+    """
+    Registry of per-host clients shared by the whole application
+
+    Hosts are registered up front (see configure_defaults) and their
+    clients are built on first use, so unused integrations cost nothing.
+    """
+
+    def __init__(self):
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._clients: Dict[str, HostClient] = {}
+
+    def register(self, name: str, base_url: str, **options):
+        """Register (or replace the configuration of) a host"""
+        self._configs[name] = {"base_url": base_url, **options}
+
+    def configure_defaults(self):
+        """Register the integrations configured in settings"""
+        self.register("loyalty", settings.LOYALTY_SERVER_URL, max_concurrency=settings.OUTBOX_CONCURRENCY, timeout=5.0)
+        self.register("openai", settings.OPENAI_BASE_URL, max_concurrency=16, timeout=30.0)
+        self.register("amadeus", "https://test.api.amadeus.com", max_concurrency=10)
+        self.register("booking_com", "https://distribution-xml.booking.com", max_concurrency=10)
+        self.register("exchange_rates", "https://v6.exchangerate-api.com", max_concurrency=2)
+
+    def get(self, name: str) -> HostClient:
+        """Return the shared client for a registered host"""
+        client = self._clients.get(name)
+        if client is None:
+            if name not in self._configs:
+                raise KeyError(f"HTTP host '{name}' is not registered")
+            client = self._clients[name] = HostClient(name, **self._configs[name])
+        return client
+
+    async def aclose(self):
+        """Close every open client (application shutdown)"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Error closing HTTP client %s: %s", client.name, e)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: client.metrics() for name, client in self._clients.items()}
+
+# Configured in the application lifespan (main.py)
+http_clients = HTTPClientRegistry()
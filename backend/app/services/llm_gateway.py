@@ -0,0 +1,275 @@
+"""
+LLM Gateway for Faredown
+Cached, deduplicated and rate-limited chat completions with template fallback
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from app.core.config import settings
+from app.services.http_clients import LatencyHistogram, http_clients
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+class LLMUnavailableError(Exception):
+    """Raised when no completion can be requested (no API key)"""
+
+class LLMResult:
+    """One completion; source is memory, disk, api or fallback"""
+
+    __slots__ = ("text", "source", "prompt_tokens", "completion_tokens", "latency_ms")
+
+    def __init__(self, text: Optional[str], source: str, prompt_tokens: int = 0, completion_tokens: int = 0, latency_ms: float = 0.0):
+        self.text = text
+        self.source = source
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency_ms = latency_ms
+
+    def cached(self, source: str) -> "LLMResult":
+        return LLMResult(self.text, source, self.prompt_tokens, self.completion_tokens)
+
+def normalize(text: str) -> str:
+    """NFC, trimmed, runs of whitespace collapsed to one space"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def prompt_key(model: str, messages: Sequence[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+    """Cache key for a prompt; prompts differing only in whitespace or Unicode form share it"""
+    canonical = json.dumps(
+        [model, max_tokens, round(temperature, 2), [[m["role"], normalize(m["content"])] for m in messages]],
+        ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class DiskCache:
+    """
+    SQLite file shared by every worker on the host
+
+    Keeps completions across restarts and deploys. Opened lazily (and
+    reopened after a fork) so no connection crosses a process boundary.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, model TEXT, text TEXT, prompt_tokens INTEGER, "
+                "completion_tokens INTEGER, created_at REAL)"
+            )
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[LLMResult]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT text, prompt_tokens, completion_tokens FROM completions WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        return LLMResult(row[0], "disk", row[1], row[2]) if row else None
+
+    def put(self, key: str, model: str, result: LLMResult):
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, result.text, result.prompt_tokens, result.completion_tokens, time.time())
+            )
+
+    def purge(self) -> int:
+        """Delete expired completions"""
+        with self._lock:
+            return self._connect().execute("DELETE FROM completions WHERE created_at <= ?", (time.time() - self.ttl,)).rowcount
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+class LLMGateway:
+    """
+    Single entry point for chat completions
+
+    A prompt is answered from an in-process LRU, then the on-disk SQLite
+    tier, then the API through the "openai" host client. Identical
+    prompts in flight share one API call, at most LLM_MAX_CONCURRENCY
+    calls run at once, and a caller waits at most its timeout: on a
+    timeout or error it gets its fallback text while a slow call keeps
+    running and fills the cache. Callers that know when two prompts are
+    equivalent pass a cache_key instead of relying on the prompt text.
+    """
+
+    def __init__(
+        self,
+        model: str = settings.AI_MODEL,
+        host: str = "openai",
+        cache_size: int = settings.LLM_CACHE_SIZE,
+        cache_path: str = settings.LLM_CACHE_PATH,
+        cache_ttl: float = settings.LLM_CACHE_TTL,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        timeout: float = settings.LLM_TIMEOUT
+    ):
+        self.model = model
+        self.host = host
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.disk = DiskCache(cache_path, cache_ttl) if cache_path else None
+        self._memory: "OrderedDict[str, Tuple[float, LLMResult]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.latency = LatencyHistogram()
+        self.counts = {
+            "requests": 0, "memory_hits": 0, "disk_hits": 0, "api_calls": 0, "deduplicated": 0,
+            "timeouts": 0, "errors": 0, "fallbacks": 0
+        }
+        self.tokens = {"prompt": 0, "completion": 0, "saved": 0}
+
+    @property
+    def available(self) -> bool:
+        return bool(settings.OPENAI_API_KEY)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 256,
+        temperature: float = 0.7,
+        fallback: Optional[str] = None,
+        cache_key: Optional[Sequence[Any]] = None,
+        timeout: Optional[float] = None
+    ) -> LLMResult:
+        """Completion text for messages, or fallback if none arrives within timeout"""
+        self.counts["requests"] += 1
+        if cache_key is not None:
+            key = hashlib.sha256(json.dumps([self.model, *cache_key], ensure_ascii=False).encode()).hexdigest()
+        else:
+            key = prompt_key(self.model, messages, max_tokens, temperature)
+
+        entry = self._memory.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.cache_ttl:
+            self._memory.move_to_end(key)
+            self.counts["memory_hits"] += 1
+            self.tokens["saved"] += entry[1].prompt_tokens + entry[1].completion_tokens
+            return entry[1].cached("memory")
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._resolve(key, messages, max_tokens, temperature))
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        else:
+            self.counts["deduplicated"] += 1
+
+        try:
+            # shield: giving up on the wait leaves the call running to fill the cache
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.counts["timeouts"] += 1
+        except Exception as e:
+            self.counts["errors"] += 1
+            logger.warning("LLM completion failed, using fallback: %s: %s", type(e).__name__, e)
+        self.counts["fallbacks"] += 1
+        return LLMResult(fallback, "fallback")
+
+    async def _resolve(self, key: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> LLMResult:
+        if self.disk is not None:
+            result = await asyncio.to_thread(self.disk.get, key)
+            if result is not None:
+                self.counts["disk_hits"] += 1
+                self.tokens["saved"] += result.prompt_tokens + result.completion_tokens
+                self._remember(key, result)
+                return result
+
+        if not self.available:
+            raise LLMUnavailableError("OPENAI_API_KEY is not set")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await http_clients.get(self.host).post(
+                "/chat/completions",
+                headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+                json={"model": self.model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+            )
+            latency_ms = (time.perf_counter() - started) * 1000
+        self.counts["api_calls"] += 1
+        self.latency.observe(latency_ms)
+        response.raise_for_status()
+
+        body = response.json()
+        usage = body.get("usage") or {}
+        result = LLMResult(
+            body["choices"][0]["message"]["content"], "api",
+            usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0), round(latency_ms, 1)
+        )
+        self.tokens["prompt"] += result.prompt_tokens
+        self.tokens["completion"] += result.completion_tokens
+        self._remember(key, result)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.put, key, self.model, result)
+            except sqlite3.Error as e:
+                logger.warning("LLM disk cache write failed: %s", e)
+        return result
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Retrieve the exception even when every caller already gave up waiting
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("LLM call for %s failed: %s", key[:12], task.exception())
+
+    def _remember(self, key: str, result: LLMResult):
+        self._memory[key] = (time.monotonic(), result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop the in-process tier (the disk tier is kept)"""
+        self._memory.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        requests = self.counts["requests"]
+        hits = self.counts["memory_hits"] + self.counts["disk_hits"]
+        return {
+            "model": self.model,
+            "available": self.available,
+            **self.counts,
+            "hit_rate": round(hits / requests, 4) if requests else None,
+            "in_flight": len(self._inflight),
+            "memory_entries": len(self._memory),
+            "cache_size": self.cache_size,
+            "disk_path": self.disk.path if self.disk else None,
+            "tokens": dict(self.tokens),
+            "latency": self.latency.snapshot()
+        }
+
+# Global LLM gateway
+llm_gateway = LLMGateway()
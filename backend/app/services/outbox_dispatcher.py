@@ -0,0 +1,251 @@
+"""
+Outbox Dispatcher for Faredown
+Delivers committed outbox events (loyalty earning, ...) with retries
+"""
+
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import random
+
+from sqlalchemy import select, update, func
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.outbox_models import OutboxEvent, OutboxStatus
+from app.services.http_clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+# Client errors that are still worth retrying
+RETRYABLE_CLIENT_ERRORS = {408, 429}
+
+class PermanentDeliveryError(Exception):
+    """Delivery was rejected in a way that retrying cannot fix"""
+
+async def deliver_loyalty_earning(payload: Dict[str, Any]):
+    """POST a loyalty earning event to the loyalty service"""
+    response = await http_clients.get("loyalty").post("/api/loyalty/process-earning", json=payload)
+    if 400 <= response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_ERRORS:
+        raise PermanentDeliveryError(f"Loyalty service rejected the event with HTTP {response.status_code}")
+    response.raise_for_status()
+    result = response.json()
+    if not result.get("success"):
+        raise PermanentDeliveryError(str(result.get("error", "Loyalty earning rejected")))
+
+# Event type -> delivery handler
+EVENT_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+    "loyalty_earning": deliver_loyalty_earning,
+}
+
+class OutboxDispatcher:
+    """
+    Background worker draining the outbox_events table
+
+    Claims due events in batches (row locks with SKIP LOCKED on PostgreSQL
+    plus a lease on next_attempt_at, so several workers can run side by
+    side), delivers them concurrently over the shared pooled HTTP clients
+    (app.services.http_clients) and reschedules failures with exponential
+    backoff.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        concurrency: int = settings.OUTBOX_CONCURRENCY,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        base_backoff: float = 2.0,
+        max_backoff: float = 3600.0,
+        lease_seconds: int = 60
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease_seconds = lease_seconds
+
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+        self.delivered_total = 0
+        self.retried_total = 0
+        self.failed_total = 0
+        self.last_batch_size = 0
+        self.lag_seconds = 0.0
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self):
+        """Start the dispatch loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the dispatch loop"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = await self.dispatch_once()
+            except Exception as e:
+                logger.exception("Outbox dispatch failed: %s", e)
+                delivered = 0
+
+            # Drain back-to-back while there is a backlog, otherwise poll
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_once(self) -> int:
+        """Claim and deliver one batch; returns the number of events claimed"""
+        events = await asyncio.to_thread(self._claim_batch)
+        self.last_run_at = datetime.utcnow()
+        self.last_batch_size = len(events)
+        if not events:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(event: Dict[str, Any]):
+            async with semaphore:
+                return event, await self._deliver(event)
+
+        results = await asyncio.gather(*(deliver(event) for event in events))
+        await asyncio.to_thread(self._record_results, results)
+        return len(events)
+
+    async def _deliver(self, event: Dict[str, Any]) -> Optional[Exception]:
+        """Deliver a single event; returns the error, if any"""
+        handler = EVENT_HANDLERS.get(event["event_type"])
+        if handler is None:
+            return PermanentDeliveryError(f"No handler for event type {event['event_type']}")
+        try:
+            await handler(event["payload"])
+        except Exception as e:
+            return e
+        return None
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        """Lock due events, push their next_attempt_at out by the lease and return them"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            rows = db.execute(
+                select(
+                    OutboxEvent.id,
+                    OutboxEvent.event_type,
+                    OutboxEvent.payload,
+                    OutboxEvent.attempts
+                ).where(
+                    OutboxEvent.status == OutboxStatus.PENDING,
+                    OutboxEvent.next_attempt_at <= now
+                ).order_by(
+                    OutboxEvent.next_attempt_at
+                ).limit(self.batch_size).with_for_update(skip_locked=True)
+            ).all()
+
+            if rows:
+                db.execute(
+                    update(OutboxEvent).where(
+                        OutboxEvent.id.in_([row.id for row in rows])
+                    ).values(next_attempt_at=now + timedelta(seconds=self.lease_seconds))
+                )
+
+            oldest = db.execute(
+                select(func.min(OutboxEvent.created_at)).where(
+                    OutboxEvent.status == OutboxStatus.PENDING
+                )
+            ).scalar()
+            self.lag_seconds = self._age_seconds(oldest)
+
+            db.commit()
+            return [row._asdict() for row in rows]
+        finally:
+            db.close()
+
+    def _record_results(self, results: List[tuple]):
+        """Persist delivery outcomes for a batch"""
+        now = datetime.utcnow()
+        delivered_ids = []
+        failures = []
+
+        for event, error in results:
+            attempts = event["attempts"] + 1
+            if error is None:
+                delivered_ids.append(event["id"])
+                continue
+
+            permanent = isinstance(error, PermanentDeliveryError) or attempts >= self.max_attempts
+            failures.append({
+                "id": event["id"],
+                "attempts": attempts,
+                "status": OutboxStatus.FAILED if permanent else OutboxStatus.PENDING,
+                "next_attempt_at": now + timedelta(seconds=self._backoff(attempts)),
+                "last_error": f"{type(error).__name__}: {error}"[:1000]
+            })
+            if permanent:
+                self.failed_total += 1
+                logger.error("Outbox event %s failed permanently: %s", event["id"], error)
+            else:
+                self.retried_total += 1
+
+        db = self.session_factory()
+        try:
+            if delivered_ids:
+                db.execute(
+                    update(OutboxEvent).where(
+                        OutboxEvent.id.in_(delivered_ids)
+                    ).values(
+                        status=OutboxStatus.DELIVERED,
+                        delivered_at=now,
+                        attempts=OutboxEvent.attempts + 1,
+                        last_error=None
+                    )
+                )
+            if failures:
+                # Bulk UPDATE by primary key (executemany)
+                db.execute(update(OutboxEvent), failures)
+            db.commit()
+        finally:
+            db.close()
+
+        self.delivered_total += len(delivered_ids)
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(self.max_backoff, self.base_backoff * (2 ** attempts))
+        return random.uniform(0, ceiling)
+
+    def _age_seconds(self, timestamp: Optional[datetime]) -> float:
+        if timestamp is None:
+            return 0.0
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+        return max(0.0, (datetime.utcnow() - timestamp).total_seconds())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Dispatcher counters and outbox lag"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "delivered_total": self.delivered_total,
+            "retried_total": self.retried_total,
+            "failed_total": self.failed_total,
+            "last_batch_size": self.last_batch_size,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+# Started and stopped by the application lifespan in main.py
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,206 @@
+"""
+Payment Service for Faredown
+Payment/booking state machine with row-level locking
+"""
+
+from typing import Dict, Any, Optional
+from datetime import datetime
+import secrets
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.booking_models import Booking, Payment, BookingStatus, PaymentStatus, PaymentMethod
+from app.models.outbox_models import OutboxEvent
+from app.services.feature_store import feature_store
+
+# Allowed status transitions; anything not listed is rejected
+PAYMENT_TRANSITIONS = {
+    PaymentStatus.PENDING: {PaymentStatus.PROCESSING, PaymentStatus.FAILED},
+    PaymentStatus.PROCESSING: {PaymentStatus.COMPLETED, PaymentStatus.FAILED},
+    PaymentStatus.COMPLETED: {PaymentStatus.REFUNDED, PaymentStatus.PARTIAL_REFUND},
+    PaymentStatus.PARTIAL_REFUND: {PaymentStatus.PARTIAL_REFUND, PaymentStatus.REFUNDED},
+    PaymentStatus.FAILED: set(),
+    PaymentStatus.REFUNDED: set(),
+}
+
+BOOKING_TRANSITIONS = {
+    BookingStatus.PENDING: {BookingStatus.CONFIRMED, BookingStatus.CANCELLED, BookingStatus.FAILED},
+    BookingStatus.CONFIRMED: {BookingStatus.COMPLETED, BookingStatus.CANCELLED},
+    BookingStatus.CANCELLED: {BookingStatus.REFUNDED},
+    BookingStatus.COMPLETED: set(),
+    BookingStatus.REFUNDED: set(),
+    BookingStatus.FAILED: set(),
+}
+
+class InvalidTransition(Exception):
+    """Requested status change is not allowed from the current state"""
+
+def check_transition(transitions: Dict, current, target):
+    """Raise InvalidTransition unless current -> target is allowed"""
+    if target not in transitions.get(current, set()):
+        raise InvalidTransition(f"Cannot move from {current.value} to {target.value}")
+
+class PaymentService:
+    """Payment initiation and confirmation"""
+
+    def initiate_payment(
+        self,
+        db: Session,
+        booking: Booking,
+        amount: float,
+        payment_method: str,
+        gateway_data: Dict[str, Any]
+    ):
+        """
+        Create a payment already in PROCESSING state
+
+        The payment row is written once with RETURNING instead of being
+        inserted and then updated in a second commit.
+        """
+        check_transition(PAYMENT_TRANSITIONS, PaymentStatus.PENDING, PaymentStatus.PROCESSING)
+
+        # In production, integrate with actual payment gateway
+        # For demo, simulate payment processing
+        payment = db.execute(
+            insert(Payment).values(
+                booking_id=booking.id,
+                payment_id=f"PAY_{secrets.token_hex(6).upper()}",
+                amount=amount,
+                currency=booking.currency,
+                payment_method=PaymentMethod(payment_method),
+                payment_gateway="razorpay",  # Default gateway
+                gateway_response=gateway_data,
+                status=PaymentStatus.PROCESSING,
+                gateway_transaction_id=f"razorpay_{secrets.token_hex(8)}"
+            ).returning(
+                Payment.payment_id,
+                Payment.status,
+                Payment.gateway_transaction_id,
+                Payment.amount,
+                Payment.currency
+            )
+        ).one()
+        db.commit()
+        return payment
+
+    def confirm_payment(
+        self,
+        db: Session,
+        payment_id: str,
+        user_id: int,
+        gateway_response: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Mark a payment COMPLETED and its booking CONFIRMED
+
+        Payment and booking are locked together with one joined
+        SELECT ... FOR UPDATE, then each is moved with a single guarded
+        UPDATE ... RETURNING. Confirming an already completed payment is a
+        no-op, so concurrent webhook and client confirmations are safe.
+        Returns None if the payment doesn't exist for this user.
+        """
+        row = self._locked_state(db, payment_id, user_id)
+
+        if row is None:
+            db.rollback()
+            return None
+
+        if row.payment_status == PaymentStatus.COMPLETED:
+            # Duplicate confirmation (e.g. webhook after client): nothing to do
+            db.rollback()
+            return self._result(row.booking_reference, row.payment_status, row.booking_status)
+
+        try:
+            check_transition(PAYMENT_TRANSITIONS, row.payment_status, PaymentStatus.COMPLETED)
+            check_transition(BOOKING_TRANSITIONS, row.booking_status, BookingStatus.CONFIRMED)
+        except InvalidTransition:
+            db.rollback()
+            raise
+
+        now = datetime.utcnow()
+
+        # Status guards keep the updates correct even where FOR UPDATE is a
+        # no-op (SQLite development databases)
+        payment_status = db.execute(
+            update(Payment).where(
+                Payment.id == row.payment_pk,
+                Payment.status == row.payment_status
+            ).values(
+                status=PaymentStatus.COMPLETED,
+                completed_at=now,
+                gateway_response=gateway_response
+            ).returning(Payment.status)
+        ).scalar()
+
+        booking_status = db.execute(
+            update(Booking).where(
+                Booking.id == row.booking_pk,
+                Booking.status == row.booking_status
+            ).values(
+                status=BookingStatus.CONFIRMED,
+                confirmed_at=now,
+                supplier_booking_ref=f"SUP_{secrets.token_hex(4).upper()}"
+            ).returning(Booking.status)
+        ).scalar()
+
+        if payment_status is None or booking_status is None:
+            # Lost a race with a concurrent confirmation
+            db.rollback()
+            current = self._locked_state(db, payment_id, user_id)
+            db.rollback()
+            if current is not None and current.payment_status == PaymentStatus.COMPLETED:
+                return self._result(current.booking_reference, current.payment_status, current.booking_status)
+            raise InvalidTransition("Payment or booking changed concurrently")
+
+        # Loyalty points earning is delivered by the outbox dispatcher; the
+        # event is committed together with the payment so it can't be lost
+        db.execute(insert(OutboxEvent).values(
+            event_type="loyalty_earning",
+            aggregate_id=row.booking_reference,
+            payload={
+                "userId": str(user_id),
+                "bookingId": row.booking_reference,
+                "bookingType": "HOTEL" if row.booking_type == "hotel" else "FLIGHT",
+                "eligibility": {
+                    # 80% of total (excluding taxes/fees)
+                    "eligibleAmount": float(row.total_amount) * 0.8,
+                    "currency": row.currency or "INR",
+                    "fxRate": 1.0
+                },
+                "description": f"{row.booking_type.title()} booking confirmed"
+            }
+        ))
+
+        # The user's behavior features count the booking in the same transaction
+        feature_store.record_booking(db, user_id, float(row.total_amount), now)
+
+        db.commit()
+        return self._result(row.booking_reference, payment_status, booking_status)
+
+    def _locked_state(self, db: Session, payment_id: str, user_id: int):
+        """Lock and read a payment and its booking in one joined query"""
+        return db.execute(
+            select(
+                Payment.id.label("payment_pk"),
+                Payment.status.label("payment_status"),
+                Booking.id.label("booking_pk"),
+                Booking.status.label("booking_status"),
+                Booking.booking_reference,
+                Booking.booking_type,
+                Booking.total_amount,
+                Booking.currency
+            ).join(
+                Booking, Payment.booking_id == Booking.id
+            ).where(
+                Payment.payment_id == payment_id,
+                Booking.user_id == user_id
+            ).with_for_update()
+        ).first()
+
+    def _result(self, booking_reference: str, payment_status: PaymentStatus, booking_status: BookingStatus):
+        return {
+            "booking_reference": booking_reference,
+            "payment_status": payment_status.value,
+            "booking_status": booking_status.value
+        }
@@ -5,6 +5,8 @@ Markup calculation, currency conversion, and pricing logic
 
 from typing import Dict, Any, Optional
 from app.core.config import settings
+from app.services.fee_engine import fee_engine
+from app.services.reference_data import reference_data
 
 class PricingService:
     """Service for handling pricing calculations and markup logic"""
@@ -23,8 +25,13 @@ class PricingService:
     ) -> Dict[str, float]:
         """Calculate markup range for specific route/supplier"""
         
-        # In production, this would query the markup database
-        # For now, return default values with some route-specific adjustments
+        # Configured markup rules win over the built-in adjustments below
+        rule = reference_data.get().markup_rule(booking_type, origin, destination, supplier)
+        if rule:
+            return {
+                "markup_min": rule["markup_min"],
+                "markup_max": rule["markup_max"]
+            }
         
         base_min = self.default_markup_min
         base_max = self.default_markup_max
@@ -105,15 +112,9 @@ class PricingService:
         if from_currency == to_currency:
             return amount
         
-        # Use provided rates or default rates
+        # Use provided rates or the shared currency snapshot (INR per unit)
         if not exchange_rates:
-            exchange_rates = {
-                "USD": 83.0,  # 1 USD = 83 INR
-                "EUR": 90.5,  # 1 EUR = 90.5 INR
-                "GBP": 105.2, # 1 GBP = 105.2 INR
-                "AED": 22.6,  # 1 AED = 22.6 INR
-                "SGD": 61.8   # 1 SGD = 61.8 INR
-            }
+            exchange_rates = reference_data.get().exchange_rates()
         
         # Convert to INR first, then to target currency
         if from_currency == "INR":
@@ -135,22 +136,11 @@ class PricingService:
     ) -> Dict[str, float]:
         """Calculate applicable taxes"""
         
-        # Simplified tax calculation
-        vat_rate = 0.0
+        quote = fee_engine.quote(booking_type, base_amount, origin_country, destination_country)
+        vat_rate = quote["vat_percentage"]
         service_tax = 0.0
         
-        if booking_type == "flight":
-            if origin_country == "IN" and destination_country == "IN":
-                vat_rate = 5.0  # Domestic flights
-            else:
-                vat_rate = 0.0  # International flights
-        elif booking_type == "hotel":
-            if destination_country == "IN":
-                vat_rate = 12.0  # Domestic hotels
-            else:
-                vat_rate = 0.0  # International hotels
-        
-        vat_amount = base_amount * (vat_rate / 100)
+        vat_amount = quote["vat_amount"]
         service_tax_amount = base_amount * (service_tax / 100)
         total_taxes = vat_amount + service_tax_amount
         
@@ -166,28 +156,16 @@ class PricingService:
         self,
         booking_type: str,
         payment_method: str = "credit_card",
-        booking_amount: float = 0.0
+        booking_amount: float = 0.0,
+        origin_country: str = "IN",
+        destination_country: str = "IN"
     ) -> float:
         """Calculate convenience fee"""
         
-        # Base convenience fees
-        base_fees = {
-            "flight": 50.0,
-            "hotel": 35.0,
-            "package": 75.0
-        }
-        
-        base_fee = base_fees.get(booking_type, 50.0)
-        
-        # Payment method adjustments
-        if payment_method == "net_banking":
-            base_fee *= 0.8  # 20% discount for net banking
-        elif payment_method == "upi":
-            base_fee *= 0.7  # 30% discount for UPI
-        elif payment_method == "wallet":
-            base_fee *= 0.9  # 10% discount for wallet
-        
-        return round(base_fee, 2)
+        quote = fee_engine.quote(
+            booking_type, booking_amount, origin_country, destination_country, payment_method
+        )
+        return round(quote["convenience_fee"], 2)
     
     def validate_bargain_price(
         self,
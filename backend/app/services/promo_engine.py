@@ -0,0 +1,465 @@
+"""
+Promo Engine for Faredown
+In-memory promo code index with atomic, limit-enforcing redemption
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from itertools import chain
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import select, update, insert, func, or_, and_, false, event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy_imports import lazy_module
+from app.database import SessionLocal
+from app.models.promo_models import PromoCode, PromoUsage
+
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+class PromoError(Exception):
+    """Promo code cannot be applied; the message is safe to show the user"""
+
+class PromoNotFound(PromoError):
+    """No active promo code with this code"""
+
+class PromoNotApplicable(PromoError):
+    """Code exists but does not apply to this cart (window, type, route, amount)"""
+
+class PromoLimitReached(PromoError):
+    """Global or per-user usage limit has been reached"""
+
+EPOCH = datetime(1970, 1, 1)
+
+def epoch_seconds(moment: datetime) -> float:
+    """Naive UTC datetime as seconds, without local-time conversion"""
+    return (moment - EPOCH).total_seconds()
+
+def normalize_route(origin: Optional[str], destination: Optional[str]) -> Optional[str]:
+    origin, destination = (origin or "").strip(), (destination or "").strip()
+    if not origin or not destination:
+        return None
+    return f"{origin.upper()}-{destination.upper()}"
+
+def parse_routes(routes) -> Optional[frozenset]:
+    """applicable_routes entries are "DEL-BOM" strings or {"origin", "destination"} objects"""
+    if not routes:
+        return None
+    parsed = set()
+    for route in routes:
+        if isinstance(route, dict):
+            route = normalize_route(route.get("origin"), route.get("destination"))
+        elif isinstance(route, str):
+            route = route.strip().upper()
+        if route:
+            parsed.add(route)
+    return frozenset(parsed) or None
+
+class PromoRule:
+    """Immutable, pre-parsed view of one PromoCode row"""
+
+    __slots__ = (
+        "id", "code", "name", "description", "discount_type", "discount_value",
+        "max_discount_amount", "usage_limit", "usage_limit_per_user", "valid_from",
+        "valid_until", "min_booking_amount", "booking_types", "routes"
+    )
+
+    def __init__(self, promo: PromoCode):
+        self.id = promo.id
+        self.code = promo.code.upper()
+        self.name = promo.name
+        self.description = promo.description
+        self.discount_type = promo.discount_type
+        self.discount_value = promo.discount_value
+        self.max_discount_amount = promo.max_discount_amount
+        self.usage_limit = promo.usage_limit
+        self.usage_limit_per_user = promo.usage_limit_per_user
+        self.valid_from = promo.valid_from
+        self.valid_until = promo.valid_until
+        self.min_booking_amount = promo.min_booking_amount or 0.0
+        self.booking_types = frozenset(promo.applicable_booking_types) if promo.applicable_booking_types else None
+        self.routes = parse_routes(promo.applicable_routes)
+
+    def discount(self, amount: float) -> float:
+        if self.discount_type == "percentage":
+            discount = amount * self.discount_value / 100
+            if self.max_discount_amount is not None:
+                discount = min(discount, self.max_discount_amount)
+        else:
+            discount = self.discount_value
+        return round(min(discount, amount), 2)
+
+    def check(self, booking_type: str, amount: float, route: Optional[str], now: datetime):
+        """Raise PromoNotApplicable unless the cart qualifies (usage limits aside)"""
+        if now < self.valid_from:
+            raise PromoNotApplicable(f"{self.code} is not valid yet")
+        if now >= self.valid_until:
+            raise PromoNotApplicable(f"{self.code} has expired")
+        if self.booking_types is not None and booking_type not in self.booking_types:
+            raise PromoNotApplicable(f"{self.code} does not apply to {booking_type} bookings")
+        if self.routes is not None and route not in self.routes:
+            raise PromoNotApplicable(f"{self.code} does not apply to this route")
+        if amount < self.min_booking_amount:
+            raise PromoNotApplicable(f"{self.code} needs a minimum booking of {self.min_booking_amount:g}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "code": self.code,
+            "name": self.name,
+            "description": self.description,
+            "discount_type": self.discount_type,
+            "discount_value": self.discount_value,
+            "max_discount_amount": self.max_discount_amount,
+            "min_booking_amount": self.min_booking_amount,
+            "applicable_booking_types": sorted(self.booking_types) if self.booking_types else None,
+            "valid_until": self.valid_until.isoformat()
+        }
+
+class PromoIndex:
+    """
+    Active promo codes indexed by code and by applicability
+
+    by_applicability maps (booking_type or None, route or None) to the rules
+    restricted to exactly that booking type/route; None means unrestricted.
+    A cart only has to look at its four buckets. Best-promo search reads
+    the buckets as PromoColumns.
+    """
+
+    def __init__(self, rules: List[PromoRule]):
+        self.built_at = time.time()
+        self.by_code: Dict[str, PromoRule] = {rule.code: rule for rule in rules}
+        self.by_applicability: Dict[Tuple[Optional[str], Optional[str]], List[PromoRule]] = {}
+        for rule in rules:
+            for booking_type in rule.booking_types or (None,):
+                for route in rule.routes or (None,):
+                    self.by_applicability.setdefault((booking_type, route), []).append(rule)
+
+        self._columns: Dict[Tuple[Optional[str], Optional[str]], PromoColumns] = {}
+
+    @staticmethod
+    def bucket_keys(booking_type: Optional[str], route: Optional[str]):
+        return {(booking_type, route), (booking_type, None), (None, route), (None, None)}
+
+    def candidates(self, booking_type: str, route: Optional[str]) -> List[PromoRule]:
+        """Rules whose booking type and route restrictions admit this cart"""
+        return list(chain.from_iterable(
+            self.by_applicability.get(key, ()) for key in self.bucket_keys(booking_type, route)
+        ))
+
+    def columns(self, key: Tuple[Optional[str], Optional[str]]) -> Optional["PromoColumns"]:
+        """Column arrays for one bucket, built on first use"""
+        columns = self._columns.get(key)
+        if columns is None and key in self.by_applicability:
+            columns = self._columns[key] = PromoColumns(self.by_applicability[key])
+        return columns
+
+class PromoColumns:
+    """
+    One applicability bucket as numpy columns, sorted by valid_from
+
+    Codes that have started are a prefix found by binary search; expiry,
+    minimum amount and the discount are then evaluated for the whole
+    prefix at once.
+    """
+
+    def __init__(self, rules: List[PromoRule]):
+        self.rules = sorted(rules, key=lambda rule: rule.valid_from)
+        count = len(self.rules)
+        self.starts = np.fromiter((epoch_seconds(rule.valid_from) for rule in self.rules), np.float64, count)
+        self.ends = np.fromiter((epoch_seconds(rule.valid_until) for rule in self.rules), np.float64, count)
+        self.min_amount = np.fromiter((rule.min_booking_amount for rule in self.rules), np.float64, count)
+        self.is_percentage = np.fromiter((rule.discount_type == "percentage" for rule in self.rules), bool, count)
+        self.value = np.fromiter((rule.discount_value for rule in self.rules), np.float64, count)
+        self.cap = np.fromiter(
+            (math.inf if rule.max_discount_amount is None else rule.max_discount_amount for rule in self.rules),
+            np.float64, count
+        )
+
+    def discounts(self, amount: float, at: float):
+        """(positions, discounts) of the codes live at `at` that this amount qualifies for"""
+        started = int(np.searchsorted(self.starts, at, side="right"))
+        positions = np.flatnonzero((self.ends[:started] > at) & (self.min_amount[:started] <= amount))
+        discounts = np.where(
+            self.is_percentage[positions],
+            np.minimum(amount * self.value[positions] / 100, self.cap[positions]),
+            self.value[positions]
+        )
+        return positions, np.round(np.minimum(discounts, amount), 2)
+
+def table_fingerprint(db) -> Tuple:
+    """Cheap change detector (row count, last configuration change)"""
+    return tuple(db.execute(select(func.count(PromoCode.id), func.max(PromoCode.updated_at))).one())
+
+class PromoEngine:
+    """
+    Promo validation and redemption
+
+    Eligibility is answered from the in-memory PromoIndex; only usage
+    limits touch the database. The index is rebuilt when this process
+    commits a promo code change, and otherwise at most every
+    PROMO_INDEX_CHECK_INTERVAL seconds if the table changed elsewhere.
+    """
+
+    def __init__(self):
+        self._index: Optional[PromoIndex] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._index = None
+
+    def build(self) -> PromoIndex:
+        """Load active, unexpired codes and swap in a new index"""
+        with self._lock:
+            db = SessionLocal()
+            try:
+                fingerprint = table_fingerprint(db)
+                promos = db.execute(
+                    select(PromoCode).where(
+                        PromoCode.is_active.is_(True),
+                        PromoCode.is_deleted.is_(False),
+                        PromoCode.valid_until >= datetime.utcnow()
+                    )
+                ).scalars().all()
+                rules = [PromoRule(promo) for promo in promos]
+            finally:
+                db.close()
+
+            self._index = PromoIndex(rules)
+            self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            logger.info("Promo index built with %d codes", len(rules))
+            return self._index
+
+    def _changed_elsewhere(self) -> bool:
+        self._checked_at = time.monotonic()
+        db = SessionLocal()
+        try:
+            return table_fingerprint(db) != self._fingerprint
+        finally:
+            db.close()
+
+    def index(self) -> PromoIndex:
+        index = self._index
+        if index is None:
+            return self.build()
+        if time.monotonic() - self._checked_at >= settings.PROMO_INDEX_CHECK_INTERVAL and self._changed_elsewhere():
+            return self.build()
+        return index
+
+    def _rule(self, code: str) -> PromoRule:
+        rule = self.index().by_code.get(code.strip().upper())
+        if rule is None:
+            raise PromoNotFound("Invalid promo code")
+        return rule
+
+    def _usage_left(self, db: Session, rule: PromoRule, user_id: Optional[int]):
+        """Raise PromoLimitReached if the code or this user's allowance is used up"""
+        current_usage = db.execute(select(PromoCode.current_usage).where(PromoCode.id == rule.id)).scalar()
+        if rule.usage_limit is not None and current_usage >= rule.usage_limit:
+            raise PromoLimitReached(f"{rule.code} has been fully redeemed")
+        if user_id is not None and self._user_usage(db, rule, user_id) >= rule.usage_limit_per_user:
+            raise PromoLimitReached(f"You have already used {rule.code}")
+
+    def _user_usage(self, db: Session, rule: PromoRule, user_id: int) -> int:
+        return db.execute(
+            select(func.count(PromoUsage.id)).where(
+                PromoUsage.promo_code_id == rule.id,
+                PromoUsage.user_id == user_id,
+                PromoUsage.is_deleted.is_(False)
+            )
+        ).scalar()
+
+    def validate(
+        self,
+        db: Session,
+        code: str,
+        booking_type: str,
+        amount: float,
+        user_id: Optional[int] = None,
+        route: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Discount the code would give this cart, without redeeming it"""
+        rule = self._rule(code)
+        rule.check(booking_type, amount, route, datetime.utcnow())
+        self._usage_left(db, rule, user_id)
+        return {"promo": rule.to_dict(), "discount_amount": rule.discount(amount)}
+
+    def redeem(
+        self,
+        db: Session,
+        code: str,
+        user_id: int,
+        booking_type: str,
+        amount: float,
+        route: Optional[str] = None,
+        booking_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Consume one use of the code for this user and record it
+
+        The global limit is enforced by a conditional increment
+        (current_usage < usage_limit ... RETURNING), which also row-locks the
+        code, so the per-user count that follows can't race with another
+        redemption of the same code. Any failure rolls the increment back.
+        """
+        rule = self._rule(code)
+        now = datetime.utcnow()
+        rule.check(booking_type, amount, route, now)
+
+        counter = db.execute(
+            update(PromoCode)
+            .where(
+                PromoCode.id == rule.id,
+                PromoCode.is_active.is_(True),
+                PromoCode.is_deleted.is_(False),
+                PromoCode.valid_until > now,
+                or_(PromoCode.usage_limit.is_(None), PromoCode.current_usage < PromoCode.usage_limit)
+            )
+            # Usage bumps are not configuration changes: keep updated_at (the index fingerprint) as is
+            .values(current_usage=PromoCode.current_usage + 1, updated_at=PromoCode.updated_at)
+            .returning(PromoCode.current_usage, PromoCode.usage_limit)
+            .execution_options(promo_usage_counter=True)
+        ).first()
+        if counter is None:
+            db.rollback()
+            raise PromoLimitReached(f"{rule.code} has been fully redeemed")
+
+        if self._user_usage(db, rule, user_id) >= rule.usage_limit_per_user:
+            db.rollback()
+            raise PromoLimitReached(f"You have already used {rule.code}")
+
+        discount = rule.discount(amount)
+        db.execute(insert(PromoUsage).values(
+            user_id=user_id,
+            promo_code_id=rule.id,
+            booking_id=booking_id,
+            discount_amount=discount,
+            booking_amount=amount
+        ))
+        db.commit()
+
+        remaining = counter.usage_limit - counter.current_usage if counter.usage_limit is not None else None
+        return {"promo": rule.to_dict(), "discount_amount": discount, "remaining_uses": remaining}
+
+    def best(
+        self,
+        db: Session,
+        booking_type: str,
+        amount: float,
+        user_id: Optional[int] = None,
+        route: Optional[str] = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Codes this user can redeem on this cart, biggest discount first
+
+        Candidates come from the cart's applicability buckets, pruned by
+        validity window and minimum amount and priced in bulk. Only the
+        leading candidates are checked against global and per-user usage,
+        in one grouped query per round.
+        """
+        index = self.index()
+        at = epoch_seconds(datetime.utcnow())
+
+        bucket_rules, buckets, positions, discounts = [], [], [], []
+        for key in index.bucket_keys(booking_type, route):
+            columns = index.columns(key)
+            if columns is None:
+                continue
+            bucket_positions, bucket_discounts = columns.discounts(amount, at)
+            buckets.append(np.full(len(bucket_positions), len(bucket_rules), dtype=np.intp))
+            bucket_rules.append(columns.rules)
+            positions.append(bucket_positions)
+            discounts.append(bucket_discounts)
+        if not bucket_rules:
+            return []
+        buckets, positions, discounts = np.concatenate(buckets), np.concatenate(positions), np.concatenate(discounts)
+
+        def rule_at(i) -> PromoRule:
+            return bucket_rules[buckets[i]][positions[i]]
+
+        # Walk candidates in discount order, a usage-checked round at a time
+        round_size = max(limit * 2, 16)
+        remaining = np.flatnonzero(discounts > 0)
+        ranked = []
+        while len(ranked) < limit and len(remaining):
+            take = min(round_size, len(remaining))
+            if take < len(remaining):
+                leading = np.argpartition(-discounts[remaining], take - 1)[:take]
+                chosen, remaining = remaining[leading], np.delete(remaining, leading)
+            else:
+                chosen, remaining = remaining, remaining[:0]
+            chosen = chosen[np.argsort(-discounts[chosen], kind="stable")]
+
+            usage = self._usage_counts(db, [rule_at(i).id for i in chosen], user_id)
+            for i in chosen:
+                rule = rule_at(i)
+                if rule.id not in usage:
+                    continue  # deleted since the index was built
+                current_usage, user_usage = usage[rule.id]
+                if rule.usage_limit is not None and current_usage >= rule.usage_limit:
+                    continue
+                if user_id is not None and user_usage >= rule.usage_limit_per_user:
+                    continue
+                ranked.append({**rule.to_dict(), "discount_amount": float(discounts[i])})
+                if len(ranked) == limit:
+                    break
+        return ranked
+
+    def _usage_counts(self, db: Session, promo_ids: List[int], user_id: Optional[int]) -> Dict[int, Tuple[int, int]]:
+        """promo id -> (current_usage, uses by user_id) in one grouped query"""
+        user_usage = and_(
+            PromoUsage.promo_code_id == PromoCode.id,
+            PromoUsage.user_id == user_id,
+            PromoUsage.is_deleted.is_(False)
+        ) if user_id is not None else false()
+        rows = db.execute(
+            select(PromoCode.id, PromoCode.current_usage, func.count(PromoUsage.id))
+            .outerjoin(PromoUsage, user_usage)
+            .where(PromoCode.id.in_(promo_ids))
+            .group_by(PromoCode.id, PromoCode.current_usage)
+        ).all()
+        return {promo_id: (current_usage, used) for promo_id, current_usage, used in rows}
+
+    def available(self, booking_type: Optional[str] = None, route: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Codes currently live for a booking type/route (all live codes if no type)"""
+        index = self.index()
+        now = datetime.utcnow()
+        rules = index.candidates(booking_type, route) if booking_type else index.by_code.values()
+        live = [rule for rule in rules if rule.valid_from <= now < rule.valid_until]
+        return [rule.to_dict() for rule in sorted(live, key=lambda rule: rule.code)]
+
+# Global promo engine
+promo_engine = PromoEngine()
+
+PROMO_INDEX_CHANGED = "promo_index_changed"
+
+@event.listens_for(Session, "after_flush")
+def _track_promo_changes(session, flush_context):
+    if any(isinstance(obj, PromoCode) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[PROMO_INDEX_CHANGED] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_promo_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_select or orm_execute_state.execution_options.get("promo_usage_counter"):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is PromoCode:
+        orm_execute_state.session.info[PROMO_INDEX_CHANGED] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_promo_index(session):
+    if session.info.pop(PROMO_INDEX_CHANGED, False):
+        promo_engine.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_promo_changes(session):
+    session.info.pop(PROMO_INDEX_CHANGED, None)
@@ -0,0 +1,226 @@
+"""
+Reference Data Snapshot for Faredown
+Read-mostly catalogs (markups, currencies, airlines, airports)
+loaded once and shared read-only between requests and worker processes
+"""
+
+from typing import Dict, Any, Mapping, Optional
+from datetime import datetime
+from types import MappingProxyType
+import logging
+import os
+import signal
+import threading
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.pricing_models import Markup, Currency
+from app.models.flight_models import Airline, Airport
+
+logger = logging.getLogger(__name__)
+
+# Set by gunicorn.conf.py in the master; workers inherit it across fork
+MASTER_PID_ENV = "FAREDOWN_GUNICORN_MASTER_PID"
+
+# Built-in values used until the corresponding tables are populated
+DEFAULT_CURRENCIES = [
+    {"code": "INR", "name": "Indian Rupee", "symbol": "₹", "exchange_rate": 1.0},
+    {"code": "USD", "name": "US Dollar", "symbol": "$", "exchange_rate": 83.0},
+    {"code": "EUR", "name": "Euro", "symbol": "€", "exchange_rate": 90.5},
+    {"code": "GBP", "name": "British Pound", "symbol": "£", "exchange_rate": 105.2},
+    {"code": "AED", "name": "UAE Dirham", "symbol": "د.إ", "exchange_rate": 22.6},
+    {"code": "SGD", "name": "Singapore Dollar", "symbol": "S$", "exchange_rate": 61.8},
+]
+
+DEFAULT_AIRLINES = [
+    {"code": "AI", "name": "Air India"},
+    {"code": "6E", "name": "IndiGo"},
+    {"code": "SG", "name": "SpiceJet"},
+]
+
+def freeze(value):
+    """Recursively convert dicts/lists to read-only mappings/tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+class ReferenceSnapshot:
+    """
+    One immutable generation of reference data
+
+    Everything is a MappingProxyType or tuple so a snapshot built in the
+    gunicorn master can be shared by forked workers without copies.
+    Reloading replaces the whole snapshot rather than mutating it.
+    """
+
+    __slots__ = (
+        "version", "built_at", "source", "markups", "currencies",
+        "airlines", "airports"
+    )
+
+    def __init__(self, version: int, source: str, **catalogs):
+        self.version = version
+        self.built_at = datetime.utcnow()
+        self.source = source
+        for name in self.__slots__[3:]:
+            setattr(self, name, freeze(catalogs.get(name, {})))
+
+    def exchange_rates(self) -> Dict[str, float]:
+        """Currency code -> INR per unit, for PricingService.convert_currency"""
+        return {code: currency["exchange_rate"] for code, currency in self.currencies.items()}
+
+    def markup_rule(
+        self,
+        booking_type: str,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        supplier: Optional[str] = None
+    ) -> Optional[Mapping[str, Any]]:
+        """Most specific active markup rule; blank rule fields match anything"""
+        wanted = {"origin": origin, "destination": destination, "supplier": supplier}
+        best, best_score = None, -1
+        for rule in self.markups:
+            if rule["booking_type"] != booking_type:
+                continue
+            score = 0
+            for field, value in wanted.items():
+                if rule[field] is None:
+                    continue
+                if value is None or rule[field].lower() != value.lower():
+                    break
+                score += 1
+            else:
+                if score > best_score:
+                    best, best_score = rule, score
+        return best
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "built_at": self.built_at.isoformat(),
+            "source": self.source,
+            "counts": {name: len(getattr(self, name)) for name in self.__slots__[3:]},
+            "pid": os.getpid()
+        }
+
+def load_catalogs(db) -> Dict[str, Any]:
+    """Read every reference table; empty tables fall back to the defaults"""
+
+    def active(model, *criteria, order_by=None):
+        query = select(model).where(model.is_deleted.is_(False), *criteria)
+        return db.execute(query.order_by(order_by if order_by is not None else model.id)).scalars().all()
+
+    markups = [
+        {
+            "booking_type": row.booking_type,
+            "origin": row.origin,
+            "destination": row.destination,
+            "supplier": row.supplier,
+            "markup_min": row.markup_percentage_min,
+            "markup_max": row.markup_percentage_max,
+        }
+        for row in active(Markup, Markup.is_active.is_(True))
+    ]
+
+    currencies = {
+        row.code: {"code": row.code, "name": row.name, "symbol": row.symbol, "exchange_rate": row.exchange_rate}
+        for row in active(Currency, Currency.is_active.is_(True))
+    } or {currency["code"]: currency for currency in DEFAULT_CURRENCIES}
+
+    airlines = [
+        {"code": row.iata_code, "name": row.name}
+        for row in active(Airline, Airline.is_active.is_(True), order_by=Airline.iata_code)
+    ] or DEFAULT_AIRLINES
+
+    airports = {
+        row.iata_code: {
+            "code": row.iata_code,
+            "name": row.name,
+            "city": row.city,
+            "country": row.country,
+            "timezone": row.timezone,
+        }
+        for row in active(Airport, Airport.is_active.is_(True))
+    }
+
+    return {
+        "markups": markups,
+        "currencies": currencies,
+        "airlines": airlines,
+        "airports": airports,
+    }
+
+def default_catalogs() -> Dict[str, Any]:
+    return {
+        "markups": [],
+        "currencies": {currency["code"]: currency for currency in DEFAULT_CURRENCIES},
+        "airlines": DEFAULT_AIRLINES,
+        "airports": {},
+    }
+
+class ReferenceDataStore:
+    """
+    Holder for the current ReferenceSnapshot
+
+    Under gunicorn (gunicorn.conf.py) the master builds the snapshot after
+    preloading the app and freezes it out of the GC before forking workers;
+    a SIGHUP rebuilds it in the master and rolls the workers onto the new
+    one. In a single process (python main.py) the lifespan builds it and
+    reload() rebuilds it in place.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._lock = threading.Lock()
+        self._version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def get(self) -> ReferenceSnapshot:
+        """Current snapshot, building it on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.rebuild()
+        return snapshot
+
+    def rebuild(self) -> ReferenceSnapshot:
+        """Load a new snapshot and swap it in; keeps the old one if loading fails"""
+        with self._lock:
+            try:
+                db = SessionLocal()
+                try:
+                    catalogs, source = load_catalogs(db), "database"
+                finally:
+                    db.close()
+            except Exception as e:
+                if self._snapshot is not None:
+                    logger.error("Reference data reload failed, keeping version %s: %s", self._snapshot.version, e)
+                    return self._snapshot
+                logger.warning("Reference data unavailable, using defaults: %s", e)
+                catalogs, source = default_catalogs(), "defaults"
+
+            self._version += 1
+            self._snapshot = ReferenceSnapshot(self._version, source, **catalogs)
+            logger.info("Reference data snapshot %s built from %s", self._version, source)
+            return self._snapshot
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        Rebuild the snapshot everywhere it is served from
+
+        Under gunicorn this signals the master (SIGHUP), which rebuilds and
+        replaces the workers gracefully; otherwise it rebuilds in-process.
+        """
+        master_pid = os.environ.get(MASTER_PID_ENV)
+        if master_pid and int(master_pid) != os.getpid():
+            os.kill(int(master_pid), signal.SIGHUP)
+            return {"mode": "gunicorn", "signalled_pid": int(master_pid), "current": self.get().info()}
+        return {"mode": "in_process", "current": self.rebuild().info()}
+
+# Global reference data store
+reference_data = ReferenceDataStore()
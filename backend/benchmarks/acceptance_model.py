@@ -0,0 +1,166 @@
+"""
+Acceptance model benchmark for Faredown
+
+Seeds --sessions bargain sessions answered by a simulated buyer (see
+bargain_replay.py) and a few more through the bargain offer handler,
+trains an acceptance model on them, and checks that training sees every
+counter offer, that the exported scorer matches scikit-learn, that the request path never
+imports scikit-learn, that a newly activated version is picked up
+without a restart, and that model-chosen counter prices earn more
+expected margin from the simulated buyer than the strategy rules alone.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_acceptance.db python benchmarks/acceptance_model.py --sessions 20000
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+from alembic import command
+from alembic.config import Config
+
+from app.core.config import settings
+from app.database import SessionLocal
+from sqlalchemy import func, select
+
+from app.models.bargain_models import BargainSession, CounterOffer
+from app.services.acceptance_model import (
+    FEATURES, AcceptanceModelRegistry, AcceptanceScorer, acceptance_models, choose_counter_price
+)
+from app.services.acceptance_training import fit, load_training_data, train, train_and_store
+from app.services.ai_service import AIBargainService
+
+from bargain_replay import TRUE_INTERCEPT, TRUE_SLOPE, seed, seed_offers
+
+REQUEST_PATH_IMPORTS = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from app.routers import bargain, admin
+from app.services.acceptance_model import acceptance_models
+scorer = acceptance_models.scorer()
+print(scorer is not None, 'sklearn' in sys.modules)
+"""
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def buyer_accepts(offer: float, counter: float) -> float:
+    return 1 / (1 + math.exp(-(TRUE_INTERCEPT + TRUE_SLOPE * (counter - offer) / offer)))
+
+async def main(args):
+    failures = []
+    await seed(args.sessions, random.Random(44))
+    await seed_offers(20, random.Random(45))
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        features, labels = load_training_data(db)
+        counters = db.execute(select(func.count(CounterOffer.id)).where(
+            CounterOffer.original_offer > 0, CounterOffer.counter_price > 0
+        )).scalar()
+        check(len(labels) == counters, f"training sees all {counters} counters, including ones made through /api/bargain/offer",
+              failures)
+        parameters, metrics = train(features, labels)
+        print(f"trained on {metrics['samples']} counters in {time.perf_counter() - started:.1f}s: "
+              f"holdout auc {metrics['auc']}, log loss {metrics['log_loss']}")
+        check(metrics["auc"] is not None and metrics["auc"] > 0.7, "holdout AUC above 0.7", failures)
+
+        scorer = AcceptanceScorer("check", FEATURES, parameters)
+        sample = features[:2000]
+        expected = fit(features, labels).predict_proba(sample)[:, 1]
+        single = np.array([scorer.score(row) for row in sample.tolist()])
+        check(np.abs(single - expected).max() < 1e-9, "exported scorer matches scikit-learn predict_proba", failures)
+        check(np.abs(scorer.score_many(sample) - expected).max() < 1e-9, "batch scoring matches too", failures)
+
+        row = sample[0].tolist()
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            for _ in range(10000):
+                scorer.score(row)
+            timings.append((time.perf_counter() - started) / 10000 * 1e6)
+        choose = []
+        for _ in range(2000):
+            started = time.perf_counter()
+            choose_counter_price(scorer, "flight", 10000.0, 10800.0, 12500.0, 3, 10200.0, 11800.0, 1)
+            choose.append((time.perf_counter() - started) * 1e6)
+        print(f"  score one counter: {min(timings):.2f} us; choose a counter price "
+              f"({settings.ACCEPTANCE_PRICE_CANDIDATES} candidates): {statistics.median(choose):.1f} us")
+
+        first = train_and_store(db, "bench-v1")["version"]
+        acceptance_models.activate(db, first)
+    finally:
+        db.close()
+
+    output = subprocess.run(
+        [sys.executable, "-c", REQUEST_PATH_IMPORTS, BACKEND_DIR], capture_output=True, text=True
+    ).stdout.split()
+    check(output == ["True", "False"], "request path serves the model without importing scikit-learn", failures)
+
+    service = AIBargainService()
+    session = BargainSession(
+        session_id="bench", user_id=None, booking_type="flight", net_rate=10000.0, max_attempts=3,
+        final_price_range_min=10800.0, final_price_range_max=12500.0, ai_confidence_score=0.7
+    )
+    decision = await service.generate_counter_offer(session, 10200.0, 1)
+    check(decision["model_version"] == first and decision["acceptance_probability"] is not None,
+          f"counter offers carry {first}'s acceptance probability ({decision['acceptance_probability']})", failures)
+
+    print("\nHot swap")
+    other_worker = AcceptanceModelRegistry()
+    db = SessionLocal()
+    try:
+        second = train_and_store(db, "bench-v2")["version"]
+        other_worker.activate(db, second)
+    finally:
+        db.close()
+    settings.ACCEPTANCE_MODEL_CHECK_INTERVAL = 0.2
+    time.sleep(0.3)
+    decision = await service.generate_counter_offer(session, 10200.0, 1)
+    check(decision["model_version"] == second, "a version activated by another worker is served after the check interval", failures)
+
+    print("\nCounter prices against the simulated buyer")
+    rng = np.random.default_rng(7)
+    rules, model = [], []
+    scorer = acceptance_models.scorer()
+    for _ in range(5000):
+        net_rate = float(rng.uniform(3000, 60000))
+        low, high = round(net_rate * 1.08, 2), round(net_rate * 1.25, 2)
+        attempt = int(rng.integers(1, 4))
+        offer = round(net_rate * float(rng.uniform(0.9, 1.06)), 2)
+        margin = (offer - net_rate) / net_rate
+        strategy = service._determine_strategy(attempt, margin, 3)
+        rule_price = round(await service._calculate_counter_price(offer, low, high, strategy, attempt, 3), 2)
+        price, _ = choose_counter_price(scorer, "flight", net_rate, low, high, 3, offer, rule_price, attempt)
+        rules.append(buyer_accepts(offer, rule_price) * (rule_price - net_rate))
+        model.append(buyer_accepts(offer, price) * (price - net_rate))
+    print(f"  expected margin per counter: rules {np.mean(rules):,.0f}, with model {np.mean(model):,.0f} "
+          f"({np.mean(model) / np.mean(rules) - 1:+.1%})")
+    check(np.mean(model) >= np.mean(rules), "model-chosen prices earn at least the rules' expected margin", failures)
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20000)
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if asyncio.run(main(args)) else 0)
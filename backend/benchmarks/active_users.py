@@ -0,0 +1,156 @@
+"""
+Active user counting benchmark for Faredown
+
+Adds --users distinct users (each seen several times) to HyperLogLog
+sketches and checks the estimates against exact distinct counts, at
+small and large cardinalities, and that sketches from workers seeing
+overlapping users merge into the union without double counting. Then
+runs the snapshot path against a database (two workers, rolling
+windows, a third worker's own live activity) and compares exact()
+with the distinct-count query over session rows it replaces.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_active_users.db python benchmarks/active_users.py --users 200000
+"""
+
+import argparse
+import os
+import random
+import secrets
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import distinct, func, insert, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.user_models import User, UserSession
+from app.services.active_users import ActiveUsers, HyperLogLog
+
+MINUTE = 60.0
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def main(args):
+    failures = []
+    rng = random.Random(50)
+    limit = 3 * 1.04 / (1 << settings.ACTIVE_USERS_HLL_PRECISION) ** 0.5
+
+    print("Accuracy")
+    for distinct_users in (10, 1000, 20000, args.users):
+        sketch = HyperLogLog()
+        began = time.perf_counter()
+        for user_id in range(distinct_users):
+            for _ in range(3):
+                sketch.add(user_id)
+        add_us = (time.perf_counter() - began) / (3 * distinct_users) * 1e6
+        error = sketch.estimate() / distinct_users - 1
+        check(abs(error) < (0.01 if distinct_users <= 1000 else limit),
+              f"{distinct_users} users seen 3 times each: estimate {sketch.estimate():.0f} ({error:+.4f}); add {add_us:.2f} us", failures)
+
+    print("\nMerging")
+    workers = [HyperLogLog() for _ in range(4)]
+    for user_id in range(args.users):
+        # Each user's requests land on one or two workers
+        for worker in rng.sample(workers, rng.choice((1, 2))):
+            worker.add(user_id)
+    union = HyperLogLog()
+    for worker in workers:
+        union.merge(worker)
+    summed = sum(worker.estimate() for worker in workers)
+    check(abs(union.estimate() / args.users - 1) < limit,
+          f"4 workers merge to {union.estimate():.0f} of {args.users} (summing their counts gives {summed:.0f})", failures)
+
+    print("\nSnapshots")
+    db = SessionLocal()
+    try:
+        now = time.time()
+        run = uuid.uuid4().hex[:6]
+        first, second, reader = ActiveUsers(snapshot_interval=60.0), ActiveUsers(snapshot_interval=60.0), ActiveUsers(snapshot_interval=60.0)
+        online, hour = set(), set()
+        for index in range(args.users // 4):
+            user_id = f"{run}:{rng.randrange(args.users // 8)}"
+            at = now - rng.uniform(0, 3 * 60 * MINUTE)
+            (first if index % 2 else second).record(user_id, at=at)
+            # The online window is whole minutes: the current one and the 29 before it
+            if int(at // MINUTE) > int(now // MINUTE) - settings.ACTIVE_USERS_ONLINE_MINUTES:
+                online.add(user_id)
+            if int(at // MINUTE) > int(now // MINUTE) - 60:
+                hour.add(user_id)
+        written = first.snapshot() + second.snapshot()
+        counts = {window: reader.count(db, window, at=now) for window in ("online", "hour")}
+        check(abs(counts["online"] / len(online) - 1) < limit and abs(counts["hour"] / len(hour) - 1) < limit,
+              f"a third worker reads both workers' snapshots ({written} rows): online {counts['online']} of {len(online)}, "
+              f"hour {counts['hour']} of {len(hour)}", failures)
+        for user_id in list(online)[:500]:
+            reader.record(user_id, at=now)
+        fresh = [f"{run}:new:{index}" for index in range(500)]
+        for user_id in fresh:
+            reader.record(user_id, at=now)
+        again = reader.count(db, "online", at=now)
+        expected = len(online) + len(fresh)
+        check(abs(again / expected - 1) < limit,
+              f"its own unsnapshotted activity counts at once, repeat users once ({again} of {expected})", failures)
+        began = time.perf_counter()
+        for _ in range(200):
+            reader.count(db, "online", at=now)
+        cached_us = (time.perf_counter() - began) / 200 * 1e6
+        print(f"  count {cached_us:.0f} us (snapshot rows cached); {reader.metrics()}")
+
+        print("\nExact mode")
+        user_ids = db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {"email": f"active_{run}_{i}@faredown.test", "password_hash": "x", "first_name": "Bench", "last_name": "User"}
+            for i in range(args.sessions // 4)
+        ]).scalars().all()
+        recent = set()
+        sessions = []
+        for _ in range(args.sessions):
+            user_id = rng.choice(user_ids)
+            last_activity = datetime.utcnow() - timedelta(minutes=rng.uniform(0, 240))
+            if last_activity >= datetime.utcnow() - timedelta(minutes=settings.ACTIVE_USERS_ONLINE_MINUTES - 1):
+                recent.add(user_id)
+            sessions.append({
+                "user_id": user_id, "session_token": secrets.token_urlsafe(24), "is_active": True,
+                "last_activity": last_activity, "expires_at": datetime.utcnow() + timedelta(days=1)
+            })
+        db.execute(insert(UserSession), sessions)
+        db.commit()
+        audited = ActiveUsers().exact(db, "online")
+        check(audited >= len(recent), f"exact() counts {audited} online users from session rows (>= {len(recent)} of this run)", failures)
+        timings = []
+        for _ in range(5):
+            began = time.perf_counter()
+            db.execute(select(func.count(distinct(UserSession.user_id))).where(
+                UserSession.is_active.is_(True),
+                UserSession.last_activity >= datetime.utcnow() - timedelta(minutes=settings.ACTIVE_USERS_ONLINE_MINUTES)
+            )).scalar()
+            timings.append((time.perf_counter() - began) * 1e6)
+        total = db.execute(select(func.count(UserSession.id))).scalar()
+        print(f"  distinct over {total} session rows {statistics.median(timings):.0f} us; sketch count {cached_us:.0f} us")
+    finally:
+        db.close()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--sessions", type=int, default=50000)
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if main(args) else 0)
@@ -0,0 +1,123 @@
+"""
+AI decision log benchmark for Faredown
+
+Runs --decisions counter-offer decisions through AIBargainService and
+compares the offer-path cost of logging each one with a synchronous
+INSERT+commit against queueing it for AILogWriter. Then checks that the
+writer persisted every queued row in batches, and that an overloaded
+queue sheds records (sampling, then dropping) and counts them.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_ai_logs.db python benchmarks/ai_log_writer.py --decisions 5000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.ai_models import AILog
+from app.models.bargain_models import BargainSession
+from app.services import ai_service
+from app.services.ai_log_writer import AILogWriter
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def sessions(count: int):
+    return [
+        BargainSession(
+            session_id=str(uuid.uuid4()), user_id=None, net_rate=10000.0, max_attempts=5, total_attempts=1,
+            final_price_range_min=10500.0, final_price_range_max=12000.0, ai_confidence_score=0.7,
+            expires_at=datetime.utcnow() + timedelta(minutes=10)
+        )
+        for _ in range(count)
+    ]
+
+class SyncLogWriter:
+    """What logging inline would cost: one INSERT and commit per decision"""
+
+    def record(self, **row):
+        db = SessionLocal()
+        try:
+            db.add(AILog(**row))
+            db.commit()
+        finally:
+            db.close()
+        return True
+
+async def run_decisions(service, writer, count: int):
+    ai_service.ai_log_writer = writer
+    latencies = []
+    for session in sessions(count):
+        started = time.perf_counter()
+        await service.generate_counter_offer(session, 11000.0, 2)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+def ai_log_count() -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(select(func.count(AILog.id))).scalar()
+    finally:
+        db.close()
+
+async def main(args):
+    failures = []
+    service = ai_service.AIBargainService()
+    before = ai_log_count()
+
+    inline = await run_decisions(service, SyncLogWriter(), args.decisions // 10)
+    inline_rows = ai_log_count() - before
+
+    writer = AILogWriter(batch_size=args.batch_size, max_queue=max(args.decisions * 2, 10000))
+    writer.start()
+    started = time.perf_counter()
+    queued = await run_decisions(service, writer, args.decisions)
+    await writer.stop()
+    drained_s = time.perf_counter() - started
+
+    print(f"offer path p50: inline INSERT {statistics.median(inline):.0f} us, "
+          f"queued {statistics.median(queued):.0f} us ({statistics.median(inline) / statistics.median(queued):.0f}x)")
+    print(f"writer: {writer.written_total} rows in {writer.batches} batches, all written in {drained_s:.2f}s")
+    check(ai_log_count() - before == inline_rows + args.decisions, "every queued decision reached ai_logs", failures)
+    check(writer.metrics()["queue_depth"] == 0 and writer.failed_batches == 0, "queue drained without failed batches", failures)
+
+    print("\nOverload (writer loop not running)")
+    overloaded = AILogWriter(max_queue=1000, sample_threshold=0.5, sample_rate=0.1)
+    kept = sum(
+        overloaded.record("bargain_decision", {"i": i}, {}, ai_model_used="rules")
+        for i in range(20000)
+    )
+    print(f"  kept {kept}, sampled out {overloaded.sampled_out_total}, dropped {overloaded.dropped_total}")
+    check(len(overloaded._queue) == overloaded.max_queue, "queue stays bounded at max_queue", failures)
+    check(kept + overloaded.sampled_out_total + overloaded.dropped_total == 20000, "every shed record is counted", failures)
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decisions", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=settings.AI_LOG_BATCH_SIZE)
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if asyncio.run(main(args)) else 0)
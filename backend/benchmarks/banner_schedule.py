@@ -0,0 +1,139 @@
+"""
+Banner schedule benchmark for Faredown
+
+Seeds --banners scheduled banners across several positions, then compares
+BannerTimeline lookups with the filtered, sorted query they replace at
+--lookups random times (results and latency), and checks that a prebuilt
+cache entry is swapped in at a boundary without a rebuild.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_banners.db python benchmarks/banner_schedule.py --banners 500
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import delete, insert, or_, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.cms_models import Banner
+from app.services.banner_scheduler import banner_scheduler
+from app.services.content_cache import content_cache
+
+POSITIONS = ["hero", "sidebar", "footer", "checkout"]
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def seed(db, banners: int, now: datetime, rng: random.Random):
+    db.execute(delete(Banner))
+    rows = []
+    for i in range(banners):
+        start = now + timedelta(hours=rng.uniform(-24 * 7, 24 * 7)) if rng.random() < 0.8 else None
+        end = (start or now) + timedelta(hours=rng.uniform(1, 24 * 7)) if rng.random() < 0.8 else None
+        rows.append({
+            "title": f"Bench banner {i}",
+            "image_url": f"https://example.com/banner{i}.jpg",
+            "position": rng.choice(POSITIONS),
+            "order_index": rng.randint(0, 20),
+            "is_active": rng.random() < 0.9,
+            "valid_from": start,
+            "valid_until": end,
+        })
+    db.execute(insert(Banner), rows)
+    db.commit()
+
+def query_active(db, position: str, at: datetime):
+    """The per-request query the timeline replaces"""
+    return db.execute(
+        select(Banner.id)
+        .where(
+            Banner.is_active.is_(True),
+            Banner.is_deleted.is_(False),
+            Banner.position == position,
+            or_(Banner.valid_from.is_(None), Banner.valid_from <= at),
+            or_(Banner.valid_until.is_(None), Banner.valid_until > at),
+        )
+        .order_by(Banner.order_index, Banner.id)
+    ).scalars().all()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--banners", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    failures = []
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    rng = random.Random(3)
+    now = datetime.utcnow().replace(microsecond=0)
+    db = SessionLocal()
+    try:
+        seed(db, args.banners, now, rng)
+
+        started = time.perf_counter()
+        timeline = banner_scheduler.timeline()
+        print(f"timeline: {len(timeline.boundaries)} boundaries, {len(timeline.positions)} positions, "
+              f"built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        times = [now + timedelta(hours=rng.uniform(-24 * 10, 24 * 10)) for _ in range(args.lookups)]
+        times += rng.sample(timeline.boundaries, min(len(timeline.boundaries), 200))
+        lookups = [(rng.choice(POSITIONS), at) for at in times]
+
+        query_ms, timeline_ms, mismatches = [], [], 0
+        for position, at in lookups:
+            started = time.perf_counter()
+            expected = query_active(db, position, at)
+            query_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            found = timeline.active(position, at)
+            timeline_ms.append((time.perf_counter() - started) * 1000)
+
+            mismatches += [banner["id"] for banner in found] != expected
+    finally:
+        db.close()
+
+    print(f"lookups:  {len(lookups)} (including {len(times) - args.lookups} exactly at boundaries)")
+    print(f"query:    p50 {statistics.median(query_ms):.3f} ms")
+    print(f"timeline: p50 {statistics.median(timeline_ms) * 1000:.1f} us")
+    check(mismatches == 0, f"timeline matches the query for {len(lookups) - mismatches}/{len(lookups)} lookups", failures)
+
+    print("\nBoundary swap")
+    boundary = timeline.next_boundary(now)
+    content_cache.clear()
+    content_cache.get("banners:hero")
+    content_cache.prebuild_banners(boundary)
+    misses = content_cache.misses
+    with mock.patch("app.services.content_cache.datetime") as clock:
+        clock.utcnow.return_value = boundary
+        entry = content_cache.get("banners:hero")
+    check(content_cache.misses == misses, "entry prebuilt for the boundary is served without a rebuild", failures)
+    check(
+        [banner["id"] for banner in json.loads(entry.body)["banners"]] == [banner["id"] for banner in timeline.active("hero", boundary)],
+        "swapped-in entry has the banners live at the boundary", failures
+    )
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
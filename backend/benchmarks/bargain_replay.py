@@ -0,0 +1,228 @@
+"""
+Bargain strategy replay benchmark for Faredown
+
+Seeds --sessions bargain sessions whose counters were priced by
+AIBargainService and answered by a simulated buyer, then checks that the
+replay reproduces every stored counter price under today's parameters,
+finds the counters of sessions bargained through the offer handler,
+recovers the buyer's acceptance curve, and gives the same results in a
+process pool as in one process. Prints the best parameter sets of a grid.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_replay.db python benchmarks/bargain_replay.py --sessions 50000 --workers 4
+
+With --no-seed nothing is written and the replay runs over whatever
+history DATABASE_URL already holds.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+from alembic import command
+from alembic.config import Config
+from fastapi import BackgroundTasks
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.bargain_models import BargainSession, BargainAttempt, CounterOffer, BargainStatus, BargainAttemptType
+from app.models.user_models import User
+from app.routers.bargain import BargainOfferRequest, StartBargainRequest, make_bargain_offer, start_bargain_session
+from app.services.ai_service import AIBargainService
+from app.services.bargain_replay import (
+    AcceptanceCurve, counter_prices, current_parameters, load_acceptance_history, load_chunk,
+    parameter_grid, replay, PARAMETERS
+)
+
+# The simulated buyer's answer to a counter `gap` above their offer
+TRUE_INTERCEPT = 1.0
+TRUE_SLOPE = -25.0
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+async def seed(count: int, rng: random.Random):
+    """count sessions of up to three user offers, each countered by AIBargainService until one is accepted"""
+    service = AIBargainService()
+    run = uuid.uuid4().hex[:8]
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        user_id = db.execute(insert(User).values(
+            email=f"bench_{run}@faredown.test", password_hash="x", first_name="Bench", last_name="User"
+        ).returning(User.id)).scalar()
+
+        sessions, histories = [], []
+        for i in range(count):
+            net_rate = round(rng.uniform(3000, 60000), 2)
+            low, high = round(net_rate * 1.08, 2), round(net_rate * 1.25, 2)
+            sessions.append({
+                "session_id": f"replay_{run}_{i}", "user_id": user_id, "booking_type": rng.choice(["flight", "hotel"]),
+                "item_id": f"ITEM{i % 500}", "item_data": {}, "net_rate": net_rate, "markup_min": 8.0,
+                "markup_max": 25.0, "base_price": high, "final_price_range_min": low, "final_price_range_max": high,
+                "max_attempts": 3, "expires_at": now, "status": BargainStatus.EXPIRED
+            })
+            offer, history = net_rate * rng.uniform(0.9, 1.06), []
+            for attempt_number in (1, 2, 3):
+                margin = (offer - net_rate) / net_rate
+                strategy = service._determine_strategy(attempt_number, margin, 3)
+                counter = round(await service._calculate_counter_price(offer, low, high, strategy, attempt_number, 3), 2)
+                gap = (counter - offer) / offer
+                accepted = rng.random() < 1 / (1 + math.exp(-(TRUE_INTERCEPT + TRUE_SLOPE * gap)))
+                history.append((attempt_number, round(offer, 2), counter, strategy, accepted))
+                if accepted:
+                    sessions[-1].update(status=BargainStatus.ACCEPTED, agreed_price=counter)
+                    break
+                offer = min(offer + (counter - offer) * rng.uniform(0.1, 0.5), low - 1)
+            histories.append(history)
+
+        session_ids = db.execute(
+            insert(BargainSession).returning(BargainSession.id, sort_by_parameter_order=True), sessions
+        ).scalars().all()
+        attempts = [
+            {"session_id": session_id, "attempt_number": number, "attempt_type": BargainAttemptType.USER_OFFER,
+             "offered_price": offer, "is_accepted": False}
+            for session_id, history in zip(session_ids, histories)
+            for number, offer, _, _, _ in history
+        ]
+        attempt_ids = db.execute(
+            insert(BargainAttempt).returning(BargainAttempt.id, sort_by_parameter_order=True), attempts
+        ).scalars().all()
+        db.execute(insert(CounterOffer), [
+            {"session_id": session_id, "attempt_id": attempt_id, "counter_price": counter, "original_offer": offer,
+             "discount_amount": offer - counter, "discount_percentage": (offer - counter) / offer * 100,
+             "strategy_type": strategy, "valid_until": now, "is_final_offer": number >= 2,
+             "was_accepted": accepted, "confidence_level": 0.7, "profit_margin": 0.0}
+            for attempt_id, (session_id, (number, offer, counter, strategy, accepted)) in zip(
+                attempt_ids, ((session_id, entry) for session_id, history in zip(session_ids, histories) for entry in history)
+            )
+        ])
+        db.commit()
+        return session_ids[0], session_ids[-1] + 1
+    finally:
+        db.close()
+
+async def seed_offers(count: int, rng: random.Random):
+    """
+    count sessions bargained through the /api/bargain start and offer handlers
+
+    seed() bulk-inserts the rows those handlers write, for speed; these
+    check that the handlers really link each counter to its attempt.
+    Returns the sessions' id range.
+    """
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        user = User(email=f"offers_{run}@faredown.test", password_hash="x", first_name="Bench", last_name="User")
+        db.add(user)
+        db.commit()
+        ids = []
+        for i in range(count):
+            net_rate = round(rng.uniform(3000, 60000), 2)
+            started = await start_bargain_session(StartBargainRequest(
+                booking_type="flight", item_id=f"ITEM{i}", item_data={}, net_rate=net_rate, markup_min=8.0, markup_max=25.0
+            ), current_user=user, db=db)
+            for share in (0.85, 0.9, 0.95):
+                response = await make_bargain_offer(
+                    BargainOfferRequest(session_id=started.session_id, offered_price=round(net_rate * share, 2)),
+                    BackgroundTasks(), current_user=user, db=db
+                )
+                if json.loads(response.body)["status"] == "accepted":
+                    break
+            ids.append(db.query(BargainSession.id).filter(BargainSession.session_id == started.session_id).scalar())
+        return min(ids), max(ids) + 1
+    finally:
+        db.close()
+
+def main(args):
+    failures = []
+    rng = random.Random(43)
+    grid = parameter_grid(
+        aggressive=[0.4, 0.5, 0.6, 0.7, 0.8],
+        moderate=[0.2, 0.3, 0.4, 0.5, 0.6],
+        conservative=[0.1, 0.2, 0.3],
+        final_squeeze=[0.2, 0.3, 0.4, 0.5]
+    )
+
+    if not args.no_seed:
+        started = time.perf_counter()
+        bounds = asyncio.run(seed(args.sessions, rng))
+        print(f"seeded {args.sessions} sessions in {time.perf_counter() - started:.1f}s")
+
+        db = SessionLocal()
+        try:
+            chunk = load_chunk(db, bounds)
+            curve = AcceptanceCurve.fit(*load_acceptance_history(db))
+        finally:
+            db.close()
+        current = np.array([[current_parameters()[name] for name in PARAMETERS]])
+        replayed = counter_prices(chunk, current)[0]
+        check(np.abs(replayed - chunk["counter_price"]).max() < 0.011,
+              f"today's parameters reproduce all {len(replayed)} stored counter prices", failures)
+        print(f"  fitted curve intercept {curve.intercept:.2f} slope {curve.slope:.2f} "
+              f"(buyer: {TRUE_INTERCEPT} / {TRUE_SLOPE})")
+        check(abs(curve.slope - TRUE_SLOPE) < abs(TRUE_SLOPE) * 0.15, "acceptance curve slope within 15% of the buyer's", failures)
+
+        offers = asyncio.run(seed_offers(20, rng))
+        db = SessionLocal()
+        try:
+            answered = load_chunk(db, offers)
+        finally:
+            db.close()
+        check(len(answered["counter_price"]) > 0 and (answered["counter_price"] > 0).all(),
+              f"the replay finds the counter to each of {len(answered['counter_price'])} offers made through the offer handler",
+              failures)
+
+    serial = replay(grid, workers=1, chunks=args.workers * 4)
+    print(f"\n{serial['sessions']} sessions, {serial['counters']} counters x {len(grid)} parameter sets")
+    print(f"  1 process:  {serial['elapsed_s']:.2f}s")
+    pooled = replay(grid, workers=args.workers)
+    print(f"  {args.workers} workers:  {pooled['elapsed_s']:.2f}s over {pooled['chunks']} chunks")
+
+    by_params = {tuple(result["parameters"].values()): result for result in pooled["results"]}
+    check(all(
+        abs(by_params[tuple(result["parameters"].values())]["expected_margin"] - result["expected_margin"]) < 1.0
+        for result in serial["results"]
+    ), "process pool matches a single process", failures)
+
+    today = next(result for result in serial["results"] if result["is_current"])
+    historical = serial["historical"]
+    print(f"  history: {historical['acceptance_rate']:.1%} accepted, margin {historical['margin']:,.0f}")
+    print(f"  replayed today's parameters: {today['expected_acceptance_rate']:.1%} accepted, margin {today['expected_margin']:,.0f}")
+    if not args.no_seed:
+        check(abs(today["expected_acceptance_rate"] - historical["acceptance_rate"]) < 0.03,
+              "replaying today's parameters projects the observed acceptance rate", failures)
+
+    print("\nBest expected margin")
+    for result in serial["results"][:5]:
+        params = ", ".join(f"{name} {value}" for name, value in result["parameters"].items())
+        print(f"  {params}: {result['expected_acceptance_rate']:.1%} accepted, margin {result['expected_margin']:,.0f}")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if main(args) else 0)
@@ -0,0 +1,77 @@
+"""
+List payload size benchmark for Faredown
+
+Builds a my-bookings style list of --rows bookings and reports the bytes on
+the wire and encode time for each response shape (rows, fields=, columnar)
+under each content coding CompressionMiddleware can produce here (brotli
+and zstd only when their packages are installed). No database needed.
+
+    python benchmarks/compression.py --rows 100
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.compression import CompressionMiddleware, available_encodings
+from app.core.serialization import ListShape, dumps
+from app.routers.bookings import MY_BOOKINGS_FIELDS
+
+def bookings(count: int, rng: random.Random):
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        departure = now + timedelta(days=rng.randint(1, 120), minutes=rng.randint(0, 1440))
+        rows.append({
+            "booking_reference": f"FD{10000000 + i}",
+            "booking_type": rng.choice(["flight", "hotel"]),
+            "status": rng.choice(["confirmed", "pending", "cancelled"]),
+            "total_amount": round(rng.uniform(2000, 90000), 2),
+            "currency": "INR",
+            "was_bargained": rng.random() < 0.4,
+            "bargain_savings": round(rng.uniform(0, 3000), 2),
+            "departure_date": departure,
+            "return_date": departure + timedelta(days=rng.randint(2, 14)) if rng.random() < 0.5 else None,
+            "passenger_count": rng.randint(1, 4),
+            "lead_passenger_name": rng.choice(["Asha Rao", "Vikram Singh", "Meera Iyer", "Rahul Das"]),
+            "created_at": now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86400)),
+            "confirmed_at": now - timedelta(days=rng.randint(0, 30)) if rng.random() < 0.7 else None,
+        })
+    return rows
+
+def shaped(rows, fields=None, format="rows"):
+    return dumps(ListShape(fields=fields, format=format).apply(rows, MY_BOOKINGS_FIELDS))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+
+    rows = bookings(args.rows, random.Random(5))
+    bodies = {
+        "rows": shaped(rows),
+        "fields=4": shaped(rows, "booking_reference,status,total_amount,departure_date"),
+        "columnar": shaped(rows, format="columnar"),
+        "columnar fields=4": shaped(rows, "booking_reference,status,total_amount,departure_date", "columnar"),
+    }
+    factories = CompressionMiddleware(None).factories
+    codings = available_encodings()
+
+    print(f"{args.rows} bookings; codings available here: {', '.join(codings)}")
+    print(f"{'shape':20} {'identity':>9}" + "".join(f" {coding:>14}" for coding in codings))
+    for shape, body in bodies.items():
+        cells = []
+        for coding in codings:
+            started = time.perf_counter()
+            size = len(factories[coding]().finish(body))
+            cells.append(f"{size:7d} {(time.perf_counter() - started) * 1000:4.1f}ms")
+        print(f"{shape:20} {len(body):9d}" + "".join(f" {cell:>14}" for cell in cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Counter-offer message benchmark for Faredown
+
+Renders counter-offer messages for every strategy, attempt phase, booking
+type and currency and checks that they are deterministic per session and
+attempt, split evenly across variants, reshuffled by the experiment salt,
+never quote negative savings and use the user's currency. Then drives the
+optional LLM enrichment with a slow fake template source to check the
+latency budget, the template fallback, the shared in-flight fetch and the
+(strategy, price band, locale) cache. Compares render time with building
+the f-string lists and calling random.choice per message.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_messages.db python benchmarks/counter_offer_messages.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+
+from app.core.config import settings
+from app.services.bargain_messages import PHASES, CounterOfferMessages, format_money
+from app.services.reference_data import DEFAULT_CURRENCIES
+
+STRATEGIES = ("aggressive", "moderate", "conservative")
+BOOKING_TYPES = ("flight", "hotel", "package")
+MAX_ATTEMPTS = 4
+ATTEMPTS = {"opening": 1, "middle": 2, "final": 3}
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def random_choice_message(user_offer: float, counter_price: float, strategy: str, attempt_number: int, max_attempts: int) -> str:
+    """The previous implementation: lists of f-strings rebuilt per call"""
+    savings = user_offer - counter_price
+    savings_percentage = (savings / user_offer) * 100
+    if strategy == "aggressive":
+        messages = [
+            f"Great offer! I can get you an even better deal at ₹{counter_price:,.0f} - that's ₹{savings:,.0f} in savings!",
+            f"You drive a hard bargain! How about ₹{counter_price:,.0f}? You'll save ₹{savings:,.0f} from your offer!",
+            f"I like your style! Let's meet at ₹{counter_price:,.0f} - you're saving {savings_percentage:.1f}% from your original offer!"
+        ]
+    elif strategy == "moderate":
+        messages = [
+            f"I can work with that! How about ₹{counter_price:,.0f}? This gives you great value while ensuring quality service.",
+            f"Let's find a middle ground at ₹{counter_price:,.0f} - you'll still save ₹{savings:,.0f}!",
+            f"I can offer you ₹{counter_price:,.0f} - this is a fantastic deal that works for both of us!"
+        ]
+    else:
+        messages = [
+            f"I appreciate your offer! The best I can do is ₹{counter_price:,.0f} while maintaining our premium service quality.",
+            f"This is a popular choice! I can offer ₹{counter_price:,.0f} - this ensures you get the best experience.",
+            f"For this premium option, ₹{counter_price:,.0f} is the best available price I can secure for you."
+        ]
+    if attempt_number == 1:
+        return random.choice(messages)
+    elif attempt_number >= max_attempts - 1:
+        final_messages = [
+            f"This is my final offer: ₹{counter_price:,.0f}. You're getting an incredible deal - save ₹{savings:,.0f}!",
+            f"Last chance for this amazing price: ₹{counter_price:,.0f}! Don't miss out on saving ₹{savings:,.0f}!",
+            f"Final offer: ₹{counter_price:,.0f}. This is the absolute best price I can secure for you!"
+        ]
+        return random.choice(final_messages)
+    return random.choice(messages) + f" (Attempt {attempt_number} of {max_attempts})"
+
+async def templates(failures: list):
+    messages = CounterOfferMessages()
+    settings.BARGAIN_MESSAGE_LLM = False
+
+    print("Templates")
+    rendered, negative = 0, 0
+    for strategy in STRATEGIES:
+        for phase in PHASES:
+            for booking_type in BOOKING_TYPES:
+                for currency in DEFAULT_CURRENCIES:
+                    message, _ = await messages.render(
+                        strategy, 11800.0, 12500.0, ATTEMPTS[phase], MAX_ATTEMPTS, "s1", booking_type, currency["code"], "en-IN"
+                    )
+                    rendered += 1
+                    negative += "-" in message.replace(" - ", "")
+                    if currency["symbol"] not in message:
+                        failures.append(f"{strategy}/{phase}/{booking_type} not priced in {currency['code']}")
+    check(rendered == len(STRATEGIES) * len(PHASES) * len(BOOKING_TYPES) * len(DEFAULT_CURRENCIES) and not failures,
+          f"{rendered} combinations render in the user's currency", failures)
+    check(negative == 0, "no negative amounts in any message", failures)
+    check(format_money(124500, "INR") == "₹1,24,500" and format_money(12450000, "INR") == "₹1,24,50,000",
+          f"INR uses Indian digit grouping ({format_money(12450000, 'INR')})", failures)
+    check(format_money(124500, "USD") == "$1,500", f"USD converts at the reference rate ({format_money(124500, 'USD')})", failures)
+    at_list, _ = await messages.render("aggressive", 12500.0, 12500.0, 1, MAX_ATTEMPTS, "s1", "flight")
+    check("₹0" not in at_list, "a counter at the listed price doesn't boast about saving ₹0", failures)
+
+    print("\nSelection")
+    first = [await messages.render("moderate", 11800.0, 12500.0, 1, MAX_ATTEMPTS, f"session-{i}") for i in range(3000)]
+    again = [await messages.render("moderate", 11800.0, 12500.0, 1, MAX_ATTEMPTS, f"session-{i}") for i in range(3000)]
+    check(first == again, "the same session and attempt always get the same message", failures)
+    split = Counter(variant for _, variant in first)
+    shares = {variant: count / len(first) for variant, count in sorted(split.items())}
+    print(f"  {shares}")
+    check(len(split) == 3 and max(shares.values()) - min(shares.values()) < 0.05, "variants split evenly across sessions", failures)
+    settings.BARGAIN_MESSAGE_EXPERIMENT_SALT = "experiment-2"
+    salted = [await messages.render("moderate", 11800.0, 12500.0, 1, MAX_ATTEMPTS, f"session-{i}") for i in range(3000)]
+    settings.BARGAIN_MESSAGE_EXPERIMENT_SALT = ""
+    moved = sum(a[1] != b[1] for a, b in zip(first, salted)) / len(first)
+    check(0.5 < moved < 0.8, f"a new experiment salt reassigns {moved:.0%} of sessions", failures)
+
+    print("\nRender time")
+    rng = random.Random(46)
+    cases = [
+        (rng.choice(STRATEGIES), round(rng.uniform(3000, 60000), 2), rng.randint(1, 3), f"session-{i}")
+        for i in range(20000)
+    ]
+    started = time.perf_counter()
+    for strategy, price, attempt, session_id in cases:
+        random_choice_message(price * 0.9, price, strategy, attempt, MAX_ATTEMPTS)
+    baseline = (time.perf_counter() - started) / len(cases) * 1e6
+    started = time.perf_counter()
+    for strategy, price, attempt, session_id in cases:
+        await messages.render(strategy, price, price * 1.1, attempt, MAX_ATTEMPTS, session_id, "flight", "INR", "en")
+    compiled = (time.perf_counter() - started) / len(cases) * 1e6
+    print(f"  f-string lists + random.choice {baseline:.2f} us, precompiled + seeded selection {compiled:.2f} us per message")
+
+async def llm_enrichment(failures: list):
+    print("\nLLM enrichment")
+    settings.BARGAIN_MESSAGE_LLM = True
+    settings.BARGAIN_MESSAGE_LLM_BUDGET = 0.05
+    calls = []
+
+    async def slow_source(strategy, phase, band, locale):
+        calls.append((strategy, phase, band, locale))
+        await asyncio.sleep(0.2)
+        return "Just for you: {price}, saving {savings}!"
+
+    messages = CounterOfferMessages(template_source=slow_source)
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        messages.render("moderate", 11800.0 + i, 12500.0, 1, MAX_ATTEMPTS, f"session-{i}") for i in range(20)
+    ])
+    waited = time.perf_counter() - started
+    check(waited < 0.15 and all(not variant.startswith("llm:") for _, variant in results),
+          f"a slow LLM answers with templates within the budget ({waited * 1000:.0f} ms)", failures)
+    check(len(calls) == 1, f"20 concurrent counters in one price band share one fetch ({len(calls)})", failures)
+    await asyncio.sleep(0.25)
+    message, variant = await messages.render("moderate", 12000.0, 12500.0, 1, MAX_ATTEMPTS, "session-x", currency="EUR")
+    check(variant.startswith("llm:") and message == "Just for you: €133, saving €6!",
+          f"the late answer is cached and rendered in the user's currency ({message})", failures)
+    at_list, variant = await messages.render("moderate", 12000.0, 12000.0, 1, MAX_ATTEMPTS, "session-x")
+    check(not variant.startswith("llm:") and "₹0" not in at_list,
+          f"a cached LLM template quoting savings isn't used for a counter at the listed price ({at_list})", failures)
+    await messages.render("moderate", 60000.0, 65000.0, 1, MAX_ATTEMPTS, "session-y")
+    check(len(calls) == 2, "another price band is fetched separately", failures)
+
+    async def broken_source(strategy, phase, band, locale):
+        return "Pay {amount} now"
+
+    messages = CounterOfferMessages(template_source=broken_source)
+    _, variant = await messages.render("moderate", 11800.0, 12500.0, 1, MAX_ATTEMPTS, "session-z")
+    _, again = await messages.render("moderate", 11800.0, 12500.0, 1, MAX_ATTEMPTS, "session-z")
+    check(not variant.startswith("llm:") and variant == again and messages.llm_fetches == 1,
+          "an LLM template with unknown placeholders is rejected (and not refetched)", failures)
+    print(f"  {messages.metrics()}")
+    settings.BARGAIN_MESSAGE_LLM = False
+
+async def main(args):
+    failures = []
+    await templates(failures)
+    await llm_enrichment(failures)
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if asyncio.run(main(args)) else 0)
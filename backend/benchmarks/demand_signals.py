@@ -0,0 +1,169 @@
+"""
+Demand signal benchmark for Faredown
+
+Streams --events simulated searches, bargain starts and bookings over
+Zipf-distributed items and routes into the demand sketches and checks
+that the decayed count-min estimates track exact decayed counts, that
+counts halve per half-life (including across a landmark rescale), that
+a worker idle for over a thousand half-lives still quotes and records, that
+surging demand raises the multiplier and cooling demand lowers it within
+the configured bounds, that the batch mode matches per-item quotes, and
+that a worker seeing half the traffic prices close to one seeing all
+of it.
+Reports record, quote and batch repricing costs.
+
+    python benchmarks/demand_signals.py --events 200000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.demand_signals import DemandSignals, date_bucket
+
+HOUR = 3600.0
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def simulate(count: int, rng: random.Random, start: float, span: float):
+    """(at, event, booking_type, market, travel_date, item_id) with Zipf item popularity"""
+    routes = [f"R{index:03d}-X" for index in range(300)]
+    weights = [1 / (rank + 1) for rank in range(5000)]
+    items = rng.choices(range(5000), weights=weights, k=count)
+    travel = datetime(2026, 11, 2)
+    events = []
+    for index, item in enumerate(items):
+        at = start + span * index / count
+        event = rng.choices(("search", "bargain", "booking"), weights=(20, 3, 1))[0]
+        events.append((at, event, "flight", routes[item % len(routes)], travel + timedelta(days=7 * (item % 6)), f"F{item}"))
+    return events
+
+def main(args):
+    failures = []
+    rng = random.Random(48)
+    start = 1_000_000.0
+    signals = DemandSignals(now=start)
+    span = 2 * settings.DEMAND_LONG_HALF_LIFE
+    events = simulate(args.events, rng, start, span)
+
+    print("Accuracy")
+    exact = defaultdict(float)
+    began = time.perf_counter()
+    for at, event, booking_type, market, travel_date, item_id in events:
+        signals.record(event, booking_type, market, travel_date, item_id, at=at)
+    record_us = (time.perf_counter() - began) / len(events) * 1e6
+    now = start + span
+    for at, event, booking_type, market, travel_date, item_id in events:
+        if event == "search":
+            exact[(item_id, date_bucket(travel_date))] += 2.0 ** (-(now - at) / signals.long_half_life)
+    top = sorted(exact.items(), key=lambda pair: -pair[1])[:200]
+    errors = []
+    for (item_id, bucket), value in top:
+        positions = signals.positions("flight", f"item:{item_id}", bucket)
+        estimate = signals.sketches[("search", "long")].estimate(positions, now)
+        errors.append((estimate - value) / value)
+    print(f"  {len(exact)} item-weeks; top 200 relative error median {statistics.median(errors):.4f}, max {max(errors):.4f}")
+    check(min(errors) > -1e-9, "estimates never undercount", failures)
+    check(statistics.median(errors) < 0.05, "top items' decayed search counts within 5% (median)", failures)
+    print(f"  {signals.metrics()}")
+
+    print("\nDecay")
+    fresh = DemandSignals(now=start)
+    for _ in range(100):
+        fresh.record("booking", "hotel", "GOA", None, "H1", at=start)
+    positions = fresh.positions("hotel", "item:H1", "*")
+    short = fresh.sketches[("booking", "short")].estimate(positions, start + fresh.short_half_life)
+    check(abs(short - 50.0) < 1e-6, f"100 bookings count {short:.2f} one short half-life later", failures)
+    later = start + 40 * fresh.short_half_life
+    fresh.record("booking", "hotel", "GOA", None, "H1", at=later)
+    estimate = fresh.sketches[("booking", "short")].estimate(positions, later)
+    check(abs(estimate - (1 + 100 * 2.0 ** -40)) < 1e-6 and fresh.sketches[("booking", "short")].landmark == later,
+          "counts survive a landmark rescale", failures)
+    idle = DemandSignals(now=start)
+    idle.record("booking", "hotel", "GOA", None, "H1", at=start)
+    long_after = start + 1100 * idle.short_half_life
+    try:
+        quiet = idle.quote("hotel", "GOA", None, "H1", at=long_after)["multiplier"]
+        idle.multipliers([("hotel", "GOA", None, "H1")], at=long_after)
+        idle.record("booking", "hotel", "GOA", None, "H1", at=long_after)
+        after = idle.sketches[("booking", "short")].estimate(positions, long_after)
+        check(abs(after - 1.0) < 1e-6 and settings.DEMAND_MULTIPLIER_MIN <= quiet <= settings.DEMAND_MULTIPLIER_MAX,
+              "a sketch idle for 1100 short half-lives still quotes, reprices and records", failures)
+    except OverflowError as e:
+        check(False, f"a sketch idle for 1100 short half-lives still quotes, reprices and records ({e})", failures)
+
+    print("\nMultipliers")
+    market = DemandSignals(now=start)
+    t = start
+    for hour in range(48):
+        # 20 searches an hour, evenly spread; the surge is 10x for the last two hours
+        for step in range(20):
+            at = t + hour * HOUR + step * HOUR / 20
+            market.record("search", "flight", "DEL-BOM", None, "steady", at=at)
+            if hour < 24:
+                market.record("search", "flight", "DEL-GOI", None, "cooling", at=at)
+            for _ in range(1 if hour < 46 else 10):
+                market.record("search", "flight", "DEL-DXB", None, "surging", at=at)
+    now = start + 48 * HOUR
+    quotes = {
+        name: market.quote("flight", route, None, name, at=now)["multiplier"]
+        for name, route in (("steady", "DEL-BOM"), ("surging", "DEL-DXB"), ("cooling", "DEL-GOI"))
+    }
+    print(f"  {({name: round(value, 4) for name, value in quotes.items()})}")
+    check(abs(quotes["steady"] - 1.0) < 0.03, "steady demand prices near 1.0", failures)
+    check(quotes["surging"] > 1.05, "a surge raises the price", failures)
+    check(quotes["cooling"] < 0.97, "cooling demand lowers it", failures)
+    fresh = DemandSignals(now=start)
+    for minute in range(120):
+        fresh.record("search", "flight", "DEL-BLR", None, "warming", at=start + minute * 60)
+    warming = fresh.quote("flight", "DEL-BLR", None, "warming", at=start + 120 * 60)["multiplier"]
+    check(abs(warming - 1.0) < 0.03, f"a worker up for two hours doesn't read steady traffic as a surge ({warming:.4f})", failures)
+    check(all(settings.DEMAND_MULTIPLIER_MIN <= value <= settings.DEMAND_MULTIPLIER_MAX for value in quotes.values()),
+          "all within DEMAND_MULTIPLIER_MIN/MAX", failures)
+
+    print("\nBatch repricing")
+    now = start + span
+    result_set = [("flight", f"R{i % 300:03d}-X", datetime(2026, 11, 2) + timedelta(days=7 * (i % 6)), f"F{i}") for i in range(1000)]
+    began = time.perf_counter()
+    single = [signals.quote(*item, at=now)["multiplier"] for item in result_set]
+    quote_us = (time.perf_counter() - began) / len(result_set) * 1e6
+    signals.multipliers(result_set[:10], at=now)
+    began = time.perf_counter()
+    batch = signals.multipliers(result_set, at=now)
+    batch_us = (time.perf_counter() - began) / len(result_set) * 1e6
+    check(np.abs(np.array(single) - batch).max() < 1e-9, "batch multipliers equal per-item quotes", failures)
+    print(f"  record {record_us:.1f} us/event; quote {quote_us:.1f} us/item; batch {batch_us:.1f} us/item over {len(result_set)} items")
+
+    print("\nWorkers")
+    whole, halves = DemandSignals(now=start), (DemandSignals(now=start), DemandSignals(now=start))
+    for index, (at, event, booking_type, market_name, travel_date, item_id) in enumerate(events):
+        whole.record(event, booking_type, market_name, travel_date, item_id, at=at)
+        halves[index % 2].record(event, booking_type, market_name, travel_date, item_id, at=at)
+    busy = [("flight", f"R{i:03d}-X", datetime(2026, 11, 2) + timedelta(days=7 * (i % 6)), f"F{i}") for i in range(20)]
+    gaps = [whole.quote(*item, at=now)["multiplier"] - halves[0].quote(*item, at=now)["multiplier"] for item in busy]
+    # Half the traffic is a sample: short-window counts carry Poisson noise, and the prior weighs a little more
+    check(statistics.mean(map(abs, gaps)) < 0.05,
+          f"a worker with half the traffic prices busy items like one with all (mean gap {statistics.mean(gaps):+.4f}, "
+          f"mean absolute {statistics.mean(map(abs, gaps)):.4f})", failures)
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    sys.exit(1 if main(args) else 0)
@@ -0,0 +1,201 @@
+"""
+User feature store benchmark for Faredown
+
+Replays --users users' bargain and booking events the way the routers
+record them (source rows plus feature increments in one transaction),
+then checks that the incrementally maintained user_features rows equal a
+full rebuild from history, that rolled back events leave no trace, and
+that another worker sees new events after FEATURE_STORE_TTL. Compares a
+hot-tier lookup with scanning the user's history per request.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_features.db python benchmarks/feature_store.py --users 1000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, insert, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.bargain_models import BargainSession, BargainAttempt, BargainStatus, BargainAttemptType
+from app.models.booking_models import Booking, BookingStatus
+from app.models.user_models import User, UserFeatures
+from app.services.feature_store import COUNTERS, TIMESTAMPS, UserFeatureStore, feature_store
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def create_users(db, count: int, run: str):
+    return db.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [
+            {"email": f"features_{run}_{i}@faredown.test", "password_hash": "x", "first_name": "Bench", "last_name": "User"}
+            for i in range(count)
+        ]
+    ).scalars().all()
+
+def replay_user(db, store, user_id: int, run: str, rng: random.Random, start: datetime):
+    """A few bargain sessions and confirmed bookings, each committed with its feature increments"""
+    at = start
+    for _ in range(rng.randint(1, 6)):
+        at += timedelta(hours=rng.uniform(1, 200))
+        base_price = round(rng.uniform(3000, 60000), 2)
+        accepted = rng.random() < 0.4
+        session_pk = db.execute(insert(BargainSession).values(
+            session_id=f"features_{run}_{uuid.uuid4().hex}", user_id=user_id, booking_type="flight", item_id="X",
+            item_data={}, net_rate=base_price * 0.8, markup_min=5.0, markup_max=25.0, base_price=base_price,
+            final_price_range_min=base_price * 0.85, final_price_range_max=base_price,
+            status=BargainStatus.ACCEPTED if accepted else BargainStatus.EXPIRED, started_at=at, expires_at=at
+        ).returning(BargainSession.id)).scalar()
+        store.record_bargain_started(db, user_id, at)
+        for number in range(1, rng.randint(2, 4)):
+            at += timedelta(minutes=rng.uniform(0.5, 3))
+            offer = round(base_price * rng.uniform(0.7, 0.98), 2)
+            db.execute(insert(BargainAttempt).values(
+                session_id=session_pk, attempt_number=number, attempt_type=BargainAttemptType.USER_OFFER,
+                offered_price=offer, is_accepted=False, timestamp=at
+            ))
+            store.record_offer(db, user_id, offer, base_price, at)
+        if accepted:
+            store.record_bargain_accepted(db, user_id)
+            if rng.random() < 0.7:
+                at += timedelta(minutes=rng.uniform(1, 30))
+                amount = round(base_price * rng.uniform(0.85, 1.0), 2)
+                db.execute(insert(Booking).values(
+                    booking_reference=f"FS{uuid.uuid4().hex[:16]}", user_id=user_id, booking_type="flight",
+                    status=BookingStatus.CONFIRMED, base_amount=amount, total_amount=amount,
+                    lead_passenger_name="Bench User", lead_passenger_email="bench@faredown.test",
+                    lead_passenger_phone="0000000000", confirmed_at=at
+                ))
+                store.record_booking(db, user_id, amount, at)
+        db.commit()
+
+def table_rows(db, user_ids):
+    rows = db.execute(select(UserFeatures).where(UserFeatures.user_id.in_(user_ids))).scalars().all()
+    return {row.user_id: {name: getattr(row, name) for name in COUNTERS + TIMESTAMPS} for row in rows}
+
+def same(left, right) -> bool:
+    if left.keys() != right.keys():
+        return False
+    for user_id, row in left.items():
+        for name, value in row.items():
+            other = right[user_id][name]
+            if isinstance(value, float) or isinstance(other, float):
+                if abs(value - other) > 1e-6:
+                    return False
+            elif value != other:
+                return False
+    return True
+
+def scan_features(db, user_id: int):
+    """What analyze_user_behavior would have to do without the store"""
+    sessions, accepted = db.execute(select(
+        func.count(BargainSession.id),
+        func.count(BargainSession.id).filter(BargainSession.status == BargainStatus.ACCEPTED)
+    ).where(BargainSession.user_id == user_id)).one()
+    offers = db.execute(
+        select(BargainSession.base_price, BargainAttempt.offered_price, BargainAttempt.timestamp)
+        .join(BargainSession, BargainSession.id == BargainAttempt.session_id)
+        .where(BargainSession.user_id == user_id)
+    ).all()
+    bookings = db.execute(select(func.count(Booking.id), func.sum(Booking.total_amount), func.max(Booking.confirmed_at)).where(
+        Booking.user_id == user_id, Booking.status == BookingStatus.CONFIRMED
+    )).one()
+    return sessions, accepted, len(offers), bookings
+
+def main(args):
+    failures = []
+    rng = random.Random(45)
+    run = uuid.uuid4().hex[:8]
+    store = feature_store
+    start = datetime.utcnow() - timedelta(days=400)
+
+    db = SessionLocal()
+    try:
+        user_ids = create_users(db, args.users, run)
+        db.commit()
+        for user_id in user_ids[:50]:
+            store.get(user_id)
+        started = time.perf_counter()
+        for user_id in user_ids:
+            replay_user(db, store, user_id, run, rng, start)
+        print(f"replayed {args.users} users' events in {time.perf_counter() - started:.1f}s ({store.events} increments)")
+
+        incremental = table_rows(db, user_ids)
+        hot_loads = store.loads
+        check(all(
+            same({user_id: incremental[user_id]}, {user_id: {name: getattr(store.get(user_id), name) for name in COUNTERS + TIMESTAMPS}})
+            for user_id in user_ids[:50]
+        ), "hot entries updated on commit match the table", failures)
+        check(store.loads == hot_loads, "without re-reading the table", failures)
+
+        print("\nRebuild from history")
+        result = store.rebuild(db)
+        print(f"  {result['users']} users in {result['elapsed_ms']:.0f}ms")
+        check(same(incremental, table_rows(db, user_ids)), "incremental rows equal a full rebuild", failures)
+
+        print("\nRollback")
+        user_id = user_ids[0]
+        before = table_rows(db, [user_id])
+        store.get(user_id)
+        store.record_booking(db, user_id, 99999.0)
+        db.rollback()
+        check(table_rows(db, [user_id]) == before and store.get(user_id).total_spent == before[user_id]["total_spent"],
+              "a rolled back event changes neither the table nor the hot tier", failures)
+
+        print("\nAnother worker")
+        other_worker = UserFeatureStore(ttl=0.2)
+        seen = other_worker.get(user_id).bookings
+        store.record_booking(db, user_id, 1000.0)
+        db.commit()
+        stale = other_worker.get(user_id).bookings
+        time.sleep(0.3)
+        check(stale == seen and other_worker.get(user_id).bookings == seen + 1,
+              "sees the event once its entry is older than the TTL", failures)
+
+        print("\nLookup")
+        sample = user_ids[:500]
+        for user_id in sample:
+            store.get(user_id)
+        started = time.perf_counter()
+        for _ in range(20):
+            for user_id in sample:
+                store.get(user_id)
+        hot_us = (time.perf_counter() - started) / (20 * len(sample)) * 1e6
+        scans = []
+        for user_id in sample[:200]:
+            began = time.perf_counter()
+            scan_features(db, user_id)
+            scans.append((time.perf_counter() - began) * 1e6)
+        print(f"  hot tier {hot_us:.2f} us per user, scanning history {statistics.median(scans):.0f} us per user")
+        print(f"  {store.metrics()}")
+    finally:
+        db.close()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if main(args) else 0)
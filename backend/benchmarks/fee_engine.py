@@ -0,0 +1,113 @@
+"""
+Fee engine benchmark for Faredown
+
+Migrates DATABASE_URL to head (which seeds the VAT and convenience fee
+tables), checks batch quotes against single quotes, times both, and checks
+that committing a change to the fee tables is picked up without a restart.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_fees.db python benchmarks/fee_engine.py --items 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import delete, update
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.pricing_models import VAT
+from app.services.fee_engine import fee_engine
+from app.services.pricing_service import PricingService
+
+# Values PricingService and the VAT router hardcoded before the fee engine
+PREVIOUS_TAXES = [
+    (("flight", "IN", "IN"), 5.0),
+    (("flight", "IN", "AE"), 0.0),
+    (("hotel", "IN", "IN"), 12.0),
+    (("hotel", "IN", "AE"), 0.0),
+]
+
+BOOKING_TYPES = ["flight", "hotel", "package", "activity"]
+REGIONS = ["domestic", "international"]
+COUNTRIES = [None, "AE", "SG", "GB"]
+PAYMENT_METHODS = [None, "credit_card", "upi", "net_banking", "wallet"]
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+    failures = []
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    compiled = fee_engine.compile()
+    print(f"Compiled {len(compiled.vat_percentage)} cells from {compiled.source}: {compiled.axes}")
+
+    pricing = PricingService()
+    for (booking_type, origin, destination), expected in PREVIOUS_TAXES:
+        vat_rate = pricing.calculate_taxes(1000.0, booking_type, origin, destination)["vat_rate"]
+        check(vat_rate == expected, f"{booking_type} {origin}->{destination} VAT {vat_rate} == {expected}", failures)
+
+    rng = random.Random(7)
+    items = [
+        (rng.choice(BOOKING_TYPES), round(rng.uniform(500, 50000), 2), rng.choice(REGIONS),
+         rng.choice(COUNTRIES), rng.choice(PAYMENT_METHODS))
+        for _ in range(args.items)
+    ]
+
+    start = time.perf_counter()
+    single = [compiled.quote(*item) for item in items]
+    single_s = time.perf_counter() - start
+
+    columns = list(zip(*items))
+    start = time.perf_counter()
+    batch = compiled.quote_batch(columns[0], columns[1], columns[2], columns[3], columns[4])
+    batch_s = time.perf_counter() - start
+
+    print(f"\n{args.items} quotes: single {single_s * 1000:.1f} ms, batch {batch_s * 1000:.1f} ms "
+          f"({single_s / batch_s:.1f}x)")
+    for field in ("vat_amount", "convenience_fee", "total_amount"):
+        expected = np.array([quote[field] for quote in single])
+        check(np.allclose(batch[field], expected), f"batch {field} matches single quotes", failures)
+
+    print("\nInvalidation")
+    db = SessionLocal()
+    try:
+        row = VAT(booking_type="hotel", region="international", country="AE", vat_percentage=5.0, is_active=True)
+        db.add(row)
+        db.commit()
+        vat = fee_engine.quote("hotel", 1000.0, "IN", "AE")["vat_percentage"]
+        check(vat == 5.0, f"new AE hotel VAT row applies after commit ({vat})", failures)
+
+        db.execute(update(VAT).where(VAT.id == row.id).values(is_active=False))
+        db.commit()
+        vat = fee_engine.quote("hotel", 1000.0, "IN", "AE")["vat_percentage"]
+        check(vat == 0.0, f"bulk-deactivated row stops applying ({vat})", failures)
+
+        db.execute(delete(VAT).where(VAT.id == row.id))
+        db.commit()
+    finally:
+        db.close()
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
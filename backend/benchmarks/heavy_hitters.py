@@ -0,0 +1,192 @@
+"""
+Top destinations benchmark for Faredown
+
+Streams --events Zipf-distributed destinations into Space-Saving
+summaries and checks them against exact counts: the top ten are found,
+counts never undercount and stay within the summary's error bound, and
+merging per-worker, per-day summaries keeps both. Then runs the snapshot
+path against a database (two workers writing buckets, rolling windows,
+a restarted worker answering from snapshots, the query cache) and checks
+that a rebuild from booking history matches a full scan of it.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_top_k.db python benchmarks/heavy_hitters.py --events 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.booking_models import Booking, BookingItem, BookingStatus
+from app.models.user_models import User
+from app.services.heavy_hitters import HeavyHitters, SpaceSaving, destination_of, merge
+
+DAY = 86400.0
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def zipf_names(count: int, rng: random.Random, universe: int = 20000):
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(universe)]
+    return [f"City {index:05d}" for index in rng.choices(range(universe), weights=weights, k=count)]
+
+def ranked(counts: Counter, limit: int):
+    """Exact top keys, ties broken by name as the summaries break them"""
+    return sorted(counts.items(), key=lambda pair: (-pair[1], pair[0]))[:limit]
+
+def bounded(rows, exact) -> bool:
+    """Every reported count is an upper bound and count - error a lower bound"""
+    return all(row["count"] >= exact[row["name"]] >= row["count"] - row["error"] for row in rows)
+
+def main(args):
+    failures = []
+    rng = random.Random(49)
+    names = zipf_names(args.events, rng)
+    exact = Counter(names)
+    true_top = [name for name, _ in exact.most_common(10)]
+
+    print("Accuracy")
+    summary = SpaceSaving(settings.TOP_K_CAPACITY)
+    began = time.perf_counter()
+    for name in names:
+        summary.add(name)
+    add_us = (time.perf_counter() - began) / len(names) * 1e6
+    rows = merge([summary])
+    check([row["name"] for row in rows[:10]] == true_top, "one summary finds the exact top ten, in order", failures)
+    check(bounded(rows, exact), "counts never undercount and stay within their error", failures)
+    overcount = max(row["count"] - exact[row["name"]] for row in rows)
+    check(overcount <= len(names) / summary.capacity,
+          f"largest overcount {overcount} within events / capacity ({len(names) / summary.capacity:.0f})", failures)
+
+    print("\nMerging")
+    parts = defaultdict(lambda: SpaceSaving(settings.TOP_K_CAPACITY))
+    for index, name in enumerate(names):
+        # 4 workers x 30 daily buckets
+        parts[(index % 4, index * 30 // len(names))].add(name)
+    began = time.perf_counter()
+    rows = merge(parts.values())
+    merge_ms = (time.perf_counter() - began) * 1000
+    top_counts = [exact[name] for name in true_top]
+    errors = [abs(row["count"] - exact[row["name"]]) / exact[row["name"]] for row in rows[:10]]
+    check({row["name"] for row in rows[:10]} == set(true_top), f"{len(parts)} merged summaries find the same top ten", failures)
+    check(bounded(rows, exact), "merged counts keep both bounds", failures)
+    check(max(errors) < 0.1, f"top ten within 10% (largest {max(errors):.3f}; true counts {top_counts[0]}..{top_counts[-1]})", failures)
+    print(f"  add {add_us:.2f} us/event; merging {len(parts)} summaries {merge_ms:.1f} ms")
+
+    print("\nSnapshots")
+    db = SessionLocal()
+    try:
+        now = time.time()
+        workers = (HeavyHitters(snapshot_interval=60.0), HeavyHitters(snapshot_interval=60.0))
+        run = uuid.uuid4().hex[:6]
+        bookings = zipf_names(args.bookings, rng, universe=400)
+        spent = defaultdict(float)
+        recent = Counter()
+        began = time.perf_counter()
+        for index, name in enumerate(bookings):
+            # Spread over the last 29 days; every tenth booking in the last half hour
+            at = now - rng.uniform(0, 1800) if index % 10 == 0 else now - rng.uniform(0, 29 * DAY)
+            amount = rng.uniform(5000, 80000)
+            workers[index % 2].record_booking("hotel", [{"city": f"{name} {run}".upper()}], amount, "INR", at=at)
+            spent[f"{name} {run}".title()] += amount
+            if now - at < 50 * 60:
+                recent[f"{name} {run}".title()] += 1
+        record_us = (time.perf_counter() - began) / len(bookings) * 1e6
+        written = sum(worker.snapshot() for worker in workers)
+        in_memory = sum(worker.metrics()["buckets_in_memory"] for worker in workers)
+        check(in_memory <= 2 * 3 * 2, f"{written} bucket rows written; {in_memory} buckets left in memory (only current ones)", failures)
+
+        booked = Counter(f"{name} {run}".title() for name in bookings)
+        reader = HeavyHitters(snapshot_interval=60.0)
+        began = time.perf_counter()
+        rows = reader.top(db, "bookings:destination", "30d", limit=10)
+        cold_ms = (time.perf_counter() - began) * 1000
+        ours = [row for row in rows if row["name"].endswith(run.title())]
+        check([(row["name"], row["count"]) for row in ours] == ranked(booked, len(ours)) and len(ours) == 10,
+              "a fresh worker reads the 30-day top ten from both workers' snapshots", failures)
+        check(all(abs(row["revenue"] - spent[row["name"]]) < 1 for row in ours), "revenue totals match", failures)
+        hotels = reader.top(db, "bookings:destination", "30d", limit=10, booking_type="hotel")
+        flights = reader.top(db, "bookings:destination", "30d", limit=1000, booking_type="flight")
+        check(hotels == rows and not any(row["name"].endswith(run.title()) for row in flights),
+              "a booking_type filter keeps only that type's bookings", failures)
+        hour = {row["name"]: row["count"] for row in reader.top(db, "bookings:destination", "hour", limit=1000)}
+        check(all(hour.get(name, 0) >= count for name, count in recent.items()) and sum(hour.values()) < len(bookings) / 5,
+              "the hour window holds the last hour's bookings and not the month's", failures)
+        began = time.perf_counter()
+        for _ in range(100):
+            reader.top(db, "bookings:destination", "30d", limit=10)
+        cached_us = (time.perf_counter() - began) / 100 * 1e6
+        shaped = reader.top_destinations(db, start=datetime.utcnow() - timedelta(days=30), limit=3)
+        check(set(shaped[0]) == {"destination", "bookings", "revenue"}, f"dashboard shape {shaped[0]}", failures)
+        print(f"  record {record_us:.1f} us/booking; 30-day query {cold_ms:.1f} ms cold, {cached_us:.1f} us cached")
+
+        print("\nRebuild")
+        user_id = db.execute(insert(User).returning(User.id).values(
+            email=f"top_k_{run}@faredown.test", password_hash="x", first_name="Bench", last_name="User"
+        )).scalar()
+        for index, name in enumerate(zipf_names(args.bookings // 2, rng, universe=200)):
+            at = datetime.utcnow() - timedelta(seconds=rng.uniform(3600, 9 * DAY))
+            booking_id = db.execute(insert(Booking).returning(Booking.id).values(
+                booking_reference=f"TK{uuid.uuid4().hex[:16]}", user_id=user_id, booking_type="flight",
+                status=BookingStatus.CONFIRMED, base_amount=10000, total_amount=10000,
+                lead_passenger_name="Bench User", lead_passenger_email="bench@faredown.test",
+                lead_passenger_phone="0000000000", created_at=at
+            )).scalar()
+            db.execute(insert(BookingItem), [
+                {"booking_id": booking_id, "item_type": "flight", "item_name": "Outbound", "unit_price": 5000, "total_price": 5000,
+                 "item_data": {"origin": "BOM", "destination": name.replace(" ", "")[-5:]}},
+                {"booking_id": booking_id, "item_type": "flight", "item_name": "Return", "unit_price": 5000, "total_price": 5000,
+                 "item_data": {"origin": name.replace(" ", "")[-5:], "destination": "BOM"}},
+            ])
+        db.commit()
+
+        since = datetime.utcnow() - timedelta(days=10)
+        result = reader.rebuild(db, days=10)
+        scanned = Counter()
+        items = db.execute(
+            select(Booking.id, Booking.booking_type, BookingItem.item_data)
+            .join(BookingItem, BookingItem.booking_id == Booking.id)
+            .where(Booking.created_at >= since).order_by(Booking.id, BookingItem.id)
+        ).all()
+        seen = set()
+        for booking_id, booking_type, item_data in items:
+            name = destination_of(booking_type, item_data)
+            if booking_id not in seen and name:
+                scanned[name] += 1
+                seen.add(booking_id)
+        rows = reader.top_destinations(db, start=since, limit=10)
+        check([(row["destination"], row["bookings"]) for row in rows] == ranked(scanned, 10),
+              f"rebuild of {result['bookings']} bookings ({result['duration_s']}s) matches a full scan", failures)
+        print(f"  {reader.metrics()}")
+    finally:
+        db.close()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--bookings", type=int, default=20000)
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    sys.exit(1 if main(args) else 0)
@@ -0,0 +1,106 @@
+"""
+Import-time budget check for Faredown
+
+Imports main.py in fresh interpreters under `python -X importtime`, reports
+where boot time goes and fails if the median total exceeds the budget or a
+module that should be deferred (openai, numpy, pandas, sklearn) is imported
+during boot.
+
+    python benchmarks/import_time.py                      # print report
+    python benchmarks/import_time.py --output benchmarks/reports/import_time.txt
+"""
+
+import argparse
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules that must only load on first use
+DEFERRED_MODULES = ["openai", "numpy", "pandas", "sklearn"]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def measure(target: str):
+    """One cold import of target; returns {module: (self_us, cumulative_us, depth)}"""
+    # Run from a neutral directory so a local .env doesn't skew settings
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=tempfile.gettempdir(),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-4000:])
+        raise SystemExit(f"import {target} failed")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+def report(target: str, runs, budget_ms: float, top: int):
+    totals = [run[target][1] / 1000 for run in runs]
+    median_total = statistics.median(totals)
+    modules = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    # Self time grouped by top-level package
+    by_package = defaultdict(int)
+    for name, (self_us, _, _) in modules.items():
+        by_package[name.split(".")[0]] += self_us
+
+    deferred_loaded = [name for name in DEFERRED_MODULES if name in modules]
+
+    lines = [
+        f"Import-time report for `import {target}`",
+        f"Generated {datetime.utcnow():%Y-%m-%d %H:%M} UTC, Python {platform.python_version()}, {len(runs)} runs",
+        "",
+        f"Total (median): {median_total:.0f} ms   budget: {budget_ms:.0f} ms   runs: {', '.join(f'{t:.0f}' for t in totals)} ms",
+        f"Modules imported: {len(modules)}",
+        f"Deferred modules loaded at boot: {', '.join(deferred_loaded) or 'none'}",
+        "",
+        f"Top {top} packages by self time:",
+    ]
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    lines += ["", f"Top {top} app modules by cumulative time:"]
+    app_modules = [(name, data) for name, data in modules.items() if name.startswith("app.") or name == target]
+    for name, (_, cumulative_us, _) in sorted(app_modules, key=lambda item: -item[1][1])[:top]:
+        lines.append(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    ok = median_total <= budget_ms and not deferred_loaded
+    return "\n".join(lines) + "\n", ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2500.0, help="median total under -X importtime, which inflates timings")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    runs = [measure(args.target) for _ in range(args.runs)]
+    text, ok = report(args.target, runs, args.budget_ms, args.top)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
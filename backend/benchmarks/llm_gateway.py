@@ -0,0 +1,177 @@
+"""
+LLM gateway benchmark for Faredown
+
+Starts a local fake OpenAI server (chat completions with a configurable
+delay, failure switch and usage counts) and points the "openai" host at
+it, then checks the gateway's memory and disk cache tiers, in-flight
+deduplication, concurrency cap, timeout and error fallbacks, token
+accounting, and the counter-offer message templates it serves. No
+network access or API key is needed.
+
+    python benchmarks/llm_gateway.py
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.services.http_clients import http_clients
+from app.services.bargain_messages import CounterOfferMessages, openai_template
+from app.services.llm_gateway import LLMGateway
+
+class FakeOpenAI:
+    """Chat completions endpoint that counts calls and concurrent requests"""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.failing = False
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.completions)
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if self.failing:
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=503)
+        prompt = body["messages"][-1]["content"]
+        if "{price}" in prompt:
+            content = "Just for you: {price}, saving {savings}!"
+        else:
+            content = f"Reply to: {prompt[:40]}"
+        usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split())}
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+        return {
+            "id": f"chatcmpl-{self.calls}",
+            "object": "chat.completion",
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {**usage, "total_tokens": sum(usage.values())}
+        }
+
+    def start(self) -> int:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="error"))
+        threading.Thread(target=self.server.run, daemon=True).start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return port
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def ask(text: str):
+    return [{"role": "system", "content": "You are a travel assistant."}, {"role": "user", "content": text}]
+
+async def main(args):
+    failures = []
+    fake = FakeOpenAI()
+    port = fake.start()
+    settings.OPENAI_API_KEY = "test-key"
+    http_clients.register("openai", f"http://127.0.0.1:{port}/v1", max_concurrency=16, timeout=30.0)
+    disk_path = os.path.join(tempfile.mkdtemp(), "llm_cache.db")
+    gateway = LLMGateway(cache_path=disk_path, max_concurrency=4, timeout=2.0)
+
+    print("Cache tiers")
+    first = await gateway.complete(ask("Suggest a weekend trip from Mumbai"))
+    again = await gateway.complete(ask("  Suggest a weekend   trip from\nMumbai "))
+    check(first.source == "api" and again.source == "memory" and again.text == first.text,
+          "a prompt differing only in whitespace is served from memory", failures)
+    restarted = LLMGateway(cache_path=disk_path, max_concurrency=4, timeout=2.0)
+    from_disk = await restarted.complete(ask("Suggest a weekend trip from Mumbai"))
+    check(from_disk.source == "disk" and fake.calls == 1, "a restarted worker is served from the disk tier", failures)
+    keyed = [await gateway.complete(ask(f"Variant {i} of the same question"), cache_key=("trip", "mumbai")) for i in range(3)]
+    check([r.source for r in keyed] == ["api", "memory", "memory"], "prompts sharing a caller's cache_key share a completion", failures)
+
+    print("\nDeduplication and concurrency")
+    fake.delay = 0.1
+    calls = fake.calls
+    results = await asyncio.gather(*[gateway.complete(ask("Best time to visit Goa?")) for _ in range(50)])
+    check(fake.calls == calls + 1 and len({r.text for r in results}) == 1,
+          f"50 identical concurrent prompts make {fake.calls - calls} API call", failures)
+    fake.peak = 0
+    started = time.perf_counter()
+    await asyncio.gather(*[gateway.complete(ask(f"Hotel tips for city {i}")) for i in range(40)])
+    elapsed = time.perf_counter() - started
+    check(fake.peak <= 4, f"40 distinct prompts never exceed 4 calls in flight (peak {fake.peak}, {elapsed:.2f}s)", failures)
+
+    print("\nTimeouts and errors")
+    fake.delay = 0.5
+    started = time.perf_counter()
+    late = await gateway.complete(ask("Is Bali busy in August?"), fallback="template", timeout=0.1)
+    waited = time.perf_counter() - started
+    check(late.source == "fallback" and late.text == "template" and waited < 0.2,
+          f"a slow call returns the fallback after the timeout ({waited * 1000:.0f} ms)", failures)
+    await asyncio.sleep(0.6)
+    filled = await gateway.complete(ask("Is Bali busy in August?"), fallback="template", timeout=0.1)
+    check(filled.source == "memory", "the abandoned call still fills the cache", failures)
+    fake.delay, fake.failing = 0.0, True
+    errors = gateway.counts["errors"]
+    failed = await gateway.complete(ask("Visa rules for Dubai?"), fallback="template")
+    check(failed.text == "template" and gateway.counts["errors"] == errors + 1, "an upstream 503 returns the fallback", failures)
+    fake.failing = False
+    settings.OPENAI_API_KEY = ""
+    keyless = await LLMGateway(cache_path="").complete(ask("Anything"), fallback="template")
+    check(keyless.source == "fallback", "without an API key every call falls back", failures)
+    settings.OPENAI_API_KEY = "test-key"
+
+    print("\nAccounting")
+    tokens = {"prompt": gateway.tokens["prompt"] + restarted.tokens["prompt"],
+              "completion": gateway.tokens["completion"] + restarted.tokens["completion"]}
+    check(tokens == {"prompt": fake.prompt_tokens, "completion": fake.completion_tokens},
+          f"token counts match the server's usage ({tokens})", failures)
+    hits = []
+    for _ in range(2000):
+        began = time.perf_counter()
+        await gateway.complete(ask("Suggest a weekend trip from Mumbai"))
+        hits.append((time.perf_counter() - began) * 1e6)
+    print(f"  memory hit {statistics.median(hits):.1f} us, api p50 {gateway.latency.percentile(0.5)} ms")
+    print(f"  {gateway.metrics()}")
+
+    print("\nCounter-offer templates")
+    settings.BARGAIN_MESSAGE_LLM = True
+    messages = CounterOfferMessages(template_source=functools.partial(openai_template, gateway=gateway))
+    await messages.render("moderate", 11800.0, 12500.0, 1, 4, "s1")
+    await asyncio.sleep(0.05)
+    message, variant = await messages.render("moderate", 11900.0, 12500.0, 1, 4, "s2", currency="USD")
+    check(variant.startswith("llm:") and message == "Just for you: $143, saving $7!",
+          f"LLM templates are fetched through the gateway ({message})", failures)
+
+    fake.server.should_exit = True
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args = parser.parse_args()
+
+    sys.exit(1 if asyncio.run(main(args)) else 0)
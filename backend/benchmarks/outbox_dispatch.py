@@ -0,0 +1,200 @@
+"""
+Outbox dispatcher benchmark for Faredown
+
+Starts a local stand-in loyalty server and points the "loyalty" host at it,
+seeds loyalty_earning outbox events in a scratch database and drains them
+with the OutboxDispatcher. The stand-in answers per booking: accepted,
+503 a few times before accepting, 429 once before accepting, 422, or
+200 with success=false. Checks that every event ends in the right state
+with the right attempt count, that each accepted event was delivered once,
+and that the lag metric tracks the oldest pending event. No network access
+is needed.
+
+    python benchmarks/outbox_dispatch.py --events 500
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.outbox_models import OutboxEvent, OutboxStatus
+from app.services.http_clients import http_clients
+from app.services.outbox_dispatcher import OutboxDispatcher
+
+# Booking reference prefix -> behaviour of the stand-in loyalty server
+BEHAVIOURS = ["OK", "FLAKY", "THROTTLE", "REJECT", "DECLINE"]
+FLAKY_FAILURES = 2
+
+class StandInLoyaltyServer:
+    """process-earning endpoint that fails on purpose depending on the booking"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.accepted = Counter()
+        self.app = FastAPI()
+        self.app.post("/api/loyalty/process-earning")(self.process_earning)
+
+    async def process_earning(self, request: Request):
+        booking_id = (await request.json())["bookingId"]
+        self.calls[booking_id] += 1
+        calls = self.calls[booking_id]
+        if booking_id.startswith("FLAKY") and calls <= FLAKY_FAILURES:
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+        if booking_id.startswith("THROTTLE") and calls == 1:
+            return JSONResponse({"error": "slow down"}, status_code=429)
+        if booking_id.startswith("REJECT"):
+            return JSONResponse({"error": "invalid payload"}, status_code=422)
+        if booking_id.startswith("DECLINE"):
+            return {"success": False, "error": "booking not eligible"}
+        self.accepted[booking_id] += 1
+        return {"success": True, "pointsEarned": 100}
+
+    def start(self) -> int:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="error"))
+        threading.Thread(target=self.server.run, daemon=True).start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return port
+
+def check(condition: bool, message: str, failures: list):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+def seed(session_factory, count: int, age_seconds: float):
+    """Insert count events spread over the behaviours, all created age_seconds ago"""
+    created_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    db = session_factory()
+    try:
+        db.execute(insert(OutboxEvent), [
+            {
+                "event_type": "loyalty_earning",
+                "aggregate_id": f"{BEHAVIOURS[i % len(BEHAVIOURS)]}{i:06d}",
+                "payload": {
+                    "userId": "1",
+                    "bookingId": f"{BEHAVIOURS[i % len(BEHAVIOURS)]}{i:06d}",
+                    "bookingType": "FLIGHT",
+                    "eligibility": {"eligibleAmount": 800.0, "currency": "INR", "fxRate": 1.0},
+                    "description": "Flight booking confirmed"
+                },
+                "created_at": created_at,
+                "next_attempt_at": created_at
+            }
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def outcomes(session_factory):
+    db = session_factory()
+    try:
+        return db.execute(select(OutboxEvent.aggregate_id, OutboxEvent.status, OutboxEvent.attempts)).all()
+    finally:
+        db.close()
+
+async def main(args):
+    failures = []
+    loyalty = StandInLoyaltyServer()
+    port = loyalty.start()
+    # A high breaker threshold keeps the deliberate 5xx responses from opening the circuit
+    http_clients.register("loyalty", f"http://127.0.0.1:{port}", max_concurrency=args.concurrency,
+                          timeout=5.0, failure_threshold=10 ** 6)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'outbox_bench.db')}"
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(session_factory, args.events, age_seconds=120)
+
+    dispatcher = OutboxDispatcher(
+        session_factory=session_factory,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_attempts=args.max_attempts,
+        base_backoff=0.01,
+        max_backoff=0.05
+    )
+
+    print("Delivery")
+    started = time.perf_counter()
+    await dispatcher.dispatch_once()
+    check(dispatcher.lag_seconds >= 120, f"lag reports the oldest pending event ({dispatcher.lag_seconds:.0f}s)", failures)
+    while time.perf_counter() - started < args.deadline:
+        if not await dispatcher.dispatch_once():
+            await asyncio.sleep(0.02)
+            if not any(status == OutboxStatus.PENDING for _, status, _ in outcomes(session_factory)):
+                break
+    wall = time.perf_counter() - started
+    await dispatcher.dispatch_once()
+    check(dispatcher.lag_seconds == 0.0, "lag drops to zero once the outbox is drained", failures)
+
+    rows = outcomes(session_factory)
+    by_behaviour = {behaviour: [row for row in rows if row.aggregate_id.startswith(behaviour)] for behaviour in BEHAVIOURS}
+    expected = {
+        "OK": (OutboxStatus.DELIVERED, 1),
+        "FLAKY": (OutboxStatus.DELIVERED, FLAKY_FAILURES + 1),
+        "THROTTLE": (OutboxStatus.DELIVERED, 2),
+        "REJECT": (OutboxStatus.FAILED, 1),
+        "DECLINE": (OutboxStatus.FAILED, 1),
+    }
+    descriptions = {
+        "OK": "accepted events are delivered on the first attempt",
+        "FLAKY": f"events answered with 503 are retried until delivered ({FLAKY_FAILURES + 1} attempts)",
+        "THROTTLE": "events answered with 429 are retried",
+        "REJECT": "events answered with 422 fail permanently without retries",
+        "DECLINE": "events declined with success=false fail permanently without retries",
+    }
+    for behaviour, (status, attempts) in expected.items():
+        ok = all(row.status == status and row.attempts == attempts for row in by_behaviour[behaviour])
+        check(ok, f"{descriptions[behaviour]} ({len(by_behaviour[behaviour])} events)", failures)
+
+    delivered = {row.aggregate_id for row in rows if row.status == OutboxStatus.DELIVERED}
+    check(all(loyalty.accepted[booking_id] == 1 for booking_id in delivered) and sum(loyalty.accepted.values()) == len(delivered),
+          "each delivered event was accepted by the loyalty server exactly once", failures)
+
+    metrics = dispatcher.metrics()
+    check(metrics["delivered_total"] == len(delivered)
+          and metrics["failed_total"] == len(by_behaviour["REJECT"]) + len(by_behaviour["DECLINE"])
+          and metrics["retried_total"] == len(by_behaviour["FLAKY"]) * FLAKY_FAILURES + len(by_behaviour["THROTTLE"]),
+          "dispatcher counters match the outcomes", failures)
+
+    print(f"\n  {args.events} events in {wall:.2f}s ({args.events / wall:.0f}/s), {sum(loyalty.calls.values())} loyalty calls")
+    print(f"  {metrics}")
+    print(f"  loyalty client: {http_clients.get('loyalty').metrics()['latency']}")
+
+    await http_clients.aclose()
+    loyalty.server.should_exit = True
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--max-attempts", type=int, default=8)
+    parser.add_argument("--deadline", type=float, default=60.0, help="give up after this many seconds")
+    args = parser.parse_args()
+
+    sys.exit(1 if asyncio.run(main(args)) else 0)
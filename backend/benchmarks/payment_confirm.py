@@ -0,0 +1,145 @@
+"""
+Payment confirmation benchmark for Faredown
+
+Seeds N bookings with PROCESSING payments and confirms every payment twice
+at the same time (client + gateway webhook), then checks that each booking
+was confirmed once and got exactly one loyalty outbox event.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=postgresql://localhost/faredown_bench python benchmarks/payment_confirm.py --payments 1000 --workers 32
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.user_models import User
+from app.models.booking_models import Booking, Payment, BookingStatus, PaymentStatus, PaymentMethod
+from app.models.outbox_models import OutboxEvent
+from app.services.payment_service import PaymentService, InvalidTransition
+
+def seed(session_factory, count: int):
+    """Create one user, count pending bookings and their PROCESSING payments"""
+    run = uuid.uuid4().hex[:8]
+    db = session_factory()
+    try:
+        user_id = db.execute(insert(User).values(
+            email=f"bench_{run}@faredown.test",
+            password_hash="x",
+            first_name="Bench",
+            last_name="User"
+        ).returning(User.id)).scalar()
+
+        booking_ids = db.execute(
+            insert(Booking).returning(Booking.id, sort_by_parameter_order=True),
+            [
+                {
+                    "booking_reference": f"BN{run}{i:06d}",
+                    "user_id": user_id,
+                    "booking_type": "flight",
+                    "status": BookingStatus.PENDING,
+                    "base_amount": 1000.0,
+                    "total_amount": 1180.0,
+                    "lead_passenger_name": "Bench User",
+                    "lead_passenger_email": f"bench_{run}@faredown.test",
+                    "lead_passenger_phone": "0000000000"
+                }
+                for i in range(count)
+            ]
+        ).scalars().all()
+
+        payment_ids = [f"PAY_BN{run}{i:06d}" for i in range(count)]
+        db.execute(insert(Payment), [
+            {
+                "booking_id": booking_id,
+                "payment_id": payment_id,
+                "amount": 1180.0,
+                "payment_method": PaymentMethod.CREDIT_CARD,
+                "payment_gateway": "razorpay",
+                "status": PaymentStatus.PROCESSING
+            }
+            for booking_id, payment_id in zip(booking_ids, payment_ids)
+        ])
+        db.commit()
+        return user_id, run, payment_ids
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./payment_bench.db"))
+    parser.add_argument("--payments", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    connect_args = {"check_same_thread": False, "timeout": 30} if args.database_url.startswith("sqlite") else {}
+    engine = create_engine(args.database_url, pool_size=args.workers, max_overflow=0, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    user_id, run, payment_ids = seed(session_factory, args.payments)
+    service = PaymentService()
+    latencies = []
+    conflicts = 0
+
+    def confirm(payment_id: str):
+        db = session_factory()
+        started = time.perf_counter()
+        try:
+            service.confirm_payment(db, payment_id, user_id, {"source": "bench"})
+            return time.perf_counter() - started, False
+        except InvalidTransition:
+            return time.perf_counter() - started, True
+        finally:
+            db.close()
+
+    # Each payment is confirmed twice, interleaved, to race client and webhook
+    calls = [payment_id for payment_id in payment_ids for _ in range(2)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for elapsed, conflict in pool.map(confirm, calls):
+            latencies.append(elapsed * 1000)
+            conflicts += conflict
+    wall = time.perf_counter() - started
+
+    db = session_factory()
+    try:
+        confirmed = db.execute(
+            select(func.count()).select_from(Booking).where(
+                Booking.booking_reference.like(f"BN{run}%"),
+                Booking.status == BookingStatus.CONFIRMED
+            )
+        ).scalar()
+        events = db.execute(
+            select(func.count()).select_from(OutboxEvent).where(
+                OutboxEvent.aggregate_id.like(f"BN{run}%")
+            )
+        ).scalar()
+    finally:
+        db.close()
+
+    latencies.sort()
+    print(f"database:      {engine.dialect.name}")
+    print(f"confirmations: {len(calls)} ({args.payments} payments x 2) on {args.workers} workers")
+    print(f"wall time:     {wall:.2f}s ({len(calls) / wall:.0f}/s)")
+    print(f"latency ms:    p50 {statistics.median(latencies):.1f}  p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f}  max {latencies[-1]:.1f}")
+    print(f"conflicts:     {conflicts}")
+    print(f"confirmed:     {confirmed}/{args.payments}")
+    print(f"outbox events: {events}/{args.payments}")
+
+    if confirmed != args.payments or events != args.payments:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
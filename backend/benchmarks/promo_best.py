@@ -0,0 +1,164 @@
+"""
+Best-promo search benchmark for Faredown
+
+Seeds --codes live-ish promo codes (mixed booking types, routes, windows,
+limits), then times PromoEngine.best() over random carts and compares every
+answer with a brute-force scan of all codes.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=sqlite:////tmp/faredown_promos.db python benchmarks/promo_best.py --codes 50000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, insert, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.user_models import User
+from app.models.promo_models import PromoCode, PromoUsage
+from app.services.promo_engine import promo_engine, PromoError
+
+BOOKING_TYPES = ["flight", "hotel", "package"]
+AIRPORTS = ["DEL", "BOM", "BLR", "MAA", "CCU", "HYD", "GOI", "DXB", "SIN", "LHR"]
+
+def seed(db, codes: int, rng: random.Random):
+    run = uuid.uuid4().hex[:6].upper()
+    now = datetime.utcnow()
+    routes = [f"{a}-{b}" for a in AIRPORTS for b in AIRPORTS if a != b]
+    rows = []
+    for i in range(codes):
+        start = now + timedelta(hours=rng.uniform(-24 * 30, 24 * 5))
+        limit = rng.choice([None, None, 100, 1000])
+        rows.append({
+            "code": f"B{run}{i:06d}",
+            "name": f"Bench {i}",
+            "discount_type": rng.choice(["percentage", "fixed"]),
+            "discount_value": rng.choice([5, 10, 15, 20, 25]) if i % 2 else rng.choice([100, 250, 500, 1000]),
+            "max_discount_amount": rng.choice([None, 500.0, 1500.0]),
+            "usage_limit": limit,
+            "usage_limit_per_user": 1,
+            # A few codes are already used up
+            "current_usage": limit if limit and rng.random() < 0.05 else 0,
+            "valid_from": start,
+            "valid_until": start + timedelta(days=rng.uniform(1, 60)),
+            "min_booking_amount": rng.choice([None, 1000.0, 5000.0]),
+            "applicable_booking_types": rng.choice([None, None, ["flight"], ["hotel"], ["flight", "package"]]),
+            "applicable_routes": rng.sample(routes, 2) if rng.random() < 0.3 else None,
+            "is_active": True,
+        })
+    db.execute(insert(PromoCode), rows)
+
+    user_id = db.execute(insert(User).values(
+        email=f"promo_best_{run}@faredown.test", password_hash="x", first_name="Best", last_name="Promo"
+    ).returning(User.id)).scalar()
+    db.commit()
+    return user_id, routes
+
+def use_some(db, user_id: int, rng: random.Random, count: int):
+    """Record uses of popular codes by the bench user so per-user limits bite"""
+    promo_ids = db.execute(
+        select(PromoCode.id).where(PromoCode.discount_type == "fixed", PromoCode.discount_value == 1000)
+    ).scalars().all()
+    db.execute(insert(PromoUsage), [
+        {"user_id": user_id, "promo_code_id": promo_id, "discount_amount": 1000.0, "booking_amount": 10000.0}
+        for promo_id in rng.sample(promo_ids, min(count, len(promo_ids)))
+    ])
+    db.commit()
+
+def brute_force(db, carts, user_id: int, limit: int):
+    """Reference answers: check every code in the index one by one"""
+    current = dict(db.execute(select(PromoCode.id, PromoCode.current_usage)).all())
+    used = dict(db.execute(
+        select(PromoUsage.promo_code_id, func.count(PromoUsage.id))
+        .where(PromoUsage.user_id == user_id).group_by(PromoUsage.promo_code_id)
+    ).all())
+    now = datetime.utcnow()
+    answers = []
+    for booking_type, amount, route in carts:
+        found = []
+        for rule in promo_engine.index().by_code.values():
+            try:
+                rule.check(booking_type, amount, route, now)
+            except PromoError:
+                continue
+            if rule.usage_limit is not None and current[rule.id] >= rule.usage_limit:
+                continue
+            if used.get(rule.id, 0) >= rule.usage_limit_per_user:
+                continue
+            discount = rule.discount(amount)
+            if discount > 0:
+                found.append(discount)
+        answers.append(sorted(found, reverse=True)[:limit])
+    return answers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--codes", type=int, default=50000)
+    parser.add_argument("--carts", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="p50 latency budget")
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    rng = random.Random(11)
+    db = SessionLocal()
+    try:
+        user_id, routes = seed(db, args.codes, rng)
+        use_some(db, user_id, rng, 200)
+
+        started = time.perf_counter()
+        index = promo_engine.build()
+        print(f"index:    {len(index.by_code)} codes in {len(index.by_applicability)} buckets, "
+              f"built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        carts = [
+            (rng.choice(BOOKING_TYPES + ["activity"]), round(rng.uniform(500, 60000), 2),
+             rng.choice(routes + [None]))
+            for _ in range(args.carts)
+        ]
+        # First call per bucket builds its columns
+        for booking_type, amount, route in carts:
+            promo_engine.best(db, booking_type, amount, user_id, route, args.limit)
+
+        latencies, results = [], []
+        for booking_type, amount, route in carts:
+            started = time.perf_counter()
+            results.append(promo_engine.best(db, booking_type, amount, user_id, route, args.limit))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        expected = brute_force(db, carts, user_id, args.limit)
+    finally:
+        db.close()
+
+    mismatches = sum(
+        [promo["discount_amount"] for promo in result] != answer
+        for result, answer in zip(results, expected)
+    )
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    print(f"carts:    {args.carts}, top {args.limit}")
+    print(f"latency:  p50 {p50:.2f} ms  p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms  max {latencies[-1]:.2f} ms "
+          f"(budget p50 {args.budget_ms:g} ms)")
+    print(f"matches brute force: {args.carts - mismatches}/{args.carts}")
+
+    sys.exit(0 if mismatches == 0 and p50 <= args.budget_ms else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Promo redemption benchmark for Faredown
+
+Creates a promo code limited to --limit uses, then has --users users redeem
+it at the same time, with one extra user trying their single allowed use
+several times in parallel. Checks that the code was never oversubscribed
+and that the per-user limit held.
+
+Run against a scratch database, never a shared one:
+
+    DATABASE_URL=postgresql://localhost/faredown_bench python benchmarks/promo_redeem.py --users 2000 --limit 500 --workers 32
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.user_models import User
+from app.models.promo_models import PromoCode, PromoUsage
+from app.services.promo_engine import promo_engine, PromoLimitReached
+
+def seed(session_factory, users: int, limit: int):
+    """users users and one flight promo code limited to limit uses, one per user"""
+    run = uuid.uuid4().hex[:8]
+    db = session_factory()
+    try:
+        user_ids = db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {"email": f"promo_{run}_{i}@faredown.test", "password_hash": "x", "first_name": "Promo", "last_name": str(i)}
+            for i in range(users + 1)
+        ]).scalars().all()
+        code = f"BENCH{run}".upper()
+        db.add(PromoCode(
+            code=code,
+            name="Bench promo",
+            discount_type="percentage",
+            discount_value=10.0,
+            max_discount_amount=500.0,
+            usage_limit=limit,
+            usage_limit_per_user=1,
+            valid_from=datetime.utcnow() - timedelta(days=1),
+            valid_until=datetime.utcnow() + timedelta(days=1),
+            applicable_booking_types=["flight"]
+        ))
+        db.commit()
+        return code, user_ids
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=8, help="parallel attempts by the single repeat user")
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    command.upgrade(config, "head")
+
+    connect_args = {"check_same_thread": False, "timeout": 30} if settings.DATABASE_URL.startswith("sqlite") else {}
+    engine = create_engine(settings.DATABASE_URL, pool_size=args.workers, max_overflow=0, connect_args=connect_args)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    code, user_ids = seed(session_factory, args.users, args.limit)
+    promo_engine.build()
+    repeat_user = user_ids[-1]
+
+    def redeem(user_id: int):
+        db = session_factory()
+        started = time.perf_counter()
+        try:
+            promo_engine.redeem(db, code, user_id, "flight", 4000.0)
+            return time.perf_counter() - started, True
+        except PromoLimitReached:
+            return time.perf_counter() - started, False
+        finally:
+            db.close()
+
+    calls = list(user_ids[:-1])
+    # Interleave the repeat user's attempts with everyone else's
+    step = max(1, len(calls) // args.repeat)
+    for position in range(args.repeat):
+        calls.insert(position * step, repeat_user)
+
+    latencies = []
+    redeemed = {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for user_id, (elapsed, ok) in zip(calls, pool.map(redeem, calls)):
+            latencies.append(elapsed * 1000)
+            redeemed[user_id] = redeemed.get(user_id, 0) + ok
+    wall = time.perf_counter() - started
+
+    db = session_factory()
+    try:
+        promo = db.execute(select(PromoCode).where(PromoCode.code == code)).scalar_one()
+        usage_rows = db.execute(select(func.count(PromoUsage.id)).where(PromoUsage.promo_code_id == promo.id)).scalar()
+        repeat_rows = db.execute(
+            select(func.count(PromoUsage.id)).where(PromoUsage.promo_code_id == promo.id, PromoUsage.user_id == repeat_user)
+        ).scalar()
+        current_usage = promo.current_usage
+    finally:
+        db.close()
+
+    successes = sum(redeemed.values())
+    latencies.sort()
+    print(f"database:      {engine.dialect.name}")
+    print(f"redemptions:   {len(calls)} attempts by {len(redeemed)} users on {args.workers} workers, limit {args.limit}")
+    print(f"wall time:     {wall:.2f}s ({len(calls) / wall:.0f}/s)")
+    print(f"latency ms:    p50 {statistics.median(latencies):.1f}  p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f}  max {latencies[-1]:.1f}")
+    print(f"succeeded:     {successes}")
+    print(f"current_usage: {current_usage}")
+    print(f"usage rows:    {usage_rows}")
+    print(f"repeat user:   {repeat_rows} of {args.repeat} attempts recorded")
+
+    expected = min(args.limit, len(redeemed))
+    if not (successes == current_usage == usage_rows == expected) or repeat_rows > 1:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Query plan regression check for Faredown
+
+Builds a database with the Alembic migrations, seeds it, and EXPLAINs the
+hot router queries, failing if any of them stops using its index.
+
+    python benchmarks/query_plans.py                       # scratch SQLite file
+    python benchmarks/query_plans.py --database-url postgresql://localhost/faredown_plans
+
+The PostgreSQL run needs an empty scratch database; sequential scans are
+disabled there so the check doesn't depend on table size.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, func, insert, select
+
+from app.models.user_models import User, UserSession
+from app.models.booking_models import Booking, Payment, BookingStatus, PaymentStatus, PaymentMethod
+from app.models.bargain_models import BargainSession, BargainAttempt, BargainStatus, BargainAttemptType
+
+USERS = 200
+PER_USER = 20
+
+def query_patterns(now: datetime):
+    """(expected index, statement) for each query pattern the routers run"""
+    return [
+        ("ix_bargain_sessions_user_id_status", select(BargainSession.id).where(
+            BargainSession.user_id == 7,
+            BargainSession.status == BargainStatus.ACTIVE
+        )),
+        ("ix_bargain_sessions_active_expires_at", select(BargainSession.id).where(
+            BargainSession.status == BargainStatus.ACTIVE,
+            BargainSession.expires_at < now
+        )),
+        ("ix_bargain_attempts_session_id_offered_price", select(BargainAttempt.id).where(
+            BargainAttempt.session_id == 7,
+            BargainAttempt.offered_price == 850.0
+        )),
+        ("ix_bookings_user_id_created_at", select(Booking.id).where(
+            Booking.user_id == 7
+        ).order_by(Booking.created_at.desc()).limit(20)),
+        ("ix_bookings_status_created_at", select(func.count(Booking.id), func.sum(Booking.total_amount)).where(
+            Booking.created_at >= now - timedelta(days=30),
+            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED])
+        )),
+        ("ix_payments_status_completed_at", select(func.sum(Payment.amount)).where(
+            Payment.status == PaymentStatus.COMPLETED
+        )),
+        ("ix_user_sessions_user_id_active_last_activity", select(UserSession.id).where(
+            UserSession.user_id == 7,
+            UserSession.is_active == True
+        ).order_by(UserSession.last_activity.desc())),
+    ]
+
+def migrate(url: str):
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+def seed(engine, now: datetime):
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        user_ids = conn.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {"email": f"plan{i}@faredown.test", "password_hash": "x", "first_name": "Plan", "last_name": str(i)}
+            for i in range(USERS)
+        ]).scalars().all()
+
+        conn.execute(insert(UserSession), [
+            {
+                "user_id": user_id,
+                "session_token": f"tok_{user_id}_{j}",
+                "is_active": rng.random() < 0.2,
+                "last_activity": now - timedelta(minutes=rng.randint(0, 100000)),
+                "expires_at": now + timedelta(days=1)
+            }
+            for user_id in user_ids for j in range(PER_USER)
+        ])
+
+        booking_ids = conn.execute(insert(Booking).returning(Booking.id, sort_by_parameter_order=True), [
+            {
+                "booking_reference": f"PLAN{user_id:05d}{j:03d}",
+                "user_id": user_id,
+                "booking_type": rng.choice(["flight", "hotel"]),
+                "status": rng.choice(list(BookingStatus)),
+                "base_amount": 1000.0,
+                "total_amount": 1180.0,
+                "lead_passenger_name": "Plan",
+                "lead_passenger_email": "plan@faredown.test",
+                "lead_passenger_phone": "0",
+                "created_at": now - timedelta(days=rng.randint(0, 365))
+            }
+            for user_id in user_ids for j in range(PER_USER)
+        ]).scalars().all()
+
+        conn.execute(insert(Payment), [
+            {
+                "booking_id": booking_id,
+                "payment_id": f"PAY_PLAN{booking_id}",
+                "amount": 1180.0,
+                "payment_method": PaymentMethod.UPI,
+                "payment_gateway": "razorpay",
+                "status": rng.choice(list(PaymentStatus)),
+                "completed_at": now - timedelta(days=rng.randint(0, 365))
+            }
+            for booking_id in booking_ids
+        ])
+
+        session_ids = conn.execute(insert(BargainSession).returning(BargainSession.id, sort_by_parameter_order=True), [
+            {
+                "session_id": f"bs_{user_id}_{j}",
+                "user_id": user_id,
+                "booking_type": "flight",
+                "item_id": "X",
+                "item_data": {},
+                "net_rate": 800.0,
+                "markup_min": 5.0,
+                "markup_max": 25.0,
+                "base_price": 1000.0,
+                "final_price_range_min": 840.0,
+                "final_price_range_max": 1000.0,
+                # Sessions are mostly finished; only a few are still active
+                "status": BargainStatus.ACTIVE if rng.random() < 0.05 else rng.choice(list(BargainStatus)),
+                "expires_at": now + timedelta(minutes=rng.randint(-100000, 10))
+            }
+            for user_id in user_ids for j in range(PER_USER)
+        ]).scalars().all()
+
+        conn.execute(insert(BargainAttempt), [
+            {
+                "session_id": session_id,
+                "attempt_number": j + 1,
+                "attempt_type": BargainAttemptType.USER_OFFER,
+                "offered_price": 800.0 + 10 * j
+            }
+            for session_id in session_ids for j in range(3)
+        ])
+
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+
+def add_explain_prefix(conn, cursor, sql, parameters, context, executemany):
+    """Prefix statements run with the "explain" execution option"""
+    prefix = context.execution_options.get("explain") if context is not None else None
+    return (prefix + sql if prefix else sql), parameters
+
+def explain(engine, statement) -> str:
+    """Run EXPLAIN for a statement and return the plan as text"""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            result = conn.execute(statement, execution_options={"explain": "EXPLAIN QUERY PLAN "})
+            return "\n".join(str(row[-1]) for row in result.cursor.fetchall())
+
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        result = conn.execute(statement, execution_options={"explain": "EXPLAIN (FORMAT JSON) "})
+        return json.dumps(result.cursor.fetchone()[0], indent=1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_plans.db')}"
+    migrate(url)
+    engine = create_engine(url)
+    event.listen(engine, "before_cursor_execute", add_explain_prefix, retval=True)
+    now = datetime.utcnow()
+    seed(engine, now)
+
+    failures = 0
+    for index_name, statement in query_patterns(now):
+        plan = explain(engine, statement)
+        ok = index_name in plan
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {index_name}")
+        if args.verbose or not ok:
+            print("     " + plan.replace("\n", "\n     "))
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
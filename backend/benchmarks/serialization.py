@@ -0,0 +1,178 @@
+"""
+Response serialization benchmark for Faredown
+
+Times the per-response encoding cost of the hot endpoints the way FastAPI
+used to do it (pydantic response models, jsonable_encoder, json.dumps via
+JSONResponse) against returning the payload as an ORJSONResponse, and checks
+that both produce the same JSON. No database needed: the ORM objects are
+built in memory.
+
+    python benchmarks/serialization.py --items 40 --repeat 2000
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.core.serialization import ORJSONResponse
+from app.models.booking_models import Booking, BookingItem, Payment, BookingStatus, PaymentMethod, PaymentStatus
+from app.models.bargain_models import BargainSession, BargainAttempt, CounterOffer, BargainStatus, BargainAttemptType
+from app.routers.bookings import booking_details_payload
+from app.routers.bargain import BargainSessionResponse, session_payload, attempt_payload, counter_offer_payload
+
+# Response models /api/bargain/offer wrapped its counter offer in before
+class BargainAttemptResponse(BaseModel):
+    attempt_number: int
+    attempt_type: str
+    offered_price: float
+    is_accepted: bool
+    ai_reasoning: Optional[str]
+    timestamp: datetime
+
+class CounterOfferResponse(BaseModel):
+    counter_price: float
+    original_offer: float
+    discount_amount: float
+    discount_percentage: float
+    strategy_type: str
+    ai_message: Optional[str]
+    incentives: Optional[Dict[str, Any]]
+    valid_until: datetime
+    is_final_offer: bool
+    confidence_level: float
+    savings: Dict[str, float]
+
+def booking_fixture(items: int):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    booking = Booking(
+        booking_reference="FD00012345", booking_type="flight", status=BookingStatus.CONFIRMED,
+        total_amount=48250.5, base_amount=42000.0, tax_amount=2100.0, convenience_fee=350.0,
+        promo_discount=500.0, currency="INR", was_bargained=True, bargain_savings=1800.0,
+        original_price=50050.5, passenger_count=items, lead_passenger_name="Asha Rao",
+        lead_passenger_email="asha@example.com", lead_passenger_phone="+919800000000",
+        departure_date=now + timedelta(days=30), return_date=now + timedelta(days=37),
+        special_requests="Window seats, vegetarian meals ✈️", supplier_name="Amadeus",
+        supplier_confirmation="XK29QZ", created_at=now.replace(tzinfo=timezone.utc), confirmed_at=now
+    )
+    booking_items = [
+        BookingItem(
+            item_type="flight", item_name=f"DEL → DXB segment {i}", item_description="Economy, 25kg baggage",
+            unit_price=4200.0 + i, quantity=1, total_price=4200.0 + i, status="confirmed",
+            item_data={
+                "flight_number": f"AI{900 + i}", "departure": (now + timedelta(days=30, hours=i)).isoformat(),
+                "fare_basis": "YLOWIN", "baggage": {"cabin": 7, "checked": 25}, "seat": f"{10 + i}A"
+            }
+        )
+        for i in range(items)
+    ]
+    payments = [
+        Payment(
+            payment_id=f"pay_{i:08d}", amount=48250.5 / 2, currency="INR",
+            payment_method=PaymentMethod.UPI, status=PaymentStatus.COMPLETED, payment_gateway="razorpay",
+            initiated_at=now - timedelta(minutes=10 + i), completed_at=now - timedelta(minutes=i)
+        )
+        for i in range(2)
+    ]
+    return booking, booking_items, payments
+
+def bargain_fixture():
+    now = datetime.utcnow()
+    session = BargainSession(
+        session_id="2c7b7c2e-5a8f-4b8e-9a57-0c7f8f6b8c11", status=BargainStatus.ACTIVE, total_attempts=2,
+        max_attempts=5, user_best_offer=41000.0, ai_best_counter=43500.0, final_price_range_min=40000.0,
+        final_price_range_max=46000.0, expires_at=now + timedelta(minutes=8)
+    )
+    attempt = BargainAttempt(
+        attempt_number=2, attempt_type=BargainAttemptType.USER_OFFER, offered_price=41000.0,
+        is_accepted=False, ai_reasoning="Offer is below the floor for this route", created_at=now
+    )
+    counter = CounterOffer(
+        counter_price=43500.0, original_offer=41000.0, discount_amount=-2500.0, discount_percentage=-6.1,
+        strategy_type="moderate", ai_message="We can do ₹43,500 if you book in the next 5 minutes",
+        incentives={"free_seat": True, "meal": "veg"}, valid_until=now + timedelta(minutes=5),
+        is_final_offer=False, confidence_level=0.82
+    )
+    return session, attempt, counter
+
+def before_booking(booking, items, payments) -> bytes:
+    """Dict through jsonable_encoder and JSONResponse, as FastAPI does for an untyped route"""
+    return JSONResponse(jsonable_encoder(booking_details_payload(booking, items, payments))).body
+
+OFFER_FIELD = create_response_field(name="Response_make_bargain_offer", type_=Dict[str, Any])
+
+async def before_offer(session, attempt, counter) -> bytes:
+    """Pydantic models in a dict through the Dict[str, Any] response_model, as /offer did"""
+    content = {
+        "status": "counter_offer",
+        "message": "We have a counter offer for you!",
+        "attempt": BargainAttemptResponse(**attempt_payload(attempt)),
+        "counter_offer": CounterOfferResponse(**counter_offer_payload(counter)),
+        "session": BargainSessionResponse(**session_payload(session)),
+    }
+    return JSONResponse(await serialize_response(field=OFFER_FIELD, response_content=content)).body
+
+def after_booking(booking, items, payments) -> bytes:
+    return ORJSONResponse(booking_details_payload(booking, items, payments)).body
+
+def after_offer(session, attempt, counter) -> bytes:
+    return ORJSONResponse({
+        "status": "counter_offer",
+        "message": "We have a counter offer for you!",
+        "attempt": attempt_payload(attempt),
+        "counter_offer": counter_offer_payload(counter),
+        "session": session_payload(session),
+    }).body
+
+async def call(function, args) -> bytes:
+    result = function(*args)
+    return await result if inspect.isawaitable(result) else result
+
+async def timed(function, args, repeat: int) -> float:
+    """Mean microseconds per call"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await call(function, args)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+async def run(args) -> list:
+    failures = []
+    cases = [
+        ("GET /api/bookings/{reference}", before_booking, after_booking, booking_fixture(args.items)),
+        ("POST /api/bargain/offer", before_offer, after_offer, bargain_fixture()),
+    ]
+    print(f"{'endpoint':34} {'before us':>10} {'after us':>10} {'speedup':>8}  same JSON")
+    for name, before, after, fixture in cases:
+        same = json.loads(await call(before, fixture)) == json.loads(await call(after, fixture))
+        before_us = await timed(before, fixture, args.repeat)
+        after_us = await timed(after, fixture, args.repeat)
+        print(f"{name:34} {before_us:10.1f} {after_us:10.1f} {before_us / after_us:7.1f}x  {'yes' if same else 'NO'}")
+        if not same:
+            failures.append(name)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=40, help="booking items per booking")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = asyncio.run(run(args))
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
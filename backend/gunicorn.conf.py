@@ -0,0 +1,60 @@
+"""
+Gunicorn configuration for Faredown (production serving mode)
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is preloaded in the master, which then builds the reference data
+snapshot once and moves everything allocated so far into the GC's permanent
+generation (gc.freeze) before forking, so workers share those pages
+copy-on-write instead of dirtying them on their first collection.
+
+    kill -HUP <master pid>     # or POST /api/admin/reference-data/reload
+
+rebuilds the snapshot in the master and gracefully replaces the workers.
+Code changes still need a full restart: preloaded modules are not re-imported.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+def build_shared_state(server):
+    """Build the reference snapshot, fee lookup and CMS cache in the master and freeze the heap before forking"""
+    from app.database import engine
+    from app.services.content_cache import content_cache
+    from app.services.fee_engine import fee_engine
+    from app.services.reference_data import reference_data, MASTER_PID_ENV
+
+    os.environ[MASTER_PID_ENV] = str(os.getpid())
+
+    # Objects frozen for the previous generation become collectable again
+    gc.unfreeze()
+    snapshot = reference_data.rebuild()
+    fee_engine.compile()
+    content_cache.clear()
+    content_cache.warm()
+    # Workers must open their own connections, not inherit the master's
+    engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    server.log.info(
+        "Reference data snapshot %s (%s) shared with workers, %d objects frozen",
+        snapshot.version, snapshot.source, gc.get_freeze_count()
+    )
+
+def when_ready(server):
+    build_shared_state(server)
+
+def on_reload(server):
+    # Runs in the master on SIGHUP, before the replacement workers are spawned
+    build_shared_state(server)
@@ -3,17 +3,33 @@ Faredown Backend API - Main Application Entry Point
 AI-Powered Travel Booking Platform with Bargain Engine
 """
 
+# Imported first: starts the cold-start clock
+from app.core.startup import startup_timer, verify_schema
+
+from app.core.config import settings
+startup_timer.mark("config")
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import os
 from datetime import datetime
 
+from app.core.compression import CompressionMiddleware
+from app.core.serialization import ORJSONResponse
+
 # Import database components
-from app.database import engine, get_db
-from app.core.config import settings
+from app.database import engine, get_db, test_connection
+from app.services.http_clients import http_clients
+from app.services.outbox_dispatcher import outbox_dispatcher
+from app.services.ai_log_writer import ai_log_writer
+from app.services.reference_data import reference_data
+from app.services.fee_engine import fee_engine
+from app.services.content_cache import content_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.heavy_hitters import heavy_hitters
+from app.services.active_users import active_users
 
 # Import models first to register them with Base
 try:
@@ -24,123 +40,85 @@ except Exception as e:
     import traceback
     traceback.print_exc()
 
-from app.models.base import Base
-
-# Import routers with error handling
-routers_to_import = []
-
-try:
-    from app.routers import auth
-    routers_to_import.append(("auth", auth))
-    print("✅ Auth router imported")
-except Exception as e:
-    print(f"❌ Failed to import auth router: {e}")
-
-try:
-    from app.routers import admin
-    routers_to_import.append(("admin", admin))
-    print("✅ Admin router imported")
-except Exception as e:
-    print(f"❌ Failed to import admin router: {e}")
-
-try:
-    from app.routers import users
-    routers_to_import.append(("users", users))
-    print("✅ Users router imported")
-except Exception as e:
-    print(f"❌ Failed to import users router: {e}")
-
-try:
-    from app.routers import bookings
-    routers_to_import.append(("bookings", bookings))
-    print("✅ Bookings router imported")
-except Exception as e:
-    print(f"❌ Failed to import bookings router: {e}")
-
-try:
-    from app.routers import airlines
-    routers_to_import.append(("airlines", airlines))
-    print("✅ Airlines router imported")
-except Exception as e:
-    print(f"❌ Failed to import airlines router: {e}")
-
-try:
-    from app.routers import hotels
-    routers_to_import.append(("hotels", hotels))
-    print("✅ Hotels router imported")
-except Exception as e:
-    print(f"❌ Failed to import hotels router: {e}")
-
-try:
-    from app.routers import bargain
-    routers_to_import.append(("bargain", bargain))
-    print("✅ Bargain router imported")
-except Exception as e:
-    print(f"❌ Failed to import bargain router: {e}")
-
-try:
-    from app.routers import promo
-    routers_to_import.append(("promo", promo))
-    print("✅ Promo router imported")
-except Exception as e:
-    print(f"❌ Failed to import promo router: {e}")
-
-try:
-    from app.routers import currency
-    routers_to_import.append(("currency", currency))
-    print("✅ Currency router imported")
-except Exception as e:
-    print(f"❌ Failed to import currency router: {e}")
-
-try:
-    from app.routers import vat
-    routers_to_import.append(("vat", vat))
-    print("✅ VAT router imported")
-except Exception as e:
-    print(f"❌ Failed to import vat router: {e}")
-
-try:
-    from app.routers import cms
-    routers_to_import.append(("cms", cms))
-    print("✅ CMS router imported")
-except Exception as e:
-    print(f"❌ Failed to import cms router: {e}")
-
-try:
-    from app.routers import extranet
-    routers_to_import.append(("extranet", extranet))
-    print("✅ Extranet router imported")
-except Exception as e:
-    print(f"❌ Failed to import extranet router: {e}")
-
-try:
-    from app.routers import ai
-    routers_to_import.append(("ai", ai))
-    print("✅ AI router imported")
-except Exception as e:
-    print(f"❌ Failed to import ai router: {e}")
+# Declarative router table: (module in app.routers, prefix, tags).
+# Routers are imported as they are mounted; ENABLED_ROUTERS restricts a
+# deployment to a subset so the rest are never imported.
+ROUTERS = [
+    ("auth", "/api/auth", ["Authentication"]),
+    ("admin", "/api/admin", ["Admin Dashboard"]),
+    ("users", "/api/users", ["User Management"]),
+    ("bookings", "/api/bookings", ["Booking Management"]),
+    ("airlines", "/api/airlines", ["Airlines & Flights"]),
+    ("hotels", "/api/hotels", ["Hotels & Accommodation"]),
+    ("bargain", "/api/bargain", ["Bargain Engine"]),
+    ("promo", "/api/promo", ["Promo Codes"]),
+    ("currency", "/api/currency", ["Currency Management"]),
+    ("vat", "/api/vat", ["VAT & Fees"]),
+    ("cms", "/api/cms", ["Content Management"]),
+    ("extranet", "/api/extranet", ["Extranet System"]),
+    ("ai", "/api/ai", ["AI Engine"]),
+    ("reports", "/api/reports", ["Analytics & Reports"]),
+]
+
+def mount_routers(app: FastAPI, enabled: str = ""):
+    """Import and mount the routers in ROUTERS (all, or the comma-separated enabled list)"""
+    wanted = {name.strip() for name in enabled.split(",") if name.strip()}
+    for name, prefix, tags in ROUTERS:
+        if wanted and name not in wanted:
+            continue
+        try:
+            # __import__ rather than importlib so -X importtime attributes the time
+            router_module = __import__(f"app.routers.{name}", fromlist=["router"])
+            app.include_router(router_module.router, prefix=prefix, tags=tags)
+            print(f"✅ Mounted {name} router at {prefix}")
+        except Exception as e:
+            print(f"❌ Failed to mount {name} router: {e}")
 
-try:
-    from app.routers import reports
-    routers_to_import.append(("reports", reports))
-    print("✅ Reports router imported")
-except Exception as e:
-    print(f"❌ Failed to import reports router: {e}")
+startup_timer.mark("imports")
 
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created/verified")
-except Exception as e:
-    print(f"⚠️  Warning creating database tables (continuing...): {e}")
+# The schema is owned by Alembic migrations (alembic/versions); it is
+# verified in the lifespan rather than created here at import time
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
+    startup_timer.mark("server")
     print("🚀 Faredown Backend API Starting...")
     print(f"📅 Started at: {datetime.now()}")
     print(f"🌐 Environment: {settings.ENVIRONMENT}")
+    
+    # Connectivity and schema checks run once per worker, before serving
+    app.state.database = "connected" if test_connection() else "unavailable"
+    if app.state.database == "connected":
+        revisions = verify_schema(engine, auto_migrate=settings.AUTO_MIGRATE)
+        print(f"✅ Database schema at revision {', '.join(revisions['current'])}")
+    startup_timer.mark("database")
+    
+    # Under gunicorn the master already built this before forking
+    snapshot = reference_data.get()
+    print(f"📚 Reference data snapshot {snapshot.version} loaded from {snapshot.source}")
+    fees = fee_engine.compiled()
+    print(f"🧾 Fee engine compiled {len(fees.vat_percentage)} cells from {fees.source}")
+    
+    http_clients.configure_defaults()
+    app.state.http_clients = http_clients
+    outbox_dispatcher.start()
+    content_cache.start()
+    ai_log_writer.start()
+    heavy_hitters.start()
+    active_users.start()
+    
+    startup_timer.complete()
+    app.state.startup = startup_timer
+    print(f"⏱️  Startup completed in {startup_timer.summary()}")
     yield
+    await outbox_dispatcher.stop()
+    await content_cache.stop()
+    await ai_log_writer.stop()
+    await heavy_hitters.stop()
+    await active_users.stop()
+    await http_clients.aclose()
+    llm_gateway.close()
     print("👋 Faredown Backend API Shutting down...")
 
 # Initialize FastAPI app
@@ -150,6 +128,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -162,6 +141,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/zstd/gzip by Accept-Encoding; outermost, so it sees the final response
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -184,41 +166,18 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "database": "connected",
+        "database": getattr(app.state, "database", "unknown"),
         "timestamp": datetime.now().isoformat()
     }
 
-# Include all API routers that were successfully imported
-router_config = {
-    "auth": ("/api/auth", ["Authentication"]),
-    "admin": ("/api/admin", ["Admin Dashboard"]),
-    "users": ("/api/users", ["User Management"]),
-    "bookings": ("/api/bookings", ["Booking Management"]),
-    "airlines": ("/api/airlines", ["Airlines & Flights"]),
-    "hotels": ("/api/hotels", ["Hotels & Accommodation"]),
-    "bargain": ("/api/bargain", ["Bargain Engine"]),
-    "promo": ("/api/promo", ["Promo Codes"]),
-    "currency": ("/api/currency", ["Currency Management"]),
-    "vat": ("/api/vat", ["VAT & Fees"]),
-    "cms": ("/api/cms", ["Content Management"]),
-    "extranet": ("/api/extranet", ["Extranet System"]),
-    "ai": ("/api/ai", ["AI Engine"]),
-    "reports": ("/api/reports", ["Analytics & Reports"]),
-}
-
-for name, router_module in routers_to_import:
-    if name in router_config:
-        prefix, tags = router_config[name]
-        try:
-            app.include_router(router_module.router, prefix=prefix, tags=tags)
-            print(f"✅ Mounted {name} router at {prefix}")
-        except Exception as e:
-            print(f"❌ Failed to mount {name} router: {e}")
+mount_routers(app, settings.ENABLED_ROUTERS)
+
+startup_timer.mark("routers")
 
 # Global exception handler
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": True,